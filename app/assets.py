@@ -0,0 +1,85 @@
+"""
+Template asset maintenance (no Qt).
+
+    python -m app.assets adopt [WORKFLOW ...]   # move templates into the shared store
+    python -m app.assets gc [--dry-run]         # delete images no workflow refers to
+    python -m app.assets export WORKFLOW DEST   # self-contained copy of a workflow folder
+
+adopt rewrites each workflow's image steps to use the content-addressed store in
+workflows/.assets (identical templates end up as one file); without names it adopts
+every workflow. gc deletes store files and workflows/<name>/assets images that no
+flow.json refers to, keeps files younger than --grace-hours (templates captured in an
+editor that hasn't saved yet), and removes nothing if any flow.json is unreadable.
+Store references ("../.assets/...") break when a workflow folder is copied on its own;
+export writes a copy whose templates are back in its assets/ folder.
+Exit code: 0 on success, 2 if a workflow could not be read.
+"""
+import argparse
+import logging
+import os
+import sys
+
+from app.constants import ASSET_GC_GRACE_S
+from app.core.asset_store import adopt_workflow, collect_garbage, export_workflow, workflow_folders
+from app.utils.common import get_workflows_dir
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.assets", description="Manage workflow template images.")
+    parser.add_argument("--workflows-dir", help="Workflows directory (default: the app's workflows/)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    adopt = commands.add_parser("adopt", help="Move workflow templates into the shared content-addressed store")
+    adopt.add_argument("workflows", nargs="*", help="Workflow folder names (default: all)")
+    gc = commands.add_parser("gc", help="Delete template images that no workflow refers to")
+    gc.add_argument("--dry-run", action="store_true", help="Only list what would be deleted")
+    gc.add_argument("--grace-hours", type=float, default=ASSET_GC_GRACE_S / 3600,
+                    help="Keep unreferenced files modified more recently than this (default: %(default)g)")
+    export = commands.add_parser("export", help="Copy a workflow folder with its store templates included")
+    export.add_argument("workflow", help="Workflow folder name")
+    export.add_argument("dest", help="Destination folder (must not exist)")
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(stream=sys.stderr, level=logging.INFO, format='%(levelname)s - %(message)s')
+    workflows_dir = args.workflows_dir or get_workflows_dir()
+
+    if args.command == "adopt":
+        folders = args.workflows or [
+            f for f in workflow_folders(workflows_dir) if os.path.exists(os.path.join(workflows_dir, f, "flow.json"))
+        ]
+        for folder in folders:
+            try:
+                changed = adopt_workflow(folder, workflows_dir)
+            except (OSError, ValueError) as e:
+                sys.stderr.write(f"{folder}: {e}\n")
+                return 2
+            print(f"{folder}: {changed} step(s) now use the shared store")
+        print("Run 'python -m app.assets gc' to delete the images they no longer use.")
+        return 0
+
+    if args.command == "export":
+        try:
+            changed = export_workflow(args.workflow, args.dest, workflows_dir)
+        except (OSError, ValueError) as e:
+            sys.stderr.write(f"{args.workflow}: {e}\n")
+            return 2
+        print(f"{args.workflow}: exported to {args.dest} ({changed} step(s) use copied templates)")
+        return 0
+
+    try:
+        report = collect_garbage(workflows_dir, dry_run=args.dry_run, grace_s=args.grace_hours * 3600)
+    except ValueError as e:
+        sys.stderr.write(f"{e}\n")
+        return 2
+    verb = "Would remove" if args.dry_run else "Removed"
+    for path in report.removed:
+        print(f"{verb} {os.path.relpath(path, workflows_dir)}")
+    print(f"{verb} {len(report.removed)} file(s), {report.freed_bytes / 1024:.1f} KiB; "
+          f"{report.kept - report.recent} in use, {report.recent} unreferenced but recent")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
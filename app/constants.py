@@ -6,6 +6,66 @@ Centralized configuration values to improve maintainability.
 # Template cache configuration
 TEMPLATE_CACHE_SIZE = 100
 MAX_VISITED_MATCHES = 1000
+VISITED_MATCH_MAX_AGE_S = 60.0 # Visited sequential-click targets are forgotten after this long
+
+# Screen capture: frames younger than this are reused by back-to-back searches
+FRAME_CACHE_MAX_AGE_MS = 30
+FRAME_CACHE_MAX_ENTRIES = 8
+
+# Template matching: local maxima considered before non-maximum suppression
+MAX_PEAKS_PER_SEARCH = 1000
+
+# Coarse-to-fine (PYRAMID) image search
+PYRAMID_FACTOR = 4               # Coarse level is 1/4 of the full resolution
+PYRAMID_MIN_TEMPLATE_PX = 8      # Coarse template must keep at least this many px per side
+PYRAMID_MAX_CANDIDATES = 32      # Coarse peaks re-matched at full resolution
+PYRAMID_COARSE_SLACK = 0.25      # Coarse scores are lower than full-res ones; accept this much below confidence
+
+# Batched image search (find_images_batch, runner prefetch of a block's IMAGE conditions)
+BATCH_MATCH_WORKERS = 4            # Threads matching the queries of one batch
+BATCH_UNION_MAX_AREA_RATIO = 4.0   # Grab regions one by one if their bounding box is this much larger
+BATCH_POOL_MIN_AREA_PX = 1000000   # Batches searching fewer physical px in total match inline (pool hand-off costs more)
+PREFETCH_MAX_AGE_MS = 30           # Prefetched results older than this are searched again (like FRAME_CACHE_MAX_AGE_MS)
+
+# Color search (app.core.color_search)
+COLOR_SCAN_FIRST_BAND_PX = 128     # Rows scanned before the first early-exit check; the band doubles after that
+COLOR_MIN_SIDE_PX = 2              # Components narrower or shorter than this are noise
+COLOR_LUT_MIN_COLORS = 4           # Palettes this large use one lookup-table pass instead of an inRange per color
+
+# flow.json format (app.core.workflow_io)
+FLOW_FORMAT_VERSION = 2            # Compact format; files without it are migrated on load
+
+# Shared template store (app.core.asset_store)
+ASSET_STORE_DIRNAME = ".assets"    # In the workflows dir; files are named by content hash
+ASSET_HASH_CHARS = 32              # Hex chars of the sha256 kept in file names
+ASSET_GC_GRACE_S = 24 * 3600       # gc keeps unreferenced images younger than this (captured in an unsaved editor)
+
+# Workflow catalog (app.core.catalog, manager list)
+CATALOG_FILENAME = ".catalog.json" # Kept in the workflows dir
+CATALOG_VERSION = 2                # Catalogs written with another version are rebuilt
+CATALOG_WATCH_DEBOUNCE_MS = 200    # File system events are batched this long before the list updates
+
+# Runner waits and step scheduling (app.core.clock, app.core.scheduler)
+CLOCK_SPIN_MS = 2.0                # Waits sleep until this close to their deadline, then spin
+SCHEDULE_DRIFT_SAMPLES = 10000     # Recent step start drifts kept for percentiles
+
+# Change detection while waiting (AWAIT retries, empty-body loops)
+CHANGE_DETECT_CELL_PX = 8          # Region is compared as a thumbnail with one cell per 8x8 px
+CHANGE_DETECT_THRESHOLD = 6        # Levels a cell must move in any B/G/R channel to count as a change
+CHANGE_DETECT_POLL_MS = 50         # How often the thumbnail is re-captured
+CHANGE_DETECT_MIN_RECHECK_MS = 100 # Re-checks never run closer together than this
+
+# Debug image dumps (AUTOMACRO_DEBUG_ARTIFACTS=1)
+DEBUG_ARTIFACT_SAMPLE_EVERY = 10   # Keep one frame in N per artifact name
+DEBUG_ARTIFACT_QUEUE_SIZE = 8      # Frames waiting for the writer thread; extra frames are dropped
+DEBUG_ARTIFACT_MAX_FILES = 200     # Oldest files in debug/ are deleted beyond this
+
+# Runner log window (app.core.log_channel)
+LOG_CHANNEL_CAPACITY = 5000        # Records buffered between UI drains; the oldest are dropped beyond this
+LOG_DRAIN_INTERVAL_MS = 100        # How often the runner window pulls new records
+LOG_VIEW_MAX_LINES = 2000          # Lines kept in the runner window
+LOG_ROLLUP_WINDOW_S = 5.0          # Repeats of a message within this window are counted instead of shown
+LOG_FILE_MAX_FILES = 20            # Oldest run logs in logs/ are deleted beyond this
 
 # Default values for step conditions and actions
 DEFAULT_CONFIDENCE = 0.8
@@ -13,6 +73,7 @@ DEFAULT_DEDUPLICATE_RADIUS = 10
 DEFAULT_SCAN_INTERVAL_MS = 500
 DEFAULT_TIMEOUT_S = 10.0
 DEFAULT_STEP_INTERVAL_MS = 5
+DEFAULT_WATCH_AREA_MARGIN_PX = 0 # Extra logical px searched around a watch_area
 
 # Window size percentages
 WINDOW_SMALL_PCT = 0.3  # 30%
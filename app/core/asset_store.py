@@ -0,0 +1,208 @@
+"""
+Content-addressed template store shared by all workflows.
+
+Captured templates are saved once as <workflows dir>/.assets/<hash>.png, named by the
+hash of the file's bytes, so capturing the same thing twice (in one workflow or in
+several) stores one file. Steps refer to them with a path relative to their workflow
+folder ("../.assets/<hash>.png"), which every existing consumer (runner, template
+cache, editor previews, catalog) already resolves against the workflow dir. Since
+identical templates resolve to one absolute path, the compiled plan preloads and
+decodes each of them once.
+
+Older workflows keep their assets/<name>.png files; adopt_workflow() moves their
+references into the store. collect_garbage() deletes store files and assets/ images
+that no flow.json refers to. Because store references point outside the workflow
+folder, a copied folder is not self-contained; export_workflow() makes a copy with
+its templates back in assets/ (app.assets is the command line for all three).
+"""
+import hashlib
+import logging
+import os
+import shutil
+import time
+from typing import List, NamedTuple, Optional
+
+from app.constants import ASSET_STORE_DIRNAME, ASSET_HASH_CHARS, ASSET_GC_GRACE_S
+
+logger = logging.getLogger("app.core.asset_store")
+
+IMAGE_EXTS = (".png", ".jpg", ".jpeg", ".bmp")
+
+
+def _workflows_dir(workflows_dir: Optional[str]) -> str:
+    if workflows_dir:
+        return workflows_dir
+    from app.utils.common import get_workflows_dir
+    return get_workflows_dir()
+
+
+def store_dir(workflows_dir: Optional[str] = None) -> str:
+    return os.path.join(_workflows_dir(workflows_dir), ASSET_STORE_DIRNAME)
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:ASSET_HASH_CHARS]
+
+
+def is_stored(path: str, workflows_dir: Optional[str] = None) -> bool:
+    """True if path (absolute) is a file of the store."""
+    return os.path.dirname(os.path.abspath(path)) == os.path.abspath(store_dir(workflows_dir))
+
+
+def store_bytes(data: bytes, ext: str = ".png", workflows_dir: Optional[str] = None) -> str:
+    """Stores encoded image bytes (no-op if the same content is already there). Returns the absolute path."""
+    directory = store_dir(workflows_dir)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, content_hash(data) + ext.lower())
+    if not os.path.exists(path):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    else:
+        os.utime(path) # Restarts gc's grace period for a template that is being reused
+    return path
+
+
+def store_file(src: str, workflows_dir: Optional[str] = None) -> str:
+    with open(src, "rb") as f:
+        data = f.read()
+    ext = os.path.splitext(src)[1].lower()
+    return store_bytes(data, ext if ext in IMAGE_EXTS else ".png", workflows_dir)
+
+
+def reference(stored_path: str, workflow_dir: str) -> str:
+    """target_image_path for a stored file, relative to the workflow folder."""
+    return os.path.relpath(stored_path, workflow_dir).replace(os.sep, "/")
+
+
+def _image_steps(steps):
+    for step in steps:
+        if step.condition.target_image_path:
+            yield step
+        if step.children:
+            yield from _image_steps(step.children)
+
+
+def workflow_folders(workflows_dir: str) -> List[str]:
+    with os.scandir(workflows_dir) as it:
+        return sorted(item.name for item in it if item.is_dir() and not item.name.startswith("."))
+
+
+def adopt_workflow(folder: str, workflows_dir: Optional[str] = None) -> int:
+    """Moves a workflow's template references into the store. Returns how many steps changed."""
+    from app.core.workflow_io import load_workflow, save_workflow
+    workflows_dir = _workflows_dir(workflows_dir)
+    workflow_dir = os.path.join(workflows_dir, folder)
+    flow_path = os.path.join(workflow_dir, "flow.json")
+    workflow = load_workflow(flow_path, folder)
+    if workflow is None:
+        raise ValueError(f"Cannot read {flow_path}")
+
+    changed = 0
+    stored = {} # Source path -> reference (steps sharing a file hash it once)
+    for step in _image_steps(workflow.steps):
+        src = os.path.abspath(os.path.join(workflow_dir, step.condition.target_image_path))
+        if is_stored(src, workflows_dir) or not os.path.exists(src):
+            continue
+        if src not in stored:
+            stored[src] = reference(store_file(src, workflows_dir), workflow_dir)
+        step.condition.target_image_path = stored[src]
+        changed += 1
+    if changed:
+        save_workflow(flow_path, workflow)
+    return changed
+
+
+def export_workflow(folder: str, dest: str, workflows_dir: Optional[str] = None) -> int:
+    """
+    Copies a workflow folder to dest (which must not exist) with its store templates
+    copied into dest/assets, so the copy runs without the store. Returns how many
+    steps were rewritten.
+    """
+    from app.core.workflow_io import load_workflow, save_workflow
+    workflows_dir = _workflows_dir(workflows_dir)
+    workflow_dir = os.path.join(workflows_dir, folder)
+    workflow = load_workflow(os.path.join(workflow_dir, "flow.json"), folder, migrate=False)
+    if workflow is None:
+        raise ValueError(f"Cannot read {os.path.join(workflow_dir, 'flow.json')}")
+    shutil.copytree(workflow_dir, dest)
+
+    changed = 0
+    for step in _image_steps(workflow.steps):
+        src = os.path.abspath(os.path.join(workflow_dir, step.condition.target_image_path))
+        if not is_stored(src, workflows_dir) or not os.path.exists(src):
+            continue
+        name = os.path.basename(src) # Content hash: same name for the same template
+        os.makedirs(os.path.join(dest, "assets"), exist_ok=True)
+        if not os.path.exists(os.path.join(dest, "assets", name)):
+            shutil.copy2(src, os.path.join(dest, "assets", name))
+        step.condition.target_image_path = f"assets/{name}"
+        changed += 1
+    if changed:
+        save_workflow(os.path.join(dest, "flow.json"), workflow)
+    return changed
+
+
+class GcReport(NamedTuple):
+    removed: List[str] # Absolute paths (with dry_run: what would be removed)
+    kept: int          # Referenced image files, plus unreferenced ones within the grace period
+    freed_bytes: int
+    recent: int = 0    # Unreferenced but kept: newer than grace_s
+
+
+def collect_garbage(workflows_dir: Optional[str] = None, dry_run: bool = False,
+                    grace_s: float = ASSET_GC_GRACE_S) -> GcReport:
+    """
+    Deletes store files and <workflow>/assets images that no flow.json refers to.
+    Files modified within grace_s are kept: an open editor may use a template it
+    captured but hasn't saved yet. Nothing is deleted if any flow.json cannot be
+    read (its references are unknown).
+    """
+    from app.core.workflow_io import load_workflow
+    workflows_dir = _workflows_dir(workflows_dir)
+    referenced = set()
+    candidates = []
+    for folder in workflow_folders(workflows_dir):
+        workflow_dir = os.path.join(workflows_dir, folder)
+        flow_path = os.path.join(workflow_dir, "flow.json")
+        if not os.path.exists(flow_path):
+            continue # Not a workflow; leave its files alone
+        workflow = load_workflow(flow_path, folder, migrate=False)
+        if workflow is None:
+            raise ValueError(f"Cannot read {flow_path}; nothing was removed")
+        for step in _image_steps(workflow.steps):
+            referenced.add(os.path.normcase(os.path.abspath(os.path.join(workflow_dir, step.condition.target_image_path))))
+        candidates += _image_files(os.path.join(workflow_dir, "assets"))
+    candidates += _image_files(store_dir(workflows_dir))
+
+    removed = []
+    freed = 0
+    recent = 0
+    cutoff = time.time() - grace_s
+    for path in candidates:
+        if os.path.normcase(path) in referenced:
+            continue
+        try:
+            info = os.stat(path)
+            if info.st_mtime > cutoff:
+                recent += 1
+                continue
+            size = info.st_size
+            if not dry_run:
+                os.remove(path)
+        except OSError as e:
+            logger.warning(f"Could not remove {path}: {e}")
+            continue
+        removed.append(path)
+        freed += size
+    return GcReport(removed, len(candidates) - len(removed), freed, recent)
+
+
+def _image_files(directory: str) -> List[str]:
+    try:
+        with os.scandir(directory) as it:
+            return [os.path.abspath(item.path) for item in it
+                    if item.is_file() and item.name.lower().endswith(IMAGE_EXTS)]
+    except OSError:
+        return []
@@ -0,0 +1,353 @@
+"""
+Screen capture shared by the matchers in app.core.image_proc.
+
+Captures go through a pluggable backend that grabs only the physical-pixel rectangle
+that is asked for:
+  - "mss": native fast path (XShm on Linux, GDI on Windows, CoreGraphics on macOS)
+  - "pyautogui": fallback, full screenshot + crop (always available)
+Select with AUTOMACRO_CAPTURE_BACKEND=mss|pyautogui|auto or set_capture_backend().
+
+A capture is kept as BGR for a short time (FRAME_CACHE_MAX_AGE_MS), so steps that
+search back to back in the same tick reuse it instead of grabbing again. Regions are
+handed out as numpy views (no copy). Grayscale views (gray=True) are converted once
+per cached capture and shared the same way.
+"""
+import logging
+import os
+import platform
+import threading
+import time
+from typing import Optional, Tuple
+
+from app.constants import FRAME_CACHE_MAX_AGE_MS, FRAME_CACHE_MAX_ENTRIES
+from app.core.tracing import get_tracer
+
+logger = logging.getLogger("app.core.capture")
+
+
+def region_to_physical(
+    region: Tuple[int, int, int, int],
+    frame_w: int,
+    frame_h: int,
+    scale: float
+) -> Optional[Tuple[int, int, int, int]]:
+    """
+    Converts a logical [x, y, w, h] region to a physical rectangle clamped to the frame.
+    Returns None if the clamped rectangle is empty.
+    """
+    rx, ry, rw, rh = region
+    px = int(rx * scale)
+    py = int(ry * scale)
+    pw = int(rw * scale)
+    ph = int(rh * scale)
+
+    # Clamp to image bounds
+    px = max(0, min(px, frame_w))
+    py = max(0, min(py, frame_h))
+    pw = max(0, min(pw, frame_w - px))
+    ph = max(0, min(ph, frame_h - py))
+
+    if pw <= 0 or ph <= 0:
+        return None
+    return px, py, pw, ph
+
+
+def expand_region(
+    region: Optional[Tuple[int, int, int, int]],
+    margin: int
+) -> Optional[Tuple[int, int, int, int]]:
+    """
+    Pads a logical [x, y, w, h] region by margin on every side (clamped at the screen origin).
+    The far edges are clamped to the frame later by region_to_physical.
+    """
+    if not region:
+        return None
+    x, y, w, h = (int(v) for v in region)
+    if margin <= 0:
+        return x, y, w, h
+    nx = max(0, x - margin)
+    ny = max(0, y - margin)
+    return nx, ny, (x + w + margin) - nx, (y + h + margin) - ny
+
+
+class CaptureBackend:
+    """Grabs BGR pixels of a physical rectangle (x, y, w, h) or the full screen."""
+    name = "base"
+
+    def screen_size(self) -> Tuple[int, int]:
+        """Returns (width, height) of the primary screen in physical pixels."""
+        raise NotImplementedError
+
+    def grab(self, rect: Optional[Tuple[int, int, int, int]] = None):
+        raise NotImplementedError
+
+
+class PyAutoGUIBackend(CaptureBackend):
+    """
+    Fallback backend. pyautogui.screenshot(region=...) may capture at 1x on Retina,
+    so we capture the full (physical) screen and crop before the color conversion.
+    """
+    name = "pyautogui"
+
+    def __init__(self):
+        self._size = None
+
+    def screen_size(self) -> Tuple[int, int]:
+        if self._size is None:
+            import pyautogui
+            w, h = pyautogui.screenshot().size
+            self._size = (w, h)
+        return self._size
+
+    def grab(self, rect: Optional[Tuple[int, int, int, int]] = None):
+        import pyautogui
+        import cv2
+        import numpy as np
+
+        img = np.array(pyautogui.screenshot())
+        self._size = (img.shape[1], img.shape[0])
+        if rect:
+            px, py, pw, ph = rect
+            img = img[py:py+ph, px:px+pw]
+
+        # Handle RGBA (Mac)
+        if img.shape[2] == 4:
+            return cv2.cvtColor(img, cv2.COLOR_RGBA2BGR)
+        return cv2.cvtColor(img, cv2.COLOR_RGB2BGR)
+
+
+class MSSBackend(CaptureBackend):
+    """Native backend: only the requested rectangle is copied from the display."""
+    name = "mss"
+
+    def __init__(self):
+        import mss  # noqa: F401 - fail early if not installed
+        # mss handles are not thread-safe (X11), keep one per thread
+        self._local = threading.local()
+        self._size = None
+        # mss takes points on macOS, physical pixels elsewhere
+        self._coord_scale = None
+
+    def _sct(self):
+        sct = getattr(self._local, "sct", None)
+        if sct is None:
+            import mss
+            sct = mss.mss()
+            self._local.sct = sct
+        return sct
+
+    def _points_per_pixel(self) -> float:
+        if self._coord_scale is None:
+            if platform.system() == "Darwin":
+                from app.utils.screen_utils import get_screen_scale
+                self._coord_scale = 1.0 / (get_screen_scale() or 1.0)
+            else:
+                self._coord_scale = 1.0
+        return self._coord_scale
+
+    def screen_size(self) -> Tuple[int, int]:
+        if self._size is None:
+            mon = self._sct().monitors[1]
+            k = self._points_per_pixel()
+            self._size = (int(round(mon["width"] / k)), int(round(mon["height"] / k)))
+        return self._size
+
+    def grab(self, rect: Optional[Tuple[int, int, int, int]] = None):
+        import cv2
+        import numpy as np
+
+        sct = self._sct()
+        mon = sct.monitors[1]
+        if rect is None:
+            rect = (0, 0) + self.screen_size()
+        px, py, pw, ph = rect
+        k = self._points_per_pixel()
+        monitor = {
+            "left": mon["left"] + int(px * k),
+            "top": mon["top"] + int(py * k),
+            "width": max(1, int(round(pw * k))),
+            "height": max(1, int(round(ph * k))),
+        }
+        img = cv2.cvtColor(np.asarray(sct.grab(monitor)), cv2.COLOR_BGRA2BGR)
+        if img.shape[0] != ph or img.shape[1] != pw:
+            img = cv2.resize(img, (pw, ph), interpolation=cv2.INTER_AREA)
+        return img
+
+
+class StaticFrameBackend(CaptureBackend):
+    """Serves crops of a fixed BGR frame (benchmarks, tests, headless runs)."""
+    name = "static"
+
+    def __init__(self, frame):
+        self.frame = frame
+
+    def screen_size(self) -> Tuple[int, int]:
+        return self.frame.shape[1], self.frame.shape[0]
+
+    def grab(self, rect: Optional[Tuple[int, int, int, int]] = None):
+        if rect is None:
+            return self.frame
+        px, py, pw, ph = rect
+        return self.frame[py:py+ph, px:px+pw]
+
+
+_BACKENDS = {
+    "mss": MSSBackend,
+    "pyautogui": PyAutoGUIBackend,
+}
+
+
+def create_capture_backend(name: str = "auto") -> CaptureBackend:
+    """Creates a backend by name. "auto" prefers the native backend and falls back to pyautogui."""
+    name = (name or "auto").lower()
+    if name == "auto":
+        try:
+            backend = MSSBackend()
+            backend.screen_size() # Probe the display connection
+            return backend
+        except ImportError:
+            logger.info("mss not available. Using pyautogui capture backend.")
+        except Exception as e:
+            logger.warning(f"mss capture unavailable ({e}). Using pyautogui capture backend.")
+        return PyAutoGUIBackend()
+    if name not in _BACKENDS:
+        raise ValueError(f"Unknown capture backend: {name} (available: auto, {', '.join(_BACKENDS)})")
+    return _BACKENDS[name]()
+
+
+class FrameCache:
+    """
+    Keeps recent BGR captures for up to max_age_ms.
+    A request is served from any fresh capture that contains its rectangle
+    (e.g. a full frame serves every region), otherwise only that rectangle is grabbed.
+    """
+
+    def __init__(self, backend: Optional[CaptureBackend] = None, max_age_ms: float = FRAME_CACHE_MAX_AGE_MS):
+        self.max_age_ms = max_age_ms
+        self._backend = backend
+        self._lock = threading.Lock()
+        self._entries = [] # [[captured_at, (px, py, pw, ph), frame, gray or None]]
+
+    @property
+    def backend(self) -> CaptureBackend:
+        if self._backend is None:
+            self._backend = create_capture_backend(os.getenv("AUTOMACRO_CAPTURE_BACKEND", "auto"))
+            logger.info(f"Capture backend: {self._backend.name}")
+        return self._backend
+
+    def set_backend(self, backend: CaptureBackend):
+        with self._lock:
+            self._backend = backend
+            self._entries = []
+
+    def invalidate(self):
+        """Drops cached captures (e.g. after a click changed the screen)."""
+        with self._lock:
+            self._entries = []
+
+    @staticmethod
+    def _view(entry, rect, gray: bool):
+        _, (ex, ey, ew, eh), frame, gray_frame = entry
+        px, py, pw, ph = rect
+        rows, cols = slice(py - ey, py - ey + ph), slice(px - ex, px - ex + pw)
+        if not gray:
+            return frame[rows, cols]
+        if gray_frame is None:
+            import cv2
+            if pw * ph * 4 < ew * eh:
+                # Small part of a large capture: convert only what is asked for
+                return cv2.cvtColor(frame[rows, cols], cv2.COLOR_BGR2GRAY)
+            gray_frame = entry[3] = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        return gray_frame[rows, cols]
+
+    def _lookup(self, rect, now, gray: bool = False):
+        max_age_s = self.max_age_ms / 1000.0
+        self._entries = [e for e in self._entries if now - e[0] <= max_age_s]
+        px, py, pw, ph = rect
+        for entry in self._entries:
+            ex, ey, ew, eh = entry[1]
+            if ex <= px and ey <= py and px + pw <= ex + ew and py + ph <= ey + eh:
+                return self._view(entry, rect, gray)
+        return None
+
+    def _store(self, rect, frame, captured_at, first: bool = False):
+        entry = [captured_at, rect, frame, None]
+        if first:
+            # Looked up before older captures covering the same pixels
+            self._entries.insert(0, entry)
+        else:
+            self._entries.append(entry)
+        if len(self._entries) > FRAME_CACHE_MAX_ENTRIES:
+            self._entries.remove(min(self._entries, key=lambda e: e[0]))
+        return entry
+
+    def grab_physical(self, rect: Optional[Tuple[int, int, int, int]] = None, gray: bool = False, fresh: bool = False):
+        """
+        Returns BGR pixels (single-channel gray with gray=True) for a physical rectangle
+        (or the full screen), reusing fresh captures. fresh=True always grabs the rectangle
+        and serves later requests inside it from the new capture; other entries are kept.
+        """
+        with self._lock:
+            backend = self.backend
+            full = (0, 0) + tuple(backend.screen_size())
+            rect = tuple(rect) if rect else full
+            now = time.monotonic()
+            view = None if fresh else self._lookup(rect, now, gray)
+            if view is not None:
+                return view
+            with get_tracer().span("capture", "capture", backend=backend.name, rect=rect):
+                frame = backend.grab(None if rect == full else rect)
+            entry = self._store(rect, frame, time.monotonic(), first=fresh)
+            return self._view(entry, rect, gray) if gray else frame
+
+    def physical_rect(self, region: Optional[Tuple[int, int, int, int]]) -> Optional[Tuple[int, int, int, int]]:
+        """Logical region -> clamped physical rectangle (full screen if region is None)."""
+        w, h = self.backend.screen_size()
+        if not region:
+            return 0, 0, w, h
+        from app.utils.screen_utils import get_screen_scale
+        return region_to_physical(region, w, h, get_screen_scale())
+
+    def get_frame(self):
+        """Returns the full BGR frame."""
+        return self.grab_physical(None)
+
+    def get_region(
+        self,
+        region: Optional[Tuple[int, int, int, int]] = None,
+        gray: bool = False,
+        fresh: bool = False
+    ) -> Tuple[Optional[object], Tuple[int, int]]:
+        """
+        Returns (view, (offset_x, offset_y)) for a logical region, or the full frame if region is None.
+        The view may share memory with a cached capture; callers must not modify it.
+        view is None if the region falls outside the screen. gray=True returns a single-channel view.
+        fresh=True bypasses the cached captures (see grab_physical).
+        """
+        rect = self.physical_rect(region)
+        if rect is None:
+            return None, (0, 0)
+        return self.grab_physical(rect, gray, fresh), (rect[0], rect[1])
+
+
+# Shared by every matcher in image_proc
+frame_cache = FrameCache()
+
+
+def set_capture_backend(backend):
+    """Selects the capture backend by name ("mss", "pyautogui", "auto") or instance."""
+    if isinstance(backend, str):
+        backend = create_capture_backend(backend)
+    frame_cache.set_backend(backend)
+
+
+def get_capture_backend() -> CaptureBackend:
+    return frame_cache.backend
+
+
+def set_frame_cache_max_age(max_age_ms: float):
+    frame_cache.max_age_ms = max_age_ms
+
+
+def invalidate_frame_cache():
+    frame_cache.invalidate()
@@ -0,0 +1,191 @@
+"""
+Workflow catalog: what the manager lists, without parsing every flow.json.
+
+The catalog is one JSON file in the workflows dir (CATALOG_FILENAME) with an entry
+per workflow folder: display name, step count, template count, a thumbnail and the
+stats of the last run. Entries are keyed by folder and remember the mtime/size of
+flow.json and the mtime of assets/; refresh() only stats the folders and re-parses
+the flow.json files whose stamps changed. The whole catalog is read in one go and
+written back (atomically) only when something changed.
+
+Qt-free: the manager drives it from a QFileSystemWatcher (update_folder() for the
+folders that changed, refresh() when folders were added or removed).
+"""
+import json
+import logging
+import os
+import time
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+from app.constants import CATALOG_FILENAME, CATALOG_VERSION
+
+logger = logging.getLogger("app.core.catalog")
+
+class LastRun(BaseModel):
+    finished_at: float # Epoch seconds
+    succeeded: bool
+    duration_s: float
+
+
+class CatalogEntry(BaseModel):
+    folder: str
+    name: str
+    step_count: int = 0 # Including nested steps
+    asset_count: int = 0 # Distinct template images the steps use
+    thumbnail: Optional[str] = None # Path relative to the folder (first image condition's target)
+    last_run: Optional[LastRun] = None
+    flow_mtime_ns: int = 0
+    flow_size: int = 0
+    assets_mtime_ns: int = 0
+
+
+class CatalogIndex(BaseModel):
+    version: int = CATALOG_VERSION
+    entries: Dict[str, CatalogEntry] = Field(default_factory=dict)
+
+
+def _count_steps(steps) -> int:
+    return sum(1 + _count_steps(step.get("children") or []) for step in steps)
+
+
+def _image_paths(steps):
+    """Template paths of the (nested) steps, in step order."""
+    for step in steps:
+        path = (step.get("condition") or {}).get("target_image_path")
+        if path:
+            yield path
+        yield from _image_paths(step.get("children") or [])
+
+
+def _mtime_ns(path: str) -> int:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return 0
+
+
+class WorkflowCatalog:
+    def __init__(self, workflows_dir: str, index_path: Optional[str] = None):
+        self.workflows_dir = workflows_dir
+        self.index_path = index_path or os.path.join(workflows_dir, CATALOG_FILENAME)
+        self.entries: Dict[str, CatalogEntry] = {}
+        self.parsed = 0 # flow.json files parsed by this instance (cache misses)
+        self._dirty = False
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                index = CatalogIndex(**json.load(f))
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logger.warning(f"Workflow catalog unreadable, rebuilding: {e}")
+            return
+        if index.version != CATALOG_VERSION:
+            return
+        self.entries = index.entries
+
+    def save(self):
+        """Writes the catalog if anything changed since it was loaded or saved."""
+        if not self._dirty:
+            return
+        tmp_path = f"{self.index_path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(CatalogIndex(entries=self.entries).json())
+            os.replace(tmp_path, self.index_path)
+            self._dirty = False
+        except OSError as e:
+            logger.warning(f"Could not save workflow catalog: {e}")
+
+    def list(self) -> List[CatalogEntry]:
+        return [self.entries[folder] for folder in sorted(self.entries)]
+
+    def get(self, folder: str) -> Optional[CatalogEntry]:
+        return self.entries.get(folder)
+
+    def refresh(self) -> List[CatalogEntry]:
+        """Brings every entry up to date with the workflows dir and returns them sorted by folder."""
+        os.makedirs(self.workflows_dir, exist_ok=True)
+        seen = set()
+        with os.scandir(self.workflows_dir) as it:
+            for item in it:
+                if item.is_dir() and not item.name.startswith("."):
+                    seen.add(item.name)
+                    self._update(item.name)
+        for folder in set(self.entries) - seen:
+            del self.entries[folder]
+            self._dirty = True
+        self.save()
+        return self.list()
+
+    def update_folder(self, folder: str) -> Optional[CatalogEntry]:
+        """Re-checks one folder (drops it if it is gone)."""
+        if os.path.isdir(os.path.join(self.workflows_dir, folder)):
+            entry = self._update(folder)
+        else:
+            entry = None
+            if self.entries.pop(folder, None) is not None:
+                self._dirty = True
+        self.save()
+        return entry
+
+    def record_run(self, folder: str, succeeded: bool, duration_s: float, finished_at: Optional[float] = None):
+        entry = self.entries.get(folder) or self.update_folder(folder)
+        if entry is None:
+            return
+        entry.last_run = LastRun(
+            finished_at=finished_at if finished_at is not None else time.time(),
+            succeeded=succeeded,
+            duration_s=round(duration_s, 3),
+        )
+        self._dirty = True
+        self.save()
+
+    def _update(self, folder: str) -> CatalogEntry:
+        path = os.path.join(self.workflows_dir, folder)
+        flow_path = os.path.join(path, "flow.json")
+        assets_dir = os.path.join(path, "assets")
+        try:
+            st = os.stat(flow_path)
+            flow_mtime_ns, flow_size = st.st_mtime_ns, st.st_size
+        except OSError:
+            flow_mtime_ns, flow_size = 0, 0
+        assets_mtime_ns = _mtime_ns(assets_dir)
+
+        entry = self.entries.get(folder)
+        if (entry is not None and entry.flow_mtime_ns == flow_mtime_ns and entry.flow_size == flow_size
+                and entry.assets_mtime_ns == assets_mtime_ns):
+            return entry
+
+        new_entry = CatalogEntry(
+            folder=folder,
+            name=folder,
+            flow_mtime_ns=flow_mtime_ns,
+            flow_size=flow_size,
+            assets_mtime_ns=assets_mtime_ns,
+            last_run=entry.last_run if entry is not None else None,
+        )
+        if flow_size:
+            self.parsed += 1
+            try:
+                with open(flow_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                steps = data.get("steps") or []
+                new_entry.name = data.get("name") or folder
+                new_entry.step_count = _count_steps(steps)
+                # Templates may live in assets/ or in the shared store; count each file once
+                images = {}
+                for image in _image_paths(steps):
+                    images.setdefault(os.path.normcase(os.path.abspath(os.path.join(path, image))), image)
+                existing = [image for abs_path, image in images.items() if os.path.exists(abs_path)]
+                new_entry.asset_count = len(existing)
+                new_entry.thumbnail = existing[0] if existing else None
+            except Exception as e:
+                logger.warning(f"Could not read {flow_path}: {e}")
+        self.entries[folder] = new_entry
+        self._dirty = True
+        return new_entry
@@ -0,0 +1,114 @@
+"""
+Cheap screen-change detection for the runner's wait loops.
+
+A region is reduced to a small BGR thumbnail (one cell per CHANGE_DETECT_CELL_PX
+square, area-averaged). Two thumbnails differ when any channel of any cell moved by
+more than CHANGE_DETECT_THRESHOLD levels, so the expensive template / color match only
+has to run again after the pixels it would look at actually changed. Color is kept
+because a hue change can leave the luminance as it was (gray 76 -> pure red).
+Averaging still hides small changes, so callers cap every wait at their retry
+interval and re-check anyway.
+"""
+import logging
+import threading
+from typing import Optional, Tuple
+
+from app.constants import CHANGE_DETECT_CELL_PX, CHANGE_DETECT_THRESHOLD, CHANGE_DETECT_POLL_MS
+from app.core.capture import frame_cache
+from app.core.clock import system_clock
+
+logger = logging.getLogger("app.core.change_detect")
+
+
+def region_signature(image, cell_px: int = CHANGE_DETECT_CELL_PX):
+    """Downsampled thumbnail of an image, channels kept (int16, ready for diffing)."""
+    import cv2
+    import numpy as np
+
+    h, w = image.shape[:2]
+    small = cv2.resize(
+        image,
+        (max(1, w // cell_px), max(1, h // cell_px)),
+        interpolation=cv2.INTER_AREA
+    )
+    return small.astype(np.int16)
+
+
+def signatures_differ(a, b, threshold: int = CHANGE_DETECT_THRESHOLD) -> bool:
+    if a is None or b is None:
+        return (a is None) != (b is None)
+    if a.shape != b.shape:
+        return True
+    import numpy as np
+    return int(np.abs(a - b).max()) > threshold
+
+
+class ChangeWatcher:
+    """Watches a logical region (None = full screen) for pixel changes."""
+
+    def __init__(
+        self,
+        region: Optional[Tuple[int, int, int, int]] = None,
+        threshold: int = CHANGE_DETECT_THRESHOLD,
+        cell_px: int = CHANGE_DETECT_CELL_PX,
+        poll_ms: float = CHANGE_DETECT_POLL_MS,
+        cache=frame_cache,
+        clock=system_clock
+    ):
+        self.region = region
+        self.threshold = threshold
+        self.cell_px = cell_px
+        self.poll_s = poll_ms / 1000.0
+        self._cache = cache
+        self._clock = clock
+        self._baseline = None
+
+    def _signature(self):
+        # Always a new capture of the region; the following match reuses it from the frame
+        # cache, and other cached captures (prefetch, batches) stay
+        view, _ = self._cache.get_region(self.region, fresh=True)
+        if view is None:
+            return None
+        return region_signature(view, self.cell_px)
+
+    def reset(self):
+        """Takes the baseline. Call right before the check it should be compared against."""
+        self._baseline = self._signature()
+
+    def changed(self) -> bool:
+        """Grabs the region and compares it with the baseline (which moves to the new capture on change)."""
+        current = self._signature()
+        if signatures_differ(self._baseline, current, self.threshold):
+            self._baseline = current
+            return True
+        return False
+
+    def wait(self, timeout_s: float, stop_event: threading.Event, min_wait_s: float = 0.0) -> bool:
+        """
+        Blocks until the region changes (but at least min_wait_s), timeout_s passes,
+        or stop_event is set. Returns True only if a change was seen and we were not stopped.
+        """
+        clock = self._clock
+        start = clock.monotonic()
+        deadline = start + max(0.0, timeout_s)
+        earliest = start + min(max(0.0, min_wait_s), max(0.0, timeout_s))
+        changed = False
+        while True:
+            now = clock.monotonic()
+            if changed and now >= earliest:
+                return True
+            if now >= deadline:
+                return changed
+            if changed:
+                step = earliest - now
+            else:
+                step = min(self.poll_s, deadline - now)
+            if clock.wait(stop_event, step):
+                return False
+            if not changed:
+                try:
+                    changed = self.changed()
+                except Exception as e:
+                    # Capture failed: behave like a plain sleep and let the caller re-check
+                    logger.warning(f"Change detection failed ({e}). Re-checking without it.")
+                    changed = True
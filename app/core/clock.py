@@ -0,0 +1,70 @@
+"""
+Time source for the runner's waits.
+
+SystemClock sleeps for real (on a threading.Event, so stop() wakes it immediately).
+wait_until() sleeps on the event until shortly before the deadline and spins the rest,
+so short waits end on time instead of one OS timer tick late.
+VirtualClock never blocks: a wait just moves its time forward, so a workflow full of
+"Wait 3s" steps and AWAIT timeouts runs as fast as its matches allow, while elapsed
+times, timeouts and timed scene changes (app.core.virtual) stay consistent.
+"""
+import threading
+import time
+
+from app.constants import CLOCK_SPIN_MS
+
+
+class SystemClock:
+    virtual = False
+
+    def __init__(self, spin_ms: float = CLOCK_SPIN_MS):
+        self.spin_s = spin_ms / 1000.0
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    def wait(self, event: threading.Event, timeout_s: float) -> bool:
+        """Blocks until event is set or timeout_s passes. Returns True if the event was set."""
+        return event.wait(timeout_s)
+
+    def wait_until(self, event: threading.Event, deadline: float) -> bool:
+        """Blocks until event is set or monotonic() reaches deadline. Returns True if the event was set."""
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return event.is_set()
+            if remaining > self.spin_s:
+                if event.wait(remaining - self.spin_s):
+                    return True
+            elif event.is_set():
+                return True
+            else:
+                time.sleep(0) # Yield while spinning
+
+
+class VirtualClock:
+    virtual = True
+
+    def __init__(self, start_s: float = 0.0):
+        self._now = start_s
+        self._lock = threading.Lock()
+
+    def monotonic(self) -> float:
+        return self._now
+
+    def advance(self, seconds: float):
+        if seconds > 0:
+            with self._lock:
+                self._now += seconds
+
+    def wait(self, event: threading.Event, timeout_s: float) -> bool:
+        if event.is_set():
+            return True
+        self.advance(timeout_s)
+        return event.is_set()
+
+    def wait_until(self, event: threading.Event, deadline: float) -> bool:
+        return self.wait(event, deadline - self._now)
+
+
+system_clock = SystemClock()
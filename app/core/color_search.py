@@ -0,0 +1,199 @@
+"""
+Color search: boxes of connected pixels that match one of several target colors.
+
+  - A palette of (color, tolerance) pairs is turned into one mask. Larger palettes take
+    a single pass over the frame: each channel goes through a 256-entry lookup table
+    whose bits say which palette colors accept that value, and a pixel matches when
+    some bit is set in all three channels (8 colors per pass). cv2.LUT on a BGR frame
+    costs about three cv2.inRange calls, so smaller palettes OR one inRange per color.
+  - Components come from cv2.connectedComponentsWithStats (8-connectivity) and are
+    filtered on the stats array, matching the old findContours(RETR_EXTERNAL) search:
+    bounding box at least COLOR_MIN_SIDE_PX on both sides, and components lying in a
+    hole of another component (a dot inside a ring) are not reported. min_area (pixel
+    count) is an extra filter on top; the default of 1 keeps every component.
+    Labeling writes a full int32 label image, so it only runs on runs of non-empty
+    mask rows, cropped to their columns: no component crosses an empty row, and the
+    runs come out in reading order.
+  - With a limit (match_index + 1), the mask is built from the top in growing bands
+    and the search stops at the run that completes the first `limit` components;
+    the rest of the frame is never looked at.
+
+Everything here works in the pixels of the image it is given; find_color_on_screen
+(app.core.image_proc) grabs physical pixels through the frame cache and adds the
+region offset.
+"""
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+from app.constants import COLOR_SCAN_FIRST_BAND_PX, COLOR_MIN_SIDE_PX, COLOR_LUT_MIN_COLORS
+
+_LUT_BITS = 8 # Palette colors per lookup pass (bits of a uint8)
+
+
+class ColorTarget(NamedTuple):
+    b: int
+    g: int
+    r: int
+    tolerance: int
+
+
+def parse_hex_color(value: str, tolerance: int = 0) -> ColorTarget:
+    """'#RRGGBB' (or 'RRGGBB') -> ColorTarget in BGR order."""
+    value = value.strip().lstrip('#')
+    if len(value) != 6:
+        raise ValueError(f"Invalid color: {value!r}")
+    r, g, b = int(value[0:2], 16), int(value[2:4], 16), int(value[4:6], 16)
+    return ColorTarget(b, g, r, max(0, int(tolerance)))
+
+
+def _palette_luts(targets: Sequence[ColorTarget]):
+    """One 256x1x3 table per group of 8 targets: bit i of lut[v, 0, c] = channel c value v is accepted by target i."""
+    import numpy as np
+    values = np.arange(256, dtype=np.int16)
+    luts = []
+    for start in range(0, len(targets), _LUT_BITS):
+        lut = np.zeros((256, 1, 3), np.uint8)
+        for bit, target in enumerate(targets[start:start + _LUT_BITS]):
+            for channel, center in enumerate((target.b, target.g, target.r)):
+                accepted = np.abs(values - center) <= target.tolerance
+                lut[accepted, 0, channel] |= np.uint8(1 << bit)
+        luts.append(lut)
+    return luts
+
+
+class PaletteMask:
+    """Builds the match mask of a palette for any row range of a BGR image."""
+
+    def __init__(self, targets: Sequence[ColorTarget]):
+        import numpy as np
+        if not targets:
+            raise ValueError("Empty color palette")
+        self.targets = list(targets)
+        self._ranges = []
+        self._luts = None
+        if len(self.targets) >= COLOR_LUT_MIN_COLORS:
+            self._luts = _palette_luts(self.targets)
+        else:
+            for t in self.targets:
+                lower = np.array([max(0, t.b - t.tolerance), max(0, t.g - t.tolerance), max(0, t.r - t.tolerance)])
+                upper = np.array([min(255, t.b + t.tolerance), min(255, t.g + t.tolerance), min(255, t.r + t.tolerance)])
+                self._ranges.append((lower, upper))
+
+    def build(self, img, out=None):
+        """Mask of img (255 = some palette color matches), written into out if given."""
+        import cv2
+        if self._luts is None:
+            (lower, upper), rest = self._ranges[0], self._ranges[1:]
+            mask = cv2.inRange(img, lower, upper, dst=out)
+            for lower, upper in rest:
+                mask = cv2.bitwise_or(mask, cv2.inRange(img, lower, upper), dst=mask)
+            return mask
+        mask = None
+        for lut in self._luts:
+            bits = cv2.LUT(img, lut)
+            b, g, r = cv2.split(bits)
+            hit = cv2.bitwise_and(cv2.bitwise_and(b, g), r)
+            mask = hit if mask is None else cv2.bitwise_or(mask, hit)
+        # Any bit left -> 255
+        return cv2.threshold(mask, 0, 255, cv2.THRESH_BINARY, dst=out)[1]
+
+
+def _size_filter(stats, min_area: int):
+    """Which rows of stats (x, y, w, h, area) are large enough."""
+    import cv2
+    return ((stats[:, cv2.CC_STAT_AREA] >= min_area)
+            & (stats[:, cv2.CC_STAT_WIDTH] >= COLOR_MIN_SIDE_PX)
+            & (stats[:, cv2.CC_STAT_HEIGHT] >= COLOR_MIN_SIDE_PX))
+
+
+def _enclosed(crop, labels, count: int):
+    """
+    Which of the labels 1..count-1 lie in a hole of another component (what RETR_EXTERNAL
+    never returned). Holes are background not 4-connected to the outside; a component is
+    outside them iff it touches the outside background.
+    """
+    import cv2
+    import numpy as np
+    padded = cv2.copyMakeBorder(crop, 1, 1, 1, 1, cv2.BORDER_CONSTANT, value=0)
+    background = padded.size - cv2.countNonZero(padded)
+    reached = cv2.floodFill(padded, None, (0, 0), 128, flags=4)[0]
+    if reached == background:
+        return np.zeros(count - 1, bool) # No holes (the usual case)
+    outside = cv2.dilate((padded == 128).view(np.uint8), cv2.getStructuringElement(cv2.MORPH_CROSS, (3, 3)))[1:-1, 1:-1]
+    touching = np.unique(labels[(outside > 0) & (labels > 0)])
+    enclosed = np.ones(count - 1, bool)
+    enclosed[touching - 1] = False
+    return enclosed
+
+
+def _label_run(mask, top: int, bottom: int, min_area: int):
+    """Filtered component stats of mask rows [top, bottom), in reading order and frame coordinates."""
+    import cv2
+    import numpy as np
+    rows = mask[top:bottom]
+    cols = np.flatnonzero(rows.max(axis=0))
+    left, right = int(cols[0]), int(cols[-1]) + 1
+    crop = rows[:, left:right]
+    count, labels, stats, _ = cv2.connectedComponentsWithStats(crop, connectivity=8)
+    keep = _size_filter(stats[1:], min_area)
+    if count > 2 and keep.any():
+        keep &= ~_enclosed(crop, labels, count)
+    stats = stats[1:][keep]
+    stats[:, cv2.CC_STAT_LEFT] += left
+    stats[:, cv2.CC_STAT_TOP] += top
+    return stats[np.lexsort((stats[:, cv2.CC_STAT_LEFT], stats[:, cv2.CC_STAT_TOP]))]
+
+
+def find_color_components(
+    img,
+    targets: Sequence[ColorTarget],
+    min_area: int = 1,
+    limit: Optional[int] = None,
+    first_band_px: int = COLOR_SCAN_FIRST_BAND_PX,
+):
+    """
+    Boxes (x, y, w, h) of the connected components of img that match the palette,
+    in reading order (top first, then left). With a limit only the first `limit`
+    boxes are returned, and the scan stops as soon as they are known.
+    Returns (boxes, mask); mask covers only the rows that were scanned.
+    """
+    import numpy as np
+    palette = PaletteMask(targets)
+    height = img.shape[0]
+    mask = np.empty(img.shape[:2], np.uint8)
+    filled = np.zeros(height, bool) # Rows with at least one matching pixel
+    found = []
+    count = 0
+    built = 0 # Rows of mask built so far
+    scan_from = 0 # First row not covered by a labeled run (the row above it is empty)
+    end = height if not limit or limit <= 0 else min(height, first_band_px)
+    while True:
+        palette.build(img[built:end], out=mask[built:end])
+        filled[built:end] = mask[built:end].max(axis=1) > 0
+        built = end
+
+        # Runs of non-empty rows: no component crosses an empty row, so the runs are
+        # independent and come in reading order
+        edges = np.diff(np.concatenate(([False], filled[scan_from:built], [False])).astype(np.int8))
+        starts = np.flatnonzero(edges == 1) + scan_from
+        stops = np.flatnonzero(edges == -1) + scan_from
+        for top, bottom in zip(starts, stops):
+            if bottom == built < height:
+                break # Touches the last built row; may continue in the next band
+            stats = _label_run(mask, int(top), int(bottom), min_area)
+            scan_from = int(bottom)
+            if len(stats):
+                found.append(stats)
+                count += len(stats)
+            if limit and 0 < limit <= count:
+                return _boxes(np.concatenate(found)[:limit]), mask[:built]
+        if built >= height:
+            break
+        end = min(height, end * 2)
+
+    if not found:
+        return [], mask
+    return _boxes(np.concatenate(found)), mask
+
+
+def _boxes(stats) -> List[Tuple[int, int, int, int]]:
+    return [(int(x), int(y), int(w), int(h)) for x, y, w, h in stats[:, :4]]
@@ -0,0 +1,168 @@
+"""
+Debug image dumps for app.core.image_proc.
+
+Nothing is written unless AUTOMACRO_DEBUG_ARTIFACTS=1 (defaults to AUTOMACRO_DEBUG).
+When enabled, matchers submit frames without blocking: only one frame in
+AUTOMACRO_DEBUG_SAMPLE_EVERY per artifact name is kept, a background thread
+draws the match boxes and encodes the PNG, and a full queue drops frames instead
+of stalling the search. Files go to <app dir>/debug/ with a timestamped name;
+the oldest are deleted beyond DEBUG_ARTIFACT_MAX_FILES.
+"""
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Iterable, Optional, Tuple
+
+from app.constants import (
+    DEBUG_ARTIFACT_QUEUE_SIZE,
+    DEBUG_ARTIFACT_MAX_FILES,
+    DEBUG_ARTIFACT_SAMPLE_EVERY,
+)
+
+logger = logging.getLogger("app.core.debug_artifacts")
+
+
+def is_debug_artifacts_enabled() -> bool:
+    from app.utils.common import is_debug_mode
+    default = "1" if is_debug_mode() else "0"
+    return os.getenv("AUTOMACRO_DEBUG_ARTIFACTS", default) == "1"
+
+
+class DebugArtifactWriter:
+    """Bounded, sampled, background PNG writer with a rotating output directory."""
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        sample_every: Optional[int] = None,
+        queue_size: int = DEBUG_ARTIFACT_QUEUE_SIZE,
+        max_files: int = DEBUG_ARTIFACT_MAX_FILES,
+        enabled: Optional[bool] = None
+    ):
+        self._directory = directory
+        self._sample_every = sample_every
+        self.max_files = max_files
+        self._enabled = enabled
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._counters = {}
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._thread = None
+        self.dropped = 0
+        self.written = 0
+
+    @property
+    def enabled(self) -> bool:
+        if self._enabled is None:
+            self._enabled = is_debug_artifacts_enabled()
+        return self._enabled
+
+    @enabled.setter
+    def enabled(self, value: bool):
+        self._enabled = value
+
+    @property
+    def sample_every(self) -> int:
+        if self._sample_every is None:
+            try:
+                self._sample_every = max(1, int(os.getenv("AUTOMACRO_DEBUG_SAMPLE_EVERY", DEBUG_ARTIFACT_SAMPLE_EVERY)))
+            except ValueError:
+                self._sample_every = DEBUG_ARTIFACT_SAMPLE_EVERY
+        return self._sample_every
+
+    @property
+    def directory(self) -> str:
+        if self._directory is None:
+            from app.utils.common import get_app_dir
+            self._directory = os.path.join(get_app_dir(), "debug")
+        return self._directory
+
+    def submit(
+        self,
+        name: str,
+        image,
+        boxes: Iterable[Tuple[int, int, int, int]] = (),
+        offset: Tuple[int, int] = (0, 0)
+    ) -> bool:
+        """
+        Queues image (BGR or single channel) to be written as <name>.png, with boxes
+        (global physical coords, shifted by -offset) drawn on it. Never blocks.
+        Returns True if the frame was queued.
+        """
+        if not self.enabled or image is None:
+            return False
+
+        with self._lock:
+            count = self._counters.get(name, 0)
+            self._counters[name] = count + 1
+            if count % self.sample_every:
+                return False
+            self._seq += 1
+            seq = self._seq
+            self._ensure_thread()
+
+        # The image may be a view of a cached frame; frames are never modified in place,
+        # so the writer can copy lazily when it draws.
+        try:
+            self._queue.put_nowait((seq, name, image, list(boxes), offset))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="debug-artifacts", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                self._write(*item)
+            except Exception as e:
+                logger.error(f"Failed to write debug artifact: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _write(self, seq, name, image, boxes, offset):
+        import cv2
+
+        if boxes:
+            image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR) if image.ndim == 2 else image.copy()
+            off_x, off_y = offset
+            for (x, y, w, h) in boxes:
+                x -= off_x
+                y -= off_y
+                cv2.rectangle(image, (x, y), (x + w, y + h), (0, 255, 0), 2)
+
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        path = os.path.join(self.directory, f"{stamp}_{seq:06d}_{name}.png")
+        cv2.imwrite(path, image)
+        self.written += 1
+        logger.debug(f"DEBUG_ARTIFACT: Saved {path} (Shape={image.shape})")
+        self._rotate()
+
+    def _rotate(self):
+        try:
+            files = sorted(f for f in os.listdir(self.directory) if f.endswith(".png"))
+        except OSError:
+            return
+        for stale in files[:max(0, len(files) - self.max_files)]:
+            try:
+                os.remove(os.path.join(self.directory, stale))
+            except OSError:
+                pass
+
+    def flush(self, timeout: float = 5.0):
+        """Waits until queued artifacts are written (tests / shutdown)."""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+
+# Shared by every matcher in image_proc
+debug_artifacts = DebugArtifactWriter()
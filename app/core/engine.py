@@ -1,12 +1,23 @@
+import os
 import time
 import logging
-import pyautogui
-from typing import Optional
-from PyQt6.QtCore import QObject, pyqtSignal
-from app.core.models import Workflow, Step, ConditionType, ActionType, ImageMatchMode, StepType, LoopMode, KeyInputMode
-from app.core.image_proc import find_image_on_screen, sort_matches, deduplicate_matches
+import threading
+from typing import Optional, Tuple
+from app.core.models import Workflow, Step, ConditionType, ActionType, StepType, LoopMode, KeyInputMode
+from app.core.image_proc import find_image_on_screen, find_images_batch, ImageQuery, sort_matches, deduplicate_matches
+from app.core.capture import invalidate_frame_cache, expand_region
+from app.core.templates import template_cache
+from app.core.plan import WorkflowPlan, StepNode, VISUAL_CONDITIONS, compile_workflow, compile_step
+from app.core.spatial import VisitedPoints, match_centers
+from app.core.change_detect import ChangeWatcher
+from app.core.clock import system_clock
+from app.core.scheduler import StepScheduler
+from app.core.input import get_input_backend
+from app.core.signals import Signal
+from app.core.tracing import Tracer, NullTracer, set_tracer, resolve_trace_path
 # from app.core.ocr import find_text_on_screen # Lazy loaded
 from app.utils.screen_utils import physical_to_logical
+from app.constants import DEFAULT_WATCH_AREA_MARGIN_PX, CHANGE_DETECT_MIN_RECHECK_MS, PREFETCH_MAX_AGE_MS
 
 logger = logging.getLogger("app.core.engine")
 
@@ -14,26 +25,55 @@ logger = logging.getLogger("app.core.engine")
 class _LoopBreak(Exception):
     """Raised when a BREAK step is executed inside a loop body."""
 
-class WorkflowRunner(QObject):
-    progress_signal = pyqtSignal(int, str) # Step Index, Step Name
-    log_signal = pyqtSignal(str)
-    finished_signal = pyqtSignal()
-    request_input_signal = pyqtSignal(str) # Prompt. Returns to self.set_input_value
-    
-    def __init__(self, workflow: Workflow, workflow_dir: str = ""):
-        super().__init__()
+class WorkflowRunner:
+    """
+    Runs a workflow on the calling thread. Qt-free: the UI forwards the signals to
+    Qt (app.ui.runner.RunnerSignals), the CLI (app.run) connects plain callbacks.
+    """
+
+    def __init__(
+        self,
+        workflow: Workflow,
+        workflow_dir: str = "",
+        watch_area_margin_px: int = DEFAULT_WATCH_AREA_MARGIN_PX,
+        change_detection: bool = True,
+        trace_path: Optional[str] = None,
+        clock=None
+    ):
+        self.progress_signal = Signal() # (Step Index, Step Name)
+        self.log_signal = Signal() # (message)
+        self.finished_signal = Signal()
+        self.request_input_signal = Signal() # (Prompt). Returns to self.set_input_value
+        
         self.workflow = workflow
         self.workflow_dir = workflow_dir
+        self.watch_area_margin_px = watch_area_margin_px # Padding around watch_area for IMAGE searches
+        self.change_detection = change_detection # Failed visual checks wait for a screen change before retrying
+        # Waits go through the clock (app.core.clock.VirtualClock for headless virtual runs)
+        self.clock = clock or system_clock
+        # Step intervals as deadlines on the clock; drift of each step start is recorded
+        self.scheduler = StepScheduler(self.clock)
+        self.schedule_stats = {} # scheduler.summary() of the last run
+        self._step_drift_ms = None # Drift of the step about to run (for its trace span)
+        self.input = get_input_backend() # Mouse / keyboard (app.core.input)
+        # Span trace of each run (file or directory); off unless set here or by AUTOMACRO_TRACE
+        self.trace_path = trace_path if trace_path is not None else os.getenv("AUTOMACRO_TRACE")
+        self.tracer = NullTracer()
+        self.trace_file = None # File written by the last traced run
+        self._trace_names = [] # Names of the steps being executed (nesting path)
+        self._loop_iterations = [] # Iteration of each enclosing loop, innermost last
         self.is_running = False
+        self.succeeded = False # Result of the last run(): False if a step failed or it was stopped
+        self._stop_event = threading.Event() # Set by stop(); wakes every wait immediately
         self.current_step_index = 0
-        self.visited_matches = [] # For sequential image matching
-        self.max_visited_matches = 1000  # Limit memory usage  # Limit memory usage
-        self.max_visited_matches = 1000 # Limit memory usage
+        self.plan: Optional[WorkflowPlan] = None # Compiled by run()
+        self.last_match_region = None # (x, y, w, h) of the last match, physical
+        self._prefetched = {} # id(node) -> (clock time, matches) from a block's batched search
+        self.visited_matches = VisitedPoints() # For sequential image matching (evicts by age / MAX_VISITED_MATCHES)
         
         # Variable Context
         self.variables = {}
         # Input Synchronization
-        import threading
         self.input_event = threading.Event()
         self.input_result = None
 
@@ -44,24 +84,155 @@ class WorkflowRunner(QObject):
 
     def stop(self):
         self.is_running = False
+        self._stop_event.set()
+        self.input_event.set() # Wake a pending INPUT wait
         self.log_signal.emit("Stopping workflow...")
 
+    def _start(self):
+        self.is_running = True
+        self._stop_event.clear()
+
     def _interruptible_sleep(self, duration_s: float) -> bool:
-        """Sleeps for duration_s but checks is_running every 0.1s. Returns False if stopped."""
-        end_time = time.time() + duration_s
-        while time.time() < end_time:
-            if not self.is_running:
-                return False
-            time.sleep(min(0.1, end_time - time.time()))
-        return True
+        """Sleeps for duration_s or until stop() is called. Returns False if stopped."""
+        if duration_s > 0 and self.is_running:
+            with self.tracer.span("sleep", "wait", seconds=duration_s):
+                self.clock.wait_until(self._stop_event, self.clock.monotonic() + duration_s)
+        return self.is_running
+
+    def _open_trace(self, label: str):
+        path = resolve_trace_path(self.trace_path, label)
+        if not path:
+            return
+        try:
+            self.tracer = Tracer(path)
+        except OSError as e:
+            self.log_signal.emit(f"Tracing disabled: cannot write {path} ({e})")
+            return
+        self.trace_file = path
+        set_tracer(self.tracer) # Capture / matching sub-spans
+        self.log_signal.emit(f"Tracing to {path}")
+
+    def _close_trace(self):
+        if not self.tracer.enabled:
+            return
+        self.tracer.close()
+        set_tracer(None)
+        self.log_signal.emit(f"Trace saved: {self.trace_file} ({self.tracer.span_count} spans)")
+        self.tracer = NullTracer()
+
+    def _run_traced(self, node: StepNode) -> tuple[bool, Optional[int]]:
+        """node.run inside a step span (id, name, nesting path, loop iteration, outcome)."""
+        self._trace_names.append(node.name)
+        span_args = {
+            "id": node.step.id,
+            "type": node.type.value,
+            "path": " > ".join(self._trace_names),
+        }
+        if self._loop_iterations:
+            span_args["iteration"] = self._loop_iterations[-1]
+        if self._step_drift_ms is not None:
+            span_args["drift_ms"] = round(self._step_drift_ms, 3)
+            self._step_drift_ms = None
+        try:
+            with self.tracer.span(node.name, "step", **span_args) as span:
+                try:
+                    success, goto_target = node.run(self, node)
+                except _LoopBreak:
+                    span.set(outcome="break")
+                    raise
+                if goto_target is not None:
+                    span.set(outcome="goto", goto=goto_target + 1)
+                elif success:
+                    span.set(outcome="ok")
+                else:
+                    span.set(outcome="failed" if self.is_running else "stopped")
+                return success, goto_target
+        finally:
+            self._trace_names.pop()
+
+    def _change_watcher(self, node: StepNode) -> Optional[ChangeWatcher]:
+        """
+        Watcher over the area a visual condition step looks at, or None if the step's result
+        does not only depend on the screen (control flow, TIME, ...).
+        """
+        if not self.change_detection or not node.is_visual:
+            return None
+        return ChangeWatcher(node.change_region, clock=self.clock)
+
+    def _reset_watcher(self, watcher: Optional[ChangeWatcher]) -> Optional[ChangeWatcher]:
+        """Takes the watcher's baseline; drops the watcher if the screen cannot be captured."""
+        if watcher is None:
+            return None
+        try:
+            watcher.reset()
+            return watcher
+        except Exception as e:
+            logger.warning(f"Change detection disabled for this wait: {e}")
+            return None
+
+    def _prefetch(self, node: StepNode):
+        """Searches the block's IMAGE conditions (node.prefetch) against one capture, in one batch."""
+        if not node.prefetch:
+            return
+        now = self.clock.monotonic()
+        missing = [n for n in node.prefetch if not self._is_prefetched(n, now)]
+        if len(missing) < 2:
+            return
+        queries = [
+            ImageQuery(n.image_path, n.condition.confidence, n.search_region, n.condition.search_mode, n.max_matches,
+                       n.condition.grayscale)
+            for n in missing
+        ]
+        with self.tracer.span("prefetch_images", "match", count=len(queries)):
+            results = find_images_batch(queries)
+        for n, matches in zip(missing, results):
+            self._prefetched[id(n)] = (now, [m[:4] for m in matches])
+
+    def _is_prefetched(self, node: StepNode, now: float) -> bool:
+        entry = self._prefetched.get(id(node))
+        return entry is not None and now - entry[0] <= PREFETCH_MAX_AGE_MS / 1000.0
+
+    def _take_prefetched(self, node: StepNode):
+        """Matches prefetched for node if still fresh (used once), else None."""
+        if not self._prefetched:
+            return None
+        entry = self._prefetched.pop(id(node), None)
+        if entry is None or self.clock.monotonic() - entry[0] > PREFETCH_MAX_AGE_MS / 1000.0:
+            return None
+        return entry[1]
+
+    def _screen_changed(self):
+        """After our own input: cached captures and prefetched results are stale."""
+        invalidate_frame_cache()
+        self._prefetched.clear()
+
+    def _compile(self) -> WorkflowPlan:
+        return compile_workflow(
+            self.workflow,
+            self.workflow_dir,
+            self.watch_area_margin_px,
+            step_handlers=_STEP_HANDLERS,
+            condition_checks=_CONDITION_CHECKS,
+            action_handlers=_ACTION_HANDLERS
+        )
 
     def run_step(self, step: Step):
         """Executes a single step for testing purposes."""
-        self.is_running = True
+        self._start()
         self.log_signal.emit(f"Testing step: {step.name}")
-        
+        self._open_trace(f"step_{step.name}")
+
         try:
-            success, goto_target = self._execute_step(step)
+            node = compile_step(
+                step,
+                self.workflow,
+                self.workflow_dir,
+                self.watch_area_margin_px,
+                step_handlers=_STEP_HANDLERS,
+                condition_checks=_CONDITION_CHECKS,
+                action_handlers=_ACTION_HANDLERS
+            )
+            success, goto_target = self._execute_step(node)
             if goto_target is not None:
                 self.log_signal.emit(f"GOTO target set to {goto_target + 1} (test mode).")
             elif success:
@@ -75,286 +246,458 @@ class WorkflowRunner(QObject):
             self.log_signal.emit(f"Error testing step: {e}")
         finally:
             self.is_running = False
+            self._close_trace()
             self.finished_signal.emit()
 
     def run(self):
-        self.is_running = True
-        self.current_step_index = 0
+        self._start()
+        self.succeeded = False
         self.current_step_index = 0 # This will be incremented by _execute_steps
-        self.visited_matches = []
+        self.visited_matches.clear()
         self.last_match_region = None # (x, y, w, h)
-        
+        self._prefetched.clear()
+        self.scheduler.reset()
+
         self.log_signal.emit(f"Starting workflow: {self.workflow.name}")
-        
+        self._open_trace(self.workflow.name)
+
         try:
-            self._execute_steps(self.workflow.steps, is_root=True)
+            # Resolve paths, regions, GOTO targets and handlers once
+            self.plan = self._compile()
+            for warning in self.plan.warnings:
+                self.log_signal.emit(warning)
+
+            # Decode every template once before the first step runs
+            loaded = template_cache.preload(self.plan.template_paths)
+            if loaded:
+                self.log_signal.emit(f"Preloaded {loaded} template image(s).")
+
+            self.succeeded, _ = self._execute_steps(self.plan.steps, is_root=True)
             self.log_signal.emit("Workflow finished.")
         except Exception as e:
             logger.exception("Error running workflow")
             self.log_signal.emit(f"Critical Error: {e}")
         finally:
             self.is_running = False
+            self._report_schedule()
+            self._close_trace()
             self.finished_signal.emit()
 
-    def _execute_steps(self, steps: list[Step], *, is_root: bool = False) -> tuple[bool, Optional[int]]:
+    def _report_schedule(self):
+        """Step start drift of this run: kept in schedule_stats, logged and added to the trace."""
+        self.schedule_stats = stats = self.scheduler.summary()
+        if not stats["steps"]:
+            return
+        with self.tracer.span("schedule_drift", "scheduler", **stats):
+            pass
+        self.log_signal.emit(
+            f"Step timing: {stats['steps']} interval(s), start drift p50 {stats['p50_ms']:.2f} ms, "
+            f"p99 {stats['p99_ms']:.2f} ms, max {stats['max_ms']:.2f} ms"
+        )
+
+    def _execute_steps(self, nodes: Tuple[StepNode, ...], *, is_root: bool = False) -> tuple[bool, Optional[int]]:
         """
         Executes a list of steps sequentially.
         Returns:
             success: True if completed list without fatal error
             goto_target: target root index (0-based) when GOTO is requested
         """
-        if not steps: return True, None
-        
+        if not nodes: return True, None
+
+        root_count = len(self.plan.steps) if self.plan is not None else 0
         idx = 0
-        while idx < len(steps):
+        waited = False # The previous step of this list ended with its interval wait
+        while idx < len(nodes):
             if not self.is_running:
                 return False, None
-            
-            step = steps[idx]
-            
+
+            node = nodes[idx]
+
             # Emit Progress
             self.current_step_index += 1
-            self.progress_signal.emit(self.current_step_index, step.name)
-            self.log_signal.emit(f"Executing step {self.current_step_index}: {step.name}")
-            
-            # Reset match region for this step (unless we want to preserve it across steps? Usually reset)
-            # self.last_match_region = None # Keep invalidating? Or keep for 'Move' after 'Find'?
-            # Actually, Move depends on last_match_region OF THE PREVIOUS step
-            # So we should ONLY invalidate if this step generates a NEW match.
-            # But if this step is 'Wait', we shouldn't clear the region.
-            
+            if self.progress_signal:
+                self.progress_signal.emit(self.current_step_index, node.name)
+            if self.log_signal:
+                self.log_signal.emit(f"Executing step {self.current_step_index}: {node.name}")
+
+            # last_match_region is kept across steps: a MOVE uses the match of the previous
+            # step, so it is only replaced when a step produces a NEW match.
+
+            self._step_drift_ms = self.scheduler.start_step() if waited else None
+            waited = False
             try:
-                success, goto_target = self._execute_step(step)
+                success, goto_target = self._execute_step(node)
             except _LoopBreak:
                 if is_root:
-                    self.log_signal.emit("[BREAK] Break encountered at top-level. Stop workflow.")
+                    if self.log_signal:
+                        self.log_signal.emit("[BREAK] Break encountered at top-level. Stop workflow.")
                     return False, None
                 raise
-            
+
             if goto_target is not None:
                 if is_root:
-                    if goto_target < 0 or goto_target >= len(self.workflow.steps):
-                        self.log_signal.emit(
-                            f"[GOTO] Invalid target: {goto_target + 1} "
-                            f"(valid range: 1-{len(self.workflow.steps)})"
-                        )
+                    if goto_target < 0 or goto_target >= root_count:
+                        if self.log_signal:
+                            self.log_signal.emit(
+                                f"[GOTO] Invalid target: {goto_target + 1} "
+                                f"(valid range: 1-{root_count})"
+                            )
                         return False, None
                     idx = goto_target
                     continue
                 return True, goto_target
-            
+
             if not success:
                 # Stop on failed step.
                 return False, None
-                
-            # Step interval
-            if not self._interruptible_sleep(step.step_interval_ms / 1000.0):
+
+            # Step interval, as a deadline the next step's start is measured against
+            if node.interval_s > 0:
+                with self.tracer.span("sleep", "wait", seconds=node.interval_s):
+                    waited = self.scheduler.wait_interval(node.interval_s, self._stop_event)
+            else:
+                waited = self.scheduler.wait_interval(0.0, self._stop_event)
+            if not waited:
                 return False, None
 
             idx += 1
 
         return True, None
 
-    def _execute_step(self, step: Step) -> tuple[bool, Optional[int]]:
+    def _execute_step(self, node: StepNode) -> tuple[bool, Optional[int]]:
         """
         Executes a single step. Returns True if successful, False if condition failed or action failed.
         """
-        if step.type == StepType.INPUT:
-            # 1. Request Input
-            prompt = step.action.input_prompt or "값을 입력하세요"
+        if self.tracer.enabled:
+            return self._run_traced(node)
+        return node.run(self, node)
+
+    # --- Step handlers (bound per node by app.core.plan) ---
+
+    def _run_input(self, node: StepNode) -> tuple[bool, Optional[int]]:
+        # 1. Request Input
+        prompt = node.action.input_prompt or "값을 입력하세요"
+        if self.log_signal:
             self.log_signal.emit(f"[INPUT] requesting input: {prompt}")
-            
-            # Clear previous event/result
-            self.input_event.clear()
-            self.input_result = None
-            
-            # Emit signal to UI
-            self.request_input_signal.emit(prompt)
-            
-            # Wait for response (blocking this thread, but allow stop)
-            while not self.input_event.is_set():
-                if not self.is_running: return False, None
-                time.sleep(0.1)
-                
-            # 2. Store Variable
-            var_name = step.action.input_variable_name or "count"
-            try:
-                # Try converting to int if possible, else string
-                val = int(self.input_result)
-            except:
-                val = self.input_result
-                
-            self.variables[var_name] = val
+
+        # Clear previous event/result
+        self.input_event.clear()
+        self.input_result = None
+
+        # Emit signal to UI
+        self.request_input_signal.emit(prompt)
+
+        # Wait for response (blocking this thread). stop() also sets the event, but a stop()
+        # that landed before the clear above is only seen through _stop_event
+        while not self.input_event.wait(0.1):
+            if self._stop_event.is_set():
+                break
+        if not self.is_running:
+            return False, None
+
+        # 2. Store Variable
+        var_name = node.action.input_variable_name or "count"
+        try:
+            # Try converting to int if possible, else string
+            val = int(self.input_result)
+        except:
+            val = self.input_result
+
+        self.variables[var_name] = val
+        if self.log_signal:
             self.log_signal.emit(f"[INPUT] Stored '{val}' in variable '{var_name}'")
-            return True, None
+        return True, None
 
-        # 1. Handle Control Flow Steps
-        if step.type == StepType.BREAK:
-            self.log_signal.emit(f"[BREAK] {step.name} triggered. Exiting nearest loop.")
-            raise _LoopBreak()
-
-        if step.type == StepType.IF:
-            # Prefer using the first child as condition (e.g. prebuilt Find Image).
-            # If no children remain, fallback to step-level condition for compatibility.
-            if step.children:
-                self.log_signal.emit("[IF] Checking first child as condition...")
-                cond_ok, goto_target = self._execute_step(step.children[0])
+    def _run_break(self, node: StepNode) -> tuple[bool, Optional[int]]:
+        if self.log_signal:
+            self.log_signal.emit(f"[BREAK] {node.name} triggered. Exiting nearest loop.")
+        raise _LoopBreak()
+
+    def _run_if(self, node: StepNode) -> tuple[bool, Optional[int]]:
+        # Prefer using the first child as condition (e.g. prebuilt Find Image).
+        # If no children remain, fallback to step-level condition for compatibility.
+        log = self.log_signal
+        if node.children:
+            if log:
+                log.emit("[IF] Checking first child as condition...")
+            self._prefetch(node)
+            cond_ok, goto_target = self._execute_step(node.children[0])
+            if goto_target is not None:
+                return True, goto_target
+
+            if not cond_ok:
+                if log:
+                    log.emit(f"[IF] Condition child failed. Skipping children.")
+                return True, None
+
+            if log:
+                log.emit(f"[IF] Condition child met. Executing remaining children...")
+            if len(node.children) > 1:
+                success, goto_target = self._execute_steps(node.children[1:], is_root=False)
                 if goto_target is not None:
                     return True, goto_target
+                return success, None
 
-                if not cond_ok:
-                    self.log_signal.emit(f"[IF] Condition child failed. Skipping children.")
-                    return True, None
+            if log:
+                log.emit("[IF] Condition child met. No child action steps.")
+            return True, None
 
-                self.log_signal.emit(f"[IF] Condition child met. Executing remaining children...")
-                if len(step.children) > 1:
-                    success, goto_target = self._execute_steps(step.children[1:], is_root=False)
-                    if goto_target is not None:
-                        return True, goto_target
-                    return success, None
+        if self._check_condition(node):
+            if log:
+                log.emit(f"[IF] Condition met. No child steps.")
+            return True, None
+        else:
+            if log:
+                log.emit(f"[IF] Condition failed. Skipping children.")
+            return True, None # Inherently successful in execution, just didn't run children.
 
-                self.log_signal.emit("[IF] Condition child met. No child action steps.")
-                return True, None
+    def _run_loop(self, node: StepNode) -> tuple[bool, Optional[int]]:
+        return self._execute_loop(node, node.condition.loop_mode)
 
-            if self._check_condition(step):
-                self.log_signal.emit(f"[IF] Condition met. No child steps.")
-                return True, None
-            else:
-                self.log_signal.emit(f"[IF] Condition failed. Skipping children.")
-                return True, None # Inherently successful in execution, just didn't run children.
-                
-        elif step.type == StepType.LOOP:
-            return self._execute_loop(step, step.condition.loop_mode)
-            
-        elif step.type == StepType.UNTIL:
-            # Deprecated Legacy Handling (keeping for safety if user has old steps)
-            return self._execute_until_legacy(step)
-            
-        elif step.type == StepType.AWAIT:
-            # Logic: Retry children UNTIL they succeed (return True).
-            # Timeout: step.condition.retry_timeout_s
-            # Interval: step.condition.retry_interval_ms
-            if not step.children:
+    def _run_until(self, node: StepNode) -> tuple[bool, Optional[int]]:
+        # Deprecated Legacy Handling (keeping for safety if user has old steps)
+        return self._execute_until_legacy(node)
+
+    def _run_await(self, node: StepNode) -> tuple[bool, Optional[int]]:
+        # Logic: Retry children UNTIL they succeed (return True).
+        # Timeout: condition.retry_timeout_s
+        # Interval: condition.retry_interval_ms
+        if not node.children:
+            if self.log_signal:
                 self.log_signal.emit(f"[AWAIT] No child steps. Treating as successful.")
-                return True, None
+            return True, None
 
-            timeout = step.condition.retry_timeout_s or 10.0
-            interval = (step.condition.retry_interval_ms or 500) / 1000.0
-            start_time = time.time()
-            condition_step = step.children[0]
-            body_steps = step.children[1:] if len(step.children) > 1 else []
-            
+        timeout = node.condition.retry_timeout_s or 10.0
+        interval = (node.condition.retry_interval_ms or 500) / 1000.0
+        start_time = self.clock.monotonic()
+        condition_step = node.children[0]
+        body_steps = node.children[1:]
+        # Visual conditions are re-checked when their area changes instead of every interval
+        watcher = self._change_watcher(condition_step)
+
+        if self.log_signal:
             self.log_signal.emit(f"[AWAIT] Waiting for children to succeed (Timeout: {timeout}s)...")
-            
-            while self.is_running:
-                # Check first child as condition.
-                cond_ok, goto_target = self._execute_step(condition_step)
-                if goto_target is not None:
-                    return True, goto_target
-                
-                if cond_ok:
-                    if body_steps:
-                        children_success, goto_target = self._execute_steps(body_steps, is_root=False)
-                        if goto_target is not None:
-                            return True, goto_target
-                        if children_success:
+
+        while self.is_running:
+            # Baseline first, so a change during the check is not missed
+            watcher = self._reset_watcher(watcher)
+            self._prefetch(node)
+            # Check first child as condition.
+            cond_ok, goto_target = self._execute_step(condition_step)
+            if goto_target is not None:
+                return True, goto_target
+
+            if cond_ok:
+                if body_steps:
+                    children_success, goto_target = self._execute_steps(body_steps, is_root=False)
+                    if goto_target is not None:
+                        return True, goto_target
+                    if children_success:
+                        if self.log_signal:
                             self.log_signal.emit("[AWAIT] Condition and body execution successful.")
-                            return True, None
+                        return True, None
+                    if self.log_signal:
                         self.log_signal.emit("[AWAIT] Body execution failed/stopped.")
-                        return False, None
+                    return False, None
 
+                if self.log_signal:
                     self.log_signal.emit("[AWAIT] Condition succeeded.")
-                    return True, None
-                
-                # Check Timeout
-                elapsed = time.time() - start_time
-                if elapsed > timeout:
+                return True, None
+
+            # Check Timeout
+            elapsed = self.clock.monotonic() - start_time
+            if elapsed > timeout:
+                if self.log_signal:
                     self.log_signal.emit(f"[AWAIT] Timeout reached ({elapsed:.1f}s / {timeout}s). Failed.")
+                return False, None
+
+            if watcher is not None:
+                # Re-check as soon as the watched area changes, and at least every interval
+                # (the thumbnail can miss small changes)
+                if self.log_signal:
+                    self.log_signal.emit(f"[AWAIT] Condition failed. Waiting for screen change... (Elapsed: {elapsed:.1f}s)")
+                min_wait = min(interval, CHANGE_DETECT_MIN_RECHECK_MS / 1000.0)
+                with self.tracer.span("wait_for_change", "wait"):
+                    watcher.wait(min(interval, timeout - elapsed), self._stop_event, min_wait_s=min_wait)
+                if not self.is_running:
                     return False, None
-                
-                # Wait Interval
+                continue
+
+            # Wait Interval
+            if self.log_signal:
                 self.log_signal.emit(f"[AWAIT] Condition failed. Retrying in {interval}s... (Elapsed: {elapsed:.1f}s)")
-                if not self._interruptible_sleep(interval):
-                    return False, None
-                     
-            return False, None # Stopped
-            
-        # 2. General Steps (Find Image, Click, etc.)
-        else:
-            # Check Condition
-            condition_met = self._check_condition(step)
-            
-            if not condition_met:
-                # If condition was TIME (Wait), it returns True usually (unless stopped).
-                # If IMAGE/COLOR/TEXT, it returns False if not found.
-                self.log_signal.emit(f"Condition failed: {step.name}")
+            if not self._interruptible_sleep(interval):
                 return False, None
-            
-            # Execute Action (if condition met)
-            # Some steps might have ActionType.NONE (e.g. Find Image only, no auto move?)
-            # But usually Find Image has Action.MOVE default.
-            if self.is_running:
-                success, goto_target = self._execute_action(step)
-                if goto_target is not None:
-                    return True, goto_target
-                if not success:
-                    return False, None
-            
+
+        return False, None # Stopped
+
+    def _run_switch(self, node: StepNode) -> tuple[bool, Optional[int]]:
+        # All IMAGE cases are searched at once on one capture and the best scoring match wins.
+        # Other cases (color, text, wait) are tried in order only when no image case matched,
+        # so a Wait case works as the default branch. No match at all fails the step
+        # (wrap the SWITCH in an AWAIT to wait for one of the screens).
+        log = self.log_signal
+        if not node.cases:
+            if log:
+                log.emit("[SWITCH] No cases. Skipping.")
             return True, None
 
-    def _execute_loop(self, step: Step, mode: LoopMode) -> tuple[bool, Optional[int]]:
+        image_cases = [case for case in node.cases if case.is_image]
+        best, best_matches = None, None
+        if image_cases:
+            queries = [
+                ImageQuery(c.condition.image_path, c.condition.condition.confidence, c.condition.search_region,
+                           c.condition.condition.search_mode, c.condition.max_matches, c.condition.condition.grayscale)
+                for c in image_cases
+            ]
+            with self.tracer.span("switch_match", "match", cases=len(queries)) as span:
+                results = find_images_batch(queries)
+                for case, matches in zip(image_cases, results):
+                    if matches and (best is None or matches[0].score > best_matches[0].score):
+                        best, best_matches = case, matches
+                span.set(winner=best.step.name if best else None)
+
+        if best is not None:
+            if log:
+                log.emit(f"[SWITCH] Case '{best.step.name}' matched best (score {best_matches[0].score:.3f}).")
+            # The condition step re-uses this search instead of matching again
+            self._prefetched[id(best.condition)] = (self.clock.monotonic(), [m[:4] for m in best_matches])
+            return self._run_case(best)
+
+        for case in node.cases:
+            if case.is_image:
+                continue
+            if not self.is_running:
+                return False, None
+            if log:
+                log.emit(f"[SWITCH] Checking case '{case.step.name}'...")
+            cond_ok, goto_target = self._execute_step(case.condition)
+            if goto_target is not None:
+                return True, goto_target
+            if cond_ok:
+                return self._run_body(case.body)
+
+        if log:
+            log.emit("[SWITCH] No case matched.")
+        return False, None
+
+    def _run_case(self, case) -> tuple[bool, Optional[int]]:
+        cond_ok, goto_target = self._execute_step(case.condition)
+        if goto_target is not None:
+            return True, goto_target
+        if not cond_ok:
+            return False, None
+        return self._run_body(case.body)
+
+    def _run_body(self, body: Tuple[StepNode, ...]) -> tuple[bool, Optional[int]]:
+        if not body:
+            return True, None
+        success, goto_target = self._execute_steps(body, is_root=False)
+        if goto_target is not None:
+            return True, goto_target
+        return success, None
+
+    def _run_general(self, node: StepNode) -> tuple[bool, Optional[int]]:
+        # General Steps (Find Image, Click, etc.)
+        condition_met = self._check_condition(node)
+
+        if not condition_met:
+            # If condition was TIME (Wait), it returns True usually (unless stopped).
+            # If IMAGE/COLOR/TEXT, it returns False if not found.
+            if self.log_signal:
+                self.log_signal.emit(f"Condition failed: {node.name}")
+            return False, None
+
+        # Execute Action (if condition met)
+        # Some steps might have ActionType.NONE (e.g. Find Image only, no auto move?)
+        # But usually Find Image has Action.MOVE default.
+        if self.is_running:
+            success, goto_target = self._execute_action(node)
+            if goto_target is not None:
+                return True, goto_target
+            if not success:
+                return False, None
+
+        return True, None
+
+    def _execute_loop(self, node: StepNode, mode: LoopMode) -> tuple[bool, Optional[int]]:
+        self._loop_iterations.append(0)
+        try:
+            return self._execute_loop_body(node, mode)
+        finally:
+            self._loop_iterations.pop()
+
+    def _execute_loop_body(self, node: StepNode, mode: LoopMode) -> tuple[bool, Optional[int]]:
         # Smart Loop Logic
         # Condition: First Child Step
         # Body: Remaining Children
-        
-        max_count = step.condition.loop_max_count or 100
-        loop_infinite = bool(step.condition.loop_infinite)
-        
+        condition = node.condition
+        max_count = condition.loop_max_count or 100
+        loop_infinite = bool(condition.loop_infinite)
+
         # while(1) mode: run body repeatedly without any condition check.
-        if loop_infinite and not step.children:
-            self.log_signal.emit("[LOOP] Invalid config: Infinite loop has no body. Add at least one step and rerun.")
+        if loop_infinite and not node.children:
+            if self.log_signal:
+                self.log_signal.emit("[LOOP] Invalid config: Infinite loop has no body. Add at least one step and rerun.")
             return False, None
-        
+
         # Check for Variable Override
-        if step.condition.loop_count_variable:
-            var_name = step.condition.loop_count_variable
+        if condition.loop_count_variable:
+            var_name = condition.loop_count_variable
             if var_name in self.variables:
                 val = self.variables[var_name]
                 if isinstance(val, int):
                     max_count = val
-                    self.log_signal.emit(f"[LOOP] Using variable '{var_name}' = {max_count}")
+                    if self.log_signal:
+                        self.log_signal.emit(f"[LOOP] Using variable '{var_name}' = {max_count}")
                 else:
-                    self.log_signal.emit(f"[LOOP] Variable '{var_name}' is not an integer ({val}). Using default {max_count}.")
+                    if self.log_signal:
+                        self.log_signal.emit(f"[LOOP] Variable '{var_name}' is not an integer ({val}). Using default {max_count}.")
             else:
-                self.log_signal.emit(f"[LOOP] Variable '{var_name}' not found. Using default {max_count}.")
-        
+                if self.log_signal:
+                    self.log_signal.emit(f"[LOOP] Variable '{var_name}' not found. Using default {max_count}.")
+
         if loop_infinite:
-            self.log_signal.emit("[LOOP] Starting infinite loop (while1)...")
+            if self.log_signal:
+                self.log_signal.emit("[LOOP] Starting infinite loop (while1)...")
             condition_step = None
-            body_steps = step.children
+            body_steps = node.children
         else:
-            self.log_signal.emit(f"[LOOP] Starting {mode.value} loop (Max: {max_count})...")
-            if not step.children:
-                self.log_signal.emit(f"[LOOP] Error: No condition step (first child) found.")
+            if self.log_signal:
+                self.log_signal.emit(f"[LOOP] Starting {mode.value} loop (Max: {max_count})...")
+            if not node.children:
+                if self.log_signal:
+                    self.log_signal.emit(f"[LOOP] Error: No condition step (first child) found.")
                 return False, None
-            condition_step = step.children[0]
-            body_steps = step.children[1:]
-        
+            condition_step = node.children[0]
+            body_steps = node.children[1:]
+
+        # Empty-body loops poll their condition; skip the match while its area is unchanged
+        watcher = self._change_watcher(condition_step) if condition_step is not None and not body_steps else None
+        unchanged_since_miss = False
+        recheck_s = (node.condition.retry_interval_ms or 500) / 1000.0 # Skipped checks never exceed this
+        last_check = 0.0
+        log = self.log_signal
+
+        iterations = self._loop_iterations
         count = 0
         while self.is_running:
+            iterations[-1] += 1
             if loop_infinite:
                 if body_steps:
                     try:
                         body_ok, goto_target = self._execute_steps(body_steps, is_root=False)
                     except _LoopBreak:
-                        self.log_signal.emit("[LOOP] Break encountered. Exiting loop.")
+                        if log:
+                            log.emit("[LOOP] Break encountered. Exiting loop.")
                         return True, None
                     if goto_target is not None:
                         return True, goto_target
                     if not body_ok:
                         # For while(1), body failures should not terminate the loop.
                         # Log and continue retrying until user stops execution.
-                        self.log_signal.emit("[LOOP] Body execution failed; retrying loop body.")
+                        if log:
+                            log.emit("[LOOP] Body execution failed; retrying loop body.")
                         if not self._interruptible_sleep(0.1):
                             return False, None
                         continue
@@ -366,258 +709,351 @@ class WorkflowRunner(QObject):
 
             # 1. Check Max Count
             if not loop_infinite and count >= max_count:
-                self.log_signal.emit(f"[LOOP] Max count ({max_count}) reached. Stopping.")
+                if log:
+                    log.emit(f"[LOOP] Max count ({max_count}) reached. Stopping.")
                 break
-                
+
             # 2. Check Condition (Execute First Child)
             # First child is the "Condition Step". We execute it and see if it returns True.
-            try:
-                is_found, goto_target = self._execute_step(condition_step)
-            except _LoopBreak:
-                self.log_signal.emit("[LOOP] Break encountered in condition. Exiting loop.")
-                return True, None
-            if goto_target is not None:
-                return True, goto_target
-            
+            if unchanged_since_miss and self.clock.monotonic() - last_check < recheck_s:
+                # Same pixels as the last failed check: same result, and its action did not run
+                is_found = False
+            else:
+                last_check = self.clock.monotonic()
+                watcher = self._reset_watcher(watcher)
+                self._prefetch(node)
+                try:
+                    is_found, goto_target = self._execute_step(condition_step)
+                except _LoopBreak:
+                    if log:
+                        log.emit("[LOOP] Break encountered in condition. Exiting loop.")
+                    return True, None
+                if goto_target is not None:
+                    return True, goto_target
+
             should_run_body = loop_infinite
             if not loop_infinite:
                 if mode == LoopMode.WHILE_FOUND:
                     if is_found:
                          should_run_body = True
-                         self.log_signal.emit(f"[LOOP] #{count+1}: Condition Met (Found). Running body...")
+                         if log:
+                             log.emit(f"[LOOP] #{count+1}: Condition Met (Found). Running body...")
                     else:
-                         self.log_signal.emit(f"[LOOP] Condition Not Met (Not Found). Loop Ends.")
+                         if log:
+                             log.emit(f"[LOOP] Condition Not Met (Not Found). Loop Ends.")
                          break
-                         
+
                 elif mode == LoopMode.UNTIL_FOUND:
                     if not is_found:
                          should_run_body = True
-                         self.log_signal.emit(f"[LOOP] #{count+1}: Condition Not Met (Not Found). Running body (Retry)...")
+                         if log:
+                             log.emit(f"[LOOP] #{count+1}: Condition Not Met (Not Found). Running body (Retry)...")
                     else:
-                         self.log_signal.emit(f"[LOOP] Condition Met (Found!). Loop Ends.")
+                         if log:
+                             log.emit(f"[LOOP] Condition Met (Found!). Loop Ends.")
                          break
-            
+
             # 3. Execution (Body)
             if should_run_body:
                 if body_steps:
                     try:
                         body_ok, goto_target = self._execute_steps(body_steps, is_root=False)
                     except _LoopBreak:
-                        self.log_signal.emit("[LOOP] Break encountered. Exiting loop.")
+                        if log:
+                            log.emit("[LOOP] Break encountered. Exiting loop.")
                         return True, None
                     if goto_target is not None:
                         return True, goto_target
                     if not body_ok:
-                        self.log_signal.emit(f"[LOOP] Body execution failed/stopped.")
+                        if log:
+                            log.emit(f"[LOOP] Body execution failed/stopped.")
                         return False, None
+                elif watcher is not None and not is_found:
+                    # Same pacing as before, but the next check only runs if the area changed
+                    with self.tracer.span("wait_for_change", "wait") as span:
+                        changed = watcher.wait(0.1, self._stop_event, min_wait_s=0.1)
+                        span.set(changed=changed)
+                    if not self.is_running:
+                        return False, None
+                    unchanged_since_miss = not changed
                 else:
                     # Prevent instant infinite loops if body is empty
+                    unchanged_since_miss = False
                     if not self._interruptible_sleep(0.1):
                         return False, None
-                
+
                 count += 1
             else:
                 break
-                
+
         return True, None
 
-    def _execute_until_legacy(self, step: Step) -> tuple[bool, Optional[int]]:
+    def _execute_until_legacy(self, node: StepNode) -> tuple[bool, Optional[int]]:
         # Keep old workflow compatibility if UNTIL remains in persisted files.
-        self.log_signal.emit("[UNTIL] Running legacy UNTIL block as Smart Loop (UNTIL_FOUND).")
-        return self._execute_loop(step, LoopMode.UNTIL_FOUND)
+        if self.log_signal:
+            self.log_signal.emit("[UNTIL] Running legacy UNTIL block as Smart Loop (UNTIL_FOUND).")
+        return self._execute_loop(node, LoopMode.UNTIL_FOUND)
 
-    def _check_condition(self, step: Step) -> bool:
-        condition = step.condition
-        
-        if condition.type == ConditionType.TIME:
-            # Wait logic
-            if condition.wait_time_s > 0:
-                self.log_signal.emit(f"Waiting {condition.wait_time_s}s...")
-                return self._interruptible_sleep(condition.wait_time_s)
-            return True
-            
-        elif condition.type == ConditionType.IMAGE:
-            # Single check only (Retry handled by AWAIT parent)
-            image_path = condition.target_image_path
-            if self.workflow_dir and image_path:
-                import os
-                image_path = os.path.join(self.workflow_dir, image_path)
-            
-            self.log_signal.emit(f"Scanning for Image: {os.path.basename(image_path) if image_path else 'None'}")
-            matches = find_image_on_screen(
-                image_path,
-                confidence=condition.confidence
-            )
-            
-            if matches:
-                self.last_match_region = matches[0]
-                self.log_signal.emit(f"Image found at {matches[0]}")
-                return True
+    # --- Condition checks (bound per node by app.core.plan) ---
+
+    def _check_condition(self, node: StepNode) -> bool:
+        if node.check is None:
+            return False
+        return node.check(self, node)
+
+    def _check_time(self, node: StepNode) -> bool:
+        # Wait logic
+        wait_time_s = node.condition.wait_time_s
+        if wait_time_s > 0:
+            if self.log_signal:
+                self.log_signal.emit(f"Waiting {wait_time_s}s...")
+            return self._interruptible_sleep(wait_time_s)
+        return True
+
+    def _check_image(self, node: StepNode) -> bool:
+        # Single check only (Retry handled by AWAIT parent)
+        condition = node.condition
+        log = self.log_signal
+        if log:
+            area_text = f"area {list(node.search_region)}" if node.search_region else "full screen"
+            log.emit(f"Scanning for Image: {node.image_name} ({area_text})")
+        with self.tracer.span("find_image", "match", template=node.image_name, region=node.search_region) as span:
+            matches = self._take_prefetched(node)
+            if matches is not None:
+                span.set(prefetched=True)
             else:
-                self.log_signal.emit(f"Image NOT found.")
-                return False
-                
-        elif condition.type == ConditionType.COLOR:
-            # Single check only
-            from app.core.image_proc import find_color_on_screen
-            scan_region = tuple(condition.watch_area) if condition.watch_area else None
-            
-            self.log_signal.emit(f"Scanning for Color: {condition.target_color} (Tol: {condition.color_tolerance})")
+                matches = find_image_on_screen(
+                    node.image_path,
+                    confidence=condition.confidence,
+                    region=node.search_region,
+                    grayscale=condition.grayscale,
+                    search_mode=condition.search_mode,
+                    # SINGLE only uses the best match; stop after the best peak
+                    max_matches=node.max_matches
+                )
+            span.set(matches=len(matches))
+
+        if matches:
+            self.last_match_region = matches[0]
+            if log:
+                log.emit(f"Image found at {matches[0]}")
+            return True
+        else:
+            if log:
+                log.emit(f"Image NOT found.")
+            return False
+
+    def _check_color(self, node: StepNode) -> bool:
+        # Single check only
+        from app.core.image_proc import find_color_on_screen
+        condition = node.condition
+        log = self.log_signal
+
+        palette = [(entry.color, entry.tolerance) for entry in condition.color_palette]
+        if log:
+            extra = f" +{len(palette)} palette colors" if palette else ""
+            log.emit(f"Scanning for Color: {condition.target_color} (Tol: {condition.color_tolerance}){extra}")
+        idx = max(0, condition.match_index)
+        with self.tracer.span("find_color", "match", color=condition.target_color, region=node.watch_area) as span:
+            # Components past the one we need are never used, so the search can stop early
             matches = find_color_on_screen(
                 target_hex=condition.target_color,
                 tolerance=condition.color_tolerance,
-                region=scan_region
+                region=node.watch_area,
+                palette=palette,
+                min_area=condition.color_min_area_px,
+                max_matches=idx + 1
             )
-            
-            if matches:
-                idx = condition.match_index
-                if idx < len(matches):
-                    self.last_match_region = matches[idx]
-                    self.log_signal.emit(f"Color found at {matches[idx]} (Match #{idx+1}/{len(matches)})")
-                    return True
-                else:
-                    self.log_signal.emit(f"Color matched {len(matches)} times, but index {idx} out of range.")
-                    return False
+            span.set(matches=len(matches))
+
+        if matches:
+            if idx < len(matches):
+                self.last_match_region = matches[idx]
+                if log:
+                    log.emit(f"Color found at {matches[idx]} (Match #{idx+1})")
+                return True
             else:
-                self.log_signal.emit(f"Color NOT found.")
-            
-            return False
+                if log:
+                    log.emit(f"Color matched {len(matches)} times, but index {idx} out of range.")
+                return False
+        else:
+            if log:
+                log.emit(f"Color NOT found.")
 
-        elif condition.type == ConditionType.TEXT:
-            try:
-                from app.core.ocr import find_text_on_screen
-                # Single check
-                region = tuple(condition.watch_area) if condition.watch_area else None
-                found_region = find_text_on_screen(condition.target_text, region=region)
-                if found_region:
-                    self.last_match_region = found_region
+        return False
+
+    def _check_text(self, node: StepNode) -> bool:
+        condition = node.condition
+        try:
+            from app.core.ocr import find_text_on_screen
+            # Single check
+            with self.tracer.span("find_text", "match", region=node.watch_area):
+                found_region = find_text_on_screen(condition.target_text, region=node.watch_area)
+            if found_region:
+                self.last_match_region = found_region
+                if self.log_signal:
                     self.log_signal.emit(f"Text found: {condition.target_text}")
-                    return True
-            except ImportError as e:
+                return True
+        except ImportError as e:
+            if self.log_signal:
                 self.log_signal.emit(f"OCR not available: {e}")
-                logger.warning("OCR functionality removed - text recognition disabled")
-                return False
-            except Exception as e:
+            logger.warning("OCR functionality removed - text recognition disabled")
+            return False
+        except Exception as e:
+            if self.log_signal:
                 self.log_signal.emit(f"Text recognition error: {e}")
-                logger.error(f"Error in text recognition: {e}")
-                return False
+            logger.error(f"Error in text recognition: {e}")
             return False
-                
         return False
 
-    def _execute_action(self, step: Step) -> tuple[bool, Optional[int]]:
-        action = step.action
-        
-        if action.type == ActionType.NONE:
+    # --- Actions (bound per node by app.core.plan) ---
+
+    def _execute_action(self, node: StepNode) -> tuple[bool, Optional[int]]:
+        if node.act is None:
             return True, None
+        if self.tracer.enabled:
+            with self.tracer.span("action", "action", type=node.action.type.value):
+                return node.act(self, node)
+        return node.act(self, node)
 
-        elif action.type == ActionType.GOTO:
-            if action.goto_step_index is not None:
-                # PRD uses 1-based, internal is 0-based
-                if action.goto_step_index <= 0:
-                    self.log_signal.emit(f"[GOTO] Invalid target: {action.goto_step_index}.")
-                    return False, None
-                return True, action.goto_step_index - 1
-            return False, None
+    def _act_none(self, node: StepNode) -> tuple[bool, Optional[int]]:
+        return True, None
 
-        elif action.type == ActionType.MOVE:
-            move_x = None
-            move_y = None
-            
-            if step.condition.type in (ConditionType.IMAGE, ConditionType.COLOR, ConditionType.TEXT) and self.last_match_region:
-                # Relative Move
-                rx, ry, rw, rh = self.last_match_region
-                l_rx, l_ry, l_rw, l_rh = physical_to_logical((rx, ry, rw, rh))
-                center_x = l_rx + l_rw // 2
-                center_y = l_ry + l_rh // 2
-                
-                off_x = action.target_x or 0
-                off_y = action.target_y or 0
-                
-                move_x = center_x + off_x
-                move_y = center_y + off_y
-            else:
-                # Absolute Move
-                move_x = action.target_x
-                move_y = action.target_y
-            
-            if move_x is not None and move_y is not None:
-                pyautogui.moveTo(move_x, move_y)
-            else:
-                logger.warning("Move action requested but no target set.")
+    def _act_goto(self, node: StepNode) -> tuple[bool, Optional[int]]:
+        goto_step_index = node.action.goto_step_index
+        if goto_step_index is not None:
+            # PRD uses 1-based, internal is 0-based (converted by the plan)
+            if node.goto_target is None:
+                if self.log_signal:
+                    self.log_signal.emit(f"[GOTO] Invalid target: {goto_step_index}.")
+                return False, None
+            return True, node.goto_target
+        return False, None
+
+    def _act_move(self, node: StepNode) -> tuple[bool, Optional[int]]:
+        action = node.action
+        move_x = None
+        move_y = None
+
+        if node.condition.type in VISUAL_CONDITIONS and self.last_match_region:
+            # Relative Move
+            rx, ry, rw, rh = self.last_match_region
+            l_rx, l_ry, l_rw, l_rh = physical_to_logical((rx, ry, rw, rh))
+            center_x = l_rx + l_rw // 2
+            center_y = l_ry + l_rh // 2
+
+            off_x = action.target_x or 0
+            off_y = action.target_y or 0
+
+            move_x = center_x + off_x
+            move_y = center_y + off_y
+        else:
+            # Absolute Move
+            move_x = action.target_x
+            move_y = action.target_y
+
+        if move_x is not None and move_y is not None:
+            self.input.move_to(move_x, move_y)
+            invalidate_frame_cache() # Hover effects may change the screen; prefetched matches are kept
+            return self._input_pause(self.workflow.input_delays.move_ms), None
+        logger.warning("Move action requested but no target set.")
+        return True, None
+
+    def _act_click(self, node: StepNode) -> tuple[bool, Optional[int]]:
+        action = node.action
+        if action.target_x is not None and action.target_y is not None and (action.target_x != 0 or action.target_y != 0):
+            self.input.click(action.target_x, action.target_y)
+        else:
+            self.input.click() # At the current position (usually set by a preceding MOVE)
+        self._screen_changed()
+        return self._input_pause(self.workflow.input_delays.click_ms), None
+
+    def _act_key(self, node: StepNode) -> tuple[bool, Optional[int]]:
+        action = node.action
+        if not action.key_sequence:
             return True, None
-            
-        elif action.type == ActionType.CLICK:
-             if action.target_x is not None and action.target_y is not None and (action.target_x != 0 or action.target_y != 0):
-                 pyautogui.moveTo(action.target_x, action.target_y)
-             pyautogui.click()
-             return True, None
-
-        elif action.type == ActionType.KEY:
-            if not action.key_sequence:
-                return True, None
-            
-            mode = action.key_mode
-            if mode == KeyInputMode.PRESS:
-                # Handle compound keys (e.g. "ctrl+c")
-                keys = action.key_sequence.split('+')
-                keys = [k.strip().lower() for k in keys]
-                
+
+        mode = action.key_mode
+        if mode == KeyInputMode.PRESS:
+            # Compound keys (e.g. "ctrl+c") are split by the plan
+            keys = list(node.keys)
+            if self.log_signal:
                 self.log_signal.emit(f"Key Pressing: {keys}")
-                # pyautogui.hotkey(*keys) handles multiple keys down/up correctly
-                pyautogui.hotkey(*keys)
-                
-            elif mode == KeyInputMode.TYPE:
+            self.input.hotkey(*keys)
+
+        elif mode == KeyInputMode.TYPE:
+            if self.log_signal:
                 self.log_signal.emit(f"Typing: {action.key_sequence}")
-                # interval=0.1 to be realistic/safe?
-                pyautogui.write(action.key_sequence, interval=0.05)
-            return True, None
-        
-        return True, None
-             
+            self.input.write(action.key_sequence, interval=self.workflow.input_delays.type_interval_ms / 1000.0)
+        self._screen_changed()
+        return self._input_pause(self.workflow.input_delays.key_ms), None
+
+    def _input_pause(self, delay_ms: int) -> bool:
+        """Waits the workflow's delay after an input action. False if stopped meanwhile."""
+        return self._interruptible_sleep(delay_ms / 1000.0)
+
+    def _image_search_region(self, condition):
+        """watch_area (logical) padded by watch_area_margin_px, or None for full screen."""
+        if not condition.watch_area:
+            return None
+        return expand_region(condition.watch_area, self.watch_area_margin_px)
+
     def _handle_sequential_click(self, step: Step):
         image_path = step.condition.target_image_path
         if self.workflow_dir and image_path:
-            import os
             image_path = os.path.join(self.workflow_dir, image_path)
             
         matches = find_image_on_screen(
             image_path,
-            confidence=step.condition.confidence
+            confidence=step.condition.confidence,
+            region=self._image_search_region(step.condition),
+            grayscale=step.condition.grayscale,
+            search_mode=step.condition.search_mode
         )
         
         matches = sort_matches(matches)
         
-        valid_match = None
-        for match in matches:
-            mx, my, mw, mh = match
-            # PHYSICAL pixels here
-            
-            # Convert to Logical for visited check? 
-            # Or keep visited in physical?
-            # Let's keep visited in physical for consistency with matches, then convert ONLY for click.
-            
-            center_x = mx + mw // 2
-            center_y = my + mh // 2
-            
-            is_visited = False
-            for vx, vy in self.visited_matches:
-                dist = ((center_x - vx)**2 + (center_y - vy)**2)**0.5
-                if dist < step.condition.deduplicate_radius_px:
-                    is_visited = True
-                    break
-            
-            if not is_visited:
-                valid_match = (center_x, center_y)
-                break
+        # Centers are PHYSICAL pixels; visited points are kept in physical too, convert ONLY for click.
+        centers = match_centers(matches).tolist() if matches else []
+        idx = self.visited_matches.first_unvisited(centers, step.condition.deduplicate_radius_px)
+        valid_match = tuple(centers[idx]) if idx is not None else None
         
         if valid_match:
             cx, cy = valid_match
-            # cx, cy are PHYSICAL. Convert to LOGICAL for PyAutoGUI.
+            # cx, cy are PHYSICAL. Convert to LOGICAL for the input backend.
             l_cx, l_cy = physical_to_logical((cx, cy))
             
-            pyautogui.moveTo(l_cx, l_cy)
-            pyautogui.click()
-            self.visited_matches.append((cx, cy))
+            self.input.click(l_cx, l_cy)
+            self._screen_changed()
+            self.visited_matches.add(cx, cy)
+            self._input_pause(self.workflow.input_delays.click_ms)
         else:
             logger.info("No new matches found for sequential click.")
+
+
+# Handlers bound to plan nodes (see app.core.plan.compile_workflow)
+_STEP_HANDLERS = {
+    StepType.GENERAL: WorkflowRunner._run_general,
+    StepType.INPUT: WorkflowRunner._run_input,
+    StepType.BREAK: WorkflowRunner._run_break,
+    StepType.IF: WorkflowRunner._run_if,
+    StepType.LOOP: WorkflowRunner._run_loop,
+    StepType.UNTIL: WorkflowRunner._run_until,
+    StepType.AWAIT: WorkflowRunner._run_await,
+    StepType.SWITCH: WorkflowRunner._run_switch,
+}
+
+_CONDITION_CHECKS = {
+    ConditionType.TIME: WorkflowRunner._check_time,
+    ConditionType.IMAGE: WorkflowRunner._check_image,
+    ConditionType.COLOR: WorkflowRunner._check_color,
+    ConditionType.TEXT: WorkflowRunner._check_text,
+}
+
+_ACTION_HANDLERS = {
+    ActionType.NONE: WorkflowRunner._act_none,
+    ActionType.GOTO: WorkflowRunner._act_goto,
+    ActionType.MOVE: WorkflowRunner._act_move,
+    ActionType.CLICK: WorkflowRunner._act_click,
+    ActionType.KEY: WorkflowRunner._act_key,
+}
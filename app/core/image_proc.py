@@ -1,205 +1,371 @@
-from typing import List, Tuple, Optional
+from typing import List, NamedTuple, Sequence, Tuple, Optional
 import logging
 import os
+import threading
+
+from app.core.capture import frame_cache
+from app.core.templates import template_cache
+from app.core.models import ImageSearchMode
+from app.core.spatial import PointGrid, match_centers
+from app.core.debug_artifacts import debug_artifacts
+from app.core.tracing import get_tracer
+from app.constants import (
+    PYRAMID_FACTOR,
+    PYRAMID_MIN_TEMPLATE_PX,
+    PYRAMID_MAX_CANDIDATES,
+    PYRAMID_COARSE_SLACK,
+    MAX_PEAKS_PER_SEARCH,
+    BATCH_MATCH_WORKERS,
+    BATCH_UNION_MAX_AREA_RATIO,
+    BATCH_POOL_MIN_AREA_PX,
+)
 
 logger = logging.getLogger("app.core.image_proc")
 
+class ImageMatch(NamedTuple):
+    """A distinct template match in physical pixels with its TM_CCOEFF_NORMED score."""
+    left: int
+    top: int
+    width: int
+    height: int
+    score: float
+
 def find_image_on_screen(
     target_image_path: str,
     confidence: float = 0.8,
     region: Optional[Tuple[int, int, int, int]] = None,
-    grayscale: bool = False
+    grayscale: bool = False,
+    search_mode: ImageSearchMode = ImageSearchMode.EXHAUSTIVE,
+    max_matches: Optional[int] = None
 ) -> List[Tuple[int, int, int, int]]:
-    import pyautogui
-    import cv2
-    import numpy as np
-    from app.utils.common import is_debug_mode
     """
     Finds all occurrences of target image on the screen.
-    Returns a list of (left, top, width, height) tuples.
+    Returns a list of (left, top, width, height) tuples, best match first.
+    search_mode=PYRAMID matches on a downsampled level first and re-matches at
+    full resolution only around the best coarse candidates.
+    grayscale=True matches single-channel screen and template (about 3x less
+    matchTemplate work, but colors that differ only in hue look the same).
     """
-    matches = []
+    matches = find_image_matches(
+        target_image_path,
+        confidence=confidence,
+        region=region,
+        grayscale=grayscale,
+        search_mode=search_mode,
+        max_matches=max_matches,
+    )
+    return [match[:4] for match in matches]
+
+def find_image_matches(
+    target_image_path: str,
+    confidence: float = 0.8,
+    region: Optional[Tuple[int, int, int, int]] = None,
+    grayscale: bool = False,
+    search_mode: ImageSearchMode = ImageSearchMode.EXHAUSTIVE,
+    max_matches: Optional[int] = None
+) -> List[ImageMatch]:
+    """
+    Same search as find_image_on_screen, returning ImageMatch (box + score).
+    Each on-screen occurrence is reported once (peak + non-maximum suppression).
+    max_matches=1 stops after the best peak.
+    """
+    from app.utils.common import is_debug_mode
     debug_enabled = is_debug_mode()
 
     if debug_enabled:
         logger.debug(f"DEBUG_IMAGE: Searching for {target_image_path} with confidence={confidence}, region={region}")
 
     if debug_enabled:
-        # DEBUG: Save Debug Screenshot of what we are searching on
-        try:
-            from app.utils.common import get_app_dir
-
-            # 0. Capture what PyAutoGUI sees (for debugging)
-            # Use High-Res Capture (Full Screen + Crop) to match the new search logic
-            full_debug_ss = pyautogui.screenshot()
-            debug_ss_np = np.array(full_debug_ss)
-
-            # Handle RGBA
-            if debug_ss_np.shape[2] == 4:
-                debug_ss_np = debug_ss_np[:, :, :3]
-            debug_ss_np = cv2.cvtColor(debug_ss_np, cv2.COLOR_RGB2BGR)
-
-            debug_img = debug_ss_np
-
-            if region:
-                from app.utils.screen_utils import get_screen_scale
-                scale = get_screen_scale()
-
-                rx, ry, rw, rh = region
-                px = int(rx * scale)
-                py = int(ry * scale)
-                pw = int(rw * scale)
-                ph = int(rh * scale)
-
-                h_h, h_w = debug_ss_np.shape[:2]
-                px = max(0, min(px, h_w))
-                py = max(0, min(py, h_h))
-                pw = max(0, min(pw, h_w - px))
-                ph = max(0, min(ph, h_h - py))
-
-                if pw > 0 and ph > 0:
-                    debug_img = debug_ss_np[py:py+ph, px:px+pw]
-
-            debug_path = os.path.join(get_app_dir(), "debug_image_search_capture.png")
-            cv2.imwrite(debug_path, debug_img)
-            logger.debug(f"DEBUG_IMAGE: Saved capture to {debug_path} (Shape={debug_img.shape})")
-
-            # Check Template
-            if os.path.exists(target_image_path):
-                 tmpl = cv2.imread(target_image_path)
-                 if tmpl is not None:
-                     logger.debug(f"DEBUG_IMAGE: Template loaded. Shape={tmpl.shape}")
-                 else:
-                     logger.error(f"DEBUG_IMAGE: Failed to load template with cv2: {target_image_path}")
-            else:
-                 logger.error(f"DEBUG_IMAGE: Template file does not exist: {target_image_path}")
+        # Check Template
+        if not os.path.exists(target_image_path):
+            logger.error(f"DEBUG_IMAGE: Template file does not exist: {target_image_path}")
 
-        except Exception as e:
-            logger.error(f"DEBUG_IMAGE: Error saving debug info: {e}")
+    # Decoded once per file (LRU, keyed by path + mtime)
+    template = template_cache.get(target_image_path)
+    if template is None:
+        return []
 
     # 1. Try Standard Search with Retina-Aware Capture
     try:
-        # Proposed Fix: pyautogui.locateAllOnScreen(region=...) might capture at 1x on Retina.
-        # Instead, we capture Full Screen (usually 2x on Retina) and crop manually.
-        
-        # A. Capture Full Screen
-        full_ss = pyautogui.screenshot()
-        haystack = np.array(full_ss)
-        
-        # Handle RGBA
-        if haystack.shape[2] == 4:
-            haystack = haystack[:, :, :3]
-        haystack = cv2.cvtColor(haystack, cv2.COLOR_RGB2BGR)
-
-        # B. Crop Region if provided
-        search_img = haystack
-        crop_offset_x, crop_offset_y = 0, 0
+        # pyautogui.locateAllOnScreen(region=...) might capture at 1x on Retina.
+        # The frame cache keeps the full (physical) screen and hands out a view of the region.
+        search_img, (crop_offset_x, crop_offset_y) = frame_cache.get_region(region, gray=grayscale)
+        if search_img is None:
+            if debug_enabled:
+                logger.warning("DEBUG_IMAGE: Crop region is empty or out of bounds.")
+            return []
+        if region and debug_enabled:
+            logger.debug(f"DEBUG_IMAGE: Region{tuple(region)} -> Crop({crop_offset_x},{crop_offset_y},{search_img.shape[1]},{search_img.shape[0]})")
+
+        return _search_view(search_img, (crop_offset_x, crop_offset_y), template, confidence, search_mode, max_matches, grayscale)
+
+    except Exception as e:
+        logger.error(f"DEBUG_IMAGE: Manual search failed: {e}")
+        # pass # Fallthrough to standard search or fail
         
-        if region:
-            # region is Logical [x, y, w, h]
-            rx, ry, rw, rh = region
-            
-            # Determine Scale (Physical Width / Logical Width)
-            from app.utils.screen_utils import get_screen_scale
-            scale = get_screen_scale() 
-            
-            # Calculate Physical Region
-            px = int(rx * scale)
-            py = int(ry * scale)
-            pw = int(rw * scale)
-            ph = int(rh * scale)
-            
-            # Clamp to image bounds
-            h_h, h_w = haystack.shape[:2]
-            px = max(0, min(px, h_w))
-            py = max(0, min(py, h_h))
-            pw = max(0, min(pw, h_w - px))
-            ph = max(0, min(ph, h_h - py))
-            
-            if pw > 0 and ph > 0:
-                search_img = haystack[py:py+ph, px:px+pw]
-                crop_offset_x, crop_offset_y = px, py
-                if debug_enabled:
-                    logger.debug(f"DEBUG_IMAGE: Manual Crop (Scale={scale}): Region({rx},{ry}) -> Crop({px},{py},{pw},{ph})")
-            else:
-                if debug_enabled:
-                    logger.warning("DEBUG_IMAGE: Crop region is empty or out of bounds.")
+    return []
+
+class ImageQuery(NamedTuple):
+    """One search of find_images_batch (same meaning as the find_image_matches arguments)."""
+    path: str
+    confidence: float = 0.8
+    region: Optional[Tuple[int, int, int, int]] = None # Logical, None = full screen
+    search_mode: ImageSearchMode = ImageSearchMode.EXHAUSTIVE
+    max_matches: Optional[int] = None
+    grayscale: bool = False
+
+_match_pool = None
+_match_pool_lock = threading.Lock()
+
+def _get_match_pool():
+    global _match_pool
+    with _match_pool_lock:
+        if _match_pool is None:
+            from concurrent.futures import ThreadPoolExecutor
+            _match_pool = ThreadPoolExecutor(max_workers=BATCH_MATCH_WORKERS, thread_name_prefix="image-match")
+        return _match_pool
+
+def _batch_views(rects, grays):
+    """
+    Capture views for physical rects (None entries stay None), grayscale where grays says so.
+    The union of the rects is grabbed once, unless it is much larger than the rects themselves
+    (regions far apart), in which case each rect is grabbed on its own.
+    """
+    present = [r for r in rects if r is not None]
+    if not present:
+        return [None] * len(rects)
+    ux = min(r[0] for r in present)
+    uy = min(r[1] for r in present)
+    ux2 = max(r[0] + r[2] for r in present)
+    uy2 = max(r[1] + r[3] for r in present)
+    union_area = (ux2 - ux) * (uy2 - uy)
+    if len(present) > 1 and union_area > BATCH_UNION_MAX_AREA_RATIO * sum(r[2] * r[3] for r in present):
+        return [frame_cache.grab_physical(r, gray) if r is not None else None for r, gray in zip(rects, grays)]
+
+    union_rect = (ux, uy, ux2 - ux, uy2 - uy)
+    union = frame_cache.grab_physical(union_rect)
+    union_gray = None
+    if any(gray for r, gray in zip(rects, grays) if r is not None):
+        # The cache's gray view of the capture: converted once per frame, shared with other searches
+        union_gray = frame_cache.grab_physical(union_rect, gray=True)
+    views = []
+    for r, gray in zip(rects, grays):
+        if r is None:
+            views.append(None)
+            continue
+        source = union_gray if gray else union
+        views.append(source[r[1]-uy:r[1]-uy+r[3], r[0]-ux:r[0]-ux+r[2]])
+    return views
+
+def find_images_batch(queries: Sequence[ImageQuery]) -> List[List[ImageMatch]]:
+    """
+    Runs several template searches against one capture and returns one result list per
+    query (same order, same results as find_image_matches). The screen is grabbed once for
+    the union of the query regions. Large batches match on a small thread pool (matchTemplate
+    releases the GIL); small ones run on the caller thread, where they are faster.
+    """
+    if not queries:
+        return []
+    with get_tracer().span("find_images_batch", "match", queries=len(queries)):
+        try:
+            rects = [frame_cache.physical_rect(q.region) for q in queries]
+            views = _batch_views(rects, [q.grayscale for q in queries])
+        except Exception as e:
+            logger.error(f"Batch image search capture failed: {e}")
+            return [[] for _ in queries]
+
+        def run(index):
+            query, rect, view = queries[index], rects[index], views[index]
+            template = template_cache.get(query.path)
+            if template is None or view is None:
+                return []
+            try:
+                return _search_view(view, rect[:2], template, query.confidence, query.search_mode,
+                                    query.max_matches, query.grayscale)
+            except Exception as e:
+                logger.error(f"Batch image search failed for {query.path}: {e}")
                 return []
-        
-        # 1. Try Multi-Scale Search (Robust to Retina/Resolution mismatches)
-        scales = [1.0]
 
-        # Heuristic: Check dimensions
-        img_h, img_w = haystack.shape[:2]
+        area = sum(view.shape[0] * view.shape[1] for view in views if view is not None)
+        if len(queries) == 1 or area < BATCH_POOL_MIN_AREA_PX or (os.cpu_count() or 1) < 2:
+            return [run(i) for i in range(len(queries))]
+        return list(_get_match_pool().map(run, range(len(queries))))
+
+def _search_view(
+    search_img,
+    offset: Tuple[int, int],
+    template,
+    confidence: float,
+    search_mode: ImageSearchMode,
+    max_matches: Optional[int],
+    gray: bool = False
+) -> List[ImageMatch]:
+    """
+    Multi-scale search of a cached template in a captured view (offset = its physical top-left).
+    gray=True expects a single-channel view and matches the grayscale template.
+    """
+    import cv2
+    from app.utils.common import is_debug_mode
+    debug_enabled = is_debug_mode()
+    crop_offset_x, crop_offset_y = offset
 
-        if os.path.exists(target_image_path):
-            tmpl = cv2.imread(target_image_path)
-            if tmpl is not None:
-                 t_h, t_w = tmpl.shape[:2]
-                 if t_w > 50: 
-                     scales.append(0.5)
+    # 1. Try Multi-Scale Search (Robust to Retina/Resolution mismatches)
+    tracer = get_tracer()
+    for scale_factor in template.scales:
+        if debug_enabled:
+            logger.debug(f"DEBUG_IMAGE: Searching with Scale={scale_factor}")
 
-        best_matches = []
+        # Pre-resized template from the cache
+        template_scaled = (template.gray_pyramid if gray else template.pyramid).get(scale_factor)
+        if template_scaled is None: continue
 
-        for scale_factor in scales:
-            if debug_enabled:
-                logger.debug(f"DEBUG_IMAGE: Searching with Scale={scale_factor}")
+        target_h, target_w = template_scaled.shape[:2]
 
-            # Load Template
-            template_original = cv2.imread(target_image_path)
-            if template_original is None: continue
+        # Match
+        try:
+            with tracer.span("match_template", "match", scale=scale_factor, mode=getattr(search_mode, "value", search_mode),
+                             template=(target_w, target_h), area=search_img.shape[1::-1], gray=gray) as span:
+                if search_mode == ImageSearchMode.PYRAMID:
+                    ys, xs, scores = _match_pyramid(search_img, template, scale_factor, confidence, max_matches, gray)
+                else:
+                    res = cv2.matchTemplate(search_img, template_scaled, cv2.TM_CCOEFF_NORMED)
+                    ys, xs, scores = _extract_peaks(res, confidence, target_w, target_h, max_matches)
+                span.set(matches=len(scores))
+
+            if len(scores):
+                if debug_enabled:
+                    logger.info(f"DEBUG_IMAGE: Found {len(scores)} matches at Scale {scale_factor}!")
+                # Peaks are in search_img coordinates
+                found = [
+                    ImageMatch(crop_offset_x + int(x), crop_offset_y + int(y), target_w, target_h, float(score))
+                    for y, x, score in zip(ys, xs, scores)
+                ]
+                debug_artifacts.submit("image_search", search_img, [m[:4] for m in found], (crop_offset_x, crop_offset_y))
+                return found # Stop at first successful scale
 
-            t_h, t_w = template_original.shape[:2]
+        except Exception as e:
+            logger.error(f"Error matching at scale {scale_factor}: {e}")
+            continue
 
-            target_w = int(t_w * scale_factor)
-            target_h = int(t_h * scale_factor)
+    # Nothing found: keep what we searched on
+    debug_artifacts.submit("image_search_miss", search_img)
+    return []
 
-            if target_w < 1 or target_h < 1: continue
+def _local_maxima(res, threshold: float, window_w: int, window_h: int, limit: int):
+    """
+    Returns (ys, xs) of local maxima in a matchTemplate result that are >= threshold,
+    best first, at most limit of them. A peak must be the maximum of its window.
+    """
+    import cv2
+    import numpy as np
 
-            if scale_factor != 1.0:
-                template_scaled = cv2.resize(template_original, (target_w, target_h), interpolation=cv2.INTER_AREA)
-            else:
-                template_scaled = template_original
+    kernel = np.ones((max(1, window_h) | 1, max(1, window_w) | 1), np.uint8)
+    peaks = (res >= threshold) & (res >= cv2.dilate(res, kernel))
+    ys, xs = np.nonzero(peaks)
+    if len(ys) > limit:
+        scores = res[ys, xs]
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        ys, xs = ys[top], xs[top]
+    order = np.argsort(-res[ys, xs], kind="stable")
+    return ys[order], xs[order]
+
+def _suppress_overlaps(ys, xs, scores, box_w: int, box_h: int, limit: Optional[int] = None):
+    """
+    Greedy non-maximum suppression for same-size boxes, best score first.
+    A peak is dropped if it lies within half a box of an already kept one.
+    """
+    import numpy as np
 
-            # Match
-            try:
-                res = cv2.matchTemplate(search_img, template_scaled, cv2.TM_CCOEFF_NORMED)
-                loc = np.where(res >= confidence)
-
-                found_at_scale = []
-                for pt in zip(*loc[::-1]): # (x, y)
-                    # pt is in search_img coordinates
-                    g_phys_x = crop_offset_x + pt[0]
-                    g_phys_y = crop_offset_y + pt[1]
-                    
-                    class Box:
-                        def __init__(self, left, top, width, height):
-                            self.left = left
-                            self.top = top
-                            self.width = width
-                            self.height = height
-
-                    found_at_scale.append(Box(g_phys_x, g_phys_y, target_w, target_h))
-
-                if found_at_scale:
-                    if debug_enabled:
-                        logger.info(f"DEBUG_IMAGE: Found {len(found_at_scale)} matches at Scale {scale_factor}!")
-                    best_matches = found_at_scale
-                    break # Stop at first successful scale
+    order = np.argsort(-scores, kind="stable")
+    ys, xs, scores = ys[order], xs[order], scores[order]
+    keep = np.ones(len(scores), bool)
+    half_w = max(1, box_w // 2)
+    half_h = max(1, box_h // 2)
+    kept = 0
+    for i in range(len(scores)):
+        if not keep[i]:
+            continue
+        kept += 1
+        if limit is not None and kept >= limit:
+            keep[i + 1:] = False
+            break
+        rest = slice(i + 1, None)
+        close = (np.abs(xs[rest] - xs[i]) < half_w) & (np.abs(ys[rest] - ys[i]) < half_h)
+        keep[rest] &= ~close
+    return ys[keep], xs[keep], scores[keep]
+
+def _extract_peaks(res, confidence: float, box_w: int, box_h: int, max_matches: Optional[int] = None):
+    """
+    Returns (ys, xs, scores) of the distinct matches in a matchTemplate result, best first.
+    Only local maxima >= confidence are considered, so one on-screen occurrence yields one peak
+    instead of every pixel around it.
+    """
+    import cv2
+    import numpy as np
 
-            except Exception as e:
-                logger.error(f"Error matching at scale {scale_factor}: {e}")
-                continue
+    if max_matches == 1:
+        _, max_val, _, max_loc = cv2.minMaxLoc(res)
+        if max_val < confidence:
+            return np.empty(0, np.intp), np.empty(0, np.intp), np.empty(0, np.float32)
+        return np.array([max_loc[1]]), np.array([max_loc[0]]), np.array([max_val], np.float32)
 
-        if best_matches:
-             results = [(box.left, box.top, box.width, box.height) for box in best_matches]
-             return results
+    ys, xs = _local_maxima(res, confidence, box_w // 2, box_h // 2, MAX_PEAKS_PER_SEARCH)
+    return _suppress_overlaps(ys, xs, res[ys, xs], box_w, box_h, max_matches)
 
-    except Exception as e:
-        logger.error(f"DEBUG_IMAGE: Manual search failed: {e}")
-        # pass # Fallthrough to standard search or fail
-        
-    return []
+def _match_pyramid(search_img, template, scale_factor: float, confidence: float, max_matches: Optional[int] = None,
+                   gray: bool = False):
+    """
+    Coarse-to-fine TM_CCOEFF_NORMED search (gray=True: single-channel search_img and template).
+    Returns (ys, xs, scores) of the distinct full-resolution matches >= confidence, best first.
+    """
+    import cv2
+    import numpy as np
+
+    tmpl = template.resized(scale_factor, gray)
+    t_h, t_w = tmpl.shape[:2]
+    s_h, s_w = search_img.shape[:2]
+    if t_h > s_h or t_w > s_w:
+        return np.empty(0, np.intp), np.empty(0, np.intp), np.empty(0, np.float32)
+
+    # Largest factor (up to PYRAMID_FACTOR) that keeps the coarse template usable
+    factor = PYRAMID_FACTOR
+    while factor > 1 and min(t_w, t_h) // factor < PYRAMID_MIN_TEMPLATE_PX:
+        factor //= 2
+    coarse_tmpl = template.resized(scale_factor / factor, gray) if factor > 1 else None
+    if coarse_tmpl is None or coarse_tmpl.shape[0] > s_h // factor or coarse_tmpl.shape[1] > s_w // factor:
+        res = cv2.matchTemplate(search_img, tmpl, cv2.TM_CCOEFF_NORMED)
+        return _extract_peaks(res, confidence, t_w, t_h, max_matches)
+
+    # 1. Coarse level
+    coarse_img = cv2.resize(search_img, (s_w // factor, s_h // factor), interpolation=cv2.INTER_AREA)
+    coarse_res = cv2.matchTemplate(coarse_img, coarse_tmpl, cv2.TM_CCOEFF_NORMED)
+    cand_ys, cand_xs = _local_maxima(
+        coarse_res,
+        confidence - PYRAMID_COARSE_SLACK,
+        coarse_tmpl.shape[1] // 2,
+        coarse_tmpl.shape[0] // 2,
+        PYRAMID_MAX_CANDIDATES,
+    )
+
+    # 2. Refine at full resolution in small windows around each candidate
+    ys, xs, scores = [], [], []
+    radius = factor * 2
+    for cy, cx in zip(cand_ys, cand_xs):
+        x0 = max(0, cx * factor - radius)
+        y0 = max(0, cy * factor - radius)
+        x1 = min(s_w - t_w, cx * factor + radius)
+        y1 = min(s_h - t_h, cy * factor + radius)
+        if x1 < x0 or y1 < y0:
+            continue
+        window = search_img[y0:y1 + t_h, x0:x1 + t_w]
+        res = cv2.matchTemplate(window, tmpl, cv2.TM_CCOEFF_NORMED)
+        _, max_val, _, max_loc = cv2.minMaxLoc(res)
+        if max_val >= confidence:
+            xs.append(x0 + max_loc[0])
+            ys.append(y0 + max_loc[1])
+            scores.append(max_val)
+
+    return _suppress_overlaps(np.array(ys, np.intp), np.array(xs, np.intp), np.array(scores, np.float32), t_w, t_h, max_matches)
 
 def sort_matches(matches: List[Tuple[int, int, int, int]]) -> List[Tuple[int, int, int, int]]:
     """
@@ -215,185 +381,64 @@ def deduplicate_matches(
     """
     Removes matches that are within radius_px of each other.
     Assumes matches are already sorted by priority if that matters.
+    Kept centers go into a grid hash, so each match only checks its neighbor cells.
     """
     if not matches:
         return []
-        
+    if radius_px <= 0:
+        return list(matches)
+
+    grid = PointGrid(radius_px)
     unique_matches = []
-    
-    for match in matches:
-        mx, my, mw, mh = match
-        m_center_x = mx + mw // 2
-        m_center_y = my + mh // 2
-        
-        is_duplicate = False
-        for unique in unique_matches:
-            ux, uy, uw, uh = unique
-            u_center_x = ux + uw // 2
-            u_center_y = uy + uh // 2
-            
-            dist = ((m_center_x - u_center_x) ** 2 + (m_center_y - u_center_y) ** 2) ** 0.5
-            if dist < radius_px:
-                is_duplicate = True
-                break
-        
-        if not is_duplicate:
+    for match, (cx, cy) in zip(matches, match_centers(matches).tolist()):
+        if not grid.has_near(cx, cy, radius_px):
+            grid.add(cx, cy)
             unique_matches.append(match)
             
     return unique_matches
 
 def find_color_on_screen(
-    target_hex: str,
+    target_hex: Optional[str],
     tolerance: int = 10,
-    region: Optional[Tuple[int, int, int, int]] = None
+    region: Optional[Tuple[int, int, int, int]] = None,
+    palette: Sequence[Tuple[str, int]] = (),
+    min_area: int = 1,
+    max_matches: Optional[int] = None
 ) -> List[Tuple[int, int, int, int]]:
     """
-    Finds regions matching the target color.
-    Returns list of (x, y, w, h) bounding boxes of matching connected components.
+    Finds regions matching the target color or any (hex, tolerance) of palette.
+    Returns (x, y, w, h) boxes of the matching connected components in physical
+    pixels, in reading order. With max_matches only that many are returned and
+    the scan stops once they are known (pass match_index + 1).
     """
-    import pyautogui
-    import cv2
-    import numpy as np
+    from app.core.color_search import find_color_components, parse_hex_color
     from app.utils.common import is_debug_mode
     debug_enabled = is_debug_mode()
-    
+
     try:
-        # 1. Parse Hex to BGR
-        if target_hex.startswith('#'):
-            target_hex = target_hex[1:]
-        
-        r = int(target_hex[0:2], 16)
-        g = int(target_hex[2:4], 16)
-        b = int(target_hex[4:6], 16)
-        
-        
-        if debug_enabled:
-            logger.debug(f"DEBUG_COLOR: TargetHex={target_hex}, RGB=({r},{g},{b}), BGR=({b},{g},{r})")
-        
-        # 2. Capture Screen
-        screenshot = pyautogui.screenshot(region=region)
-        img = np.array(screenshot)
-        if debug_enabled:
-            logger.debug(f"DEBUG_COLOR: Captured Image Shape={img.shape}")
-        
-        # DEBUG: Save screenshot to verify what we are searching (User requested)
-        import os
-        from app.utils.common import get_app_dir
-        debug_path = os.path.join(get_app_dir(), "debug_color_search.png")
+        targets = [parse_hex_color(target_hex, tolerance)] if target_hex else []
+        targets += [parse_hex_color(color, tol) for color, tol in palette]
+        if not targets:
+            return []
         if debug_enabled:
-            logger.debug(f"DEBUG_COLOR: Saving debug image to {debug_path}")
-        cv2.imwrite(debug_path, cv2.cvtColor(img, cv2.COLOR_RGB2BGR)) # Save original capture
-        
-        # Handle RGBA (Mac) -> RGB
-        if img.shape[2] == 4:
-            img = img[:, :, :3]
-            
-        # RGB to BGR
-        img = cv2.cvtColor(img, cv2.COLOR_RGB2BGR)
-        
-        # 3. Create Mask
-        lower = np.array([max(0, b - tolerance), max(0, g - tolerance), max(0, r - tolerance)])
-        upper = np.array([min(255, b + tolerance), min(255, g + tolerance), min(255, r + tolerance)])
-        
-        mask = cv2.inRange(img, lower, upper)
-        
-        if debug_enabled:
-            # DEBUG: Save mask
-            mask_path = os.path.join(get_app_dir(), "debug_color_mask.png")
-            cv2.imwrite(mask_path, mask)
-        
-        # 4. Find Contours (Connected Components)
-        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+            logger.debug(f"DEBUG_COLOR: Targets (BGR, tol)={targets}")
+
+        # Capture is physical (frame cache maps the logical region), so only the offset is added
+        img, (offset_x, offset_y) = frame_cache.get_region(region)
+        if img is None:
+            logger.warning(f"DEBUG_COLOR: Region {region} is empty or out of bounds.")
+            return []
+
+        boxes, mask = find_color_components(img, targets, min_area=min_area, limit=max_matches)
+        debug_artifacts.submit("color_mask", mask)
         if debug_enabled:
-            logger.debug(f"DEBUG_COLOR: Found {len(contours)} contours")
-        
-        # DEBUG: Log region and scale
-        if region:
-            from app.utils.screen_utils import get_screen_scale
-            scale = get_screen_scale()
-            if debug_enabled:
-                logger.debug(f"DEBUG_COLOR: Region provided={region}, Scale={scale}")
-            
-            # Check if capture is 1x (Logical) or 2x (Physical)
-            # Img shape is (H, W, C)
-            h_img, w_img = img.shape[:2]
-            w_region = region[2]
-            
-            capture_scale = 1.0
-            if abs(w_img - w_region * scale) < 5:
-                capture_scale = scale # Captured at 2x
-                if debug_enabled:
-                    logger.debug("DEBUG_COLOR: Capture is Physical (High-Res)")
-            elif abs(w_img - w_region) < 5:
-                capture_scale = 1.0 # Captured at 1x
-                if debug_enabled:
-                    logger.debug("DEBUG_COLOR: Capture is Logical (Low-Res)")
-            else:
-                 logger.warning(f"DEBUG_COLOR: Capture size mismatch? Img={w_img}, Region={w_region}")
-        else:
-            scale = 1.0 # Fallback
-            capture_scale = 1.0
-            if debug_enabled:
-                logger.debug("DEBUG_COLOR: No region provided (Full Screen)")
-            from app.utils.screen_utils import get_screen_scale
-            scale = get_screen_scale()
-
-        matches = []
-        for cnt in contours:
-            x, y, w, h = cv2.boundingRect(cnt)
-            # Filter tiny noise (Require at least 2px dimensions)
-            if w >= 2 and h >= 2:
-                
-                # Normalize to Physical Coordinates (2x)
-                if capture_scale == 1.0 and scale > 1.0:
-                    # Captured in 1x, need to upscale to Physical
-                    x = int(x * scale)
-                    y = int(y * scale)
-                    w = int(w * scale)
-                    h = int(h * scale)
-                
-                # Add region offset (Region is Logical, so multiply by scale for Physical)
-                if region:
-                    local_x, local_y = x, y
-                    x += int(region[0] * scale)
-                    y += int(region[1] * scale)
-                    # logger.debug(f"DEBUG_COLOR: Offset calc: LocalScaled({local_x},{local_y}) + RegionScaled({int(region[0]*scale)},{int(region[1]*scale)}) -> Global({x},{y})")
-                    
-                matches.append((x, y, w, h))
-        
-        # DEBUG: Draw matches on a result image
-        result_img = cv2.cvtColor(img, cv2.COLOR_RGB2BGR).copy()
-        for (mx, my, mw, mh) in matches:
-            # Note: matches are in GLOBAL coordinates if region is used.
-            # But we want to draw on the LOCAL captured image 'img'.
-            # We need to reverse the offset for drawing.
-            
-            draw_x, draw_y = mx, my
-            if region:
-                 from app.utils.screen_utils import get_screen_scale
-                 scale = get_screen_scale()
-                 draw_x -= int(region[0] * scale)
-                 draw_y -= int(region[1] * scale)
-             
-            # Scale back to local image coords if image was 1x but matches are 2x
-            if capture_scale == 1.0 and scale > 1.0:
-                 draw_x = int(draw_x / scale)
-                 draw_y = int(draw_y / scale)
-                 draw_w = int(mw / scale)
-                 draw_h = int(mh / scale)
-            else:
-                 draw_w = mw
-                 draw_h = mh
-            
-            cv2.rectangle(result_img, (draw_x, draw_y), (draw_x + draw_w, draw_y + draw_h), (0, 255, 0), 2)
+            logger.debug(f"DEBUG_COLOR: {len(boxes)} components in {mask.shape[0]}/{img.shape[0]} rows scanned")
 
-        result_path = os.path.join(get_app_dir(), "debug_color_result.png")
-        cv2.imwrite(result_path, result_img)
-                
-        # Sort by visual order (top-left)
-        matches = sort_matches(matches)
+        matches = [(x + offset_x, y + offset_y, w, h) for x, y, w, h in boxes]
+        # DEBUG: Capture with matches drawn on it (boxes are drawn by the writer thread)
+        debug_artifacts.submit("color_search", img, matches, (offset_x, offset_y))
         return matches
-        
+
     except Exception as e:
         logger.error(f"Error in find_color_on_screen: {e}")
         return []
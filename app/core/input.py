@@ -0,0 +1,242 @@
+"""
+Mouse / keyboard output used by the runner's actions.
+
+Actions go through a pluggable backend (logical coordinates, like pyautogui):
+  - "xtest": X11 XTEST events through python-xlib, one display connection kept open
+    (Linux; preferred by "auto")
+  - "pyautogui": the real desktop on any OS (fallback)
+  - app.core.virtual.VirtualScreen: a scripted scene for headless runs and benchmarks
+Select with set_input_backend() or AUTOMACRO_INPUT_BACKEND. Backends never sleep:
+pyautogui's global PAUSE (0.1 s after every call) is bypassed and the runner waits
+the workflow's explicit InputDelays instead. Both real backends honour pyautogui.FAILSAFE
+(pointer in the top-left corner aborts); with it off, xtest skips the pointer query. Libraries are only imported on first use,
+so the engine loads without a display.
+"""
+import logging
+import os
+import sys
+import time
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger("app.core.input")
+
+
+class InputBackend:
+    """Moves / clicks the mouse and presses keys at logical (OS point) coordinates."""
+    name = "base"
+
+    def position(self) -> Tuple[int, int]:
+        raise NotImplementedError
+
+    def move_to(self, x: int, y: int):
+        raise NotImplementedError
+
+    def click(self, x: Optional[int] = None, y: Optional[int] = None):
+        """Clicks at (x, y), or at the current position if no coordinates are given."""
+        raise NotImplementedError
+
+    def hotkey(self, *keys: str):
+        """Presses keys together (e.g. "ctrl", "c") and releases them in reverse order."""
+        raise NotImplementedError
+
+    def write(self, text: str, interval: float = 0.0):
+        raise NotImplementedError
+
+
+class FailSafeError(Exception):
+    """The pointer was parked in the top-left corner to abort a run."""
+
+
+class PyAutoGUIInput(InputBackend):
+    name = "pyautogui"
+
+    def position(self) -> Tuple[int, int]:
+        import pyautogui
+        x, y = pyautogui.position()
+        return int(x), int(y)
+
+    # _pause=False: no PAUSE sleep after the call (the fail-safe check still runs)
+    def move_to(self, x: int, y: int):
+        import pyautogui
+        pyautogui.moveTo(x, y, _pause=False)
+
+    def click(self, x: Optional[int] = None, y: Optional[int] = None):
+        import pyautogui
+        if x is None or y is None:
+            pyautogui.click(_pause=False)
+        else:
+            pyautogui.click(x, y, _pause=False)
+
+    def hotkey(self, *keys: str):
+        import pyautogui
+        # hotkey() handles multiple keys down/up correctly
+        pyautogui.hotkey(*keys, _pause=False)
+
+    def write(self, text: str, interval: float = 0.0):
+        import pyautogui
+        pyautogui.write(text, interval=interval, _pause=False)
+
+
+# pyautogui key names -> X keysym names (single characters are looked up directly)
+_X_KEYSYMS = {
+    "enter": "Return", "return": "Return", "\n": "Return", "esc": "Escape", "escape": "Escape",
+    "tab": "Tab", "\t": "Tab", "space": "space", " ": "space", "backspace": "BackSpace",
+    "delete": "Delete", "del": "Delete", "insert": "Insert", "home": "Home", "end": "End",
+    "pageup": "Prior", "pgup": "Prior", "pagedown": "Next", "pgdn": "Next",
+    "up": "Up", "down": "Down", "left": "Left", "right": "Right",
+    "shift": "Shift_L", "shiftleft": "Shift_L", "shiftright": "Shift_R",
+    "ctrl": "Control_L", "ctrlleft": "Control_L", "ctrlright": "Control_R",
+    "alt": "Alt_L", "altleft": "Alt_L", "altright": "Alt_R", "option": "Alt_L",
+    "win": "Super_L", "winleft": "Super_L", "winright": "Super_R", "command": "Super_L", "super": "Super_L",
+    "capslock": "Caps_Lock", "numlock": "Num_Lock", "scrolllock": "Scroll_Lock",
+    "printscreen": "Print", "prtsc": "Print", "pause": "Pause", "menu": "Menu", "apps": "Menu",
+}
+_X_KEYSYMS.update({f"f{i}": f"F{i}" for i in range(1, 25)})
+
+
+class XTestInput(InputBackend):
+    """
+    Sends XTEST fake input events on one open X display connection: no per-call
+    library overhead or sleeps, one round trip (sync) per action.
+    """
+    name = "xtest"
+
+    def __init__(self, display_name: Optional[str] = None, failsafe: Optional[bool] = None):
+        from Xlib import X, XK, display
+        from Xlib.ext import xtest
+        self._X = X
+        self._XK = XK
+        self._xtest = xtest
+        self.display = display.Display(display_name)
+        if not self.display.has_extension("XTEST"):
+            raise RuntimeError("X server has no XTEST extension")
+        self.root = self.display.screen().root
+        self._keycodes: Dict[str, Tuple[int, bool]] = {} # key -> (keycode, needs shift)
+        self._shift = self.display.keysym_to_keycode(XK.string_to_keysym("Shift_L"))
+        self.failsafe = failsafe # None: follow pyautogui.FAILSAFE
+
+    def position(self) -> Tuple[int, int]:
+        pointer = self.root.query_pointer()
+        return pointer.root_x, pointer.root_y
+
+    def _failsafe_enabled(self) -> bool:
+        if self.failsafe is not None:
+            return self.failsafe
+        # Same switch as the pyautogui backend, without importing pyautogui just to read it
+        pyautogui = sys.modules.get("pyautogui")
+        return pyautogui.FAILSAFE if pyautogui is not None else True
+
+    def _check_failsafe(self):
+        # Costs a query_pointer round trip, so only when the fail-safe is on
+        if self._failsafe_enabled() and self.position() == (0, 0):
+            raise FailSafeError("Fail-safe triggered: pointer moved to the top-left corner.")
+
+    def _fake(self, event_type: int, detail: int = 0, **kwargs):
+        self._xtest.fake_input(self.display, event_type, detail, **kwargs)
+
+    def move_to(self, x: int, y: int):
+        self._check_failsafe()
+        self._fake(self._X.MotionNotify, x=int(x), y=int(y))
+        self.display.sync()
+
+    def click(self, x: Optional[int] = None, y: Optional[int] = None):
+        self._check_failsafe()
+        if x is not None and y is not None:
+            self._fake(self._X.MotionNotify, x=int(x), y=int(y))
+        self._fake(self._X.ButtonPress, 1)
+        self._fake(self._X.ButtonRelease, 1)
+        self.display.sync()
+
+    def _keycode(self, key: str) -> Tuple[int, bool]:
+        cached = self._keycodes.get(key)
+        if cached is not None:
+            return cached
+        name = _X_KEYSYMS.get(key.lower() if len(key) > 1 else key)
+        if name is not None:
+            keysym = self._XK.string_to_keysym(name)
+        elif len(key) == 1:
+            # Latin-1 keysyms equal the code point; others use the Unicode keysym range
+            keysym = ord(key) if ord(key) < 0x100 else 0x01000000 + ord(key)
+        else:
+            keysym = self._XK.string_to_keysym(key)
+        keycode = self.display.keysym_to_keycode(keysym) if keysym else 0
+        # Not the unshifted symbol of its key (e.g. "A", "!"): press shift with it
+        shift = bool(keycode) and self.display.keycode_to_keysym(keycode, 0) != keysym
+        self._keycodes[key] = (keycode, shift)
+        return keycode, shift
+
+    def _press(self, keys):
+        codes = []
+        for key in keys:
+            keycode, shift = self._keycode(key)
+            if not keycode:
+                logger.warning(f"xtest: no key for {key!r}, skipped")
+                continue
+            if shift:
+                codes.append(self._shift)
+            codes.append(keycode)
+        for code in codes:
+            self._fake(self._X.KeyPress, code)
+        for code in reversed(codes):
+            self._fake(self._X.KeyRelease, code)
+
+    def hotkey(self, *keys: str):
+        self._check_failsafe()
+        self._press(keys)
+        self.display.sync()
+
+    def write(self, text: str, interval: float = 0.0):
+        self._check_failsafe()
+        for char in text:
+            self._press([char])
+            if interval > 0:
+                self.display.sync()
+                time.sleep(interval)
+        self.display.sync()
+
+
+_BACKENDS = {
+    "xtest": XTestInput,
+    "pyautogui": PyAutoGUIInput,
+}
+
+
+def create_input_backend(name: str = "auto") -> InputBackend:
+    """Creates a backend by name. "auto" prefers XTEST on Linux/X11 and falls back to pyautogui."""
+    name = (name or "auto").lower()
+    if name == "auto":
+        if sys.platform.startswith("linux") and os.getenv("DISPLAY"):
+            try:
+                return XTestInput()
+            except ImportError:
+                logger.info("python-xlib not available. Using pyautogui input backend.")
+            except Exception as e:
+                logger.warning(f"XTEST input unavailable ({e}). Using pyautogui input backend.")
+        return PyAutoGUIInput()
+    if name not in _BACKENDS:
+        raise ValueError(f"Unknown input backend: {name} (available: auto, {', '.join(_BACKENDS)})")
+    return _BACKENDS[name]()
+
+
+_input_backend: Optional[InputBackend] = None
+
+
+def get_input_backend() -> InputBackend:
+    global _input_backend
+    if _input_backend is None:
+        _input_backend = create_input_backend(os.getenv("AUTOMACRO_INPUT_BACKEND", "auto"))
+        logger.info(f"Input backend: {_input_backend.name}")
+    return _input_backend
+
+
+def set_input_backend(backend=None):
+    """
+    Selects the input backend by name ("xtest", "pyautogui", "auto") or instance;
+    None goes back to the default (AUTOMACRO_INPUT_BACKEND or auto).
+    """
+    global _input_backend
+    if isinstance(backend, str):
+        backend = create_input_backend(backend)
+    _input_backend = backend
+    if backend is not None:
+        logger.info(f"Input backend: {backend.name}")
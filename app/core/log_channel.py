@@ -0,0 +1,221 @@
+"""
+Runner -> UI log channel.
+
+The runner logs every step, AWAIT retry and loop iteration. Forwarding each message
+as a queued Qt signal floods the GUI event queue in long while(1) runs, so instead:
+  - LogChannel.push() stamps a LogRecord and appends it to a ring buffer. It never
+    blocks; if the UI falls behind, the oldest records are overwritten and counted.
+  - The UI drains the buffer on a timer (drain()) and passes the batch through a
+    LogRollup, which shows a message once and then only periodic "x240" summaries
+    while it keeps repeating (numbers in messages are ignored when comparing).
+  - A LogFileWriter keeps the full history: every record is written to logs/ by a
+    background thread.
+"""
+import logging
+import os
+import queue
+import re
+import threading
+import time
+from collections import deque
+from typing import List, NamedTuple, Optional, Tuple
+
+from app.constants import LOG_CHANNEL_CAPACITY, LOG_ROLLUP_WINDOW_S, LOG_FILE_MAX_FILES
+
+logger = logging.getLogger("app.core.log_channel")
+
+_NUMBER = re.compile(r"\d+(?:\.\d+)?")
+
+
+class LogRecord(NamedTuple):
+    seq: int
+    time: float # Epoch seconds
+    step_index: int # Step being executed when the message was logged (0 = none yet)
+    step_name: str
+    message: str
+
+
+def format_record(record: LogRecord) -> str:
+    stamp = time.strftime("%H:%M:%S", time.localtime(record.time))
+    return f"[{stamp}] {record.message}"
+
+
+class LogChannel:
+    """Bounded ring buffer between the runner thread (push) and the UI timer (drain)."""
+
+    def __init__(self, capacity: int = LOG_CHANNEL_CAPACITY, file_writer: Optional["LogFileWriter"] = None):
+        self._records = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._drained_seq = 0
+        self.file_writer = file_writer
+        self.progress: Tuple[int, str] = (0, "") # Latest (step index, step name)
+
+    def attach(self, runner):
+        """Receives the runner's log and progress signals."""
+        runner.log_signal.connect(self.push)
+        runner.progress_signal.connect(self.set_progress)
+
+    def set_progress(self, index: int, name: str):
+        self.progress = (index, name)
+
+    def push(self, message: str):
+        index, name = self.progress
+        with self._lock:
+            self._seq += 1
+            record = LogRecord(self._seq, time.time(), index, name, str(message))
+            self._records.append(record)
+        if self.file_writer is not None:
+            self.file_writer.write(record)
+
+    def drain(self) -> Tuple[List[LogRecord], int]:
+        """Returns (records pushed since the last drain, how many of them were overwritten)."""
+        with self._lock:
+            records = list(self._records)
+            self._records.clear()
+            last_seq = self._seq
+        dropped = last_seq - self._drained_seq - len(records)
+        self._drained_seq = last_seq
+        return records, dropped
+
+
+class _Repeat:
+    __slots__ = ("last", "count", "reported_at")
+
+    def __init__(self, record: LogRecord):
+        self.last = record
+        self.count = 0 # Repeats not shown yet
+        self.reported_at = record.time
+
+
+class LogRollup:
+    """
+    Turns drained records into display lines. A message whose text (numbers ignored)
+    was shown less than window_s ago is counted instead of shown; the count is
+    reported as one line per window, and once more when the message goes quiet.
+    """
+
+    def __init__(self, window_s: float = LOG_ROLLUP_WINDOW_S):
+        self.window_s = window_s
+        self._repeats = {}
+
+    @staticmethod
+    def _key(message: str) -> str:
+        return _NUMBER.sub("#", message)
+
+    def _summary(self, repeat: _Repeat) -> str:
+        return f"{format_record(repeat.last)}  (repeated {repeat.count}x)"
+
+    def feed(self, records: List[LogRecord], now: Optional[float] = None) -> List[str]:
+        lines = []
+        for record in records:
+            key = self._key(record.message)
+            repeat = self._repeats.get(key)
+            if repeat is not None and record.time - repeat.last.time <= self.window_s:
+                repeat.last = record
+                repeat.count += 1
+                continue
+            if repeat is not None and repeat.count:
+                lines.append(self._summary(repeat))
+            self._repeats[key] = _Repeat(record)
+            lines.append(format_record(record))
+        return lines + self.flush(now if now is not None else time.time())
+
+    def flush(self, now: float, force: bool = False) -> List[str]:
+        """Summary lines for repeats that are due (all of them with force)."""
+        lines = []
+        for key in list(self._repeats):
+            repeat = self._repeats[key]
+            if repeat.count and (force or now - repeat.reported_at >= self.window_s):
+                lines.append(self._summary(repeat))
+                repeat.count = 0
+                repeat.reported_at = now
+            elif not repeat.count and now - repeat.last.time > self.window_s:
+                del self._repeats[key] # Quiet and fully reported
+        return lines
+
+
+def default_log_dir() -> str:
+    from app.utils.common import get_app_dir
+    return os.path.join(get_app_dir(), "logs")
+
+
+def log_file_path(label: str, directory: Optional[str] = None) -> str:
+    """<directory>/run_<label>_<time>.log (directory defaults to <app dir>/logs)."""
+    safe_label = "".join(c if c.isalnum() or c in "-_" else "_" for c in label) or "run"
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    return os.path.join(directory or default_log_dir(), f"run_{safe_label}_{stamp}.log")
+
+
+class LogFileWriter:
+    """Appends every record to a file from a background thread; write() never blocks."""
+
+    def __init__(self, path: str, max_files: int = LOG_FILE_MAX_FILES):
+        self.path = path
+        self.max_files = max_files
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._closed = False
+        self.written = 0
+        self._thread.start()
+
+    def write(self, record: LogRecord):
+        if not self._closed:
+            self._queue.put(record)
+
+    def _run(self):
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._rotate()
+            f = open(self.path, "a", encoding="utf-8")
+        except OSError as e:
+            logger.error(f"Run log disabled: cannot write {self.path} ({e})")
+            return
+        with f:
+            while True:
+                record = self._queue.get()
+                batch = [record]
+                # Write whatever piled up in one go
+                while True:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                stop = None in batch
+                lines = []
+                for r in batch:
+                    if r is None:
+                        continue
+                    stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(r.time))
+                    lines.append(f"{stamp}.{int(r.time * 1000) % 1000:03d} [{r.step_index} {r.step_name}] {r.message}\n")
+                f.writelines(lines)
+                f.flush()
+                self.written += len(lines)
+                if stop:
+                    return
+
+    def _rotate(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        files = []
+        try:
+            for entry in os.scandir(directory):
+                if entry.name.startswith("run_") and entry.name.endswith(".log") and entry.is_file():
+                    files.append((entry.stat().st_mtime_ns, entry.path))
+        except OSError:
+            return
+        # Oldest first across all workflows (names start with the workflow label, so not by name)
+        files.sort()
+        # Leave room for the file about to be created
+        for _mtime, stale in files[:max(0, len(files) - self.max_files + 1)]:
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
+
+    def close(self, timeout: float = 5.0):
+        """Writes what is queued and stops the thread."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout)
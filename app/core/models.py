@@ -11,6 +11,7 @@ class StepType(str, Enum):
     AWAIT = "AWAIT"
     INPUT = "INPUT"
     BREAK = "BREAK"
+    SWITCH = "SWITCH" # Children are cases; runs the one whose condition matches best
 
 class ConditionType(str, Enum):
     IMAGE = "IMAGE"
@@ -34,10 +35,18 @@ class ImageMatchMode(str, Enum):
     SINGLE = "SINGLE"
     SEQUENTIAL = "SEQUENTIAL"
 
+class ImageSearchMode(str, Enum):
+    EXHAUSTIVE = "EXHAUSTIVE" # Full-resolution match over the whole search area
+    PYRAMID = "PYRAMID"       # Coarse match on a downsampled level, refine around candidates
+
 class LoopMode(str, Enum):
     WHILE_FOUND = "WHILE_FOUND" # Run while condition is met
     UNTIL_FOUND = "UNTIL_FOUND" # Run until condition is met
 
+class PaletteColor(BaseModel):
+    color: str # Hex "#RRGGBB"
+    tolerance: int = 0
+
 class Condition(BaseModel):
     type: ConditionType
     # Image specific
@@ -47,6 +56,8 @@ class Condition(BaseModel):
     scan_interval_ms: int = 500
     timeout_s: float = 10.0
     deduplicate_radius_px: int = 10
+    search_mode: ImageSearchMode = ImageSearchMode.EXHAUSTIVE
+    grayscale: bool = False # Match on luminance only (~3x faster); keep off when color matters
     
     # Text specific
     target_text: Optional[str] = None
@@ -55,6 +66,8 @@ class Condition(BaseModel):
     # Color specific
     target_color: Optional[str] = None # Hex "#RRGGBB"
     color_tolerance: int = 0
+    color_palette: List[PaletteColor] = Field(default_factory=list) # Extra colors that also count as a match
+    color_min_area_px: int = 1 # Components with fewer matching pixels are ignored (on top of the 2x2 box minimum)
     match_index: int = 0 # 0=First match, 1=Second...
     
     # Time specific
@@ -95,8 +108,16 @@ class Step(BaseModel):
     next_step_index: Optional[int] = None # Implicitly next, but can be explicit
     step_interval_ms: int = 5
 
+class InputDelays(BaseModel):
+    """Pauses after each input action, so UIs can react (replaces pyautogui's hidden 0.1 s PAUSE)."""
+    move_ms: int = 0
+    click_ms: int = 50
+    key_ms: int = 50
+    type_interval_ms: int = 50 # Between characters of a TYPE key action
+
 class Workflow(BaseModel):
     name: str
     steps: List[Step] = []
+    input_delays: InputDelays = Field(default_factory=InputDelays)
     created_at: str
     updated_at: str
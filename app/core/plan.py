@@ -0,0 +1,247 @@
+"""
+Compiled execution plan for WorkflowRunner.
+
+compile_workflow() walks the Step models once and produces an immutable tree of
+StepNode tuples: template paths resolved to absolute paths, search regions
+precomputed, KEY sequences split, GOTO targets converted to 0-based indexes and
+checked against the root step count, and one handler callable bound per node
+(by step type, condition type and action type). The runner then executes nodes
+without re-inspecting the models, so a step costs the same on the millionth
+iteration of a while(1) loop as on the first.
+"""
+import os
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from app.core.capture import expand_region
+from app.core.models import (
+    Workflow, Step, Condition, Action, StepType, ConditionType, ActionType, ImageMatchMode, LoopMode,
+)
+
+# Conditions whose result only depends on the pixels of change_region
+VISUAL_CONDITIONS = (ConditionType.IMAGE, ConditionType.COLOR, ConditionType.TEXT)
+
+# Step types with their own control flow; every other type checks its condition, then acts
+CONTROL_STEP_TYPES = (
+    StepType.INPUT, StepType.BREAK, StepType.IF, StepType.LOOP, StepType.UNTIL, StepType.AWAIT, StepType.SWITCH,
+)
+
+
+class StepNode(NamedTuple):
+    step: Step
+    name: str
+    type: StepType
+    condition: Condition
+    action: Action
+    children: Tuple["StepNode", ...]
+
+    # Bound handlers (None when compiled without handlers)
+    run: Optional[Callable]   # run(runner, node) -> (success, goto_target)
+    check: Optional[Callable] # check(runner, node) -> bool
+    act: Optional[Callable]   # act(runner, node) -> (success, goto_target)
+
+    image_path: Optional[str]                          # Absolute template path (IMAGE)
+    image_name: str                                    # Basename for log lines
+    search_region: Optional[Tuple[int, int, int, int]] # IMAGE: watch_area + margin (logical)
+    watch_area: Optional[Tuple[int, int, int, int]]    # COLOR / TEXT: watch_area (logical)
+    max_matches: Optional[int]                         # 1 for SINGLE image matching
+    change_region: Optional[Tuple[int, int, int, int]] # Area a visual condition looks at
+    is_visual: bool                                    # GENERAL step with an IMAGE/COLOR/TEXT condition
+
+    keys: Tuple[str, ...]       # KEY PRESS: lower-cased parts of "ctrl+c"
+    goto_target: Optional[int]  # GOTO: 0-based root index (None if unset or <= 0)
+    interval_s: float           # step_interval_ms in seconds
+
+    # Block steps: IMAGE conditions evaluated back to back with no input in between (the block's
+    # condition child and the condition children of IF steps in its body, up to the first IF
+    # that clicks / moves / types); the runner searches them in one batch
+    prefetch: Tuple["StepNode", ...] = ()
+
+    # SWITCH: one entry per child
+    cases: Tuple["SwitchCase", ...] = ()
+
+
+class SwitchCase(NamedTuple):
+    """
+    A SWITCH branch. An IF child is a case with its first child as condition and the
+    rest as body; any other child is its own condition with an empty body.
+    """
+    step: StepNode
+    condition: StepNode
+    body: Tuple[StepNode, ...]
+    is_image: bool # condition is a plain IMAGE search (evaluated in the SWITCH's batch)
+
+
+class WorkflowPlan(NamedTuple):
+    name: str
+    steps: Tuple[StepNode, ...]
+    template_paths: Tuple[str, ...] # Unique, in first-use order (for preloading)
+    warnings: Tuple[str, ...]       # Problems found while compiling (invalid GOTO targets, ...)
+
+
+class _Compiler:
+    def __init__(
+        self,
+        workflow_dir: str,
+        watch_area_margin_px: int,
+        root_count: int,
+        step_handlers: Dict,
+        condition_checks: Dict,
+        action_handlers: Dict
+    ):
+        self.workflow_dir = workflow_dir
+        self.margin = watch_area_margin_px
+        self.root_count = root_count
+        self.step_handlers = step_handlers
+        self.condition_checks = condition_checks
+        self.action_handlers = action_handlers
+        self.template_paths: Dict[str, None] = {}
+        self.warnings: List[str] = []
+
+    def node(self, step: Step) -> StepNode:
+        condition = step.condition
+        action = step.action
+
+        image_path = condition.target_image_path
+        if image_path:
+            if self.workflow_dir:
+                image_path = os.path.join(self.workflow_dir, image_path)
+            image_path = os.path.abspath(image_path)
+            if condition.type == ConditionType.IMAGE:
+                self.template_paths.setdefault(image_path)
+
+        watch_area = tuple(condition.watch_area) if condition.watch_area else None
+        search_region = expand_region(watch_area, self.margin) if watch_area else None
+        change_region = search_region if condition.type == ConditionType.IMAGE else watch_area
+
+        keys = ()
+        if action.key_sequence:
+            keys = tuple(k.strip().lower() for k in action.key_sequence.split('+'))
+
+        goto_target = None
+        if action.type == ActionType.GOTO and action.goto_step_index is not None:
+            if action.goto_step_index > 0:
+                goto_target = action.goto_step_index - 1
+            if action.goto_step_index <= 0 or goto_target >= self.root_count:
+                self.warnings.append(
+                    f"[GOTO] Step '{step.name}' has invalid target {action.goto_step_index} "
+                    f"(valid range: 1-{self.root_count})"
+                )
+
+        step_type = step.type
+        is_general = step_type not in CONTROL_STEP_TYPES
+        run = self.step_handlers.get(StepType.GENERAL if is_general else step_type)
+        children = tuple(self.node(child) for child in step.children)
+
+        return StepNode(
+            step=step,
+            name=step.name,
+            type=step_type,
+            condition=condition,
+            action=action,
+            children=children,
+            run=run,
+            check=self.condition_checks.get(condition.type),
+            act=self.action_handlers.get(action.type),
+            image_path=image_path,
+            image_name=os.path.basename(image_path) if image_path else "None",
+            search_region=search_region,
+            watch_area=watch_area,
+            max_matches=1 if condition.match_mode == ImageMatchMode.SINGLE else None,
+            change_region=change_region,
+            is_visual=is_general and condition.type in VISUAL_CONDITIONS,
+            keys=keys,
+            goto_target=goto_target,
+            interval_s=step.step_interval_ms / 1000.0,
+            prefetch=_prefetch_nodes(step_type, condition, children),
+            cases=_switch_cases(children) if step_type == StepType.SWITCH else (),
+        )
+
+
+# MOVE only positions the cursor, so it doesn't invalidate prefetched matches
+_INPUT_ACTIONS = (ActionType.CLICK, ActionType.KEY)
+
+
+def _has_input(node: StepNode) -> bool:
+    return node.action.type in _INPUT_ACTIONS or any(_has_input(child) for child in node.children)
+
+
+def _prefetch_nodes(step_type: StepType, condition: Condition, children: Tuple[StepNode, ...]) -> Tuple[StepNode, ...]:
+    if step_type not in (StepType.IF, StepType.LOOP, StepType.UNTIL, StepType.AWAIT) or not children:
+        return ()
+    if step_type == StepType.LOOP and condition.loop_infinite:
+        candidates = [] # while(1): no condition child
+        body = children
+    else:
+        candidates = [children[0]]
+        body = children[1:]
+        # IF / AWAIT / WHILE_FOUND run the body after a match, i.e. after the condition's own action
+        until_found = step_type == StepType.UNTIL or (step_type == StepType.LOOP and condition.loop_mode == LoopMode.UNTIL_FOUND)
+        if not until_found and _has_input(children[0]):
+            return ()
+    for child in body:
+        if child.type != StepType.IF or not child.children:
+            break # Runs before the next IF is checked (could be input)
+        candidates.append(child.children[0])
+        if _has_input(child):
+            break # Its input would make later prefetched results stale
+    nodes = tuple(
+        node for node in candidates
+        if node.is_visual and node.condition.type == ConditionType.IMAGE and node.image_path
+    )
+    return nodes if len(nodes) >= 2 else ()
+
+
+def _switch_cases(children: Tuple[StepNode, ...]) -> Tuple[SwitchCase, ...]:
+    cases = []
+    for child in children:
+        if child.type == StepType.IF and child.children:
+            condition, body = child.children[0], child.children[1:]
+        else:
+            condition, body = child, ()
+        is_image = condition.is_visual and condition.condition.type == ConditionType.IMAGE and bool(condition.image_path)
+        cases.append(SwitchCase(child, condition, body, is_image))
+    return tuple(cases)
+
+
+def compile_workflow(
+    workflow: Workflow,
+    workflow_dir: str = "",
+    watch_area_margin_px: int = 0,
+    step_handlers: Optional[Dict] = None,
+    condition_checks: Optional[Dict] = None,
+    action_handlers: Optional[Dict] = None
+) -> WorkflowPlan:
+    """
+    Compiles a workflow. step_handlers maps StepType -> run callable (StepType.GENERAL
+    covers every type outside CONTROL_STEP_TYPES), condition_checks maps ConditionType -> check and
+    action_handlers maps ActionType -> act.
+    """
+    compiler = _Compiler(
+        workflow_dir, watch_area_margin_px, len(workflow.steps),
+        step_handlers or {}, condition_checks or {}, action_handlers or {}
+    )
+    steps = tuple(compiler.node(step) for step in workflow.steps)
+    return WorkflowPlan(
+        name=workflow.name,
+        steps=steps,
+        template_paths=tuple(compiler.template_paths),
+        warnings=tuple(compiler.warnings),
+    )
+
+
+def compile_step(
+    step: Step,
+    workflow: Optional[Workflow] = None,
+    workflow_dir: str = "",
+    watch_area_margin_px: int = 0,
+    step_handlers: Optional[Dict] = None,
+    condition_checks: Optional[Dict] = None,
+    action_handlers: Optional[Dict] = None
+) -> StepNode:
+    """Compiles a single step (test mode); GOTO targets are checked against workflow's root steps."""
+    root_count = len(workflow.steps) if workflow is not None else 0
+    compiler = _Compiler(
+        workflow_dir, watch_area_margin_px, root_count,
+        step_handlers or {}, condition_checks or {}, action_handlers or {}
+    )
+    return compiler.node(step)
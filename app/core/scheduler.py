@@ -0,0 +1,69 @@
+"""
+Step start scheduling for WorkflowRunner.
+
+After a step, the runner waits step_interval_ms before starting the next one. The
+scheduler turns that into a deadline on the run's clock (end of step + interval),
+waits for it with clock.wait_until() (woken at once by stop()), and when the next
+step actually starts records how late it was against the deadline ("drift": timer
+overshoot plus the runner's own dispatch work). Drift is attached to the step's trace
+span and summarized per run (mean / p50 / p99 / max).
+"""
+import threading
+from collections import deque
+from typing import Dict, Optional
+
+from app.constants import SCHEDULE_DRIFT_SAMPLES
+
+
+class StepScheduler:
+    def __init__(self, clock, max_samples: int = SCHEDULE_DRIFT_SAMPLES):
+        self.clock = clock
+        self._planned: Optional[float] = None # Deadline the next step should start at
+        self._recent = deque(maxlen=max_samples) # Drift in seconds
+        self._count = 0
+        self._total_s = 0.0
+        self._max_s = 0.0
+
+    def reset(self):
+        self._planned = None
+        self._recent.clear()
+        self._count = 0
+        self._total_s = 0.0
+        self._max_s = 0.0
+
+    def wait_interval(self, interval_s: float, stop_event: threading.Event) -> bool:
+        """Waits until interval_s after now; the next start_step() is measured against that. False if stopped."""
+        self._planned = self.clock.monotonic() + max(0.0, interval_s)
+        if interval_s > 0:
+            return not self.clock.wait_until(stop_event, self._planned)
+        return not stop_event.is_set()
+
+    def start_step(self) -> Optional[float]:
+        """
+        Call right before the step that follows wait_interval() runs.
+        Returns its drift in ms, or None if it had no planned start.
+        """
+        planned = self._planned
+        if planned is None:
+            return None
+        self._planned = None
+        drift_s = max(0.0, self.clock.monotonic() - planned)
+        self._recent.append(drift_s)
+        self._count += 1
+        self._total_s += drift_s
+        if drift_s > self._max_s:
+            self._max_s = drift_s
+        return drift_s * 1000.0
+
+    def summary(self) -> Dict[str, float]:
+        """Drift statistics of this run in ms (percentiles over the most recent samples)."""
+        if not self._count:
+            return {"steps": 0}
+        ordered = sorted(self._recent)
+        return {
+            "steps": self._count,
+            "mean_ms": round(self._total_s / self._count * 1000.0, 3),
+            "p50_ms": round(ordered[len(ordered) // 2] * 1000.0, 3),
+            "p99_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000.0, 3),
+            "max_ms": round(self._max_s * 1000.0, 3),
+        }
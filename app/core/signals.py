@@ -0,0 +1,43 @@
+"""
+Minimal Qt-free signal for app.core.
+
+Same connect / disconnect / emit surface as pyqtSignal, so the runner can be driven
+by plain callbacks (headless CLI) or forwarded to Qt signals by the UI
+(see app.ui.runner.RunnerSignals). Callbacks run synchronously on the emitting thread.
+"""
+import logging
+import threading
+from typing import Callable, List
+
+logger = logging.getLogger("app.core.signals")
+
+
+class Signal:
+    def __init__(self):
+        self._slots: List[Callable] = []
+        self._lock = threading.Lock()
+
+    def connect(self, slot: Callable):
+        with self._lock:
+            self._slots.append(slot)
+
+    def disconnect(self, slot: Callable = None):
+        """Disconnects slot, or every slot if none is given."""
+        with self._lock:
+            if slot is None:
+                self._slots.clear()
+            elif slot in self._slots:
+                self._slots.remove(slot)
+
+    def emit(self, *args):
+        with self._lock:
+            slots = list(self._slots)
+        for slot in slots:
+            try:
+                slot(*args)
+            except Exception:
+                # A broken listener must not stop the workflow
+                logger.exception("Signal slot failed")
+
+    def __len__(self):
+        return len(self._slots)
@@ -0,0 +1,127 @@
+"""
+Spatial indexes for match centers (physical pixels).
+
+PointGrid is a uniform grid hash: a radius query only looks at the cells that
+overlap the query circle, so "is anything within r px?" costs O(points nearby)
+instead of O(all points). VisitedPoints adds age-based eviction on top of it
+for the runner's sequential-click bookkeeping.
+"""
+import math
+import time
+from collections import deque
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.constants import MAX_VISITED_MATCHES, VISITED_MATCH_MAX_AGE_S
+
+
+class PointGrid:
+    """Grid hash of (x, y) points with square cells of cell_size px."""
+
+    def __init__(self, cell_size: float):
+        self.cell_size = max(1.0, float(cell_size))
+        self._cells: Dict[Tuple[int, int], List[Tuple[float, float]]] = {}
+        self._count = 0
+
+    def _cell(self, x: float, y: float) -> Tuple[int, int]:
+        return int(x // self.cell_size), int(y // self.cell_size)
+
+    def add(self, x: float, y: float):
+        self._cells.setdefault(self._cell(x, y), []).append((x, y))
+        self._count += 1
+
+    def remove(self, x: float, y: float):
+        key = self._cell(x, y)
+        points = self._cells.get(key)
+        if not points:
+            return
+        try:
+            points.remove((x, y))
+            self._count -= 1
+        except ValueError:
+            return
+        if not points:
+            del self._cells[key]
+
+    def has_near(self, x: float, y: float, radius: float) -> bool:
+        """True if any point lies strictly closer than radius to (x, y)."""
+        if radius <= 0 or not self._count:
+            return False
+        reach = int(math.ceil(radius / self.cell_size))
+        cx, cy = self._cell(x, y)
+        r2 = radius * radius
+        for gx in range(cx - reach, cx + reach + 1):
+            for gy in range(cy - reach, cy + reach + 1):
+                for px, py in self._cells.get((gx, gy), ()):
+                    if (px - x) ** 2 + (py - y) ** 2 < r2:
+                        return True
+        return False
+
+    def clear(self):
+        self._cells.clear()
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+
+def match_centers(matches: Sequence[Tuple[int, int, int, int]]):
+    """Returns an (n, 2) int array of box centers (x + w // 2, y + h // 2)."""
+    import numpy as np
+
+    boxes = np.asarray([m[:4] for m in matches], dtype=np.int64).reshape(-1, 4)
+    return np.stack([boxes[:, 0] + boxes[:, 2] // 2, boxes[:, 1] + boxes[:, 3] // 2], axis=1)
+
+
+class VisitedPoints:
+    """
+    Visited match centers. Entries older than max_age_s are evicted, and the
+    oldest ones are dropped beyond max_points, so the set never grows unbounded.
+    """
+
+    def __init__(
+        self,
+        cell_size: float = 16,
+        max_age_s: Optional[float] = VISITED_MATCH_MAX_AGE_S,
+        max_points: int = MAX_VISITED_MATCHES,
+        clock=time.monotonic
+    ):
+        self.max_age_s = max_age_s
+        self.max_points = max_points
+        self._clock = clock
+        self._grid = PointGrid(cell_size)
+        self._order = deque() # (visited_at, x, y), oldest first
+
+    def _evict(self):
+        if self.max_age_s is not None:
+            cutoff = self._clock() - self.max_age_s
+            while self._order and self._order[0][0] < cutoff:
+                _, x, y = self._order.popleft()
+                self._grid.remove(x, y)
+        while len(self._order) > self.max_points:
+            _, x, y = self._order.popleft()
+            self._grid.remove(x, y)
+
+    def add(self, x: float, y: float):
+        self._order.append((self._clock(), x, y))
+        self._grid.add(x, y)
+        self._evict()
+
+    def is_visited(self, x: float, y: float, radius: float) -> bool:
+        self._evict()
+        return self._grid.has_near(x, y, radius)
+
+    def first_unvisited(self, centers, radius: float) -> Optional[int]:
+        """Index of the first center (in the given order) not within radius of a visited point."""
+        self._evict()
+        for i, (x, y) in enumerate(centers):
+            if not self._grid.has_near(int(x), int(y), radius):
+                return i
+        return None
+
+    def clear(self):
+        self._grid.clear()
+        self._order.clear()
+
+    def __len__(self):
+        self._evict()
+        return len(self._order)
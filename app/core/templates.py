@@ -0,0 +1,151 @@
+"""
+Decoded template cache for app.core.image_proc.
+
+Templates are decoded once and kept with their grayscale version and the resized
+scale pyramid used by the multi-scale search. Entries are keyed by absolute path
+plus mtime (re-captured assets are picked up) and evicted LRU at TEMPLATE_CACHE_SIZE.
+"""
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Iterable, List, Optional
+
+from app.constants import TEMPLATE_CACHE_SIZE
+
+logger = logging.getLogger("app.core.templates")
+
+# Templates wider than this are also searched at half size (Retina captures on 1x screens)
+HALF_SCALE_MIN_WIDTH = 50
+
+
+class CachedTemplate:
+    """A decoded template and its pre-resized variants."""
+
+    def __init__(self, path: str, mtime_ns: int, bgr):
+        import cv2
+
+        self.path = path
+        self.mtime_ns = mtime_ns
+        self.bgr = bgr
+        self.gray = cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY)
+
+        t_h, t_w = bgr.shape[:2]
+        self.scales: List[float] = [1.0]
+        if t_w > HALF_SCALE_MIN_WIDTH:
+            self.scales.append(0.5)
+
+        # scale -> resized template (BGR / grayscale)
+        self.pyramid = {1.0: bgr}
+        self.gray_pyramid = {1.0: self.gray}
+        for scale in self.scales[1:]:
+            target_w = int(t_w * scale)
+            target_h = int(t_h * scale)
+            if target_w < 1 or target_h < 1:
+                continue
+            self.pyramid[scale] = cv2.resize(bgr, (target_w, target_h), interpolation=cv2.INTER_AREA)
+            self.gray_pyramid[scale] = cv2.resize(self.gray, (target_w, target_h), interpolation=cv2.INTER_AREA)
+
+    @property
+    def shape(self):
+        return self.bgr.shape
+
+    def resized(self, scale: float, gray: bool = False):
+        """Returns the template resized by scale (memoized), or None if it would be under 1 px."""
+        import cv2
+
+        pyramid = self.gray_pyramid if gray else self.pyramid
+        tmpl = pyramid.get(scale)
+        if tmpl is None:
+            t_h, t_w = self.bgr.shape[:2]
+            target_w = int(t_w * scale)
+            target_h = int(t_h * scale)
+            if target_w < 1 or target_h < 1:
+                return None
+            source = self.gray if gray else self.bgr
+            tmpl = cv2.resize(source, (target_w, target_h), interpolation=cv2.INTER_AREA)
+            pyramid[scale] = tmpl
+        return tmpl
+
+
+class TemplateCache:
+    """LRU cache of CachedTemplate keyed by (absolute path, mtime)."""
+
+    def __init__(self, max_size: int = TEMPLATE_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path: str) -> Optional[CachedTemplate]:
+        """Returns the decoded template, or None if the file is missing or unreadable."""
+        if not path:
+            return None
+        abs_path = os.path.abspath(path)
+        try:
+            mtime_ns = os.stat(abs_path).st_mtime_ns
+        except OSError:
+            return None
+
+        key = (abs_path, mtime_ns)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+
+        # Decode outside the lock (matcher threads should not wait on each other's PNG decode)
+        import cv2
+        bgr = cv2.imread(abs_path)
+        if bgr is None:
+            logger.error(f"Failed to load template with cv2: {abs_path}")
+            return None
+        entry = CachedTemplate(abs_path, mtime_ns, bgr)
+
+        with self._lock:
+            self.misses += 1
+            # Drop stale versions of the same file
+            for stale in [k for k in self._entries if k[0] == abs_path]:
+                del self._entries[stale]
+            self._entries[key] = entry
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return entry
+
+    def preload(self, paths: Iterable[str]) -> int:
+        """Decodes every path up front. Returns the number of templates available."""
+        loaded = 0
+        for path in paths:
+            if self.get(path) is not None:
+                loaded += 1
+        return loaded
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# Shared by every matcher in image_proc
+template_cache = TemplateCache()
+
+
+def iter_template_paths(steps, workflow_dir: str = "") -> Iterable[str]:
+    """Yields the resolved target_image_path of every step in the tree (depth first)."""
+    for step in steps:
+        image_path = step.condition.target_image_path
+        if image_path:
+            yield os.path.join(workflow_dir, image_path) if workflow_dir else image_path
+        if step.children:
+            yield from iter_template_paths(step.children, workflow_dir)
+
+
+def preload_workflow_templates(workflow, workflow_dir: str = "") -> int:
+    """Warms the template cache with every template referenced by the workflow."""
+    # abspath so that shared-store references from different folders count once
+    paths = list(dict.fromkeys(os.path.abspath(p) for p in iter_template_paths(workflow.steps, workflow_dir)))
+    return template_cache.preload(paths)
@@ -0,0 +1,169 @@
+"""
+Timing spans for workflow runs.
+
+The runner records a span per executed step (id, name, nesting path, loop iteration,
+outcome) and the matchers add sub-spans for capture, template / color matching,
+actions and sleeps. Spans are streamed to disk as they end, so a 2-hour run does not
+pile up in memory:
+  - *.jsonl: one span object per line
+  - anything else: Chrome trace_event JSON array (chrome://tracing, ui.perfetto.dev)
+
+Tracing is off unless a path is given (WorkflowRunner(trace_path=...), app.run --trace,
+or AUTOMACRO_TRACE=<file or directory>). When off, get_tracer() returns a NullTracer
+whose span() hands back one shared no-op object.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from typing import Optional
+
+logger = logging.getLogger("app.core.tracing")
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **args):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class NullTracer:
+    """Tracer used while tracing is off. Every call is a no-op."""
+    enabled = False
+    path = None
+
+    def span(self, name: str, cat: str = "", **args):
+        return _NULL_SPAN
+
+    def close(self):
+        pass
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "cat", "args", "start_ns")
+
+    def __init__(self, tracer, name, cat, args):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+        self.start_ns = 0
+
+    def __enter__(self):
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end_ns = time.perf_counter_ns()
+        if exc_type is not None and "outcome" not in self.args:
+            self.args["outcome"] = exc_type.__name__
+        self.tracer._record(self, end_ns)
+        return False
+
+    def set(self, **args):
+        """Adds args to the span (e.g. outcome once it is known)."""
+        self.args.update(args)
+
+
+class Tracer:
+    """Streams finished spans to a Chrome trace JSON or JSONL file."""
+    enabled = True
+
+    def __init__(self, path: str):
+        self.path = path
+        self.jsonl = path.endswith(".jsonl")
+        self._lock = threading.Lock()
+        self._origin_ns = time.perf_counter_ns()
+        self._pid = os.getpid()
+        self._threads = set()
+        self._first = True
+        self.span_count = 0
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "w", encoding="utf-8")
+        if not self.jsonl:
+            # JSON Array Format: trace viewers accept a missing closing bracket,
+            # so a crashed run still leaves a readable trace.
+            self._file.write("[\n")
+            self._write_event({"name": "process_name", "ph": "M", "pid": self._pid, "tid": 0,
+                               "args": {"name": "AutoMacro"}})
+
+    def span(self, name: str, cat: str = "", **args):
+        return _Span(self, name, cat, args)
+
+    def _write_event(self, event):
+        if not self._first:
+            self._file.write(",\n")
+        self._first = False
+        self._file.write(json.dumps(event, ensure_ascii=False, default=str))
+
+    def _record(self, span: _Span, end_ns: int):
+        thread = threading.current_thread()
+        tid = thread.ident
+        ts_us = (span.start_ns - self._origin_ns) / 1000.0
+        dur_us = (end_ns - span.start_ns) / 1000.0
+        with self._lock:
+            if self._file is None:
+                return
+            self.span_count += 1
+            if self.jsonl:
+                record = {"name": span.name, "cat": span.cat, "ts_us": round(ts_us, 1),
+                          "dur_us": round(dur_us, 1), "thread": thread.name}
+                record.update(span.args)
+                self._file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+                return
+            if tid not in self._threads:
+                self._threads.add(tid)
+                self._write_event({"name": "thread_name", "ph": "M", "pid": self._pid, "tid": tid,
+                                   "args": {"name": thread.name}})
+            self._write_event({"name": span.name, "cat": span.cat, "ph": "X", "pid": self._pid, "tid": tid,
+                               "ts": round(ts_us, 1), "dur": round(dur_us, 1), "args": span.args})
+
+    def close(self):
+        with self._lock:
+            if self._file is None:
+                return
+            if not self.jsonl:
+                self._file.write("\n]\n")
+            self._file.close()
+            self._file = None
+
+
+_tracer = NullTracer()
+
+
+def get_tracer():
+    """The active tracer (a NullTracer while tracing is off)."""
+    return _tracer
+
+
+def set_tracer(tracer=None):
+    """Activates tracer for the matchers and capture; None turns tracing off."""
+    global _tracer
+    _tracer = tracer if tracer is not None else NullTracer()
+
+
+def resolve_trace_path(target: Optional[str], label: str = "run") -> Optional[str]:
+    """
+    Turns a trace flag into a file path. A directory (or a path ending with a separator)
+    gets a timestamped trace_<label>_<time>.json file inside it.
+    """
+    if not target:
+        return None
+    if os.path.isdir(target) or target.endswith(("/", os.sep)):
+        safe_label = "".join(c if c.isalnum() or c in "-_" else "_" for c in label) or "run"
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        return os.path.join(target, f"trace_{safe_label}_{stamp}.json")
+    return target
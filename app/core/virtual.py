@@ -0,0 +1,361 @@
+"""
+Virtual screen for headless, deterministic workflow runs (CI, load tests, benchmarks).
+
+VirtualScreen is a capture backend (app.core.capture) and an input backend
+(app.core.input) at once: captures return the current frame of a scene, and the
+runner's clicks / keys switch frames through transitions:
+  - click: a click inside a logical region (or anywhere) shows another frame
+  - key:   a hotkey shows another frame
+  - after: the frame is replaced after N seconds on screen (loading screens, timers)
+Time is a VirtualClock shared with the runner, so "Wait 3s" steps, AWAIT timeouts
+and "after" transitions cost no real time.
+
+Scenes are built in code, from a recorded frame sequence (from_sequence /
+from_directory: each click or each interval advances one frame), or from a JSON
+scene file (load_scene):
+
+    {
+      "size": [1920, 1200], "scale": 2, "start": "lobby", "time_limit_s": 600,
+      "frames": {
+        "lobby": {"place": [{"image": "assets/start.png", "at": [1578, 741]}]},
+        "shot":  {"image": "recorded/shot.png"},
+        "end":   {"stop": true}
+      },
+      "transitions": [
+        {"from": "lobby", "click": [1578, 741, 53, 58], "to": "battle"},
+        {"from": "battle", "after_s": 5, "to": "lobby"},
+        {"from": "*", "key": "esc", "to": "end"}
+      ]
+    }
+
+size / at / click regions are logical (the coordinates flow.json uses); "image"
+files are physical pixels and are resolved relative to the scene file. Frames
+without an image get a seeded textured background ("background": "#RRGGBB").
+"""
+import glob
+import json
+import logging
+import os
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from typing import List, NamedTuple, Optional, Tuple
+
+from app.core.capture import CaptureBackend, frame_cache, set_capture_backend
+from app.core.clock import VirtualClock
+from app.core.input import InputBackend, get_input_backend, set_input_backend
+
+logger = logging.getLogger("app.core.virtual")
+
+ANY_FRAME = "*"
+MAX_CHAINED_TRANSITIONS = 100 # "after" transitions applied per capture (guards 0s cycles)
+
+
+class Transition(NamedTuple):
+    source: str # Frame name or ANY_FRAME
+    kind: str # "click" | "key" | "after"
+    target: str
+    region: Optional[Tuple[int, int, int, int]] = None # click: logical, None = anywhere
+    keys: Tuple[str, ...] = ()
+    delay_s: float = 0.0
+
+
+class VirtualEvent(NamedTuple):
+    time_s: float # Virtual time
+    kind: str # "frame" | "move" | "click" | "key" | "write"
+    frame: str # Frame on screen when it happened (the new one for "frame")
+    detail: object = None
+
+
+def _normalize_keys(keys) -> Tuple[str, ...]:
+    if isinstance(keys, str):
+        keys = keys.split("+")
+    return tuple(k.strip().lower() for k in keys if k.strip())
+
+
+def textured_background(width: int, height: int, color: str = "#2B2D31", seed: int = 0):
+    """Seeded low-contrast texture (flat fills make normalized template matching degenerate)."""
+    import cv2
+    import numpy as np
+
+    hex_color = color.lstrip("#")
+    r, g, b = (int(hex_color[i:i+2], 16) for i in (0, 2, 4))
+    rng = np.random.default_rng(seed)
+    small = rng.integers(-24, 25, (max(1, height // 16), max(1, width // 16), 3)).astype(np.float32)
+    noise = cv2.resize(small, (width, height), interpolation=cv2.INTER_LINEAR)
+    frame = np.array((b, g, r), np.float32) + noise
+    return np.clip(frame, 0, 255).astype(np.uint8)
+
+
+class VirtualScreen(CaptureBackend, InputBackend):
+    """Scripted screen + mouse / keyboard. Frames are BGR images in physical pixels."""
+    name = "virtual"
+
+    def __init__(self, clock: Optional[VirtualClock] = None, scale: Optional[float] = None,
+                 time_limit_s: Optional[float] = None):
+        self.clock = clock or VirtualClock()
+        self.scale = scale # Physical px per logical px; None keeps get_screen_scale()
+        self.time_limit_s = time_limit_s # attach(): stop the runner after this much virtual time
+        self.frames = {}
+        self.stop_frames = set() # attach(): stop the runner when one of these is shown
+        self.current: Optional[str] = None
+        self.shown_at = 0.0
+        self.visits = Counter() # Frame name -> times shown
+        self.cursor = (0, 0) # Logical
+        self.events: List[VirtualEvent] = []
+        self._transitions: List[Transition] = []
+        self._size = None
+        self._lock = threading.RLock()
+
+    # --- Scene building ---
+
+    def add_frame(self, name: str, image, stop: bool = False) -> "VirtualScreen":
+        size = (image.shape[1], image.shape[0])
+        if self._size is None:
+            self._size = size
+        elif size != self._size:
+            raise ValueError(f"Frame '{name}' is {size[0]}x{size[1]}, expected {self._size[0]}x{self._size[1]}")
+        self.frames[name] = image
+        if stop:
+            self.stop_frames.add(name)
+        if self.current is None:
+            self.show(name)
+        return self
+
+    def on_click(self, source: str, region: Optional[Tuple[int, int, int, int]], target: str) -> "VirtualScreen":
+        """A click inside region (logical x, y, w, h; None = anywhere) on source shows target."""
+        self._transitions.append(Transition(source, "click", target, region=tuple(region) if region else None))
+        return self
+
+    def on_key(self, source: str, keys, target: str) -> "VirtualScreen":
+        """A hotkey ("esc", "ctrl+c" or a key tuple) on source shows target."""
+        self._transitions.append(Transition(source, "key", target, keys=_normalize_keys(keys)))
+        return self
+
+    def after(self, source: str, seconds: float, target: str) -> "VirtualScreen":
+        """source is replaced by target after it has been on screen for seconds."""
+        self._transitions.append(Transition(source, "after", target, delay_s=max(0.0, float(seconds))))
+        return self
+
+    def show(self, name: str, at_s: Optional[float] = None):
+        with self._lock:
+            if name not in self.frames:
+                raise KeyError(f"Unknown frame: {name}")
+            self.current = name
+            self.shown_at = self.clock.monotonic() if at_s is None else at_s
+            self.visits[name] += 1
+            self.events.append(VirtualEvent(self.shown_at, "frame", name))
+
+    def _matching(self, kind: str):
+        return [t for t in self._transitions
+                if t.kind == kind and (t.source == self.current or t.source == ANY_FRAME)]
+
+    def _apply_timed(self):
+        for _ in range(MAX_CHAINED_TRANSITIONS):
+            due = [t for t in self._matching("after") if self.shown_at + t.delay_s <= self.clock.monotonic()]
+            if not due:
+                return
+            first = min(due, key=lambda t: t.delay_s)
+            # Keep the schedule exact even if nobody looked at the screen for a while
+            self.show(first.target, at_s=self.shown_at + first.delay_s)
+
+    # --- CaptureBackend ---
+
+    def screen_size(self) -> Tuple[int, int]:
+        if self._size is None:
+            raise RuntimeError("Virtual screen has no frames")
+        return self._size
+
+    def grab(self, rect: Optional[Tuple[int, int, int, int]] = None):
+        with self._lock:
+            self._apply_timed()
+            frame = self.frames[self.current]
+        if rect is None:
+            return frame
+        px, py, pw, ph = rect
+        return frame[py:py+ph, px:px+pw]
+
+    # --- InputBackend ---
+
+    def position(self) -> Tuple[int, int]:
+        return self.cursor
+
+    def move_to(self, x: int, y: int):
+        with self._lock:
+            self._apply_timed()
+            self.cursor = (int(x), int(y))
+            self.events.append(VirtualEvent(self.clock.monotonic(), "move", self.current, self.cursor))
+
+    def click(self, x: Optional[int] = None, y: Optional[int] = None):
+        with self._lock:
+            if x is not None and y is not None:
+                self.move_to(x, y)
+            self._apply_timed()
+            cx, cy = self.cursor
+            self.events.append(VirtualEvent(self.clock.monotonic(), "click", self.current, self.cursor))
+            for t in self._matching("click"):
+                if t.region is None or (
+                    t.region[0] <= cx < t.region[0] + t.region[2] and t.region[1] <= cy < t.region[1] + t.region[3]
+                ):
+                    self.show(t.target)
+                    return
+
+    def hotkey(self, *keys: str):
+        pressed = _normalize_keys(keys)
+        with self._lock:
+            self._apply_timed()
+            self.events.append(VirtualEvent(self.clock.monotonic(), "key", self.current, pressed))
+            for t in self._matching("key"):
+                if t.keys == pressed:
+                    self.show(t.target)
+                    return
+
+    def write(self, text: str, interval: float = 0.0):
+        with self._lock:
+            self.events.append(VirtualEvent(self.clock.monotonic(), "write", self.current, text))
+            self.clock.advance(interval * len(text))
+
+    # --- Run helpers ---
+
+    @property
+    def clicks(self) -> List[VirtualEvent]:
+        return [e for e in self.events if e.kind == "click"]
+
+    def limit_reached(self) -> bool:
+        if self.current in self.stop_frames:
+            return True
+        return self.time_limit_s is not None and self.clock.monotonic() >= self.time_limit_s
+
+    def attach(self, runner):
+        """Stops runner once a stop frame is shown or time_limit_s of virtual time passed."""
+        def on_progress(index, name):
+            if self.limit_reached() and runner.is_running:
+                runner.log_signal.emit(f"[VIRTUAL] Limit reached at {self.clock.monotonic():.1f}s (frame: {self.current}).")
+                runner.stop()
+
+        runner.progress_signal.connect(on_progress)
+        return runner
+
+    def summary(self) -> dict:
+        return {
+            "virtual_time_s": round(self.clock.monotonic(), 3),
+            "frame": self.current,
+            "clicks": len(self.clicks),
+            "visits": dict(self.visits),
+        }
+
+    # --- Constructors ---
+
+    @classmethod
+    def from_sequence(cls, frames, interval_s: Optional[float] = None, **kwargs) -> "VirtualScreen":
+        """
+        Recorded frames (BGR images or image paths), shown in order. Each click advances
+        one frame, or with interval_s every interval_s seconds. The last frame stays.
+        """
+        import cv2
+
+        screen = cls(**kwargs)
+        names = []
+        for i, frame in enumerate(frames):
+            if isinstance(frame, str):
+                path = frame
+                frame = cv2.imread(path)
+                if frame is None:
+                    raise ValueError(f"Cannot read frame: {path}")
+            names.append(str(i))
+            screen.add_frame(names[-1], frame)
+        for current, following in zip(names, names[1:]):
+            if interval_s is None:
+                screen.on_click(current, None, following)
+            else:
+                screen.after(current, interval_s, following)
+        return screen
+
+    @classmethod
+    def from_directory(cls, directory: str, interval_s: Optional[float] = None, **kwargs) -> "VirtualScreen":
+        """from_sequence over the PNG files of a directory, in name order."""
+        paths = sorted(glob.glob(os.path.join(directory, "*.png")))
+        if not paths:
+            raise ValueError(f"No PNG frames in {directory}")
+        return cls.from_sequence(paths, interval_s=interval_s, **kwargs)
+
+
+def load_scene(path: str, clock: Optional[VirtualClock] = None) -> VirtualScreen:
+    """Builds a VirtualScreen from a JSON scene file (format in the module docstring)."""
+    import cv2
+
+    with open(path, "r") as f:
+        spec = json.load(f)
+    base_dir = os.path.dirname(os.path.abspath(path))
+    scale = float(spec.get("scale", 1.0))
+    screen = VirtualScreen(clock=clock, scale=scale, time_limit_s=spec.get("time_limit_s"))
+
+    def read(rel_path):
+        image = cv2.imread(os.path.join(base_dir, rel_path))
+        if image is None:
+            raise ValueError(f"Cannot read scene image: {rel_path}")
+        return image
+
+    logical_w, logical_h = spec.get("size", (1920, 1080))
+    width, height = int(logical_w * scale), int(logical_h * scale)
+    start = spec.get("start")
+    names = list(spec["frames"])
+    if start:
+        names.sort(key=lambda name: name != start) # start is shown first
+    for i, name in enumerate(names):
+        frame_spec = spec["frames"][name]
+        if frame_spec.get("image"):
+            frame = read(frame_spec["image"])
+        else:
+            frame = textured_background(width, height, frame_spec.get("background", spec.get("background", "#2B2D31")), seed=i)
+        for item in frame_spec.get("place", []):
+            image = read(item["image"])
+            x, y = int(item["at"][0] * scale), int(item["at"][1] * scale)
+            h, w = image.shape[:2]
+            h, w = min(h, frame.shape[0] - y), min(w, frame.shape[1] - x)
+            if h > 0 and w > 0:
+                frame[y:y+h, x:x+w] = image[:h, :w]
+        screen.add_frame(name, frame, stop=bool(frame_spec.get("stop")))
+
+    for t in spec.get("transitions", []):
+        if "click" in t:
+            screen.on_click(t["from"], t["click"], t["to"])
+        elif "key" in t:
+            screen.on_key(t["from"], t["key"], t["to"])
+        elif "after_s" in t:
+            screen.after(t["from"], t["after_s"], t["to"])
+        else:
+            raise ValueError(f"Transition needs click, key or after_s: {t}")
+    return screen
+
+
+@contextmanager
+def use_virtual_screen(screen: VirtualScreen):
+    """
+    Makes screen the capture and input backend for the duration of the block.
+    The frame cache is turned off meanwhile: its age is real time, and a frame that is
+    replaced in virtual time must not be served from a capture taken a moment ago.
+    """
+    previous_capture = frame_cache._backend
+    previous_input = get_input_backend()
+    previous_max_age = frame_cache.max_age_ms
+    previous_scale = os.environ.get("AUTOMACRO_SCREEN_SCALE")
+    set_capture_backend(screen)
+    set_input_backend(screen)
+    frame_cache.max_age_ms = 0
+    if screen.scale is not None:
+        # Logical <-> physical conversions of the runner must agree with the scene
+        os.environ["AUTOMACRO_SCREEN_SCALE"] = str(screen.scale)
+    try:
+        yield screen
+    finally:
+        if previous_scale is None:
+            os.environ.pop("AUTOMACRO_SCREEN_SCALE", None)
+        else:
+            os.environ["AUTOMACRO_SCREEN_SCALE"] = previous_scale
+        frame_cache.max_age_ms = previous_max_age
+        set_input_backend(previous_input)
+        if previous_capture is None:
+            frame_cache.set_backend(None)
+        else:
+            set_capture_backend(previous_capture)
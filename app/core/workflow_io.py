@@ -0,0 +1,381 @@
+"""
+flow.json reading and writing.
+
+Files are written in a compact, versioned format (FLOW_FORMAT_VERSION, stored as the
+first key): every step keeps its id and type, but conditions and actions only keep
+the fields their type uses (e.g. a TIME condition only wait_time_s, loop settings only
+on LOOP/UNTIL steps), and only when they differ from the model default. Pydantic
+fills the rest back in on load.
+
+Loading a file that is already in the current format is one
+Workflow.model_validate_json() pass over the raw bytes (parsing and validation in
+pydantic's core, no intermediate dicts). Anything else (the old full dumps, the
+pre-pydantic legacy layouts) goes through json.load + migration once and is written
+back in the current format, so the next open takes the fast path. Legacy files are
+kept next to it as flow.legacy.json.
+
+Defaults are not stored, so changing a model default changes what existing files
+mean: bump FLOW_FORMAT_VERSION and migrate when that happens.
+"""
+import json
+import logging
+import os
+import re
+import uuid
+from typing import Optional, Set
+
+from app.core.models import (
+    Workflow, Step, Condition, Action, InputDelays,
+    StepType, ConditionType, ActionType, LoopMode, KeyInputMode,
+)
+from app.constants import FLOW_FORMAT_VERSION
+
+logger = logging.getLogger("app.core.workflow_io")
+
+_FORMAT_HEADER = re.compile(rb'\s*\{\s*"format"\s*:\s*(\d+)')
+
+_CONDITION_FIELDS = {
+    ConditionType.IMAGE: {"target_image_path", "match_mode", "confidence", "scan_interval_ms", "timeout_s",
+                          "deduplicate_radius_px", "search_mode", "grayscale", "watch_area"},
+    ConditionType.COLOR: {"target_color", "color_tolerance", "color_palette", "color_min_area_px", "match_index",
+                          "watch_area"},
+    ConditionType.TEXT: {"target_text", "watch_area"},
+    ConditionType.TIME: {"wait_time_s"},
+}
+_RETRY_FIELDS = {"retry_timeout_s", "retry_interval_ms"}
+_LOOP_FIELDS = {"loop_mode", "loop_max_count", "loop_count_variable", "loop_infinite"}
+_STEP_CONDITION_FIELDS = {
+    StepType.AWAIT: _RETRY_FIELDS,
+    StepType.LOOP: _LOOP_FIELDS,
+    StepType.UNTIL: _LOOP_FIELDS | _RETRY_FIELDS,
+}
+
+_ACTION_FIELDS = {
+    ActionType.MOVE: {"target_x", "target_y"},
+    ActionType.CLICK: {"target_x", "target_y"},
+    ActionType.GOTO: {"goto_step_index"},
+    ActionType.KEY: {"key_sequence", "key_mode"},
+    ActionType.NONE: set(),
+}
+_STEP_ACTION_FIELDS = {
+    StepType.INPUT: {"input_variable_name", "input_prompt"},
+}
+
+
+def _compact_step(data: dict) -> dict:
+    """Keeps only the fields the step's types use (data is already dumped with exclude_defaults)."""
+    step_type = StepType(data.get("type", StepType.GENERAL.value))
+    condition = data["condition"]
+    keep = {"type"} | _CONDITION_FIELDS.get(ConditionType(condition["type"]), set()) | _STEP_CONDITION_FIELDS.get(step_type, set())
+    data["condition"] = {k: v for k, v in condition.items() if k in keep}
+    action = data["action"]
+    keep = {"type"} | _ACTION_FIELDS.get(ActionType(action["type"]), set()) | _STEP_ACTION_FIELDS.get(step_type, set())
+    data["action"] = {k: v for k, v in action.items() if k in keep}
+    if data.get("children"):
+        data["children"] = [_compact_step(child) for child in data["children"]]
+    return data
+
+
+def dump_workflow(workflow: Workflow) -> str:
+    """The workflow as compact flow.json text."""
+    data = {
+        "format": FLOW_FORMAT_VERSION,
+        "name": workflow.name,
+        "created_at": workflow.created_at,
+        "updated_at": workflow.updated_at,
+    }
+    # One dump of the whole tree, then per-type filtering in Python
+    dumped = workflow.model_dump(mode="json", exclude_defaults=True, include={"input_delays", "steps"})
+    if dumped.get("input_delays"):
+        data["input_delays"] = dumped["input_delays"]
+    data["steps"] = [_compact_step(step) for step in dumped.get("steps", [])]
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+def save_workflow(path: str, workflow: Workflow):
+    """Writes flow.json atomically (a crash mid-save never leaves a truncated file)."""
+    text = dump_workflow(workflow)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def ensure_unique_ids(steps, seen: Optional[Set[str]] = None):
+    """Gives steps without an id, or with one already used in the tree (pasted copies), a new UUID."""
+    seen = set() if seen is None else seen
+    for step in steps:
+        if not step.id or step.id in seen:
+            step.id = str(uuid.uuid4())
+        seen.add(step.id)
+        if step.children:
+            ensure_unique_ids(step.children, seen)
+
+
+def load_workflow(path: str, name: Optional[str] = None, migrate: bool = True) -> Optional[Workflow]:
+    """
+    Reads flow.json. Returns None if the file is missing, unreadable, invalid or of another format version.
+    Files without a format (older layouts) are rewritten in the current one (migrate=False leaves them alone).
+    """
+    name = name or os.path.basename(os.path.dirname(os.path.abspath(path)))
+    try:
+        with open(path, "rb") as f:
+            raw = f.read()
+    except OSError:
+        return None
+
+    header = _FORMAT_HEADER.match(raw)
+    if header and int(header.group(1)) == FLOW_FORMAT_VERSION:
+        try:
+            workflow = Workflow.model_validate_json(raw)
+            ensure_unique_ids(workflow.steps)
+            return workflow
+        except ValueError as e:
+            logger.error(f"{path}: invalid format {FLOW_FORMAT_VERSION} flow.json ({e})")
+            return None
+
+    try:
+        data = json.loads(raw)
+    except ValueError as e:
+        logger.error(f"{path}: unreadable flow.json ({e})")
+        return None
+
+    if isinstance(data, dict) and "format" in data:
+        # Versioned files are never migrated: a bad or newer one is left as it is
+        if data["format"] != FLOW_FORMAT_VERSION:
+            logger.error(f"{path}: unsupported flow format {data['format']!r} (this version reads {FLOW_FORMAT_VERSION})")
+            return None
+        try:
+            workflow = Workflow(**data)
+        except Exception as e:
+            logger.error(f"{path}: invalid format {FLOW_FORMAT_VERSION} flow.json ({e})")
+            return None
+        ensure_unique_ids(workflow.steps)
+        return workflow
+
+    legacy = False
+    try:
+        workflow = Workflow(**data)
+    except Exception:
+        workflow = migrate_legacy_workflow(data, name)
+        legacy = True
+    if workflow is None:
+        return None
+    ensure_unique_ids(workflow.steps)
+
+    if migrate:
+        try:
+            if legacy:
+                os.replace(path, _legacy_backup_path(path))
+            save_workflow(path, workflow)
+            logger.info(f"Migrated {path} to flow format {FLOW_FORMAT_VERSION}")
+        except OSError as e:
+            logger.warning(f"Could not migrate {path}: {e}")
+    return workflow
+
+
+def _legacy_backup_path(path: str) -> str:
+    """flow.legacy.json next to path, or flow.legacy.<n>.json if earlier backups exist."""
+    directory = os.path.dirname(path)
+    backup = os.path.join(directory, "flow.legacy.json")
+    n = 1
+    while os.path.exists(backup):
+        backup = os.path.join(directory, f"flow.legacy.{n}.json")
+        n += 1
+    return backup
+
+
+def migrate_legacy_workflow(data, workflow_name: str) -> Optional[Workflow]:
+    """Converts the pre-pydantic flow.json layouts (nested image/color/wait dicts, lowercase types)."""
+    if not isinstance(data, dict):
+        if isinstance(data, list):
+            data = {"name": workflow_name, "steps": data, "created_at": "", "updated_at": ""}
+        else:
+            return None
+
+    raw_steps = data.get("steps")
+    if not isinstance(raw_steps, list):
+        return None
+
+    if not data.get("name"):
+        data["name"] = workflow_name
+
+    def normalize_condition_type(raw_type):
+        t = str(raw_type or "time").strip().lower()
+        if t == "image":
+            return ConditionType.IMAGE
+        if t == "color":
+            return ConditionType.COLOR
+        if t == "text":
+            return ConditionType.TEXT
+        return ConditionType.TIME
+
+    def normalize_action_type(raw_type):
+        t = str(raw_type or "none").strip().lower()
+        if t == "move":
+            return ActionType.MOVE
+        if t == "click":
+            return ActionType.CLICK
+        if t in ("keypress", "key", "key_press"):
+            return ActionType.KEY
+        if t == "goto":
+            return ActionType.GOTO
+        return ActionType.NONE
+
+    def normalize_step_type(raw_type):
+        t = str(raw_type or "general").strip().lower()
+        if t in ("if", "condition_if"):
+            return StepType.IF
+        if t in ("until", "loop"):
+            return StepType.LOOP
+        if t == "await":
+            return StepType.AWAIT
+        if t == "switch":
+            return StepType.SWITCH
+        if t == "input":
+            return StepType.INPUT
+        if t == "break":
+            return StepType.BREAK
+        return StepType.GENERAL
+
+    def to_list(value):
+        if isinstance(value, tuple):
+            return list(value)
+        if isinstance(value, list):
+            return value
+        return None
+
+    def parse_legacy_step(raw_step):
+        if not isinstance(raw_step, dict):
+            return None
+
+        condition_raw = raw_step.get("condition", {})
+        action_raw = raw_step.get("action", {})
+        condition_type = normalize_condition_type(condition_raw.get("type"))
+
+        condition_kwargs = {
+            "type": condition_type,
+            "target_text": None,
+            "target_color": None,
+            "watch_area": None,
+            "target_image_path": None,
+            "match_mode": getattr(condition_raw, "match_mode", "SINGLE"),
+            "confidence": 0.8,
+            "scan_interval_ms": 500,
+            "timeout_s": 10.0,
+            "deduplicate_radius_px": 10,
+            "wait_time_s": 0.0,
+            "retry_timeout_s": 5.0,
+            "retry_interval_ms": 500,
+            "loop_mode": LoopMode.UNTIL_FOUND,
+            "loop_max_count": 100,
+            "loop_count_variable": None,
+            "loop_infinite": False,
+            "color_tolerance": 0,
+            "match_index": 0,
+        }
+
+        if condition_type == ConditionType.IMAGE:
+            image_raw = condition_raw.get("image") if isinstance(condition_raw.get("image"), dict) else {}
+            condition_kwargs["target_image_path"] = image_raw.get("template_path")
+            condition_kwargs["confidence"] = image_raw.get("confidence", condition_raw.get("confidence", 0.8))
+            condition_kwargs["scan_interval_ms"] = image_raw.get("poll_interval_ms", condition_raw.get("scan_interval_ms", 500))
+            condition_kwargs["timeout_s"] = image_raw.get("timeout_s", condition_raw.get("timeout_s", 10.0))
+            condition_kwargs["deduplicate_radius_px"] = image_raw.get("min_dedup_distance_px", condition_raw.get("deduplicate_radius_px", 10))
+            area = image_raw.get("watch_area") if isinstance(image_raw, dict) else None
+            condition_kwargs["watch_area"] = to_list(area)
+        elif condition_type == ConditionType.COLOR:
+            color_raw = condition_raw.get("color") if isinstance(condition_raw.get("color"), dict) else {}
+            condition_kwargs["target_color"] = color_raw.get("target_color", condition_raw.get("target_color"))
+            condition_kwargs["color_tolerance"] = color_raw.get("tolerance", condition_raw.get("color_tolerance", 0))
+            condition_kwargs["match_index"] = color_raw.get("match_index", condition_raw.get("match_index", 0))
+            area = color_raw.get("watch_area") if isinstance(color_raw, dict) else None
+            condition_kwargs["watch_area"] = to_list(area)
+        elif condition_type == ConditionType.TEXT:
+            text_raw = condition_raw.get("text")
+            if isinstance(text_raw, dict):
+                condition_kwargs["target_text"] = text_raw.get("value")
+            else:
+                condition_kwargs["target_text"] = condition_raw.get("target_text")
+        else:
+            wait_raw = condition_raw.get("wait")
+            if isinstance(wait_raw, dict):
+                condition_kwargs["wait_time_s"] = float(wait_raw.get("seconds", condition_raw.get("wait_time_s", 0.0)))
+            else:
+                condition_kwargs["wait_time_s"] = float(condition_raw.get("wait_time_s", 0.0))
+
+        action_type = normalize_action_type(action_raw.get("type"))
+        action_kwargs = {
+            "type": action_type,
+            "target_x": None,
+            "target_y": None,
+            "goto_step_index": None,
+            "input_variable_name": action_raw.get("input_variable_name", "count"),
+            "input_prompt": action_raw.get("input_prompt", "값을 입력하세요"),
+            "key_sequence": None,
+            "key_mode": KeyInputMode.PRESS,
+        }
+
+        if action_type in (ActionType.MOVE, ActionType.CLICK):
+            position = action_raw.get("move", {}).get("position") if isinstance(action_raw.get("move"), dict) else None
+            if position is None and action_type == ActionType.CLICK:
+                position = action_raw.get("click", {}).get("position") if isinstance(action_raw.get("click"), dict) else None
+            if position is None:
+                position = action_raw.get("position")
+            if isinstance(position, (list, tuple)) and len(position) == 2:
+                action_kwargs["target_x"] = int(position[0])
+                action_kwargs["target_y"] = int(position[1])
+        elif action_type == ActionType.GOTO:
+            goto_raw = action_raw.get("goto", {}) if isinstance(action_raw.get("goto"), dict) else {}
+            action_kwargs["goto_step_index"] = int(goto_raw.get("step_index", action_raw.get("goto_step_index", 1) or 1))
+        elif action_type == ActionType.KEY:
+            key_raw = action_raw.get("keypress", {}) if isinstance(action_raw.get("keypress"), dict) else {}
+            if key_raw is None or not isinstance(key_raw, dict):
+                key_raw = {}
+            action_kwargs["key_sequence"] = key_raw.get("text", action_raw.get("key_sequence", ""))
+            key_mode = str(key_raw.get("mode", "press")).lower()
+            action_kwargs["key_mode"] = KeyInputMode.PRESS if key_mode in ("press", "hotkey", "combo") else KeyInputMode.TYPE
+
+        step_type = normalize_step_type(raw_step.get("step_type") or raw_step.get("type"))
+        step = Step(
+            id=str(raw_step.get("id") or uuid.uuid4()),
+            name=str(raw_step.get("name") or raw_step.get("label") or "Step"),
+            type=step_type,
+            condition=Condition(**condition_kwargs),
+            action=Action(**action_kwargs),
+        )
+
+        loop_mode = raw_step.get("loop_mode")
+        if loop_mode:
+            step.condition.loop_mode = LoopMode.WHILE_FOUND if str(loop_mode).lower().startswith("while") else LoopMode.UNTIL_FOUND
+        step.condition.loop_infinite = bool(raw_step.get("loop_infinite", step.condition.loop_infinite))
+        step.condition.loop_count_variable = raw_step.get("loop_count_variable")
+        if raw_step.get("loop_max_count") is not None:
+            try:
+                step.condition.loop_max_count = int(raw_step.get("loop_max_count"))
+            except Exception:
+                pass
+
+        step.step_interval_ms = raw_step.get("step_interval_ms", raw_step.get("interval_ms", step.step_interval_ms))
+        child_list = raw_step.get("children") or raw_step.get("steps") or []
+        if not isinstance(child_list, list):
+            child_list = []
+        for child_raw in child_list:
+            child_step = parse_legacy_step(child_raw)
+            if child_step:
+                step.children.append(child_step)
+
+        return step
+
+    steps = []
+    for raw_step in raw_steps:
+        parsed = parse_legacy_step(raw_step)
+        if parsed:
+            steps.append(parsed)
+
+    return Workflow(
+        name=data.get("name", workflow_name),
+        steps=steps,
+        created_at=data.get("created_at", ""),
+        updated_at=data.get("updated_at", ""),
+    )
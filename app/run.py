@@ -0,0 +1,222 @@
+"""
+Headless workflow runner (no Qt).
+
+    python -m app.run <workflow> [--events] [--input VALUE ...]
+
+<workflow> is a workflow name under workflows/, a workflow directory, or a flow.json path.
+Works over SSH or under a virtual framebuffer (e.g. xvfb-run python -m app.run demo);
+PyQt6 and the editor modules are never imported. With --virtual SCENE.json the run needs
+no display at all: screen, mouse and keyboard are a scripted scene (app.core.virtual)
+and waits take virtual time, e.g.
+    python -m app.run sample --virtual benchmarks/scenes/sample.json --time-limit 300
+
+Output on stdout is one line per log message, or with --events one JSON object per line:
+    {"event": "start" | "log" | "progress" | "input_request" | "finished", "time": <epoch s>, ...}
+INPUT steps take the --input values in order, then read one line per prompt from stdin.
+Exit code: 0 if every step succeeded (with --virtual: also if the time limit or a stop
+frame ended the run), 1 if a step failed or the run was stopped (Ctrl+C), 2 if the
+workflow or scene could not be loaded.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+from app.utils.common import get_workflows_dir, is_debug_mode
+
+logger = logging.getLogger("app.run")
+
+DEFAULT_INPUT_VALUE = "1" # Same fallback as the GUI input dialog
+
+
+def resolve_workflow_path(target: str) -> str:
+    """Returns the flow.json path for a workflow name, directory or file."""
+    if os.path.isfile(target):
+        return os.path.abspath(target)
+    if os.path.isdir(target):
+        return os.path.abspath(os.path.join(target, "flow.json"))
+    return os.path.join(get_workflows_dir(), target, "flow.json")
+
+
+def load_workflow(path: str):
+    from app.core.workflow_io import load_workflow as read_workflow
+
+    if not os.path.exists(path):
+        raise FileNotFoundError(path)
+    workflow = read_workflow(path)
+    if workflow is None:
+        raise ValueError(f"Not a readable workflow: {path}")
+    return workflow
+
+
+class EventPrinter:
+    """Writes runner events to a stream as plain text or JSON lines."""
+
+    def __init__(self, stream=None, as_json: bool = False):
+        self.stream = stream or sys.stdout
+        self.as_json = as_json
+        self._lock = threading.Lock()
+
+    def emit(self, event: str, **fields):
+        with self._lock:
+            if self.as_json:
+                record = {"event": event, "time": round(time.time(), 3)}
+                record.update(fields)
+                self.stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+            elif event == "log":
+                self.stream.write(f"[{time.strftime('%H:%M:%S')}] {fields['message']}\n")
+            elif event == "input_request":
+                self.stream.write(f"[{time.strftime('%H:%M:%S')}] INPUT: {fields['prompt']}\n")
+            elif event == "finished":
+                status = "OK" if fields.get("ok") else "FAILED"
+                self.stream.write(f"[{time.strftime('%H:%M:%S')}] {status} ({fields.get('duration_s')}s)\n")
+            self.stream.flush()
+
+
+class InputProvider:
+    """Answers INPUT prompts from preset values, then from stdin lines."""
+
+    def __init__(self, values=None, stream=None):
+        self.values = deque(values or [])
+        self.stream = stream or sys.stdin
+
+    def answer(self, prompt: str) -> str:
+        if self.values:
+            return self.values.popleft()
+        if self.stream.isatty():
+            sys.stderr.write(f"{prompt}: ")
+            sys.stderr.flush()
+        line = self.stream.readline()
+        if not line:
+            logger.warning(f"No input for '{prompt}'. Using {DEFAULT_INPUT_VALUE}.")
+            return DEFAULT_INPUT_VALUE
+        return line.rstrip("\r\n")
+
+
+def run_workflow(workflow, workflow_dir: str, printer: EventPrinter, inputs: InputProvider,
+                 attach=None, **runner_kwargs) -> bool:
+    """
+    Runs the workflow on a worker thread; Ctrl+C stops it. Returns True if every step succeeded.
+    attach(runner) is called before the run starts (e.g. VirtualScreen.attach).
+    """
+    from app.core.engine import WorkflowRunner
+
+    runner = WorkflowRunner(workflow, workflow_dir=workflow_dir, **runner_kwargs)
+    if attach is not None:
+        attach(runner)
+    runner.log_signal.connect(lambda message: printer.emit("log", message=message))
+    runner.progress_signal.connect(lambda index, name: printer.emit("progress", index=index, name=name))
+
+    def on_input_requested(prompt):
+        printer.emit("input_request", prompt=prompt)
+        runner.set_input_value(inputs.answer(prompt))
+
+    runner.request_input_signal.connect(on_input_requested)
+
+    printer.emit("start", workflow=workflow.name, steps=len(workflow.steps))
+    start = time.monotonic()
+    worker = threading.Thread(target=runner.run, name="workflow-runner", daemon=True)
+    worker.start()
+    try:
+        while worker.is_alive():
+            worker.join(0.2)
+    except KeyboardInterrupt:
+        runner.stop()
+        worker.join()
+
+    printer.emit("finished", ok=runner.succeeded, duration_s=round(time.monotonic() - start, 3))
+    return runner.succeeded
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.run", description="Run a workflow without the GUI.")
+    parser.add_argument("workflow", help="Workflow name (under workflows/), directory, or flow.json path")
+    parser.add_argument("--events", action="store_true", help="Print JSON lines events instead of plain log lines")
+    parser.add_argument("--input", action="append", default=[], metavar="VALUE",
+                        help="Answer for the next INPUT step (repeatable)")
+    parser.add_argument("--capture-backend", choices=["auto", "mss", "pyautogui"],
+                        help="Screen capture backend (default: AUTOMACRO_CAPTURE_BACKEND or auto)")
+    parser.add_argument("--input-backend", choices=["auto", "xtest", "pyautogui"],
+                        help="Mouse / keyboard backend (default: AUTOMACRO_INPUT_BACKEND or auto)")
+    parser.add_argument("--watch-area-margin", type=int, default=None, metavar="PX",
+                        help="Extra logical px searched around watch areas")
+    parser.add_argument("--no-change-detection", action="store_true",
+                        help="Retry failed checks on a fixed interval instead of waiting for screen changes")
+    parser.add_argument("--trace", metavar="PATH",
+                        help="Write per-step timing spans: *.jsonl for JSON lines, otherwise Chrome trace JSON "
+                             "(a directory gets a timestamped file)")
+    parser.add_argument("--virtual", metavar="SCENE",
+                        help="Run against a scripted scene file instead of the real screen / mouse "
+                             "(no display needed, waits take virtual time)")
+    parser.add_argument("--time-limit", type=float, metavar="SECONDS",
+                        help="With --virtual: stop after this much virtual time (default: the scene's time_limit_s)")
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+
+    # Logs go to stderr, stdout is reserved for events
+    logging.basicConfig(
+        stream=sys.stderr,
+        level=logging.DEBUG if is_debug_mode() else logging.WARNING,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    path = resolve_workflow_path(args.workflow)
+    try:
+        workflow = load_workflow(path)
+    except FileNotFoundError:
+        sys.stderr.write(f"Workflow not found: {path}\n")
+        return 2
+    except Exception as e:
+        sys.stderr.write(f"Failed to load workflow {path}: {e}\n")
+        return 2
+
+    if args.capture_backend:
+        from app.core.capture import set_capture_backend
+        set_capture_backend(args.capture_backend)
+    if args.input_backend:
+        from app.core.input import set_input_backend
+        set_input_backend(args.input_backend)
+
+    runner_kwargs = {"change_detection": not args.no_change_detection}
+    if args.watch_area_margin is not None:
+        runner_kwargs["watch_area_margin_px"] = args.watch_area_margin
+    if args.trace:
+        runner_kwargs["trace_path"] = args.trace
+
+    printer = EventPrinter(as_json=args.events)
+    inputs = InputProvider(args.input)
+    if not args.virtual:
+        ok = run_workflow(workflow, os.path.dirname(path), printer, inputs, **runner_kwargs)
+        return 0 if ok else 1
+
+    from app.core.virtual import load_scene, use_virtual_screen
+    try:
+        screen = load_scene(args.virtual)
+    except Exception as e:
+        sys.stderr.write(f"Failed to load scene {args.virtual}: {e}\n")
+        return 2
+    if args.time_limit is not None:
+        screen.time_limit_s = args.time_limit
+    with use_virtual_screen(screen):
+        ok = run_workflow(
+            workflow, os.path.dirname(path), printer, inputs,
+            attach=screen.attach, clock=screen.clock, **runner_kwargs
+        )
+    summary = screen.summary()
+    printer.emit("log", message=(
+        f"[VIRTUAL] {summary['virtual_time_s']}s virtual, {summary['clicks']} click(s), "
+        f"frames shown: {summary['visits']}"
+    ))
+    # Reaching the time limit / a stop frame is how a virtual run of an endless workflow ends
+    return 0 if ok or screen.limit_reached() else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,4 @@
 import os
-import json
 from PyQt6.QtWidgets import (
     QMainWindow, QWidget, QHBoxLayout, QVBoxLayout, QPushButton, QSplitter, QMessageBox, QCheckBox, QApplication,
     QTreeWidgetItemIterator
@@ -11,7 +10,7 @@ from app.ui.inspector import PropertyInspectorWidget
 from app.ui.overlay import Overlay
 from app.core.models import Workflow, Step, ConditionType, ActionType, Condition, Action, StepType
 from app.utils.common import get_workflows_dir
-from app.utils.screen_utils import get_screen_scale, set_window_size_percentage
+from app.utils.screen_utils import get_screen_scale, set_window_size_percentage, store_captured_pixmap
 import uuid
 
 class WorkflowEditor(QMainWindow):
@@ -117,34 +116,17 @@ class WorkflowEditor(QMainWindow):
         self.show()
 
     def _load_workflow(self, name: str) -> Workflow:
+        from app.core.workflow_io import load_workflow
         path = os.path.join(get_workflows_dir(), name, "flow.json")
-        workflow = None
-        if os.path.exists(path):
-            with open(path, "r") as f:
-                try:
-                    data = json.load(f)
-                    workflow = Workflow(**data)
-                except:
-                    pass
-        
+        workflow = load_workflow(path, name)
         if not workflow:
             workflow = Workflow(name=name, created_at="", updated_at="")
-            
-        # Migration: Ensure all steps have unique IDs (UUIDs)
-        # Verify if migration is needed (simplistic check: re-assign all to be safe)
-        def update_ids_recursive(steps):
-            for step in steps:
-                step.id = str(uuid.uuid4())
-                if step.children:
-                    update_ids_recursive(step.children)
-                    
-        update_ids_recursive(workflow.steps)
         return workflow
 
     def _save_workflow(self):
+        from app.core.workflow_io import save_workflow
         path = os.path.join(get_workflows_dir(), self.workflow_name, "flow.json")
-        with open(path, "w") as f:
-            f.write(self.workflow.json())
+        save_workflow(path, self.workflow)
         self.has_unsaved_changes = False
         QMessageBox.information(self, "Saved", "Workflow saved successfully.")
 
@@ -425,7 +407,6 @@ class WorkflowEditor(QMainWindow):
         # rect.x/y/w/h are in logical points. 
         # grabWindow takes logical coords, but returns physical pixel pixmap.
         
-        import datetime
         from PyQt6.QtGui import QGuiApplication
         
         screen = QGuiApplication.primaryScreen()
@@ -435,17 +416,9 @@ class WorkflowEditor(QMainWindow):
         # This is exactly what we want for High-DPI template matching!
         pixmap = screen.grabWindow(0, rect.x(), rect.y(), rect.width(), rect.height())
         
-        assets_dir = os.path.join(get_workflows_dir(), self.workflow_name, "assets")
-        if not os.path.exists(assets_dir):
-            os.makedirs(assets_dir)
-            
-        filename = f"target_{int(datetime.datetime.now().timestamp())}.png"
-        path = os.path.join(assets_dir, filename)
-        pixmap.save(path)
-        
-        rel_path = os.path.join("assets", filename)
-        
-        current_step.condition.target_image_path = rel_path
+        # Stored by content in workflows/.assets, so re-capturing the same thing reuses the file
+        workflow_dir = os.path.join(get_workflows_dir(), self.workflow_name)
+        current_step.condition.target_image_path = store_captured_pixmap(pixmap, workflow_dir)
         self.inspector.step_props.load_step(current_step)
         self._refresh_canvas_item()
 
@@ -1,4 +1,4 @@
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QStackedWidget, QLabel, QLineEdit, QFormLayout
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QStackedWidget, QLabel, QLineEdit, QFormLayout, QSpinBox
 from PyQt6.QtCore import pyqtSignal
 from app.ui.widgets import StepPropertiesWidget
 from app.core.models import Step, Workflow
@@ -13,6 +13,19 @@ class WorkflowPropertiesWidget(QWidget):
         self.desc_edit = QLineEdit()
         layout.addRow("Name:", self.name_edit)
         layout.addRow("Description:", self.desc_edit)
+
+        # Pauses after each input action (Workflow.input_delays)
+        self.delay_spins = {}
+        for field, label in (
+            ("move_ms", "Delay after Move (ms):"),
+            ("click_ms", "Delay after Click (ms):"),
+            ("key_ms", "Delay after Key (ms):"),
+            ("type_interval_ms", "Typing Interval (ms):"),
+        ):
+            spin = QSpinBox(); spin.setRange(0, 10000); spin.setSingleStep(10)
+            spin.valueChanged.connect(self._on_delays_changed)
+            self.delay_spins[field] = spin
+            layout.addRow(label, spin)
         self.setLayout(layout)
         
         self.workflow = None
@@ -21,7 +34,17 @@ class WorkflowPropertiesWidget(QWidget):
     def load_workflow(self, workflow: Workflow):
         self.workflow = workflow
         self.name_edit.setText(workflow.name)
+        for field, spin in self.delay_spins.items():
+            spin.blockSignals(True)
+            spin.setValue(getattr(workflow.input_delays, field))
+            spin.blockSignals(False)
         # self.desc_edit.setText(workflow.description) # Assuming description exists
+
+    def _on_delays_changed(self, _value):
+        if self.workflow:
+            for field, spin in self.delay_spins.items():
+                setattr(self.workflow.input_delays, field, spin.value())
+            self.workflow_changed.emit()
         
     def _on_name_changed(self, text):
         if self.workflow:
@@ -1,12 +1,16 @@
 import os
-import json
+import time
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QListWidget, QListWidgetItem, QPushButton, QMessageBox, QLabel, QCheckBox
 )
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QFileSystemWatcher, QTimer
+from PyQt6.QtGui import QIcon
 from app.utils.common import get_workflows_dir
+from app.core.catalog import WorkflowCatalog
 from app.core.models import Workflow
+from app.core.workflow_io import save_workflow
 from app.utils.screen_utils import set_window_size_percentage
+from app.constants import CATALOG_WATCH_DEBOUNCE_MS
 
 class WorkflowManager(QWidget):
     def __init__(self, on_edit_workflow, on_run_workflow):
@@ -51,7 +55,21 @@ class WorkflowManager(QWidget):
         self.edit_btn.clicked.connect(self._edit_workflow)
         self.run_btn.clicked.connect(self._run_workflow)
         self.del_btn.clicked.connect(self._delete_workflow)
-        
+
+        # Catalog: names/counts come from the index, flow.json is only parsed when it changed
+        workflows_dir = get_workflows_dir()
+        os.makedirs(workflows_dir, exist_ok=True)
+        self.catalog = WorkflowCatalog(workflows_dir)
+        self._dirty_folders = set()
+        self._rescan = False
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self._on_path_changed)
+        self.watcher.fileChanged.connect(self._on_path_changed)
+        self.watch_timer = QTimer(self)
+        self.watch_timer.setSingleShot(True)
+        self.watch_timer.setInterval(CATALOG_WATCH_DEBOUNCE_MS)
+        self.watch_timer.timeout.connect(self._apply_changes)
+
         self.refresh_list()
 
     def _toggle_always_on_top(self, state):
@@ -63,27 +81,75 @@ class WorkflowManager(QWidget):
         self.show()
 
     def refresh_list(self):
+        """Full rescan (stats every folder; only changed flow.json files are parsed)."""
+        self.catalog.refresh()
+        self._populate()
+        self._update_watches()
+
+    def _populate(self):
+        current = self.list_widget.currentItem()
+        current_folder = current.data(Qt.ItemDataRole.UserRole) if current else None
         self.list_widget.clear()
-        workflows_dir = get_workflows_dir()
-        if not os.path.exists(workflows_dir):
-            os.makedirs(workflows_dir)
-            
-        for name in os.listdir(workflows_dir):
-            if os.path.isdir(os.path.join(workflows_dir, name)):
-                # Try to read the real name from flow.json
-                display_text = name
-                json_path = os.path.join(workflows_dir, name, "flow.json")
-                if os.path.exists(json_path):
-                    try:
-                        with open(json_path, 'r') as f:
-                            data = json.load(f)
-                            if "name" in data:
-                                display_text = f"{data['name']} ({name})"
-                    except: pass
-                
-                item = QListWidgetItem(display_text)
-                item.setData(Qt.ItemDataRole.UserRole, name) # Store folder name
-                self.list_widget.addItem(item)
+        workflows_dir = self.catalog.workflows_dir
+        for entry in self.catalog.list():
+            display_text = f"{entry.name} ({entry.folder})" if entry.flow_size else entry.folder
+            item = QListWidgetItem(display_text)
+            item.setData(Qt.ItemDataRole.UserRole, entry.folder) # Store folder name
+            tooltip = f"{entry.step_count} steps, {entry.asset_count} images"
+            if entry.last_run:
+                finished = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry.last_run.finished_at))
+                result = "succeeded" if entry.last_run.succeeded else "failed/stopped"
+                tooltip += f"\nLast run: {finished}, {result}, {entry.last_run.duration_s:.1f}s"
+            item.setToolTip(tooltip)
+            if entry.thumbnail:
+                item.setIcon(QIcon(os.path.join(workflows_dir, entry.folder, entry.thumbnail)))
+            self.list_widget.addItem(item)
+            if entry.folder == current_folder:
+                self.list_widget.setCurrentItem(item)
+
+    def _update_watches(self):
+        # The workflows dir (folders added/removed), each folder (assets/, renamed saves) and
+        # each flow.json (in-place saves). Files replaced by a rename drop out of the watcher,
+        # so this runs again after every update.
+        workflows_dir = self.catalog.workflows_dir
+        wanted = {workflows_dir}
+        for entry in self.catalog.list():
+            folder_path = os.path.join(workflows_dir, entry.folder)
+            wanted.add(folder_path)
+            for sub in ("assets", "flow.json"):
+                sub_path = os.path.join(folder_path, sub)
+                if os.path.exists(sub_path):
+                    wanted.add(sub_path)
+        watched = set(self.watcher.files()) | set(self.watcher.directories())
+        if watched - wanted:
+            self.watcher.removePaths(list(watched - wanted))
+        if wanted - watched:
+            self.watcher.addPaths(list(wanted - watched))
+
+    def _on_path_changed(self, path):
+        workflows_dir = self.catalog.workflows_dir
+        rel = os.path.relpath(path, workflows_dir)
+        if rel == ".":
+            self._rescan = True
+        else:
+            self._dirty_folders.add(rel.split(os.sep)[0])
+        self.watch_timer.start()
+
+    def _apply_changes(self):
+        folders, self._dirty_folders = self._dirty_folders, set()
+        if self._rescan:
+            self._rescan = False
+            self.catalog.refresh()
+        else:
+            for folder in folders:
+                self.catalog.update_folder(folder)
+        self._populate()
+        self._update_watches()
+
+    def record_run(self, folder_name, succeeded, duration_s):
+        """Stores the stats of a finished run in the catalog."""
+        self.catalog.record_run(folder_name, succeeded, duration_s)
+        self._populate()
 
     def _new_workflow(self):
         try:
@@ -101,8 +167,7 @@ class WorkflowManager(QWidget):
                 updated_at=str(datetime.datetime.now())
             )
             
-            with open(os.path.join(path, "flow.json"), "w") as f:
-                f.write(workflow.json())
+            save_workflow(os.path.join(path, "flow.json"), workflow)
                 
             self.refresh_list()
         except Exception as e:
@@ -1,14 +1,44 @@
 from PyQt6.QtWidgets import (
-    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTextEdit, QProgressBar, QCheckBox, QApplication
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QPlainTextEdit, QProgressBar, QCheckBox, QApplication
 )
-from PyQt6.QtCore import Qt, pyqtSlot, QTimer
+from PyQt6.QtCore import Qt, QObject, pyqtSignal, pyqtSlot, QTimer
 from app.core.engine import WorkflowRunner
+from app.core.log_channel import LogChannel, LogRollup, LogFileWriter, log_file_path
+from app.constants import LOG_DRAIN_INTERVAL_MS, LOG_VIEW_MAX_LINES
 from app.utils.screen_utils import set_window_size_percentage
 
+
+class RunnerSignals(QObject):
+    """
+    Re-emits a (Qt-free) WorkflowRunner's signals as Qt signals.
+    Create it on the GUI thread: slots connected here are then queued onto the GUI
+    thread even though the runner emits from its worker thread.
+    """
+    progress_signal = pyqtSignal(int, str) # Step Index, Step Name
+    log_signal = pyqtSignal(str)
+    finished_signal = pyqtSignal()
+    request_input_signal = pyqtSignal(str) # Prompt. Answer with runner.set_input_value
+
+    def __init__(self, runner: WorkflowRunner, parent=None):
+        super().__init__(parent)
+        runner.progress_signal.connect(self.progress_signal.emit)
+        runner.log_signal.connect(self.log_signal.emit)
+        runner.finished_signal.connect(self.finished_signal.emit)
+        runner.request_input_signal.connect(self.request_input_signal.emit)
+
+
 class RunnerWindow(QWidget):
     def __init__(self, runner: WorkflowRunner):
         super().__init__()
         self.runner = runner
+        self.signals = RunnerSignals(runner, self)
+        # Log / progress go through a ring buffer drained on a timer, not one Qt event per message.
+        # The full log is written to logs/ in the background.
+        self.log_file = LogFileWriter(log_file_path(runner.workflow.name))
+        self.log_channel = LogChannel(file_writer=self.log_file)
+        self.log_channel.attach(runner)
+        self.log_rollup = LogRollup()
+        self._shown_progress = None
         self.setWindowTitle("Workflow Runner")
         set_window_size_percentage(self, width_pct=0.3, height_pct=0.3)
 
@@ -36,10 +66,15 @@ class RunnerWindow(QWidget):
         self.progress_bar = QProgressBar()
         self.layout.addWidget(self.progress_bar)
         
-        # Log Area
-        self.log_area = QTextEdit()
+        # Log Area (bounded; older lines are in the log file)
+        self.log_area = QPlainTextEdit()
         self.log_area.setReadOnly(True)
+        self.log_area.setMaximumBlockCount(LOG_VIEW_MAX_LINES)
         self.layout.addWidget(self.log_area)
+        self.log_timer = QTimer(self)
+        self.log_timer.setInterval(LOG_DRAIN_INTERVAL_MS)
+        self.log_timer.timeout.connect(self._drain_log)
+        self.log_timer.start()
         
         # Stop Button
         self.stop_btn = QPushButton("STOP (Cmd+. or Option+C)")
@@ -58,10 +93,8 @@ class RunnerWindow(QWidget):
         self.esc_shortcut = QShortcut(QKeySequence.StandardKey.Cancel, self)
         self.esc_shortcut.activated.connect(self._stop_workflow)
         
-        # Connect Signals
-        self.runner.progress_signal.connect(self._on_progress)
-        self.runner.log_signal.connect(self._on_log)
-        self.runner.finished_signal.connect(self._on_finished)
+        # Connect Signals (log / progress are polled by _drain_log)
+        self.signals.finished_signal.connect(self._on_finished)
         
         # Always on Top
         self.always_on_top_cb = QCheckBox("Always on Top")
@@ -75,16 +108,29 @@ class RunnerWindow(QWidget):
             self.setWindowFlags(self.windowFlags() & ~Qt.WindowType.WindowStaysOnTopHint)
         self.show()
         
-    @pyqtSlot(int, str)
-    def _on_progress(self, index, name):
-        self.status_label.setText(f"Step {index + 1}: {name}")
-        
-    @pyqtSlot(str)
-    def _on_log(self, message):
-        self.log_area.append(message)
-        
+    def _drain_log(self, final: bool = False):
+        progress = self.log_channel.progress
+        if progress != self._shown_progress and progress[0]:
+            self._shown_progress = progress
+            self.status_label.setText(f"Step {progress[0] + 1}: {progress[1]}")
+
+        records, dropped = self.log_channel.drain()
+        lines = []
+        if dropped:
+            lines.append(f"... {dropped} log line(s) skipped (full log: {self.log_file.path})")
+        lines += self.log_rollup.feed(records)
+        if final:
+            lines += self.log_rollup.flush(0, force=True)
+        if lines:
+            # One append per batch instead of one per message
+            self.log_area.appendPlainText("\n".join(lines))
+
     @pyqtSlot()
     def _on_finished(self):
+        self._drain_log(final=True)
+        self.log_timer.stop()
+        self.log_file.close()
+        self.log_area.appendPlainText(f"Log saved: {self.log_file.path}")
         self.status_label.setText("Finished")
         self.stop_btn.setText("Close Window")
         self.stop_btn.setStyleSheet("background-color: #4CAF50; color: white; font-weight: bold; padding: 10px;")
@@ -105,7 +151,7 @@ class RunnerWindow(QWidget):
         
     def _stop_workflow(self):
         self.runner.stop()
-        self.log_area.append("Stop requested...")
+        self.log_channel.push("Stop requested...")
         if self.overlay:
             self.overlay.close()
             self.overlay = None
@@ -136,13 +182,15 @@ class RunnerWindow(QWidget):
                 QApplication.processEvents()
         except Exception as e:
             print(f"DEBUG: Error creating overlay: {e}")
-            self.log_area.append(f"Error showing overlay: {e}")
+            self.log_channel.push(f"Error showing overlay: {e}")
             
         # Minimize removed per user request (logic: "cannot close it")
         # Start normal but try not to steal focus via WA_ShowWithoutActivating
         
     def closeEvent(self, event):
         self._stop_hotkey_listener()
+        self.log_timer.stop()
+        self.log_file.close(timeout=1.0)
         if self.overlay:
             self.overlay.close()
         super().closeEvent(event)
@@ -157,11 +205,11 @@ class RunnerWindow(QWidget):
              })
              self.listener.start()
              self.hotkey_available = True
-             self.log_area.append("Global Hotkey enabled: Cmd+C / Ctrl+C / Stop Button")
+             self.log_channel.push("Global Hotkey enabled: Cmd+C / Ctrl+C / Stop Button")
         except ImportError:
-             self.log_area.append("pynput not found. Global hotkeys disabled. Use window shortcuts (Cmd+., Esc, or Stop Button).")
+             self.log_channel.push("pynput not found. Global hotkeys disabled. Use window shortcuts (Cmd+., Esc, or Stop Button).")
         except Exception as e:
-             self.log_area.append(f"Global hotkey error: {e}. Use window shortcuts (Cmd+., Esc, or Stop Button).")
+             self.log_channel.push(f"Global hotkey error: {e}. Use window shortcuts (Cmd+., Esc, or Stop Button).")
         
     def _stop_hotkey_listener(self):
         if hasattr(self, 'listener') and self.listener:
@@ -0,0 +1,463 @@
+"""
+Item model behind the V2 editor canvas.
+
+StepTreeModel mirrors the workflow's step tree (one node per step, kept in an
+id -> node index) and describes each row as a StepCard: the texts and buttons the
+canvas delegate paints. sync() diffs the model against the edited step lists and
+only emits removes/moves/inserts for rows whose place changed and dataChanged for
+cards whose text changed, so an edit does not rebuild the whole canvas.
+
+Only QtCore is used here (no widgets).
+"""
+import logging
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from PyQt6.QtCore import QAbstractItemModel, QModelIndex, Qt
+
+from app.core.models import ActionType, ConditionType, LoopMode, Step, StepType
+
+logger = logging.getLogger("app.ui.step_tree")
+
+STEP_ROLE = Qt.ItemDataRole.UserRole
+CARD_ROLE = Qt.ItemDataRole.UserRole + 1
+
+CONDITION_EDIT = "조건 편집"
+CONDITION_ADD = "조건 추가"
+CONDITION_CLEAR = "조건 비우기"
+
+
+class StepCard(NamedTuple):
+    index: str            # "1.2"
+    flow_kind: str        # if / loop / await / switch / break / input / normal
+    title: str
+    tag: str
+    type_text: str
+    summary: str          # Shown when there are no segments
+    segments: Tuple[Tuple[str, bool], ...] # (text, opens the condition)
+    condition_button: Optional[str] # CONDITION_EDIT / CONDITION_ADD, None without a condition slot
+    clear_button: bool
+
+
+def _to_bool(value) -> bool:
+    if isinstance(value, bool):
+        return value
+    if value is None:
+        return False
+    if isinstance(value, (int, float)):
+        return bool(value)
+    return str(value).lower() in {"1", "true", "yes", "y"}
+
+
+def _type_value(step: Step) -> str:
+    t = step.type
+    if isinstance(t, StepType):
+        return t.value
+    t = str(t).strip().upper()
+    if t.startswith("STEPTYPE."):
+        t = t.split(".", 1)[1]
+    return t
+
+
+def is_container(step: Step) -> bool:
+    return step.type in [StepType.IF, StepType.LOOP, StepType.AWAIT, StepType.UNTIL, StepType.SWITCH]
+
+
+def needs_condition_slot(step: Step) -> bool:
+    t = _type_value(step)
+    if t == StepType.LOOP.value:
+        return not _to_bool(step.condition.loop_infinite)
+    return t in {StepType.IF.value, StepType.AWAIT.value, StepType.UNTIL.value}
+
+
+def is_condition_like(step: Step) -> bool:
+    if not step:
+        return False
+    if step.type == StepType.CONDITION:
+        return True
+    return step.condition.type in (ConditionType.IMAGE, ConditionType.COLOR, ConditionType.TEXT)
+
+
+def has_inline_condition(step: Step) -> bool:
+    c = step.condition
+    if c.type == ConditionType.IMAGE:
+        return bool(c.target_image_path)
+    if c.type == ConditionType.COLOR:
+        return bool(c.target_color)
+    if c.type == ConditionType.TEXT:
+        return bool(c.target_text)
+    return False
+
+
+def has_condition_child(step: Step) -> bool:
+    return bool(step.children) and is_condition_like(step.children[0])
+
+
+def condition_target(step: Step) -> Step:
+    """The step the condition buttons/links of a card open."""
+    if has_condition_child(step):
+        return step.children[0]
+    return step
+
+
+def _inline_condition_text(step: Step) -> str:
+    c = step.condition
+    if c.type == ConditionType.IMAGE:
+        return "이미지 탐색"
+    if c.type == ConditionType.COLOR:
+        return "색상 탐색"
+    if c.type == ConditionType.TEXT:
+        return "텍스트 탐색"
+    if c.type == ConditionType.TIME:
+        return "시간 대기"
+    return "미설정"
+
+
+def _flow_kind(step: Step) -> str:
+    return {
+        StepType.IF: "if",
+        StepType.LOOP: "loop",
+        StepType.AWAIT: "await",
+        StepType.SWITCH: "switch",
+        StepType.BREAK: "break",
+        StepType.INPUT: "input",
+    }.get(step.type, "normal")
+
+
+def _title_text(step: Step) -> str:
+    if step.type == StepType.LOOP and step.condition.loop_infinite:
+        return "Loop (while 1)"
+    return step.name
+
+
+def _type_text(step: Step) -> str:
+    if step.type == StepType.IF:
+        return "IF"
+    if step.type == StepType.LOOP:
+        if step.condition.loop_infinite:
+            return "LOOP(while1)"
+        return "LOOP"
+    if step.type == StepType.BREAK:
+        return "Break"
+    if step.type == StepType.AWAIT:
+        return "AWAIT"
+    if step.type == StepType.SWITCH:
+        return "SWITCH"
+    if step.type == StepType.INPUT:
+        return "Input"
+    if step.condition.type == ConditionType.IMAGE:
+        return "Image"
+    if step.condition.type == ConditionType.COLOR:
+        return "Color"
+    if step.condition.type == ConditionType.TEXT:
+        return "Text"
+    if step.condition.type == ConditionType.TIME and step.action.type == ActionType.NONE:
+        return "Wait"
+    if step.action.type == ActionType.MOVE:
+        return "Move"
+    if step.action.type == ActionType.CLICK:
+        return "Click"
+    if step.action.type == ActionType.GOTO:
+        return "Goto"
+    if step.action.type == ActionType.KEY:
+        return "Key"
+    return str(step.type)
+
+
+def _tag_text(step: Step) -> str:
+    if step.type == StepType.IF:
+        return "IF"
+    if step.type == StepType.LOOP:
+        return "WHILE(1)" if step.condition.loop_infinite else "LOOP"
+    if step.type == StepType.AWAIT:
+        return "AWAIT"
+    if step.type == StepType.SWITCH:
+        return "SWITCH"
+    if step.type == StepType.BREAK:
+        return "BREAK"
+    return _type_text(step)
+
+
+def _loop_limit(step: Step) -> str:
+    if step.condition.loop_max_count is None:
+        return ""
+    return f" / 최대 {step.condition.loop_max_count}회"
+
+
+def _summary_segments(step: Step) -> List[Tuple[str, bool]]:
+    if step.type in [StepType.IF, StepType.AWAIT]:
+        if has_condition_child(step):
+            cond_name = step.children[0].name or "Condition"
+            body_count = max(0, len(step.children) - 1)
+            return [("조건", True), (f"적용 조건: {cond_name}", True), (f"본문: {body_count}개", False)]
+        if has_inline_condition(step):
+            return [
+                ("조건", True),
+                (f"적용 조건: {_inline_condition_text(step)} (인라인)", True),
+                (f"본문: {len(step.children)}개", False),
+            ]
+        return [("조건", True), ("적용 조건: 미설정", False), (f"본문: {len(step.children)}개", False)]
+
+    if step.type == StepType.LOOP:
+        if step.condition.loop_infinite:
+            return [("반복 모드: while(1)", False), (f"본문: {len(step.children)}개", False)]
+        if has_condition_child(step):
+            cond_name = step.children[0].name or "Condition"
+            mode = step.condition.loop_mode.value if step.condition else "UNTIL_FOUND"
+            mode_kr = "while(조건 충족 시)" if mode == LoopMode.WHILE_FOUND.value else "until(조건 미충족 시)"
+            body_count = max(0, len(step.children) - 1)
+            return [
+                (f"반복 모드: {mode_kr}{_loop_limit(step)}", False),
+                ("적용 조건", True),
+                (cond_name, True),
+                (f"본문: {body_count}개", False),
+            ]
+        mode = "while" if step.condition.loop_mode == LoopMode.WHILE_FOUND else "until"
+        if has_inline_condition(step):
+            return [
+                (f"반복 모드: {mode}{_loop_limit(step)}", False),
+                ("적용 조건", True),
+                (f"{_inline_condition_text(step)} (인라인)", True),
+            ]
+        return [
+            (f"반복 모드: {mode}{_loop_limit(step)}", False),
+            ("적용 조건", True),
+            ("미설정", False),
+            (f"본문: {len(step.children)}개", False),
+        ]
+
+    if step.type == StepType.SWITCH:
+        return [(f"분기: {len(step.children)}개 (최고 점수 분기 실행)", False)]
+    return []
+
+
+def _summary_text(step: Step) -> str:
+    # Only reached for steps without segments (IF/AWAIT/LOOP/SWITCH always have some)
+    if step.type == StepType.BREAK:
+        return "현재 루프 즉시 종료"
+    if step.type == StepType.INPUT:
+        var_name = step.action.input_variable_name or "count"
+        return f"Input Variable: {var_name}"
+    if step.condition.type == ConditionType.TIME and step.action.type == ActionType.NONE:
+        return f"Wait {step.condition.wait_time_s:.1f}s"
+    if step.action.type == ActionType.GOTO:
+        return f"Goto Step #{step.action.goto_step_index or 1}"
+    return ""
+
+
+def describe_step(step: Step, index: str) -> StepCard:
+    segments = tuple(_summary_segments(step))
+    condition_button = None
+    clear_button = False
+    if needs_condition_slot(step):
+        has_condition = has_condition_child(step) or has_inline_condition(step)
+        condition_button = CONDITION_EDIT if has_condition else CONDITION_ADD
+        clear_button = has_condition
+    return StepCard(
+        index=index,
+        flow_kind=_flow_kind(step),
+        title=_title_text(step),
+        tag=_tag_text(step),
+        type_text=_type_text(step),
+        summary="" if segments else _summary_text(step),
+        segments=segments,
+        condition_button=condition_button,
+        clear_button=clear_button,
+    )
+
+
+class _Node:
+    __slots__ = ("step", "parent", "row", "children", "card")
+
+    def __init__(self, step: Optional[Step], parent: Optional["_Node"], row: int = 0):
+        self.step = step
+        self.parent = parent
+        self.row = row
+        self.children: List[_Node] = []
+        self.card: Optional[StepCard] = None
+
+
+class StepTreeModel(QAbstractItemModel):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._root = _Node(None, None)
+        self._by_id: Dict[str, _Node] = {}
+
+    # --- Lookups (O(1) through the id index) ---
+
+    def step(self, index: QModelIndex) -> Optional[Step]:
+        node = self._node(index)
+        return node.step if node is not self._root else None
+
+    def index_of(self, step: Optional[Step]) -> QModelIndex:
+        node = self._by_id.get(step.id) if step is not None else None
+        if node is None or node.step is not step:
+            return QModelIndex()
+        return self._index(node)
+
+    def find(self, step_id: str) -> Tuple[Optional[Step], Optional[Step]]:
+        """(step, parent step) for an id; (None, None) if it is not in the tree."""
+        node = self._by_id.get(step_id)
+        if node is None:
+            return None, None
+        return node.step, node.parent.step
+
+    def parent_step(self, step: Step) -> Optional[Step]:
+        node = self._by_id.get(step.id)
+        return node.parent.step if node is not None else None
+
+    def __len__(self):
+        return len(self._by_id)
+
+    # --- Updates ---
+
+    def set_steps(self, steps: List[Step]):
+        """Rebuilds the whole model."""
+        self.beginResetModel()
+        self._root = _Node(None, None)
+        self._by_id = {}
+        for row, step in enumerate(steps):
+            self._root.children.append(self._build(step, self._root, row, str(row + 1)))
+        self.endResetModel()
+
+    def sync(self, steps: List[Step]):
+        """Brings the model in line with the (edited) step tree, touching only the rows that changed."""
+        new_parent: Dict[str, Optional[str]] = {}
+        if not self._collect(steps, None, new_parent):
+            logger.warning("Duplicate step ids in workflow; rebuilding the canvas")
+            self.set_steps(steps)
+            return
+        self._prune(self._root, new_parent)
+        self._reconcile(self._root, steps, "")
+
+    def refresh_step(self, step: Step):
+        """Re-describes one step and its parent (whose summary shows its first child) after a property edit."""
+        node = self._by_id.get(step.id)
+        if node is None:
+            return
+        self._update_card(node, node.card.index)
+        if node.parent is not self._root:
+            self._update_card(node.parent, node.parent.card.index)
+
+    # --- QAbstractItemModel ---
+
+    def index(self, row, column, parent=QModelIndex()):
+        node = self._node(parent)
+        if column != 0 or not 0 <= row < len(node.children):
+            return QModelIndex()
+        return self.createIndex(row, 0, node.children[row])
+
+    def parent(self, index=QModelIndex()):
+        if not index.isValid():
+            return QModelIndex()
+        node = index.internalPointer().parent
+        return self._index(node)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid() and parent.column() != 0:
+            return 0
+        return len(self._node(parent).children)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 1
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        node = index.internalPointer()
+        if role == STEP_ROLE:
+            return node.step
+        if role == CARD_ROLE:
+            return node.card
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.ToolTipRole):
+            return f"#{node.card.index} {node.card.title}"
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemFlag.ItemIsDropEnabled
+        return (Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+                | Qt.ItemFlag.ItemIsDragEnabled | Qt.ItemFlag.ItemIsDropEnabled)
+
+    # --- Internals ---
+
+    def _node(self, index: QModelIndex) -> _Node:
+        return index.internalPointer() if index.isValid() else self._root
+
+    def _index(self, node: _Node) -> QModelIndex:
+        if node is self._root:
+            return QModelIndex()
+        return self.createIndex(node.row, 0, node)
+
+    def _build(self, step: Step, parent: _Node, row: int, index: str) -> _Node:
+        node = _Node(step, parent, row)
+        node.card = describe_step(step, index)
+        self._by_id[step.id] = node
+        for child_row, child in enumerate(step.children):
+            node.children.append(self._build(child, node, child_row, f"{index}.{child_row + 1}"))
+        return node
+
+    def _unindex(self, node: _Node):
+        if self._by_id.get(node.step.id) is node:
+            del self._by_id[node.step.id]
+        for child in node.children:
+            self._unindex(child)
+
+    @staticmethod
+    def _renumber(node: _Node, start: int = 0):
+        for row in range(start, len(node.children)):
+            node.children[row].row = row
+
+    def _collect(self, steps, parent_id, out) -> bool:
+        for step in steps:
+            if step.id in out:
+                return False
+            out[step.id] = parent_id
+            if not self._collect(step.children, step.id, out):
+                return False
+        return True
+
+    def _prune(self, node: _Node, new_parent: Dict[str, Optional[str]]):
+        """Removes rows whose step is gone or now lives under another parent."""
+        parent_id = node.step.id if node.step is not None else None
+        for row in reversed(range(len(node.children))):
+            child = node.children[row]
+            if child.step.id in new_parent and new_parent[child.step.id] == parent_id:
+                self._prune(child, new_parent)
+                continue
+            self.beginRemoveRows(self._index(node), row, row)
+            node.children.pop(row)
+            self._unindex(child)
+            self._renumber(node, row)
+            self.endRemoveRows()
+
+    def _reconcile(self, node: _Node, steps: List[Step], prefix: str):
+        """After _prune, node's rows are a subset of steps in some order: move and insert into place."""
+        parent_index = self._index(node)
+        for row, step in enumerate(steps):
+            index = f"{prefix}{row + 1}"
+            current = node.children[row] if row < len(node.children) else None
+            if current is None or current.step.id != step.id:
+                existing = self._by_id.get(step.id)
+                if existing is not None and existing.parent is node:
+                    # A later sibling (rows before this one already match)
+                    self.beginMoveRows(parent_index, existing.row, existing.row, parent_index, row)
+                    node.children.insert(row, node.children.pop(existing.row))
+                    self._renumber(node, row)
+                    self.endMoveRows()
+                    current = existing
+                else:
+                    self.beginInsertRows(parent_index, row, row)
+                    node.children.insert(row, self._build(step, node, row, index))
+                    self._renumber(node, row)
+                    self.endInsertRows()
+                    continue
+            current.step = step
+            self._update_card(current, index)
+            self._reconcile(current, step.children, f"{index}.")
+
+    def _update_card(self, node: _Node, index: str):
+        card = describe_step(node.step, index)
+        if card != node.card:
+            node.card = card
+            model_index = self._index(node)
+            self.dataChanged.emit(model_index, model_index, [CARD_ROLE, Qt.ItemDataRole.DisplayRole])
@@ -57,7 +57,7 @@ class StepPropertiesWidget(QWidget):
         
         self.name_edit = QLineEdit()
         self.command_combo = QComboBox()
-        self.command_combo.addItems(["Find Image", "Find Color", "Move Mouse", "Click Mouse", "Wait", "Loop", "Await", "Goto", "Input", "Key Press", "Break"])
+        self.command_combo.addItems(["Find Image", "Find Color", "Move Mouse", "Click Mouse", "Wait", "Loop", "Await", "Goto", "Input", "Key Press", "Break", "Switch"])
         self.command_combo.setEnabled(False) # Prevent changing type
         self.command_combo.setVisible(False)
         self.step_type_label = QLabel("Type:")
@@ -112,6 +112,12 @@ class StepPropertiesWidget(QWidget):
         self.img_capture_area_btn = QPushButton("Set Area"); self.img_capture_area_btn.setEnabled(False)
         row_area = QHBoxLayout(); row_area.addWidget(self.img_full_window_cb); row_area.addWidget(self.img_watch_area_edit); row_area.addWidget(self.img_capture_area_btn)
         
+        self.img_search_mode_combo = QComboBox()
+        self.img_search_mode_combo.addItems(["Exhaustive", "Pyramid (Fast)"])
+        self.img_search_mode_combo.setStyleSheet(combo_style)
+        self.img_grayscale_cb = QCheckBox("Grayscale (faster, ignores color)")
+        self.img_grayscale_cb.setToolTip("Match brightness only. Leave off if the target differs from its surroundings only by color.")
+        
         self.img_offset_x = QSpinBox(); self.img_offset_x.setRange(-9999, 9999)
         self.img_offset_y = QSpinBox(); self.img_offset_y.setRange(-9999, 9999)
         row_offset = QHBoxLayout(); row_offset.addWidget(QLabel("X:")); row_offset.addWidget(self.img_offset_x); row_offset.addWidget(QLabel("Y:")); row_offset.addWidget(self.img_offset_y)
@@ -120,6 +126,8 @@ class StepPropertiesWidget(QWidget):
         layout_img.addRow("Preview:", self.img_preview)
         layout_img.addRow("Confidence:", self.img_confidence)
         layout_img.addRow("Search Area:", row_area)
+        layout_img.addRow("Search Mode:", self.img_search_mode_combo)
+        layout_img.addRow("", self.img_grayscale_cb)
         layout_img.addRow("Action Move Offset:", row_offset)
         self.stack.addWidget(self.page_image)
         
@@ -135,6 +143,9 @@ class StepPropertiesWidget(QWidget):
         
         self.color_tolerance = QSpinBox(); self.color_tolerance.setRange(0, 100); self.color_tolerance.setValue(10)
         self.color_match_index = QSpinBox(); self.color_match_index.setRange(0, 99)
+        self.color_palette_edit = QLineEdit(); self.color_palette_edit.setPlaceholderText("#RRGGBB:tol, ... (optional)")
+        self.color_palette_edit.setToolTip("More colors that also count as a match, each with its own tolerance.")
+        self.color_min_area = QSpinBox(); self.color_min_area.setRange(1, 100000); self.color_min_area.setValue(1); self.color_min_area.setSuffix(" px")
         self.color_full_window_cb = QCheckBox("Full Screen"); self.color_full_window_cb.setChecked(True)
         self.color_watch_area_edit = QLineEdit(); self.color_watch_area_edit.setEnabled(False)
         self.color_set_area_btn = QPushButton("Set Area"); self.color_set_area_btn.setEnabled(False)
@@ -142,6 +153,8 @@ class StepPropertiesWidget(QWidget):
         
         layout_col.addRow("Target Color:", row_col)
         layout_col.addRow("Tolerance:", self.color_tolerance)
+        layout_col.addRow("Extra Colors:", self.color_palette_edit)
+        layout_col.addRow("Min Area:", self.color_min_area)
         layout_col.addRow("Match Index:", self.color_match_index)
         layout_col.addRow("Search Area:", row_area_col)
         self.stack.addWidget(self.page_color)
@@ -273,6 +286,19 @@ class StepPropertiesWidget(QWidget):
         layout_break.addRow(break_desc)
         self.stack.addWidget(self.page_break)
 
+        # 11. Switch
+        self.page_switch = QWidget()
+        layout_switch = QFormLayout()
+        self.page_switch.setLayout(layout_switch)
+        switch_desc = QLabel(
+            "하위 If 블록(또는 조건 스텝)이 각각 하나의 분기입니다. 이미지 조건은 한 화면에서 동시에 검사하고 "
+            "가장 높은 점수로 일치한 분기만 실행합니다. 일치하는 이미지가 없으면 나머지 분기(색상/대기 등)를 순서대로 검사합니다."
+        )
+        switch_desc.setWordWrap(True)
+        switch_desc.setStyleSheet("color: #1f2937;")
+        layout_switch.addRow(switch_desc)
+        self.stack.addWidget(self.page_switch)
+
         # Update Loop Page with Variable option
         # We need to recreate or modify the layout logic for Loop since we can't easily insert into existing layout via 'replace' if we don't see it all.
         # But we saw valid Loop logic above. I will modify the previous block (Loop Page) separately or rely on 'load_step' handling visibility.
@@ -296,6 +322,8 @@ class StepPropertiesWidget(QWidget):
         self.img_confidence.valueChanged.connect(self._sync_data)
         self.img_full_window_cb.toggled.connect(self._on_img_fullscreen_toggled)
         self.img_watch_area_edit.textChanged.connect(self._sync_data)
+        self.img_search_mode_combo.currentIndexChanged.connect(self._sync_data)
+        self.img_grayscale_cb.toggled.connect(self._sync_data)
         self.img_offset_x.valueChanged.connect(self._sync_data)
         self.img_offset_y.valueChanged.connect(self._sync_data)
         
@@ -304,6 +332,8 @@ class StepPropertiesWidget(QWidget):
         self.color_val_edit.textChanged.connect(self._update_color_preview)
         self.color_tolerance.valueChanged.connect(self._sync_data)
         self.color_match_index.valueChanged.connect(self._sync_data)
+        self.color_palette_edit.textChanged.connect(self._sync_data)
+        self.color_min_area.valueChanged.connect(self._sync_data)
         self.color_full_window_cb.toggled.connect(self._on_color_fullscreen_toggled)
         self.color_watch_area_edit.textChanged.connect(self._sync_data)
         
@@ -347,6 +377,22 @@ class StepPropertiesWidget(QWidget):
         if checked: self.img_watch_area_edit.clear()
         self._sync_data()
         
+    def _parse_palette(self, text):
+        """'#FF0000:10, #00FF00' -> [PaletteColor]; entries that don't parse are skipped."""
+        from app.core.models import PaletteColor
+        from app.core.color_search import parse_hex_color
+        palette = []
+        for entry in text.split(","):
+            color, _, tol = entry.strip().partition(":")
+            if not color:
+                continue
+            try:
+                parse_hex_color(color)
+                palette.append(PaletteColor(color=color, tolerance=int(tol or 0)))
+            except ValueError:
+                pass
+        return palette
+
     def _on_color_fullscreen_toggled(self, checked):
         self.color_watch_area_edit.setEnabled(not checked)
         self.color_set_area_btn.setEnabled(not checked)
@@ -384,6 +430,12 @@ class StepPropertiesWidget(QWidget):
             self.stack.setCurrentIndex(10)
             self.blockSignals(False)
             return
+        elif step.type == StepType.SWITCH:
+            self.command_combo.setCurrentIndex(11)
+            self.type_display.setText(self.command_combo.itemText(11))
+            self.stack.setCurrentIndex(11)
+            self.blockSignals(False)
+            return
         elif step.type in [StepType.LOOP, StepType.UNTIL]:
             self.command_combo.setCurrentIndex(5) # Goto/Loop page index
             self.type_display.setText(self.command_combo.itemText(5))
@@ -444,6 +496,9 @@ class StepPropertiesWidget(QWidget):
              self.img_watch_area_edit.setText(str(step.condition.watch_area))
         else:
              self.img_full_window_cb.setChecked(True)
+        from app.core.models import ImageSearchMode
+        self.img_search_mode_combo.setCurrentIndex(1 if step.condition.search_mode == ImageSearchMode.PYRAMID else 0)
+        self.img_grayscale_cb.setChecked(bool(step.condition.grayscale))
         
         tx = step.action.target_x or 0
         ty = step.action.target_y or 0
@@ -454,6 +509,8 @@ class StepPropertiesWidget(QWidget):
         self._update_color_preview(step.condition.target_color)
         self.color_tolerance.setValue(step.condition.color_tolerance)
         self.color_match_index.setValue(step.condition.match_index)
+        self.color_palette_edit.setText(", ".join(f"{p.color}:{p.tolerance}" for p in step.condition.color_palette))
+        self.color_min_area.setValue(step.condition.color_min_area_px)
         if step.condition.watch_area and step.condition.type == ConditionType.COLOR:
              self.color_full_window_cb.setChecked(False)
              self.color_watch_area_edit.setText(str(step.condition.watch_area))
@@ -485,6 +542,9 @@ class StepPropertiesWidget(QWidget):
             self.current_step.action.type = ActionType.MOVE
             self.current_step.condition.target_image_path = self.img_path_edit.text()
             self.current_step.condition.confidence = self.img_confidence.value()
+            from app.core.models import ImageSearchMode
+            self.current_step.condition.search_mode = ImageSearchMode.PYRAMID if self.img_search_mode_combo.currentIndex() == 1 else ImageSearchMode.EXHAUSTIVE
+            self.current_step.condition.grayscale = self.img_grayscale_cb.isChecked()
             self.current_step.action.target_x = self.img_offset_x.value()
             self.current_step.action.target_y = self.img_offset_y.value()
             try:
@@ -499,6 +559,8 @@ class StepPropertiesWidget(QWidget):
             self.current_step.condition.target_color = self.color_val_edit.text()
             self.current_step.condition.color_tolerance = self.color_tolerance.value()
             self.current_step.condition.match_index = self.color_match_index.value()
+            self.current_step.condition.color_palette = self._parse_palette(self.color_palette_edit.text())
+            self.current_step.condition.color_min_area_px = self.color_min_area.value()
             try:
                 t = self.color_watch_area_edit.text()
                 self.current_step.condition.watch_area = eval(t) if t else None
@@ -574,6 +636,10 @@ class StepPropertiesWidget(QWidget):
             self.current_step.condition.wait_time_s = 0
             self.current_step.action.type = ActionType.NONE
             self.current_step.action.key_sequence = None
+
+        # 11. Switch
+        elif idx == 11:
+            self.current_step.type = StepType.SWITCH
             
         self.step_changed.emit(self.current_step)
 
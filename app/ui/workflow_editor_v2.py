@@ -5,6 +5,8 @@ ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__fil
 if ROOT_DIR not in sys.path:
     sys.path.insert(0, ROOT_DIR)
 
+from typing import List, NamedTuple, Optional, Tuple
+
 from PyQt6.QtWidgets import (
     QMainWindow,
     QCheckBox,
@@ -12,21 +14,30 @@ from PyQt6.QtWidgets import (
     QAbstractItemView,
     QPushButton,
     QSplitter,
-    QTreeWidget,
-    QTreeWidgetItem,
-    QTreeWidgetItemIterator,
+    QStyle,
+    QStyledItemDelegate,
+    QTreeView,
     QVBoxLayout,
     QWidget,
     QMessageBox,
     QLabel,
-    QFrame,
     QSizePolicy,
     QApplication,
 )
-from PyQt6.QtCore import Qt, pyqtSignal, QMimeData, QRect
-from PyQt6.QtGui import QDrag, QMouseEvent, QGuiApplication
+from PyQt6.QtCore import Qt, pyqtSignal, QEvent, QMimeData, QPoint, QRect, QRectF, QSize
+from PyQt6.QtGui import QColor, QDrag, QFont, QFontMetrics, QMouseEvent, QGuiApplication, QPainter, QPainterPath, QPen
 from app.ui.inspector import PropertyInspectorWidget
 from app.ui.overlay import Overlay
+from app.ui.step_tree import (
+    CARD_ROLE,
+    CONDITION_CLEAR,
+    STEP_ROLE,
+    StepCard,
+    StepTreeModel,
+    condition_target,
+    is_container,
+    needs_condition_slot,
+)
 from app.core.models import (
     Workflow,
     Step,
@@ -38,11 +49,8 @@ from app.core.models import (
     LoopMode,
 )
 from app.utils.common import get_workflows_dir
-from app.utils.screen_utils import set_window_size_percentage
-import json
+from app.utils.screen_utils import set_window_size_percentage, store_captured_pixmap
 import uuid
-import datetime
-from typing import Optional
 
 
 class PaletteButton(QPushButton):
@@ -128,6 +136,7 @@ class BlockPaletteV2(QWidget):
                 ("⏩ Loop until", "조건 충족 시 종료", "Control", "loop_until"),
                 ("🔁 Loop while", "조건 충족 시 계속 실행", "Control", "loop_while"),
                 ("⌛ Await", "조건 대기 후 실행", "Control", "await"),
+                ("🔀 Switch", "가장 잘 맞는 분기 실행", "Control", "switch"),
                 ("🧩 Input", "사용자 입력", "Control", "input"),
                 ("✂️ Break", "최근 루프 종료", "Control", "break"),
             ]),
@@ -169,679 +178,406 @@ class BlockPaletteV2(QWidget):
         )
 
 
-class BlockStepCardWidget(QWidget):
-    step_selected = pyqtSignal(Step)
-    condition_step_requested = pyqtSignal(Step)
-    condition_clear_requested = pyqtSignal(Step)
-
-    def __init__(self, step: Step, index_str: str):
-        super().__init__()
-        self.step = step
-        self._drag_start_pos = None
-
-        self.setObjectName("blockCard")
-        if self.step.type == StepType.IF:
-            self.setProperty("flowKind", "if")
-        elif self.step.type == StepType.LOOP:
-            self.setProperty("flowKind", "loop")
-        elif self.step.type == StepType.AWAIT:
-            self.setProperty("flowKind", "await")
-        elif self.step.type == StepType.BREAK:
-            self.setProperty("flowKind", "break")
-        elif self.step.type == StepType.INPUT:
-            self.setProperty("flowKind", "input")
-        else:
-            self.setProperty("flowKind", "normal")
-        layout = QVBoxLayout()
-        layout.setContentsMargins(6, 6, 6, 6)
-        layout.setSpacing(4)
-        self.setLayout(layout)
+class _CardLayout(NamedTuple):
+    card: QRect
+    header: QRect
+    summary: QRect
+    links: List[Tuple[QRect, str, bool]]   # Summary segments (rect, text, opens the condition)
+    buttons: List[Tuple[QRect, str, str]]  # (rect, text, "condition" / "clear")
 
-        header = QHBoxLayout()
-        header.setSpacing(8)
-
-        idx = QLabel(f"#{index_str}")
-        idx.setStyleSheet("color:#475569; font-size:13px; font-weight:700;")
-        header.addWidget(idx)
-
-        title = QLabel(self._title_text())
-        title.setStyleSheet("font-size:16px; font-weight:700;")
-        header.addWidget(title)
-
-        if self.step.type == StepType.IF:
-            tag = "IF"
-        elif self.step.type == StepType.LOOP:
-            if self.step.condition.loop_infinite:
-                tag = "WHILE(1)"
-            else:
-                tag = "LOOP"
-        elif self.step.type == StepType.AWAIT:
-            tag = "AWAIT"
-        elif self.step.type == StepType.BREAK:
-            tag = "BREAK"
-        else:
-            tag = self._type_text()
-        tag_label = QLabel(tag)
-        tag_label.setStyleSheet("font-size:14px; color:#1d4ed8; font-weight:700;")
-        header.addWidget(tag_label)
-
-        header.addStretch()
-
-        typ = QLabel(self._type_text())
-        typ.setStyleSheet("color:#475569; font-size:12px;")
-        header.addWidget(typ, 0, Qt.AlignmentFlag.AlignRight)
-
-        frame = QFrame()
-        frame.setLayout(header)
-        layout.addWidget(frame)
-
-        summary = self._build_summary_row()
-        layout.addWidget(summary)
-
-        if self._needs_condition_slot():
-            has_inline_condition = self._has_inline_condition()
-            has_condition_child = self._has_condition_child()
-            has_condition = has_condition_child or has_inline_condition
-            condition_layout = QHBoxLayout()
-            if has_condition:
-                condition_btn = QPushButton("조건 편집")
-                condition_btn.setMinimumHeight(24)
-                condition_btn.setStyleSheet(
-                    """
-                    QPushButton {
-                        font-size: 11px;
-                        font-weight: 700;
-                        color: #0f172a;
-                        border: 1px solid #93c5fd;
-                        border-radius: 8px;
-                        padding: 4px 10px;
-                        background: #eff6ff;
-                    }
-                    QPushButton:hover { background: #dbeafe; }
-                    QPushButton:pressed { background: #bfdbfe; }
-                    """
-                )
-                condition_btn.clicked.connect(self._emit_condition_edit)
-            else:
-                condition_btn = QPushButton("조건 추가")
-                condition_btn.setMinimumHeight(24)
-                condition_btn.setStyleSheet(
-                    """
-                    QPushButton {
-                        font-size: 11px;
-                        font-weight: 700;
-                        color: #0f172a;
-                        border: 1px solid #93c5fd;
-                        border-radius: 8px;
-                        padding: 4px 10px;
-                        background: #eff6ff;
-                    }
-                    QPushButton:hover { background: #dbeafe; }
-                    QPushButton:pressed { background: #bfdbfe; }
-                    """
-                )
-                # The card itself is passed when condition is empty, so editor can auto-create
-                # a default condition step (이미지 탐색) in the first slot.
-                condition_btn.clicked.connect(lambda: self.condition_step_requested.emit(self.step))
-            condition_layout.addStretch(1)
-            condition_layout.addWidget(condition_btn)
-
-            if has_condition:
-                clear_btn = QPushButton("조건 비우기")
-                clear_btn.setMinimumHeight(24)
-                clear_btn.setStyleSheet(
-                    """
-                    QPushButton {
-                        font-size: 11px;
-                        font-weight: 700;
-                        color: #0f172a;
-                        border: 1px solid #fda4af;
-                        border-radius: 8px;
-                        padding: 4px 10px;
-                        background: #fee2e2;
-                    }
-                    QPushButton:hover { background: #fecaca; }
-                    QPushButton:pressed { background: #fca5a5; }
-                    """
-                )
-                clear_btn.clicked.connect(self._emit_condition_clear)
-                condition_layout.addWidget(clear_btn)
-            layout.addLayout(condition_layout)
-        self.setStyleSheet(
-            """
-            #blockCard {
-                background-color: #f5f7fb;
-                border: 1px solid #d8e2ff;
-                border-left: 5px solid #3b82c4;
-                border-radius: 10px;
-            }
-            #blockCard:hover {
-                border-color: #8fb4f3;
-                background: #eef2ff;
-            }
-            #blockCard[flowKind=\"if\"] {
-                border-left: 5px solid #3b82c4;
-            }
-            #blockCard[flowKind=\"loop\"] {
-                border-left: 5px solid #8b5cf6;
-            }
-            #blockCard[flowKind=\"await\"] {
-                border-left: 5px solid #0ea5a4;
-            }
-            #blockCard[flowKind=\"break\"] {
-                border-left: 5px solid #f43f5e;
-            }
-            #blockCard[flowKind=\"input\"] {
-                border-left: 5px solid #f59e0b;
-            }
-            """
-        )
 
-    def _needs_condition_slot(self) -> bool:
-        t = self.step.type
-        if isinstance(t, str):
-            t = t.strip().upper()
-            if t.startswith("STEPTYPE."):
-                t = t.split(".", 1)[1]
-        elif isinstance(t, StepType):
-            t = t.value
-        else:
-            t = str(t).upper()
-            if t.startswith("STEPTYPE."):
-                t = t.split(".", 1)[1]
+class StepCardDelegate(QStyledItemDelegate):
+    """Paints a StepCard per row (no widget per step) and handles clicks on its links and buttons."""
 
-        if t == StepType.LOOP.value:
-            loop_infinite = self._to_bool(self.step.condition.loop_infinite)
-            return not loop_infinite
-        return t in {StepType.IF.value, StepType.AWAIT.value, StepType.UNTIL.value}
+    condition_step_requested = pyqtSignal(Step)
+    condition_clear_requested = pyqtSignal(Step)
 
-    @staticmethod
-    def _to_bool(value) -> bool:
-        if isinstance(value, bool):
-            return value
-        if value is None:
+    GAP = 3
+    MARGIN = 6
+    PADDING = 8
+    ACCENT_WIDTH = 5
+    SPACING = 4
+    HEADER_HEIGHT = 24
+    SUMMARY_HEIGHT = 18
+    BUTTON_HEIGHT = 24
+
+    ACCENTS = {
+        "if": "#3b82c4",
+        "loop": "#8b5cf6",
+        "await": "#0ea5a4",
+        "switch": "#2563eb",
+        "break": "#f43f5e",
+        "input": "#f59e0b",
+        "normal": "#3b82c4",
+    }
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._fonts = {}
+
+    def _font(self, base: QFont, px: int, bold: bool = False) -> QFont:
+        key = (base.key(), px, bold)
+        font = self._fonts.get(key)
+        if font is None:
+            font = QFont(base)
+            font.setPixelSize(px)
+            font.setBold(bold)
+            self._fonts[key] = font
+        return font
+
+    def sizeHint(self, option, index):
+        card = index.data(CARD_ROLE)
+        height = 2 * (self.GAP + self.MARGIN) + self.HEADER_HEIGHT + self.SPACING + self.SUMMARY_HEIGHT
+        if card is not None and card.condition_button:
+            height += self.SPACING + self.BUTTON_HEIGHT
+        return QSize(300, height)
+
+    def layout(self, rect: QRect, card: StepCard, base: QFont) -> _CardLayout:
+        card_rect = rect.adjusted(2, self.GAP, -4, -self.GAP)
+        inner = card_rect.adjusted(self.ACCENT_WIDTH + self.PADDING, self.MARGIN, -self.PADDING, -self.MARGIN)
+        header = QRect(inner.left(), inner.top(), inner.width(), self.HEADER_HEIGHT)
+        summary = QRect(inner.left(), header.bottom() + 1 + self.SPACING, inner.width(), self.SUMMARY_HEIGHT)
+
+        links = []
+        fm = QFontMetrics(self._font(base, 12))
+        x = summary.left()
+        for i, (text, clickable) in enumerate(card.segments):
+            if i > 0:
+                x += 12 + fm.horizontalAdvance("|")
+            width = fm.horizontalAdvance(text) + 2 # Slack so that rounding does not elide it
+            if x >= summary.right():
+                break
+            links.append((QRect(x, summary.top(), min(width, summary.right() - x), summary.height()), text, clickable))
+            x += width
+
+        buttons = []
+        if card.condition_button:
+            bfm = QFontMetrics(self._font(base, 11, bold=True))
+            top = summary.bottom() + 1 + self.SPACING
+            right = inner.right()
+            specs = [(card.condition_button, "condition")]
+            if card.clear_button:
+                specs.append((CONDITION_CLEAR, "clear"))
+            for text, kind in reversed(specs):
+                width = bfm.horizontalAdvance(text) + 22
+                buttons.insert(0, (QRect(right - width + 1, top, width, self.BUTTON_HEIGHT), text, kind))
+                right -= width + 6
+        return _CardLayout(card_rect, header, summary, links, buttons)
+
+    def hit_test(self, rect: QRect, card: StepCard, base: QFont, pos: QPoint) -> Optional[str]:
+        """"condition" / "clear" if pos is on a link or button of the card, else None."""
+        layout = self.layout(rect, card, base)
+        for button_rect, _text, kind in layout.buttons:
+            if button_rect.contains(pos):
+                return kind
+        for link_rect, _text, clickable in layout.links:
+            if clickable and link_rect.contains(pos):
+                return "condition"
+        return None
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() not in (QEvent.Type.MouseButtonPress, QEvent.Type.MouseButtonRelease):
             return False
-        if isinstance(value, (int, float)):
-            return bool(value)
-        return str(value).lower() in {"1", "true", "yes", "y"}
-
-    def _has_inline_condition(self) -> bool:
-        c = self.step.condition
-        if c.type == ConditionType.IMAGE:
-            return bool(c.target_image_path)
-        if c.type == ConditionType.COLOR:
-            return bool(c.target_color)
-        if c.type == ConditionType.TEXT:
-            return bool(c.target_text)
-        return False
-
-    @staticmethod
-    def _is_condition_like_step(step: Step) -> bool:
-        if not step:
+        if event.button() != Qt.MouseButton.LeftButton:
             return False
-        if step.type == StepType.CONDITION:
-            return True
-        if step.condition.type in (ConditionType.IMAGE, ConditionType.COLOR, ConditionType.TEXT):
-            return True
-        return False
-
-    def _has_condition_child(self) -> bool:
-        return bool(self.step.children) and self._is_condition_like_step(self.step.children[0])
-
-    def _has_active_condition(self) -> bool:
-        return self._has_condition_child() or self._has_inline_condition()
-
-    def _condition_target(self):
-        if self._has_condition_child():
-            return self.step.children[0]
-        return self.step
-
-    def _emit_condition_edit(self):
-        self.condition_step_requested.emit(self._condition_target())
-
-    def _emit_condition_clear(self):
-        self.condition_clear_requested.emit(self.step)
-
-    def _build_summary_row(self):
-        segments = self._summary_segments()
-        if not segments:
-            label = QLabel(self._summary_text())
-            label.setStyleSheet("color:#1f2937; font-size:12px;")
-            label.setWordWrap(True)
-            return label
-
-        container = QWidget()
-        summary_layout = QHBoxLayout()
-        summary_layout.setContentsMargins(0, 0, 0, 0)
-        summary_layout.setSpacing(6)
-        container.setLayout(summary_layout)
-
-        def summary_button(text, handler):
-            btn = QPushButton(text)
-            btn.setCursor(Qt.CursorShape.PointingHandCursor)
-            btn.setFlat(True)
-            btn.setStyleSheet(
-                """
-                QPushButton {
-                    color: #1d4ed8;
-                    font-size: 12px;
-                    border: 0;
-                    padding: 0;
-                    text-decoration: underline;
-                    background: transparent;
-                }
-                QPushButton:hover {
-                    color: #1e40af;
-                }
-                """
-            )
-            if handler is not None:
-                btn.clicked.connect(handler)
-            return btn
-
-        for idx, (text, clickable) in enumerate(segments):
-            if idx > 0:
-                summary_layout.addWidget(QLabel("|"))
-                last = summary_layout.itemAt(summary_layout.count() - 1).widget()
-                if last:
-                    last.setStyleSheet("color:#94a3b8;")
-            if clickable:
-                summary_layout.addWidget(summary_button(text, self._emit_condition_edit))
-            else:
-                label = QLabel(text)
-                label.setStyleSheet("color:#334155; font-size:12px;")
-                summary_layout.addWidget(label)
-
-        summary_layout.addStretch(1)
-        return container
-
-    def _summary_segments(self):
-        segments = []
-        if self.step.type in [StepType.IF, StepType.AWAIT]:
-            if self._has_condition_child():
-                cond_name = self.step.children[0].name or "Condition"
-                body_count = max(0, len(self.step.children) - 1)
-                segments.extend(
-                    [
-                        ("조건", True),
-                        (f"적용 조건: {cond_name}", True),
-                        (f"본문: {body_count}개", False),
-                    ]
-                )
-            elif self._has_inline_condition():
-                segments.extend(
-                    [
-                        ("조건", True),
-                        (f"적용 조건: {self._inline_condition_text()} (인라인)", True),
-                        (f"본문: {len(self.step.children)}개", False),
-                    ]
-                )
-            else:
-                segments.extend(
-                    [
-                        ("조건", True),
-                        ("적용 조건: 미설정", False),
-                        (f"본문: {len(self.step.children)}개", False),
-                    ]
-                )
-            return segments
-
-        if self.step.type == StepType.LOOP:
-            if self.step.condition.loop_infinite:
-                segments.extend(
-                    [
-                        ("반복 모드: while(1)", False),
-                        (f"본문: {len(self.step.children)}개", False),
-                    ]
-                )
-                return segments
-
-            if self._has_condition_child():
-                cond_name = self.step.children[0].name or "Condition"
-                mode = self.step.condition.loop_mode.value if self.step.condition else "UNTIL_FOUND"
-                mode_kr = "while(조건 충족 시)" if mode == LoopMode.WHILE_FOUND.value else "until(조건 미충족 시)"
-                body_count = max(0, len(self.step.children) - 1)
-                limit = (
-                    f" / 최대 {self.step.condition.loop_max_count}회"
-                    if self.step.condition.loop_max_count is not None
-                    else ""
-                )
-                segments.extend(
-                    [
-                        (f"반복 모드: {mode_kr}{limit}", False),
-                        ("적용 조건", True),
-                        (cond_name, True),
-                        (f"본문: {body_count}개", False),
-                    ]
-                )
-            elif self._has_inline_condition():
-                mode = "while" if self.step.condition.loop_mode == LoopMode.WHILE_FOUND else "until"
-                limit = (
-                    f" / 최대 {self.step.condition.loop_max_count}회"
-                    if self.step.condition.loop_max_count is not None
-                    else ""
-                )
-                segments.extend(
-                    [
-                        (f"반복 모드: {mode}{limit}", False),
-                        ("적용 조건", True),
-                        (f"{self._inline_condition_text()} (인라인)", True),
-                    ]
-                )
+        card = index.data(CARD_ROLE)
+        step = index.data(STEP_ROLE)
+        if card is None or step is None:
+            return False
+        kind = self.hit_test(option.rect, card, option.font, event.position().toPoint())
+        if kind is None:
+            return False
+        # Presses on links/buttons are swallowed (no selection or drag); the release acts
+        if event.type() == QEvent.Type.MouseButtonRelease:
+            if kind == "clear":
+                self.condition_clear_requested.emit(step)
             else:
-                mode = "while" if self.step.condition.loop_mode == LoopMode.WHILE_FOUND else "until"
-                limit = (
-                    f" / 최대 {self.step.condition.loop_max_count}회"
-                    if self.step.condition.loop_max_count is not None
-                    else ""
-                )
-                segments.extend(
-                    [
-                        (f"반복 모드: {mode}{limit}", False),
-                        ("적용 조건", True),
-                        ("미설정", False),
-                        (f"본문: {len(self.step.children)}개", False),
-                    ]
-                )
-            return segments
-
-        return []
-    def _summary_text(self):
-        if self.step.children:
-            if self.step.type in [StepType.IF, StepType.AWAIT, StepType.LOOP]:
-                target = self.step.children[0]
-                cond_name = target.name or "Condition"
-                if self.step.type == StepType.LOOP:
-                    if self.step.condition.loop_infinite:
-                        body_count = len(self.step.children)
-                        return f"반복 모드: while(1) | 본문: {body_count}개 | 적용 조건: {cond_name}"
-                    mode = self.step.condition.loop_mode.value if self.step.condition else "UNTIL_FOUND"
-                    mode_kr = "while(조건 충족 시)" if mode == LoopMode.WHILE_FOUND.value else "until(조건 미충족 시)"
-                    body_count = max(0, len(self.step.children) - 1)
-                    return (
-                        f"반복 모드: {mode_kr}"
-                        f" | 적용 조건: {cond_name}"
-                        f" | 본문: {body_count}개"
-                    )
-                body_count = max(0, len(self.step.children) - 1)
-                return f"조건: 적용됨 | 적용 조건: {cond_name} | 본문: {body_count}개"
-        else:
-            if self.step.type in [StepType.IF, StepType.AWAIT]:
-                condition_summary = self._inline_condition_text()
-                return f"조건: 미적용 | 적용 조건: {condition_summary} (인라인)"
-            if self.step.type == StepType.LOOP:
-                if self.step.condition.loop_infinite:
-                    body_count = len(self.step.children)
-                    return f"반복 모드: while(1) | 본문: {body_count}개"
-                mode = "while" if self.step.condition.loop_mode == LoopMode.WHILE_FOUND else "until"
-                limit = f" / 최대 {self.step.condition.loop_max_count}회" if self.step.condition.loop_max_count is not None else ""
-                return f"반복 모드: {mode}{limit} | 적용 조건: {self._inline_condition_text()}"
-
-        if self.step.type == StepType.LOOP:
-            if self.step.condition.loop_infinite:
-                return "반복 모드: while(1)"
-            return "반복 모드: 설정 대기"
-        if self.step.type == StepType.BREAK:
-            return "현재 루프 즉시 종료"
-        if self.step.type == StepType.INPUT:
-            var_name = self.step.action.input_variable_name or "count"
-            return f"Input Variable: {var_name}"
-
-        if self.step.condition.type == ConditionType.TIME and self.step.action.type == ActionType.NONE:
-            return f"Wait {self.step.condition.wait_time_s:.1f}s"
-        if self.step.action.type == ActionType.GOTO:
-            return f"Goto Step #{self.step.action.goto_step_index or 1}"
-        return ""
-
-    def mousePressEvent(self, event: QMouseEvent):
-        if event.button() == Qt.MouseButton.LeftButton:
-            self._drag_start_pos = event.pos()
-        self.step_selected.emit(self.step)
-        super().mousePressEvent(event)
-
-    def mouseMoveEvent(self, event: QMouseEvent):
-        if self._drag_start_pos is None:
-            return super().mouseMoveEvent(event)
-        from PyQt6.QtWidgets import QApplication
-
-        if (event.pos() - self._drag_start_pos).manhattanLength() <= QApplication.startDragDistance():
-            return super().mouseMoveEvent(event)
+                self.condition_step_requested.emit(condition_target(step))
+        return True
 
-        drag = QDrag(self)
-        mime = QMimeData()
-        mime.setText(f"move:{self.step.id}")
-        mime.setData("application/vnd.antigravity.step-type", f"move:{self.step.id}".encode())
-        drag.setMimeData(mime)
-        drag.exec(Qt.DropAction.MoveAction)
-        self._drag_start_pos = None
-
-    def mouseReleaseEvent(self, event):
-        self._drag_start_pos = None
-        super().mouseReleaseEvent(event)
-
-    def _title_text(self):
-        if self.step.type == StepType.IF:
-            return f"{self.step.name}"
-        if self.step.type == StepType.LOOP:
-            if self.step.condition.loop_infinite:
-                return "Loop (while 1)"
-            return self.step.name
-        if self.step.type == StepType.AWAIT:
-            return self.step.name
-        return self.step.name
-
-    def _type_text(self):
-        if self.step.type == StepType.IF:
-            return "IF"
-        if self.step.type == StepType.LOOP:
-            if self.step.condition.loop_infinite:
-                return "LOOP(while1)"
-            return "LOOP"
-        if self.step.type == StepType.BREAK:
-            return "Break"
-        if self.step.type == StepType.AWAIT:
-            return "AWAIT"
-        if self.step.type == StepType.INPUT:
-            return "Input"
-        if self.step.condition.type == ConditionType.IMAGE:
-            return "Image"
-        if self.step.condition.type == ConditionType.COLOR:
-            return "Color"
-        if self.step.condition.type == ConditionType.TEXT:
-            return "Text"
-        if self.step.condition.type == ConditionType.TIME and self.step.action.type == ActionType.NONE:
-            return "Wait"
-        if self.step.action.type == ActionType.MOVE:
-            return "Move"
-        if self.step.action.type == ActionType.CLICK:
-            return "Click"
-        if self.step.action.type == ActionType.GOTO:
-            return "Goto"
-        if self.step.action.type == ActionType.KEY:
-            return "Key"
-        return str(self.step.type)
-
-    def _inline_condition_text(self) -> str:
-        c = self.step.condition
-        if c.type == ConditionType.IMAGE:
-            return "이미지 탐색"
-        if c.type == ConditionType.COLOR:
-            return "색상 탐색"
-        if c.type == ConditionType.TEXT:
-            return "텍스트 탐색"
-        if c.type == ConditionType.TIME:
-            return "시간 대기"
-        return "미설정"
-
-
-class WorkflowCanvasV2(QTreeWidget):
-    step_dropped = pyqtSignal(str, str, object, str)
+    def paint(self, painter, option, index):
+        card = index.data(CARD_ROLE)
+        if card is None:
+            return
+        layout = self.layout(option.rect, card, option.font)
+        selected = bool(option.state & QStyle.StateFlag.State_Selected)
+        hovered = bool(option.state & QStyle.StateFlag.State_MouseOver)
+
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        path = QPainterPath()
+        path.addRoundedRect(QRectF(layout.card).adjusted(0.5, 0.5, -0.5, -0.5), 10, 10)
+        if selected:
+            background, border = "#dbe7ff", "#8fb4f3"
+        elif hovered:
+            background, border = "#eef2ff", "#8fb4f3"
+        else:
+            background, border = "#f5f7fb", "#d8e2ff"
+        painter.fillPath(path, QColor(background))
+        painter.save()
+        painter.setClipPath(path)
+        accent = QRect(layout.card.left(), layout.card.top(), self.ACCENT_WIDTH, layout.card.height())
+        painter.fillRect(accent, QColor(self.ACCENTS.get(card.flow_kind, self.ACCENTS["normal"])))
+        painter.restore()
+        painter.setPen(QPen(QColor(border), 1))
+        painter.drawPath(path)
+
+        # Header: #index, title, tag ... type
+        header = layout.header
+        x = header.left()
+        for text, px, color in ((f"#{card.index}", 13, "#475569"), (card.title, 16, "#0f172a"), (card.tag, 14, "#1d4ed8")):
+            font = self._font(option.font, px, bold=True)
+            painter.setFont(font)
+            painter.setPen(QColor(color))
+            fm = QFontMetrics(font)
+            width = min(fm.horizontalAdvance(text) + 2, max(0, header.right() - x - 80))
+            painter.drawText(QRect(x, header.top(), width, header.height()), Qt.AlignmentFlag.AlignVCenter,
+                             fm.elidedText(text, Qt.TextElideMode.ElideRight, width))
+            x += width + 8
+        painter.setFont(self._font(option.font, 12))
+        painter.setPen(QColor("#475569"))
+        painter.drawText(header, Qt.AlignmentFlag.AlignVCenter | Qt.AlignmentFlag.AlignRight, card.type_text)
+
+        # Summary: segments (links underlined) or plain text
+        summary_font = self._font(option.font, 12)
+        painter.setFont(summary_font)
+        if layout.links:
+            fm = QFontMetrics(summary_font)
+            link_font = QFont(summary_font)
+            link_font.setUnderline(True)
+            for i, (rect, text, clickable) in enumerate(layout.links):
+                if i > 0:
+                    painter.setFont(summary_font)
+                    painter.setPen(QColor("#94a3b8"))
+                    sep_rect = QRect(rect.left() - 6 - fm.horizontalAdvance("|"), rect.top(), fm.horizontalAdvance("|"), rect.height())
+                    painter.drawText(sep_rect, Qt.AlignmentFlag.AlignVCenter, "|")
+                painter.setFont(link_font if clickable else summary_font)
+                painter.setPen(QColor("#1d4ed8" if clickable else "#334155"))
+                painter.drawText(rect, Qt.AlignmentFlag.AlignVCenter,
+                                 fm.elidedText(text, Qt.TextElideMode.ElideRight, rect.width()))
+        elif card.summary:
+            painter.setPen(QColor("#1f2937"))
+            fm = QFontMetrics(summary_font)
+            painter.drawText(layout.summary, Qt.AlignmentFlag.AlignVCenter,
+                             fm.elidedText(card.summary, Qt.TextElideMode.ElideRight, layout.summary.width()))
+
+        # Condition slot buttons
+        painter.setFont(self._font(option.font, 11, bold=True))
+        for rect, text, kind in layout.buttons:
+            if kind == "clear":
+                background, border = "#fee2e2", "#fda4af"
+            else:
+                background, border = "#eff6ff", "#93c5fd"
+            button = QPainterPath()
+            button.addRoundedRect(QRectF(rect).adjusted(0.5, 0.5, -0.5, -0.5), 8, 8)
+            painter.fillPath(button, QColor(background))
+            painter.setPen(QPen(QColor(border), 1))
+            painter.drawPath(button)
+            painter.setPen(QColor("#0f172a"))
+            painter.drawText(rect, Qt.AlignmentFlag.AlignCenter, text)
+        painter.restore()
+
+
+class WorkflowCanvasV2(QTreeView):
+    step_dropped = pyqtSignal(str, str, object, str) # category, type_code, target Step (None: append), slot
     step_clicked = pyqtSignal(Step)
     condition_step_selected = pyqtSignal(Step)
     condition_clear_requested = pyqtSignal(Step)
-    reordered = pyqtSignal()
 
     DROP_CONDITION = "condition"
     DROP_BODY = "body"
     DROP_ABOVE = "above"
     DROP_BELOW = "below"
 
+    MIME_TYPE = "application/vnd.antigravity.step-type"
+    EMPTY_HINT = "블록을 끌어다 놓아 첫 단계를 추가하세요"
+
     def __init__(self):
         super().__init__()
+        self.step_model = StepTreeModel(self)
+        self.setModel(self.step_model)
+        self.card_delegate = StepCardDelegate(self)
+        self.setItemDelegate(self.card_delegate)
+        self.card_delegate.condition_step_requested.connect(self.condition_step_selected.emit)
+        self.card_delegate.condition_clear_requested.connect(self.condition_clear_requested.emit)
+        self.step_model.rowsInserted.connect(self._expand_inserted)
+        self.clicked.connect(self._on_clicked)
+
+        self._drop = None # (target Step or None, slot) while a drag hovers
         self.setAcceptDrops(True)
         self.setDragEnabled(True)
         self.setDragDropMode(QAbstractItemView.DragDropMode.DragDrop)
+        self.setDropIndicatorShown(False) # Painted in paintEvent (slots differ from Qt's)
         self.setDefaultDropAction(Qt.DropAction.MoveAction)
-        self.setSelectionMode(QTreeWidget.SelectionMode.SingleSelection)
-        self.setAlternatingRowColors(True)
+        self.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
         self.setHeaderHidden(True)
         self.setIndentation(16)
         self.setUniformRowHeights(False)
+        self.setMouseTracking(True)
+        self.viewport().setAttribute(Qt.WidgetAttribute.WA_Hover)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
         self.setStyleSheet(
             """
-            QTreeWidget {
+            QTreeView {
                 border: 1px solid #c6d2eb;
                 border-radius: 8px;
                 background: #f5f8ff;
                 color: #111827;
-                show-decoration-selected: 1;
-            }
-            QTreeWidget::item:selected {
-                background: #dbe7ff;
+                show-decoration-selected: 0;
             }
-            QTreeWidget::item:hover {
-                background: #e2ebff;
+            QTreeView::item:selected, QTreeView::item:hover {
+                background: transparent;
             }
             """
         )
 
-    def mimeTypes(self):
-        types = super().mimeTypes()
-        types.append("application/vnd.antigravity.step-type")
-        return types
+    # --- Steps ---
 
-    def dragEnterEvent(self, event):
-        if event.mimeData().hasFormat("application/vnd.antigravity.step-type"):
-            event.acceptProposedAction()
+    def update_steps(self, steps):
+        """Applies the edited step tree; only changed rows are touched after the first call."""
+        if len(self.step_model) == 0:
+            self.step_model.set_steps(steps)
+            self.expandAll()
         else:
-            super().dragEnterEvent(event)
+            self.step_model.sync(steps)
+        self.viewport().update() # Empty hint
 
-    def dragMoveEvent(self, event):
-        if event.mimeData().hasFormat("application/vnd.antigravity.step-type"):
-            event.acceptProposedAction()
-            return
-        super().dragMoveEvent(event)
+    def refresh_step(self, step: Step):
+        self.step_model.refresh_step(step)
+
+    def select_step(self, step: Step):
+        index = self.step_model.index_of(step)
+        if index.isValid():
+            self.setCurrentIndex(index)
+            self.scrollTo(index)
+
+    def current_step(self) -> Optional[Step]:
+        return self.step_model.step(self.currentIndex())
+
+    def find_step(self, step_id: str):
+        return self.step_model.find(step_id)
+
+    def parent_step(self, step: Step) -> Optional[Step]:
+        return self.step_model.parent_step(step)
 
     def _is_container(self, step: Step):
-        return step.type in [StepType.IF, StepType.LOOP, StepType.AWAIT, StepType.UNTIL]
+        return is_container(step)
 
     def _requires_condition_slot(self, step: Step) -> bool:
-        t = step.type
-        if isinstance(t, str):
-            t = t.strip().upper()
-            if t.startswith("STEPTYPE."):
-                t = t.split(".", 1)[1]
-        elif isinstance(t, StepType):
-            t = t.value
-        else:
-            t = str(t).upper()
-            if t.startswith("STEPTYPE."):
-                t = t.split(".", 1)[1]
+        return needs_condition_slot(step)
 
-        if t == StepType.LOOP.value:
-            loop_infinite = self._to_bool(step.condition.loop_infinite)
-            return not loop_infinite
-        return t in {StepType.IF.value, StepType.AWAIT.value, StepType.UNTIL.value}
+    def _on_clicked(self, index):
+        step = self.step_model.step(index)
+        if step is not None:
+            self.step_clicked.emit(step)
 
-    @staticmethod
-    def _to_bool(value) -> bool:
-        if isinstance(value, bool):
-            return value
-        if value is None:
-            return False
-        if isinstance(value, (int, float)):
-            return bool(value)
-        return str(value).lower() in {"1", "true", "yes", "y"}
+    def _expand_inserted(self, parent, first, last):
+        for row in range(first, last + 1):
+            self._expand_recursively(self.step_model.index(row, 0, parent))
 
-    def dropEvent(self, event):
-        if event.mimeData().hasFormat("application/vnd.antigravity.step-type"):
-            data = event.mimeData().text()
-            category, type_code = data.split(":")
-            target_item = self.itemAt(event.position().toPoint())
-            slot = self.DROP_BELOW
-
-            if target_item:
-                step = target_item.data(0, Qt.ItemDataRole.UserRole)
-                indicator = self.dropIndicatorPosition()
-
-                if indicator == QTreeWidget.DropIndicatorPosition.AboveItem:
-                    slot = self.DROP_ABOVE
-                elif indicator == QTreeWidget.DropIndicatorPosition.BelowItem:
-                    slot = self.DROP_BELOW
-                elif indicator == QTreeWidget.DropIndicatorPosition.OnItem:
-                    if step and self._is_container(step):
-                        if self._requires_condition_slot(step):
-                            rect = self.visualItemRect(target_item)
-                            y = event.position().y() - rect.top()
-                            slot = self.DROP_CONDITION if y < rect.height() * 0.45 else self.DROP_BODY
-                        else:
-                            slot = self.DROP_BODY
-                    else:
-                        slot = self.DROP_BELOW
-
-            self.step_dropped.emit(category, type_code, target_item, slot)
-            event.setDropAction(Qt.DropAction.CopyAction)
-            event.accept()
-            return
+    def _expand_recursively(self, index):
+        if self.step_model.rowCount(index):
+            self.expand(index)
+            for row in range(self.step_model.rowCount(index)):
+                self._expand_recursively(self.step_model.index(row, 0, index))
 
-        super().dropEvent(event)
-        self.reordered.emit()
+    # --- Drag and drop ---
 
-    def update_steps(self, steps):
-        self.clear()
-        if not steps:
-            hint_item = QTreeWidgetItem(self)
-            hint_widget = QLabel("블록을 끌어다 놓아 첫 단계를 추가하세요")
-            hint_widget.setAlignment(Qt.AlignmentFlag.AlignHCenter | Qt.AlignmentFlag.AlignVCenter)
-            hint_widget.setWordWrap(True)
-            hint_widget.setStyleSheet("padding:30px; color:#334155; font-size: 14px;")
-            hint_widget.setMinimumHeight(140)
-            self.setItemWidget(hint_item, 0, hint_widget)
-            hint_item.setSizeHint(0, hint_widget.sizeHint())
+    def startDrag(self, supportedActions):
+        step = self.current_step()
+        if step is None:
             return
+        mime = QMimeData()
+        mime.setText(f"move:{step.id}")
+        mime.setData(self.MIME_TYPE, f"move:{step.id}".encode())
+        drag = QDrag(self)
+        drag.setMimeData(mime)
+        drag.exec(Qt.DropAction.MoveAction)
 
-        def add_items(items, parent_item=None, prefix="", hide_first_child=False):
-            visible_index = 1
-            for i, step in enumerate(items):
-                if hide_first_child and i == 0:
-                    idx = f"{prefix}0"
-                else:
-                    idx = f"{prefix}{visible_index}"
-                    visible_index += 1
-
-                item = QTreeWidgetItem(parent_item or self)
-                item.setData(0, Qt.ItemDataRole.UserRole, step)
-                widget = BlockStepCardWidget(step, idx)
-                widget.step_selected.connect(self.step_clicked.emit)
-                widget.condition_step_requested.connect(self.condition_step_selected.emit)
-                widget.condition_clear_requested.connect(self.condition_clear_requested.emit)
-                self.setItemWidget(item, 0, widget)
-                item.setSizeHint(0, widget.sizeHint())
-                if hide_first_child and i == 0:
-                    item.setHidden(True)
-
-                if self._is_container(step):
-                    item.setFlags(item.flags() | Qt.ItemFlag.ItemIsDropEnabled)
-                else:
-                    item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsDropEnabled)
+    def _drop_target(self, pos: QPoint):
+        index = self.indexAt(pos)
+        step = self.step_model.step(index)
+        if step is None:
+            return None, self.DROP_BELOW
+        rect = self.visualRect(index)
+        y = pos.y() - rect.top()
+        if y < rect.height() * 0.25:
+            return step, self.DROP_ABOVE
+        if y > rect.height() * 0.75 or not is_container(step):
+            return step, self.DROP_BELOW
+        if needs_condition_slot(step) and y < rect.height() * 0.45:
+            return step, self.DROP_CONDITION
+        return step, self.DROP_BODY
 
-                if step.children:
-                    child_hide_first = False
-                    add_items(step.children, item, f"{idx}.", hide_first_child=child_hide_first)
-                else:
-                    item.setExpanded(True)
+    def dragEnterEvent(self, event):
+        if event.mimeData().hasFormat(self.MIME_TYPE):
+            event.acceptProposedAction()
+        else:
+            super().dragEnterEvent(event)
+
+    def dragMoveEvent(self, event):
+        if not event.mimeData().hasFormat(self.MIME_TYPE):
+            super().dragMoveEvent(event)
+            return
+        super().dragMoveEvent(event) # Auto-scroll near the edges
+        self._drop = self._drop_target(event.position().toPoint())
+        event.acceptProposedAction()
+        self.viewport().update()
+
+    def dragLeaveEvent(self, event):
+        self._drop = None
+        self.viewport().update()
+        super().dragLeaveEvent(event)
 
-        add_items(steps)
+    def dropEvent(self, event):
+        if not event.mimeData().hasFormat(self.MIME_TYPE):
+            super().dropEvent(event)
+            return
+        self._drop = None
+        self.viewport().update()
+        category, type_code = event.mimeData().text().split(":", 1)
+        target_step, slot = self._drop_target(event.position().toPoint())
+        event.setDropAction(Qt.DropAction.CopyAction)
+        event.accept()
+        self.step_dropped.emit(category, type_code, target_step, slot)
+
+    # --- Painting ---
+
+    def mouseMoveEvent(self, event):
+        if not event.buttons():
+            pos = event.position().toPoint()
+            index = self.indexAt(pos)
+            card = index.data(CARD_ROLE) if index.isValid() else None
+            on_link = card is not None and self.card_delegate.hit_test(self.visualRect(index), card, self.font(), pos)
+            if on_link:
+                self.viewport().setCursor(Qt.CursorShape.PointingHandCursor)
+            else:
+                self.viewport().unsetCursor()
+        super().mouseMoveEvent(event)
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        painter = QPainter(self.viewport())
+        if self.step_model.rowCount() == 0:
+            font = QFont(self.font())
+            font.setPixelSize(14)
+            painter.setFont(font)
+            painter.setPen(QColor("#334155"))
+            painter.drawText(self.viewport().rect().adjusted(30, 30, -30, -30),
+                             Qt.AlignmentFlag.AlignHCenter | Qt.AlignmentFlag.AlignTop | Qt.TextFlag.TextWordWrap,
+                             self.EMPTY_HINT)
+        if self._drop is not None and self._drop[0] is not None:
+            target, slot = self._drop
+            rect = self.visualRect(self.step_model.index_of(target))
+            painter.setPen(QPen(QColor("#2563eb"), 2))
+            if slot == self.DROP_ABOVE:
+                painter.drawLine(rect.left(), rect.top() + 1, rect.right(), rect.top() + 1)
+            elif slot == self.DROP_BELOW:
+                painter.drawLine(rect.left(), rect.bottom() - 1, rect.right(), rect.bottom() - 1)
+            else:
+                painter.setPen(QPen(QColor("#2563eb"), 2, Qt.PenStyle.DashLine))
+                painter.drawRoundedRect(QRectF(rect).adjusted(2, 2, -3, -3), 10, 10)
+        painter.end()
 
 
 class WorkflowEditorV2(QMainWindow):
@@ -1020,11 +756,9 @@ class WorkflowEditorV2(QMainWindow):
 
         # Signals
         self.canvas.step_dropped.connect(self._on_step_dropped)
-        self.canvas.itemClicked.connect(self._on_step_selected)
-        self.canvas.step_clicked.connect(self._on_step_selected_from_widget)
+        self.canvas.step_clicked.connect(self._on_step_selected)
         self.canvas.condition_step_selected.connect(self._on_condition_step_selected)
         self.canvas.condition_clear_requested.connect(self._on_condition_clear_requested)
-        self.canvas.reordered.connect(self._on_reordered)
         self.save_btn.clicked.connect(self._save_workflow)
         self.delete_btn.clicked.connect(self._delete_current_step)
         self.cancel_btn.clicked.connect(self.close)
@@ -1081,16 +815,8 @@ class WorkflowEditorV2(QMainWindow):
         screen = QGuiApplication.primaryScreen()
         pixmap = screen.grabWindow(0, rect.x(), rect.y(), rect.width(), rect.height())
 
-        assets_dir = os.path.join(get_workflows_dir(), self.workflow_name, "assets")
-        if not os.path.exists(assets_dir):
-            os.makedirs(assets_dir)
-
-        filename = f"target_{int(datetime.datetime.now().timestamp())}.png"
-        path = os.path.join(assets_dir, filename)
-        pixmap.save(path)
-
-        rel_path = os.path.join("assets", filename)
-        current_step.condition.target_image_path = rel_path
+        workflow_dir = os.path.join(get_workflows_dir(), self.workflow_name)
+        current_step.condition.target_image_path = store_captured_pixmap(pixmap, workflow_dir)
         self.inspector.step_props.load_step(current_step)
         self._refresh_canvas_item()
 
@@ -1225,6 +951,8 @@ class WorkflowEditorV2(QMainWindow):
                     step.condition.target_color,
                     tolerance=step.condition.color_tolerance,
                     region=region,
+                    palette=[(p.color, p.tolerance) for p in step.condition.color_palette],
+                    min_area=step.condition.color_min_area_px,
                 )
                 if matches:
                     idx = step.condition.match_index or 0
@@ -1287,235 +1015,17 @@ class WorkflowEditorV2(QMainWindow):
         self.show()
 
     def _load_workflow(self, name: str) -> Workflow:
+        from app.core.workflow_io import load_workflow
         path = os.path.join(get_workflows_dir(), name, "flow.json")
-        workflow = None
-        if os.path.exists(path):
-            with open(path, "r") as f:
-                data = None
-                try:
-                    data = json.load(f)
-                    workflow = Workflow(**data)
-                except Exception:
-                    workflow = self._load_legacy_workflow(data, name)
-
-        if workflow is None and os.path.exists(path):
-            try:
-                with open(path, "r") as f:
-                    data = json.load(f)
-            except Exception:
-                data = None
-            workflow = self._load_legacy_workflow(data, name)
-
+        workflow = load_workflow(path, name)
         if not workflow:
             workflow = Workflow(name=name, created_at="", updated_at="")
-
-        def update_ids_recursive(steps):
-            for step in steps:
-                step.id = str(uuid.uuid4())
-                if step.children:
-                    update_ids_recursive(step.children)
-
-        update_ids_recursive(workflow.steps)
         return workflow
 
-    def _load_legacy_workflow(self, data, workflow_name: str) -> Optional[Workflow]:
-        if not isinstance(data, dict):
-            if isinstance(data, list):
-                data = {"name": workflow_name, "steps": data, "created_at": "", "updated_at": ""}
-            else:
-                return None
-
-        raw_steps = data.get("steps")
-        if not isinstance(raw_steps, list):
-            return None
-
-        if not data.get("name"):
-            data["name"] = workflow_name
-
-        from app.core.models import KeyInputMode
-
-        def normalize_condition_type(raw_type):
-            t = str(raw_type or "time").strip().lower()
-            if t == "image":
-                return ConditionType.IMAGE
-            if t == "color":
-                return ConditionType.COLOR
-            if t == "text":
-                return ConditionType.TEXT
-            return ConditionType.TIME
-
-        def normalize_action_type(raw_type):
-            t = str(raw_type or "none").strip().lower()
-            if t == "move":
-                return ActionType.MOVE
-            if t == "click":
-                return ActionType.CLICK
-            if t in ("keypress", "key", "key_press"):
-                return ActionType.KEY
-            if t == "goto":
-                return ActionType.GOTO
-            return ActionType.NONE
-
-        def normalize_step_type(raw_type):
-            t = str(raw_type or "general").strip().lower()
-            if t in ("if", "condition_if"):
-                return StepType.IF
-            if t in ("until", "loop"):
-                return StepType.LOOP
-            if t == "await":
-                return StepType.AWAIT
-            if t == "input":
-                return StepType.INPUT
-            if t == "break":
-                return StepType.BREAK
-            return StepType.GENERAL
-
-        def to_list(value):
-            if isinstance(value, tuple):
-                return list(value)
-            if isinstance(value, list):
-                return value
-            return None
-
-        def parse_legacy_step(raw_step):
-            if not isinstance(raw_step, dict):
-                return None
-
-            condition_raw = raw_step.get("condition", {})
-            action_raw = raw_step.get("action", {})
-            condition_type = normalize_condition_type(condition_raw.get("type"))
-
-            condition_kwargs = {
-                "type": condition_type,
-                "target_text": None,
-                "target_color": None,
-                "watch_area": None,
-                "target_image_path": None,
-                "match_mode": getattr(condition_raw, "match_mode", "SINGLE"),
-                "confidence": 0.8,
-                "scan_interval_ms": 500,
-                "timeout_s": 10.0,
-                "deduplicate_radius_px": 10,
-                "wait_time_s": 0.0,
-                "retry_timeout_s": 5.0,
-                "retry_interval_ms": 500,
-                "loop_mode": LoopMode.UNTIL_FOUND,
-                "loop_max_count": 100,
-                "loop_count_variable": None,
-                "loop_infinite": False,
-                "color_tolerance": 0,
-                "match_index": 0,
-            }
-
-            if condition_type == ConditionType.IMAGE:
-                image_raw = condition_raw.get("image") if isinstance(condition_raw.get("image"), dict) else {}
-                condition_kwargs["target_image_path"] = image_raw.get("template_path")
-                condition_kwargs["confidence"] = image_raw.get("confidence", condition_raw.get("confidence", 0.8))
-                condition_kwargs["scan_interval_ms"] = image_raw.get("poll_interval_ms", condition_raw.get("scan_interval_ms", 500))
-                condition_kwargs["timeout_s"] = image_raw.get("timeout_s", condition_raw.get("timeout_s", 10.0))
-                condition_kwargs["deduplicate_radius_px"] = image_raw.get("min_dedup_distance_px", condition_raw.get("deduplicate_radius_px", 10))
-                area = image_raw.get("watch_area") if isinstance(image_raw, dict) else None
-                condition_kwargs["watch_area"] = to_list(area)
-            elif condition_type == ConditionType.COLOR:
-                color_raw = condition_raw.get("color") if isinstance(condition_raw.get("color"), dict) else {}
-                condition_kwargs["target_color"] = color_raw.get("target_color", condition_raw.get("target_color"))
-                condition_kwargs["color_tolerance"] = color_raw.get("tolerance", condition_raw.get("color_tolerance", 0))
-                condition_kwargs["match_index"] = color_raw.get("match_index", condition_raw.get("match_index", 0))
-                area = color_raw.get("watch_area") if isinstance(color_raw, dict) else None
-                condition_kwargs["watch_area"] = to_list(area)
-            elif condition_type == ConditionType.TEXT:
-                text_raw = condition_raw.get("text")
-                if isinstance(text_raw, dict):
-                    condition_kwargs["target_text"] = text_raw.get("value")
-                else:
-                    condition_kwargs["target_text"] = condition_raw.get("target_text")
-            else:
-                wait_raw = condition_raw.get("wait")
-                if isinstance(wait_raw, dict):
-                    condition_kwargs["wait_time_s"] = float(wait_raw.get("seconds", condition_raw.get("wait_time_s", 0.0)))
-                else:
-                    condition_kwargs["wait_time_s"] = float(condition_raw.get("wait_time_s", 0.0))
-
-            action_type = normalize_action_type(action_raw.get("type"))
-            action_kwargs = {
-                "type": action_type,
-                "target_x": None,
-                "target_y": None,
-                "goto_step_index": None,
-                "input_variable_name": action_raw.get("input_variable_name", "count"),
-                "input_prompt": action_raw.get("input_prompt", "값을 입력하세요"),
-                "key_sequence": None,
-                "key_mode": KeyInputMode.PRESS,
-            }
-
-            if action_type in (ActionType.MOVE, ActionType.CLICK):
-                position = action_raw.get("move", {}).get("position") if isinstance(action_raw.get("move"), dict) else None
-                if position is None and action_type == ActionType.CLICK:
-                    position = action_raw.get("click", {}).get("position") if isinstance(action_raw.get("click"), dict) else None
-                if position is None:
-                    position = action_raw.get("position")
-                if isinstance(position, (list, tuple)) and len(position) == 2:
-                    action_kwargs["target_x"] = int(position[0])
-                    action_kwargs["target_y"] = int(position[1])
-            elif action_type == ActionType.GOTO:
-                goto_raw = action_raw.get("goto", {}) if isinstance(action_raw.get("goto"), dict) else {}
-                action_kwargs["goto_step_index"] = int(goto_raw.get("step_index", action_raw.get("goto_step_index", 1) or 1))
-            elif action_type == ActionType.KEY:
-                key_raw = action_raw.get("keypress", {}) if isinstance(action_raw.get("keypress"), dict) else {}
-                if key_raw is None or not isinstance(key_raw, dict):
-                    key_raw = {}
-                action_kwargs["key_sequence"] = key_raw.get("text", action_raw.get("key_sequence", ""))
-                key_mode = str(key_raw.get("mode", "press")).lower()
-                action_kwargs["key_mode"] = KeyInputMode.PRESS if key_mode in ("press", "hotkey", "combo") else KeyInputMode.TYPE
-
-            step_type = normalize_step_type(raw_step.get("step_type") or raw_step.get("type"))
-            step = Step(
-                id=str(raw_step.get("id") or uuid.uuid4()),
-                name=str(raw_step.get("name") or raw_step.get("label") or "Step"),
-                type=step_type,
-                condition=Condition(**condition_kwargs),
-                action=Action(**action_kwargs),
-            )
-
-            loop_mode = raw_step.get("loop_mode")
-            if loop_mode:
-                step.condition.loop_mode = LoopMode.WHILE_FOUND if str(loop_mode).lower().startswith("while") else LoopMode.UNTIL_FOUND
-            step.condition.loop_infinite = bool(raw_step.get("loop_infinite", step.condition.loop_infinite))
-            step.condition.loop_count_variable = raw_step.get("loop_count_variable")
-            if raw_step.get("loop_max_count") is not None:
-                try:
-                    step.condition.loop_max_count = int(raw_step.get("loop_max_count"))
-                except Exception:
-                    pass
-
-            step.step_interval_ms = raw_step.get("step_interval_ms", raw_step.get("interval_ms", step.step_interval_ms))
-            child_list = raw_step.get("children") or raw_step.get("steps") or []
-            if not isinstance(child_list, list):
-                child_list = []
-            for child_raw in child_list:
-                child_step = parse_legacy_step(child_raw)
-                if child_step:
-                    step.children.append(child_step)
-
-            return step
-
-        steps = []
-        for raw_step in raw_steps:
-            parsed = parse_legacy_step(raw_step)
-            if parsed:
-                steps.append(parsed)
-
-        return Workflow(
-            name=data.get("name", workflow_name),
-            steps=steps,
-            created_at=data.get("created_at", ""),
-            updated_at=data.get("updated_at", ""),
-        )
-
     def _save_workflow(self):
+        from app.core.workflow_io import save_workflow
         path = os.path.join(get_workflows_dir(), self.workflow_name, "flow.json")
-        with open(path, "w") as f:
-            f.write(self.workflow.json())
+        save_workflow(path, self.workflow)
         self.has_unsaved_changes = False
         self.setWindowTitle(f"Editing (V2): {self.workflow_name}")
         QMessageBox.information(self, "Saved", "Workflow saved successfully.")
@@ -1524,17 +1034,8 @@ class WorkflowEditorV2(QMainWindow):
         self.canvas.update_steps(self.workflow.steps)
 
     def _find_step_by_id(self, step_id):
-        def traverse(steps, parent=None):
-            for s in steps:
-                if s.id == step_id:
-                    return s, parent
-                if s.children:
-                    res, p = traverse(s.children, s)
-                    if res:
-                        return res, p
-            return None, None
-
-        return traverse(self.workflow.steps)
+        # The canvas model keeps an id index of the tree it shows (synced after every edit)
+        return self.canvas.find_step(step_id)
 
     def _is_descendant_of(self, root_step, target_step):
         if root_step is target_step:
@@ -1610,6 +1111,11 @@ class WorkflowEditorV2(QMainWindow):
                 step.type = StepType.AWAIT
                 step.name = "Await"
                 step.condition.type = ConditionType.TIME
+            elif type_code == "switch":
+                step.type = StepType.SWITCH
+                step.name = "Switch"
+                step.condition.type = ConditionType.TIME
+                step.action.type = ActionType.NONE
             elif type_code == "input":
                 step.type = StepType.INPUT
                 step.name = "User Input"
@@ -1621,7 +1127,7 @@ class WorkflowEditorV2(QMainWindow):
                 step.action.type = ActionType.NONE
                 step.action.goto_step_index = None
 
-    def _on_step_dropped(self, category, type_code, target_item=None, slot=WorkflowCanvasV2.DROP_BELOW):
+    def _on_step_dropped(self, category, type_code, target_step=None, slot=WorkflowCanvasV2.DROP_BELOW):
         new_step = None
         source_list = None
 
@@ -1644,8 +1150,7 @@ class WorkflowEditorV2(QMainWindow):
         if not new_step:
             return
 
-        if category == "move" and target_item:
-            target_step = target_item.data(0, Qt.ItemDataRole.UserRole)
+        if category == "move" and target_step is not None:
             if target_step is new_step or self._is_descendant_of(new_step, target_step):
                 return
             try:
@@ -1659,10 +1164,8 @@ class WorkflowEditorV2(QMainWindow):
                 return
 
         inserted = False
-        if target_item:
-            target_step = target_item.data(0, Qt.ItemDataRole.UserRole)
-            parent_item = target_item.parent()
-            parent_step = parent_item.data(0, Qt.ItemDataRole.UserRole) if parent_item else None
+        if target_step is not None:
+            parent_step = self.canvas.parent_step(target_step)
             target_list = parent_step.children if parent_step else self.workflow.steps
 
             try:
@@ -1697,23 +1200,14 @@ class WorkflowEditorV2(QMainWindow):
 
         self.has_unsaved_changes = True
         self._refresh_canvas()
-        self.canvas.expandAll()
-
-    def _on_step_selected(self, item, _col=0):
-        if not item:
-            self.inspector.show_workflow_props(self.workflow)
-            return
+        self.canvas.select_step(new_step)
 
-        step = item.data(0, Qt.ItemDataRole.UserRole)
+    def _on_step_selected(self, step):
         if step:
             self.inspector.show_step_props(step)
         else:
             self.inspector.show_workflow_props(self.workflow)
 
-    def _on_step_selected_from_widget(self, step):
-        if step:
-            self.inspector.show_step_props(step)
-
     def _on_step_changed_from_inspector(self, _step):
         self.has_unsaved_changes = True
         self._refresh_canvas_item()
@@ -1776,16 +1270,10 @@ class WorkflowEditorV2(QMainWindow):
         return condition_step
 
     def _find_condition_parent(self, condition_step: Step):
-        def walk(steps):
-            for step in steps:
-                if step.children and step.children[0] is condition_step and self._condition_slot_needs_step(step):
-                    return step
-                parent = walk(step.children)
-                if parent:
-                    return parent
-            return None
-
-        return walk(self.workflow.steps)
+        parent = self.canvas.parent_step(condition_step)
+        if parent and parent.children[0] is condition_step and self._condition_slot_needs_step(parent):
+            return parent
+        return None
 
     @staticmethod
     def _looks_like_condition_step(step: Step) -> bool:
@@ -1827,14 +1315,12 @@ class WorkflowEditorV2(QMainWindow):
             self.has_unsaved_changes = True
             self._refresh_canvas()
             self.inspector.show_step_props(step)
-            self.canvas.expandAll()
             return
 
         self._clear_condition_inline(step)
         self.has_unsaved_changes = True
         self._refresh_canvas()
         self.inspector.show_step_props(step)
-        self.canvas.expandAll()
 
     def _on_condition_step_selected(self, step):
         # 'step' can be either the condition child step itself, or a container step
@@ -1853,7 +1339,6 @@ class WorkflowEditorV2(QMainWindow):
                 self.has_unsaved_changes = True
                 self._refresh_canvas()
                 self.inspector.show_step_props(inline_condition)
-                self.canvas.expandAll()
                 return
 
             # Create default condition step (Find Image) and place it as first child.
@@ -1868,53 +1353,16 @@ class WorkflowEditorV2(QMainWindow):
             self.has_unsaved_changes = True
             self._refresh_canvas()
             self.inspector.show_step_props(condition_step)
-            self.canvas.expandAll()
             return
 
         self.inspector.show_step_props(step)
 
-    def _on_reordered(self):
-        def safe_get_step(item):
-            return item.data(0, Qt.ItemDataRole.UserRole)
-
-        def traverse_item(item):
-            step = safe_get_step(item)
-            if not step:
-                return None
-            new_children = []
-            for i in range(item.childCount()):
-                child_item = item.child(i)
-                child_step = traverse_item(child_item)
-                if child_step:
-                    new_children.append(child_step)
-            step.children = new_children
-            return step
-
-        new_root_steps = []
-        for i in range(self.canvas.topLevelItemCount()):
-            item = self.canvas.topLevelItem(i)
-            step = traverse_item(item)
-            if not step:
-                continue
-            if step.children and step.type not in [StepType.IF, StepType.UNTIL, StepType.AWAIT, StepType.LOOP]:
-                orphans = step.children
-                step.children = []
-                new_root_steps.append(step)
-                new_root_steps.extend(orphans)
-            else:
-                new_root_steps.append(step)
-
-        self.workflow.steps = new_root_steps
-        self.has_unsaved_changes = True
-        self._refresh_canvas()
-
     def _delete_current_step(self):
-        item = self.canvas.currentItem()
-        if not item:
+        target = self.canvas.current_step()
+        if not target:
             QMessageBox.information(self, "Delete", "Please select a step to delete.")
             return
 
-        target = item.data(0, Qt.ItemDataRole.UserRole)
         reply = QMessageBox.question(
             self,
             "Delete Step",
@@ -1924,37 +1372,22 @@ class WorkflowEditorV2(QMainWindow):
         if reply != QMessageBox.StandardButton.Yes:
             return
 
-        def remove_step(target_step, steps):
-            for i, step in enumerate(steps):
-                if step is target_step:
-                    steps.pop(i)
-                    return True
-                if remove_step(target_step, step.children):
-                    return True
-            return False
-
-        if remove_step(target, self.workflow.steps):
-            parent = item.parent()
-            if parent:
-                parent.removeChild(item)
-            else:
-                self.canvas.invisibleRootItem().removeChild(item)
+        parent = self.canvas.parent_step(target)
+        siblings = parent.children if parent else self.workflow.steps
+        row = next((i for i, step in enumerate(siblings) if step is target), None)
+        if row is not None:
+            siblings.pop(row)
             self.has_unsaved_changes = True
             self._refresh_canvas()
         else:
             QMessageBox.warning(self, "Error", "Could not find target step in workflow.")
 
     def _refresh_canvas_item(self):
+        # Property edits only change the current step's card (and its parent's summary)
         current_step = self.inspector.current_step
-        self._refresh_canvas()
         if current_step:
-            iterator = QTreeWidgetItemIterator(self.canvas)
-            while iterator.value():
-                item = iterator.value()
-                if item.data(0, Qt.ItemDataRole.UserRole) == current_step:
-                    self.canvas.setCurrentItem(item)
-                    break
-                iterator += 1
+            self.canvas.refresh_step(current_step)
+            self.canvas.select_step(current_step)
 
     def closeEvent(self, event):
         if not self.has_unsaved_changes:
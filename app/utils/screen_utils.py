@@ -1,10 +1,29 @@
+import os
 import platform
-from PyQt6.QtGui import QGuiApplication
+import sys
+
+def _qt_app():
+    """
+    The running QGuiApplication, or None.
+    PyQt6 is only consulted if something already imported it, so headless runs
+    (python -m app.run) never load Qt just to ask for the screen scale.
+    """
+    qt_gui = sys.modules.get("PyQt6.QtGui")
+    if qt_gui is None:
+        return None
+    return qt_gui.QGuiApplication.instance()
 
 def get_screen_scale():
     """Returns the Device Pixel Ratio (DPR) of the primary screen."""
-    app = QGuiApplication.instance()
+    app = _qt_app()
     if not app:
+        # Headless: AUTOMACRO_SCREEN_SCALE overrides the platform guess
+        env_scale = os.getenv("AUTOMACRO_SCREEN_SCALE")
+        if env_scale:
+            try:
+                return float(env_scale)
+            except ValueError:
+                pass
         # Fallback if no app instance (e.g. running just backend tests)
         # But usually we run within GUI context or have a dummy app
         # For simple headless, assume 1.0 or use platform check
@@ -19,7 +38,7 @@ def get_screen_scale():
 
 def get_screen_geometry():
     """Returns screen dimensions (width, height) in logical pixels."""
-    app = QGuiApplication.instance()
+    app = _qt_app()
     if not app:
         # Fallback
         return (1920, 1080)  # Default 1080p
@@ -68,3 +87,19 @@ def physical_to_logical(rect_or_point):
     elif isinstance(rect_or_point, (list, tuple)) and len(rect_or_point) == 2:
         return [int(v / scale) for v in rect_or_point]
     return rect_or_point
+
+def store_captured_pixmap(pixmap, workflow_dir):
+    """
+    Saves a captured template to the shared asset store and returns the
+    target_image_path to put in the step (relative to workflow_dir).
+    """
+    from PyQt6.QtCore import QBuffer, QByteArray, QIODevice
+    from app.core.asset_store import store_bytes, reference
+
+    data = QByteArray()
+    buffer = QBuffer(data)
+    buffer.open(QIODevice.OpenModeFlag.WriteOnly)
+    pixmap.save(buffer, "PNG")
+    buffer.close()
+    stored = store_bytes(bytes(data), ".png", os.path.dirname(os.path.abspath(workflow_dir)))
+    return reference(stored, workflow_dir)
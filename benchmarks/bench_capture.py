@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Capture backend benchmark.
+
+Times region and full-screen captures for every available backend.
+Needs a real display (or a virtual framebuffer).
+
+Usage:
+    python -m benchmarks.bench_capture
+    python -m benchmarks.bench_capture --backend mss --region 1578,741,53,58 --iterations 500
+"""
+
+import argparse
+import statistics
+import time
+
+from app.core.capture import create_capture_backend, region_to_physical
+
+
+def time_calls(fn, iterations):
+    """Returns per-call latencies in milliseconds."""
+    fn() # Warm up (connection setup, first allocation)
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000.0)
+    return samples
+
+
+def summarize(samples):
+    ordered = sorted(samples)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    return f"mean={statistics.mean(ordered):8.3f}ms  p50={statistics.median(ordered):8.3f}ms  p99={p99:8.3f}ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark screen capture backends.")
+    parser.add_argument("--backend", default="all", help="mss, pyautogui or all")
+    parser.add_argument("--region", default="1578,741,53,58", help="Logical region x,y,w,h")
+    parser.add_argument("--scale", type=float, default=None, help="Logical->physical scale (default: detected)")
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    names = ["mss", "pyautogui"] if args.backend == "all" else [args.backend]
+    region = tuple(int(v) for v in args.region.split(","))
+
+    scale = args.scale
+    if scale is None:
+        from app.utils.screen_utils import get_screen_scale
+        scale = get_screen_scale()
+
+    for name in names:
+        try:
+            backend = create_capture_backend(name)
+        except ImportError as e:
+            print(f"{name:10s} unavailable: {e}")
+            continue
+
+        w, h = backend.screen_size()
+        rect = region_to_physical(region, w, h, scale)
+        if rect is None:
+            print(f"{name:10s} region {region} is outside the {w}x{h} screen")
+            continue
+
+        region_samples = time_calls(lambda: backend.grab(rect), args.iterations)
+        full_samples = time_calls(lambda: backend.grab(None), max(1, args.iterations // 10))
+        print(f"{name:10s} region {rect[2]}x{rect[3]:<5d} {summarize(region_samples)}")
+        print(f"{name:10s} full   {w}x{h:<5d} {summarize(full_samples)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Per-step dispatch overhead of WorkflowRunner.
+
+Runs a while(1) loop whose body only has steps that do no real work (TIME 0s waits
+with no action, an IF whose condition child is such a step), with step_interval_ms=0,
+and stops it after a fixed number of executed steps. What is left is the runner's own
+cost per step: dispatch, progress / log emission, bookkeeping. Reported with and
+without a log listener connected. No screen or input access is needed.
+
+--ref runs the same workload against app/ from another git revision (exported to a
+temp dir, e.g. the interpreted runner before the compiled plan: cad148c~1) and prints
+both, so before/after numbers come from one machine and one run. --output writes the
+results as JSON and --compare prints the change against such a file.
+
+Usage:
+    python -m benchmarks.bench_dispatch
+    python -m benchmarks.bench_dispatch --steps 500000 --trials 5
+    python -m benchmarks.bench_dispatch --ref cad148c~1
+    python -m benchmarks.bench_dispatch --output bench_results/dispatch.json
+    python -m benchmarks.bench_dispatch --compare bench_results/dispatch.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+
+from app.core.engine import WorkflowRunner
+from app.core.models import Workflow, Step, Condition, Action, ConditionType, ActionType, StepType
+
+
+def noop_step(step_id: str) -> Step:
+    return Step(
+        id=step_id,
+        name=f"Noop {step_id}",
+        condition=Condition(type=ConditionType.TIME, wait_time_s=0.0),
+        action=Action(type=ActionType.NONE),
+        step_interval_ms=0
+    )
+
+
+def make_workflow(body_size: int) -> Workflow:
+    body = [noop_step(f"s{i}") for i in range(body_size)]
+    body.append(Step(
+        id="if",
+        name="If",
+        type=StepType.IF,
+        condition=Condition(type=ConditionType.TIME),
+        action=Action(type=ActionType.NONE),
+        children=[noop_step("if-cond"), noop_step("if-body")],
+        step_interval_ms=0
+    ))
+    loop = Step(
+        id="loop",
+        name="Loop",
+        type=StepType.LOOP,
+        condition=Condition(type=ConditionType.TIME, loop_infinite=True),
+        action=Action(type=ActionType.NONE),
+        children=body,
+        step_interval_ms=0
+    )
+    return Workflow(name="dispatch", steps=[loop], created_at="", updated_at="")
+
+
+def run_once(workflow: Workflow, steps: int, with_log: bool) -> float:
+    """Returns microseconds per executed step."""
+    runner = WorkflowRunner(workflow)
+    executed = [0]
+
+    def on_progress(index, name):
+        executed[0] += 1
+        if executed[0] >= steps:
+            runner.stop()
+
+    runner.progress_signal.connect(on_progress)
+    if with_log:
+        lines = []
+        runner.log_signal.connect(lines.append)
+
+    start = time.perf_counter()
+    runner.run()
+    elapsed = time.perf_counter() - start
+    return elapsed / max(1, executed[0]) * 1e6
+
+
+def measure(steps: int, body: int, trials: int) -> dict:
+    """{"no log listener" / "log listener": {"median_us", "min_us"}} for the importable app package."""
+    workflow = make_workflow(body)
+    run_once(workflow, 1000, False) # Warm up
+    cases = {}
+    for with_log in (False, True):
+        results = [run_once(workflow, steps, with_log) for _ in range(trials)]
+        label = "log listener" if with_log else "no log listener"
+        cases[label] = {"median_us": statistics.median(results), "min_us": min(results)}
+    return cases
+
+
+def measure_ref(ref: str, steps: int, body: int, trials: int) -> dict:
+    """measure() in a subprocess whose app package comes from git revision ref."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = os.path.join(tmp, "app.tar")
+        subprocess.run(["git", "archive", "-o", archive, ref, "app"], cwd=root, check=True)
+        with tarfile.open(archive) as tar:
+            tar.extractall(tmp)
+        # The old app/ shadows the current one; benchmarks/ still comes from this tree
+        paths = [tmp, root] + [p for p in os.environ.get("PYTHONPATH", "").split(os.pathsep) if p]
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(paths))
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_dispatch", "--json",
+             "--steps", str(steps), "--body", str(body), "--trials", str(trials)],
+            cwd=tmp, env=env, check=True, capture_output=True, text=True
+        )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def print_cases(title: str, cases: dict, baseline: dict = None):
+    print(title)
+    for label, case in cases.items():
+        line = f"  {label:16s}: median {case['median_us']:.2f} us/step (min {case['min_us']:.2f})"
+        old = (baseline or {}).get(label)
+        if old:
+            delta = (case["median_us"] - old["median_us"]) / old["median_us"] * 100.0
+            line += f"  vs {old['median_us']:.2f} ({delta:+.1f}%)"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark WorkflowRunner per-step dispatch overhead.")
+    parser.add_argument("--steps", type=int, default=200000, help="Steps executed per trial")
+    parser.add_argument("--body", type=int, default=8, help="No-op steps in the loop body")
+    parser.add_argument("--trials", type=int, default=3)
+    parser.add_argument("--ref", help="Also measure app/ from this git revision (e.g. cad148c~1, before the compiled plan)")
+    parser.add_argument("--output", help="Write the results as JSON")
+    parser.add_argument("--compare", metavar="BASELINE", help="Previous result JSON to compare against")
+    parser.add_argument("--json", action="store_true", help=argparse.SUPPRESS) # Used by --ref
+    args = parser.parse_args()
+
+    cases = measure(args.steps, args.body, args.trials)
+    if args.json:
+        print(json.dumps(cases))
+        return
+
+    baseline = None
+    if args.ref:
+        baseline = measure_ref(args.ref, args.steps, args.body, args.trials)
+    elif args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["cases"]
+
+    print(f"{args.steps} steps per trial, {args.trials} trials")
+    if args.ref:
+        print_cases(f"{args.ref}:", baseline)
+    print_cases("current:", cases, baseline)
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump({"suite": "dispatch", "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                       "steps": args.steps, "body": args.body, "cases": cases}, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
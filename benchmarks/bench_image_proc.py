@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+Synthetic benchmark suite for app.core.image_proc.
+
+Generates haystacks at common resolutions (1080p, 1440p, 5K Retina) with templates
+planted at known positions, near-duplicates and sensor noise, serves them through a
+StaticFrameBackend (no screen, runs headless) and times:
+  - find_image_on_screen (EXHAUSTIVE and PYRAMID, full screen and watch area, color and grayscale)
+  - cv2.matchTemplate alone on BGR vs. grayscale (the per-call cost grayscale=True saves)
+  - find_color_on_screen (one color, first match only, three-color palette)
+  - find_images_batch vs. the same searches one call at a time (several watch areas)
+  - sort_matches / deduplicate_matches on large match lists
+
+Each case reports latency (mean / p50 / p99 ms), throughput (calls/s, matches/s) and,
+for searches, recall / false positives against the planted positions. Results are
+written as JSON; --compare flags cases that got slower than a previous result file.
+
+Usage:
+    python -m benchmarks.bench_image_proc
+    python -m benchmarks.bench_image_proc --quick --output bench_results/latest.json
+    python -m benchmarks.bench_image_proc --compare bench_results/main.json --max-regression 15
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Deterministic logical -> physical mapping for watch-area cases
+os.environ.setdefault("AUTOMACRO_SCREEN_SCALE", "1")
+
+import cv2
+import numpy as np
+
+from app.core.capture import StaticFrameBackend, set_capture_backend, invalidate_frame_cache
+from app.core.image_proc import (
+    find_image_on_screen, find_images_batch, ImageQuery, find_color_on_screen, sort_matches, deduplicate_matches,
+)
+from app.core.models import ImageSearchMode
+from app.core.templates import template_cache
+from benchmarks.synthetic import RESOLUTIONS, make_frame, make_template, plant, near_duplicate, add_noise, random_positions
+
+TEMPLATE_SIZE = (110, 47)
+COPIES = 6
+NEAR_DUPLICATES = 4
+POSITION_TOLERANCE_PX = 2
+COLOR_BGR = (40, 200, 250) # "#FAC828"
+COLOR_ALT_BGR = (230, 90, 30) # "#1E5AE6"
+COLOR_BLOB_SIZE = (18, 14)
+
+
+def percentile(ordered, pct: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def time_case(fn, iterations: int, fresh_capture: bool = True):
+    """Returns (per-call ms samples, results of the last call)."""
+    result = fn() # Warm up (template decode, first allocation)
+    samples = []
+    for _ in range(iterations):
+        if fresh_capture:
+            invalidate_frame_cache() # Every call pays for its capture, like a real step
+        start = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - start) * 1000.0)
+    return samples, result
+
+
+def summarize(samples, matches_per_call: int):
+    ordered = sorted(samples)
+    total_s = sum(ordered) / 1000.0
+    return {
+        "iterations": len(ordered),
+        "mean_ms": round(statistics.mean(ordered), 4),
+        "p50_ms": round(statistics.median(ordered), 4),
+        "p99_ms": round(percentile(ordered, 0.99), 4),
+        "calls_per_s": round(len(ordered) / total_s, 2) if total_s else None,
+        "matches_per_s": round(len(ordered) * matches_per_call / total_s, 2) if total_s else None,
+    }
+
+
+def score_hits(matches, expected):
+    """Recall of expected top-left positions and number of unexpected matches."""
+    hits = [(int(m[0]), int(m[1])) for m in matches]
+    found = sum(
+        1 for x, y in expected
+        if any(abs(x - hx) <= POSITION_TOLERANCE_PX and abs(y - hy) <= POSITION_TOLERANCE_PX for hx, hy in hits)
+    )
+    false_positives = sum(
+        1 for hx, hy in hits
+        if not any(abs(x - hx) <= POSITION_TOLERANCE_PX and abs(y - hy) <= POSITION_TOLERANCE_PX for x, y in expected)
+    )
+    return {
+        "recall": round(found / len(expected), 4) if expected else 1.0,
+        "false_positives": false_positives,
+    }
+
+
+def build_haystack(resolution: str, tmpl, seed: int):
+    """Frame with COPIES planted templates, NEAR_DUPLICATES distractors and noise."""
+    width, height = RESOLUTIONS[resolution]
+    frame = make_frame(width, height, seed=seed)
+    positions = random_positions(frame.shape, tmpl.shape, COPIES + NEAR_DUPLICATES, seed=seed + 1)
+    planted, distractors = positions[:COPIES], positions[COPIES:]
+    plant(frame, tmpl, planted)
+    for i, pos in enumerate(distractors):
+        plant(frame, near_duplicate(tmpl, seed=seed + 10 + i, strength=60), [pos])
+    return add_noise(frame, seed=seed + 2), planted
+
+
+def image_cases(resolution: str, iterations: int, tmp: str):
+    tmpl = make_template(*TEMPLATE_SIZE, seed=7)
+    path = os.path.join(tmp, "template.png")
+    cv2.imwrite(path, tmpl)
+    frame, planted = build_haystack(resolution, tmpl, seed=11)
+    set_capture_backend(StaticFrameBackend(frame))
+
+    # Watch area around the first planted copy (logical == physical at scale 1)
+    x, y = planted[0]
+    t_w, t_h = TEMPLATE_SIZE
+    area = (max(0, x - 200), max(0, y - 150), t_w + 400, t_h + 300)
+    in_area = [(px, py) for px, py in planted
+               if area[0] <= px and area[1] <= py and px + t_w <= area[0] + area[2] and py + t_h <= area[1] + area[3]]
+
+    cases = []
+    for mode in (ImageSearchMode.EXHAUSTIVE, ImageSearchMode.PYRAMID):
+        for gray in (False, True):
+            for scope, region, expected in (("full", None, planted), ("area", area, in_area)):
+                samples, matches = time_case(
+                    lambda: find_image_on_screen(path, confidence=0.8, region=region, search_mode=mode, grayscale=gray),
+                    iterations
+                )
+                suffix = "-gray" if gray else ""
+                case = {"name": f"find_image/{mode.value.lower()}{suffix}/{scope}/{resolution}"}
+                case.update(summarize(samples, len(matches)))
+                case.update(score_hits(matches, expected))
+                cases.append(case)
+    return cases
+
+
+def match_template_cases(resolution: str, iterations: int):
+    """matchTemplate on a full frame, BGR vs. grayscale (capture and conversion excluded)."""
+    tmpl = make_template(*TEMPLATE_SIZE, seed=7)
+    frame, _ = build_haystack(resolution, tmpl, seed=11)
+    gray_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    gray_tmpl = cv2.cvtColor(tmpl, cv2.COLOR_BGR2GRAY)
+
+    cases = []
+    for name, img, t in (("bgr", frame, tmpl), ("gray", gray_frame, gray_tmpl)):
+        samples, _ = time_case(lambda: cv2.matchTemplate(img, t, cv2.TM_CCOEFF_NORMED), iterations, fresh_capture=False)
+        case = {"name": f"match_template/{name}/{resolution}"}
+        case.update(summarize(samples, 0))
+        cases.append(case)
+    cases[1]["speedup_vs_bgr"] = round(cases[0]["p50_ms"] / cases[1]["p50_ms"], 2) if cases[1]["p50_ms"] else None
+    return cases
+
+
+def batch_cases(resolution: str, iterations: int, tmp: str):
+    """Three templates in nearby watch areas: one find_images_batch call vs. three searches."""
+    width, height = RESOLUTIONS[resolution]
+    frame = make_frame(width, height, seed=31)
+    queries, expected = [], []
+    for i in range(3):
+        tmpl = make_template(*TEMPLATE_SIZE, seed=40 + i)
+        path = os.path.join(tmp, f"batch_{i}.png")
+        cv2.imwrite(path, tmpl)
+        x, y = width // 2 + i * 180, height // 3 + i * 90
+        plant(frame, tmpl, [(x, y)])
+        queries.append(ImageQuery(path, 0.8, (x - 40, y - 30, TEMPLATE_SIZE[0] + 80, TEMPLATE_SIZE[1] + 60), max_matches=1))
+        expected.append((x, y))
+    set_capture_backend(StaticFrameBackend(add_noise(frame, seed=32)))
+
+    def sequential():
+        found = []
+        for q in queries:
+            invalidate_frame_cache() # Separate steps: each one captures
+            found += find_image_on_screen(q.path, q.confidence, q.region, max_matches=q.max_matches)
+        return found
+
+    def batch():
+        return [m for result in find_images_batch(queries) for m in result]
+
+    cases = []
+    for name, fn in (("sequential", sequential), ("batch", batch)):
+        samples, matches = time_case(fn, iterations)
+        case = {"name": f"find_images/{name}/3_areas/{resolution}"}
+        case.update(summarize(samples, len(matches)))
+        case.update(score_hits(matches, expected))
+        cases.append(case)
+    return cases
+
+
+def color_cases(resolution: str, iterations: int):
+    width, height = RESOLUTIONS[resolution]
+    frame = add_noise(make_frame(width, height, seed=21), sigma=1.0, seed=22)
+    b_w, b_h = COLOR_BLOB_SIZE
+    positions = random_positions(frame.shape, (b_h + 4, b_w + 4), COPIES, seed=23)
+    for px, py in positions:
+        cv2.rectangle(frame, (px, py), (px + b_w - 1, py + b_h - 1), COLOR_BGR, -1)
+    set_capture_backend(StaticFrameBackend(frame))
+
+    # Same blobs in a second color, searched together with the first as a palette
+    alt_positions = random_positions(frame.shape, (b_h + 4, b_w + 4), COPIES, seed=24)
+    alt_positions = [p for p in alt_positions
+                     if all(abs(p[0] - x) > b_w + 4 or abs(p[1] - y) > b_h + 4 for x, y in positions)]
+    for px, py in alt_positions:
+        cv2.rectangle(frame, (px, py), (px + b_w - 1, py + b_h - 1), COLOR_ALT_BGR, -1)
+    set_capture_backend(StaticFrameBackend(frame))
+
+    def to_hex(bgr):
+        return "#{:02X}{:02X}{:02X}".format(bgr[2], bgr[1], bgr[0])
+
+    target_hex = to_hex(COLOR_BGR)
+    palette = [(to_hex(COLOR_ALT_BGR), 8), ("#102030", 4)]
+    first = min(positions, key=lambda p: (p[1], p[0]))
+    specs = [
+        ("full", lambda: find_color_on_screen(target_hex, tolerance=8), positions),
+        ("first", lambda: find_color_on_screen(target_hex, tolerance=8, max_matches=1), [first]),
+        ("palette3", lambda: find_color_on_screen(target_hex, tolerance=8, palette=palette), positions + alt_positions),
+    ]
+    cases = []
+    for name, fn, expected in specs:
+        samples, matches = time_case(fn, iterations)
+        case = {"name": f"find_color/{name}/{resolution}"}
+        case.update(summarize(samples, len(matches)))
+        case.update(score_hits(matches, expected))
+        cases.append(case)
+    return cases
+
+
+def make_match_list(count: int, seed: int):
+    """count boxes in clusters of 1-4 near-identical boxes (what overlapping peaks look like)."""
+    rng = random.Random(seed)
+    matches = []
+    while len(matches) < count:
+        x, y = rng.randrange(0, 5000), rng.randrange(0, 2800)
+        for _ in range(rng.randint(1, 4)):
+            matches.append((x + rng.randint(-3, 3), y + rng.randint(-3, 3), 40, 30))
+    rng.shuffle(matches)
+    return matches[:count]
+
+
+def list_cases(iterations: int):
+    cases = []
+    for count in (100, 1000, 10000):
+        matches = make_match_list(count, seed=count)
+        for name, fn in (
+            ("sort_matches", lambda: sort_matches(matches)),
+            ("deduplicate_matches", lambda: deduplicate_matches(matches, radius_px=10)),
+        ):
+            samples, result = time_case(fn, iterations, fresh_capture=False)
+            case = {"name": f"{name}/{count}"}
+            case.update(summarize(samples, len(result)))
+            cases.append(case)
+    return cases
+
+
+def git_revision():
+    try:
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=root, capture_output=True, text=True, timeout=10)
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def compare(results, baseline_path: str, max_regression_pct: float) -> int:
+    """Prints per-case p50 deltas. Returns the number of cases slower than allowed."""
+    with open(baseline_path) as f:
+        baseline = {case["name"]: case for case in json.load(f)["cases"]}
+    regressions = 0
+    print(f"\nvs {baseline_path}:")
+    for case in results["cases"]:
+        old = baseline.get(case["name"])
+        if not old or not old.get("p50_ms"):
+            continue
+        delta = (case["p50_ms"] - old["p50_ms"]) / old["p50_ms"] * 100.0
+        flag = ""
+        if delta > max_regression_pct:
+            flag = "  REGRESSION"
+            regressions += 1
+        print(f"  {case['name']:40s} p50 {old['p50_ms']:9.3f} -> {case['p50_ms']:9.3f} ms ({delta:+6.1f}%){flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthetic benchmark suite for app.core.image_proc.")
+    parser.add_argument("--resolutions", default="1080p,1440p,5k", help=f"Comma separated: {', '.join(RESOLUTIONS)}")
+    parser.add_argument("--iterations", type=int, default=20, help="Timed calls per search case")
+    parser.add_argument("--quick", action="store_true", help="1080p only, 5 iterations (smoke test)")
+    parser.add_argument("--output", help="Result JSON path (default: bench_results/image_proc_<time>.json)")
+    parser.add_argument("--compare", metavar="BASELINE", help="Previous result JSON to compare against")
+    parser.add_argument("--max-regression", type=float, default=20.0, metavar="PCT",
+                        help="p50 slowdown that counts as a regression with --compare")
+    args = parser.parse_args()
+
+    resolutions = ["1080p"] if args.quick else [r.strip() for r in args.resolutions.split(",") if r.strip()]
+    iterations = 5 if args.quick else args.iterations
+    unknown = [r for r in resolutions if r not in RESOLUTIONS]
+    if unknown:
+        parser.error(f"unknown resolution(s): {', '.join(unknown)}")
+
+    cases = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for resolution in resolutions:
+            template_cache.clear()
+            cases += image_cases(resolution, iterations, tmp)
+            cases += match_template_cases(resolution, iterations)
+            cases += batch_cases(resolution, iterations, tmp)
+            cases += color_cases(resolution, iterations)
+    cases += list_cases(iterations * 5)
+
+    results = {
+        "suite": "image_proc",
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "opencv": cv2.__version__,
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "iterations": iterations,
+        "cases": cases,
+    }
+
+    print(f"{'case':40s} {'p50 ms':>9s} {'p99 ms':>9s} {'calls/s':>9s} {'matches/s':>10s} {'recall':>7s} {'fp':>3s}")
+    for case in cases:
+        recall = f"{case['recall']:.2f}" if "recall" in case else "-"
+        fp = str(case.get("false_positives", "-"))
+        print(f"{case['name']:40s} {case['p50_ms']:9.3f} {case['p99_ms']:9.3f} "
+              f"{case['calls_per_s'] or 0:9.1f} {case['matches_per_s'] or 0:10.1f} {recall:>7s} {fp:>3s}")
+
+    output = args.output or os.path.join("bench_results", f"image_proc_{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.max_regression)
+        if regressions:
+            print(f"{regressions} case(s) regressed by more than {args.max_regression}%")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Input throughput benchmark (actions per second).
+
+  - runner/virtual: MOVE -> CLICK pairs dispatched by WorkflowRunner on a virtual screen,
+    once with zero input delays (runner overhead only) and once with the workflow
+    defaults (app.core.models.InputDelays). Waits run on the virtual clock, so the
+    delay case reports the virtual time the delays add per action.
+  - backend/<name>: raw move_to calls of every real input backend that can open the
+    display (xtest, pyautogui without PAUSE, and pyautogui with its default PAUSE for
+    comparison). The pointer only jiggles by a pixel around where it is; pass --clicks
+    to also time clicks in place.
+
+Usage:
+    python -m benchmarks.bench_input
+    python -m benchmarks.bench_input --actions 500 --clicks --output bench_results/input.json
+"""
+
+import argparse
+import json
+import os
+import time
+
+from app.core.engine import WorkflowRunner
+from app.core.input import create_input_backend, PyAutoGUIInput
+from app.core.models import Workflow, Step, Condition, Action, ConditionType, ActionType, InputDelays
+from app.core.virtual import VirtualScreen, textured_background, use_virtual_screen
+
+
+def rate(count: int, seconds: float):
+    return round(count / seconds, 1) if seconds else None
+
+
+def action_workflow(pairs: int, delays: InputDelays) -> Workflow:
+    steps = []
+    for i in range(pairs):
+        steps.append(Step(id=f"move-{i}", name="Move", condition=Condition(type=ConditionType.TIME),
+                          action=Action(type=ActionType.MOVE, target_x=100 + i % 50, target_y=100), step_interval_ms=0))
+        steps.append(Step(id=f"click-{i}", name="Click", condition=Condition(type=ConditionType.TIME),
+                          action=Action(type=ActionType.CLICK), step_interval_ms=0))
+    return Workflow(name="input bench", steps=steps, created_at="", updated_at="", input_delays=delays)
+
+
+def runner_case(name: str, actions: int, delays: InputDelays):
+    screen = VirtualScreen(scale=1.0)
+    screen.add_frame("screen", textured_background(640, 360))
+    workflow = action_workflow(max(1, actions // 2), delays)
+    with use_virtual_screen(screen):
+        runner = WorkflowRunner(workflow, clock=screen.clock)
+        start = time.perf_counter()
+        runner.run()
+        wall_s = time.perf_counter() - start
+    count = len(workflow.steps)
+    virtual_s = screen.clock.monotonic()
+    return {
+        "name": name,
+        "actions": count,
+        "wall_s": round(wall_s, 4),
+        "actions_per_s": rate(count, wall_s),
+        "delay_ms_per_action": round(virtual_s * 1000.0 / count, 2),
+        # What the delays allow on a real desktop (runner overhead + waits)
+        "actions_per_s_with_delays": rate(count, wall_s + virtual_s),
+    }
+
+
+def backend_cases(actions: int, clicks: bool):
+    cases = []
+    candidates = [("xtest", lambda: create_input_backend("xtest")), ("pyautogui", PyAutoGUIInput)]
+    for name, factory in candidates:
+        try:
+            backend = factory()
+            x, y = backend.position()
+        except Exception as e:
+            print(f"  backend/{name}: skipped ({e})")
+            continue
+        x, y = max(x, 10), max(y, 10) # Stay clear of the fail-safe corner
+        start = time.perf_counter()
+        for i in range(actions):
+            backend.move_to(x + (i % 2), y)
+        cases.append({"name": f"backend/{name}/move", "actions": actions,
+                      "actions_per_s": rate(actions, time.perf_counter() - start)})
+        if clicks:
+            start = time.perf_counter()
+            for _ in range(actions):
+                backend.click()
+            cases.append({"name": f"backend/{name}/click", "actions": actions,
+                          "actions_per_s": rate(actions, time.perf_counter() - start)})
+
+    if any(case["name"].startswith("backend/pyautogui") for case in cases):
+        import pyautogui
+        samples = min(actions, 20) # 0.1 s each
+        x, y = pyautogui.position()
+        x, y = max(x, 10), max(y, 10)
+        start = time.perf_counter()
+        for i in range(samples):
+            pyautogui.moveTo(x + (i % 2), y)
+        cases.append({"name": "backend/pyautogui-pause/move", "actions": samples,
+                      "actions_per_s": rate(samples, time.perf_counter() - start)})
+    return cases
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure input actions per second.")
+    parser.add_argument("--actions", type=int, default=200, help="Actions per case")
+    parser.add_argument("--clicks", action="store_true", help="Also time real clicks (at the current pointer position)")
+    parser.add_argument("--no-backends", action="store_true", help="Only the virtual runner cases")
+    parser.add_argument("--output", help="Write the results as JSON")
+    args = parser.parse_args()
+
+    cases = [
+        runner_case("runner/virtual/no-delays", args.actions, InputDelays(move_ms=0, click_ms=0, key_ms=0)),
+        runner_case("runner/virtual/default-delays", args.actions, InputDelays()),
+    ]
+    if not args.no_backends:
+        cases += backend_cases(args.actions, args.clicks)
+
+    print(f"{'case':36s} {'actions':>8s} {'actions/s':>10s}")
+    for case in cases:
+        print(f"{case['name']:36s} {case['actions']:8d} {case['actions_per_s'] or 0:10.1f}")
+        if "delay_ms_per_action" in case:
+            print(f"{'':36s} delays: {case['delay_ms_per_action']} ms/action, "
+                  f"{case['actions_per_s_with_delays']} actions/s on a real desktop")
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump({"suite": "input", "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "cases": cases}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
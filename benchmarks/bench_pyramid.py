@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Coarse-to-fine (PYRAMID) vs exhaustive template matching.
+
+Plants a template in synthetic frames and runs find_image_on_screen in both
+search modes on the same frame. Reports the speedup and how often the two
+modes return exactly the same matches. Runs headless (no screen capture).
+
+Usage:
+    python -m benchmarks.bench_pyramid
+    python -m benchmarks.bench_pyramid --resolution 5k --trials 20 --template 220x94
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import cv2
+
+from app.core.capture import StaticFrameBackend, set_capture_backend, invalidate_frame_cache
+from app.core.image_proc import find_image_on_screen
+from app.core.models import ImageSearchMode
+from benchmarks.synthetic import RESOLUTIONS, make_frame, make_template, plant, add_noise, random_positions
+
+
+def timed_search(path, confidence, mode):
+    invalidate_frame_cache() # Same capture cost for both modes
+    start = time.perf_counter()
+    matches = find_image_on_screen(path, confidence=confidence, search_mode=mode)
+    return (time.perf_counter() - start) * 1000.0, matches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark PYRAMID vs EXHAUSTIVE image search.")
+    parser.add_argument("--resolution", default="1080p", choices=sorted(RESOLUTIONS))
+    parser.add_argument("--template", default="110x47", help="Template size WxH in physical px")
+    parser.add_argument("--copies", type=int, default=1, help="Planted copies per frame")
+    parser.add_argument("--trials", type=int, default=10)
+    parser.add_argument("--confidence", type=float, default=0.8)
+    args = parser.parse_args()
+
+    width, height = RESOLUTIONS[args.resolution]
+    t_w, t_h = (int(v) for v in args.template.lower().split("x"))
+
+    exhaustive_ms, pyramid_ms = [], []
+    same, found = 0, 0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for trial in range(args.trials):
+            tmpl = make_template(t_w, t_h, seed=100 + trial)
+            path = os.path.join(tmp, f"tmpl_{trial}.png")
+            cv2.imwrite(path, tmpl)
+
+            frame = make_frame(width, height, seed=trial)
+            positions = random_positions(frame.shape, tmpl.shape, args.copies, seed=200 + trial)
+            frame = add_noise(plant(frame, tmpl, positions), seed=300 + trial)
+            set_capture_backend(StaticFrameBackend(frame))
+
+            ms_e, matches_e = timed_search(path, args.confidence, ImageSearchMode.EXHAUSTIVE)
+            ms_p, matches_p = timed_search(path, args.confidence, ImageSearchMode.PYRAMID)
+            exhaustive_ms.append(ms_e)
+            pyramid_ms.append(ms_p)
+
+            if sorted(matches_e) == sorted(matches_p):
+                same += 1
+            hits = {(int(m[0]), int(m[1])) for m in matches_p}
+            if all(any(abs(x - hx) <= 2 and abs(y - hy) <= 2 for hx, hy in hits) for x, y in positions):
+                found += 1
+
+    mean_e = statistics.mean(exhaustive_ms)
+    mean_p = statistics.mean(pyramid_ms)
+    print(f"resolution={args.resolution} ({width}x{height}) template={t_w}x{t_h} copies={args.copies} trials={args.trials}")
+    print(f"exhaustive  mean={mean_e:9.2f}ms  p50={statistics.median(exhaustive_ms):9.2f}ms")
+    print(f"pyramid     mean={mean_p:9.2f}ms  p50={statistics.median(pyramid_ms):9.2f}ms")
+    print(f"speedup     {mean_e / mean_p:6.1f}x")
+    print(f"agreement   {same}/{args.trials} identical results, {found}/{args.trials} found every planted copy")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+End-to-end workflow benchmark on a virtual screen (no display, no real sleeps).
+
+Runs a workflow against a scripted scene (app.core.virtual) with a VirtualClock and
+stops it after the scene went through its start frame a number of times (one game
+round of workflows/sample = one cycle). Everything the runner does for real is
+measured (matching, capture, dispatch); waits only move virtual time. Reports wall
+time per cycle, steps/s, matches, clicks and how much faster than real time the run was.
+
+Usage:
+    python -m benchmarks.bench_workflow
+    python -m benchmarks.bench_workflow --cycles 10 --trace bench_results/
+    python -m benchmarks.bench_workflow --workflow path/to/flow.json --scene path/to/scene.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import time
+
+from app.core.engine import WorkflowRunner
+from app.core.virtual import load_scene, use_virtual_screen
+from app.run import load_workflow
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_WORKFLOW = os.path.join(ROOT, "workflows", "sample", "flow.json")
+DEFAULT_SCENE = os.path.join(ROOT, "benchmarks", "scenes", "sample.json")
+
+
+def run_cycles(workflow, workflow_dir: str, scene_path: str, cycles: int, trace_path=None):
+    screen = load_scene(scene_path)
+    start_frame = screen.current
+    counts = {"steps": 0, "matches": 0}
+    cycle_marks = [] # Wall clock time whenever the start frame comes back
+
+    with use_virtual_screen(screen):
+        runner = WorkflowRunner(workflow, workflow_dir=workflow_dir, clock=screen.clock, trace_path=trace_path)
+
+        def on_progress(index, name):
+            counts["steps"] += 1
+            visits = screen.visits[start_frame]
+            if visits > len(cycle_marks) + 1:
+                cycle_marks.append(time.perf_counter())
+            if visits > cycles or screen.limit_reached():
+                runner.stop()
+
+        def on_log(message):
+            if message.startswith("Image found"):
+                counts["matches"] += 1
+
+        runner.progress_signal.connect(on_progress)
+        runner.log_signal.connect(on_log)
+        start = time.perf_counter()
+        runner.run()
+        wall_s = time.perf_counter() - start
+
+    cycle_s = [b - a for a, b in zip([start] + cycle_marks, cycle_marks)]
+    summary = screen.summary()
+    return {
+        "cycles": len(cycle_marks),
+        "wall_s": round(wall_s, 3),
+        "virtual_s": summary["virtual_time_s"],
+        "speedup": round(summary["virtual_time_s"] / wall_s, 1) if wall_s else None,
+        "cycle_wall_ms_median": round(statistics.median(cycle_s) * 1000.0, 1) if cycle_s else None,
+        "steps": counts["steps"],
+        "steps_per_s": round(counts["steps"] / wall_s, 1) if wall_s else None,
+        "matches": counts["matches"],
+        "clicks": summary["clicks"],
+        "visits": summary["visits"],
+        "schedule": runner.schedule_stats,
+        "trace": runner.trace_file,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark a workflow end to end on a virtual screen.")
+    parser.add_argument("--workflow", default=DEFAULT_WORKFLOW, help="flow.json path")
+    parser.add_argument("--scene", default=DEFAULT_SCENE, help="Scene JSON (app.core.virtual)")
+    parser.add_argument("--cycles", type=int, default=3, help="Stop after the scene returned to its start frame this often")
+    parser.add_argument("--trace", metavar="PATH", help="Also write a span trace of the run")
+    parser.add_argument("--output", help="Write the result as JSON")
+    args = parser.parse_args()
+
+    workflow = load_workflow(args.workflow)
+    result = run_cycles(workflow, os.path.dirname(os.path.abspath(args.workflow)), args.scene, args.cycles, args.trace)
+
+    print(f"{workflow.name}: {result['cycles']} cycle(s) in {result['wall_s']:.2f}s wall "
+          f"({result['virtual_s']:.1f}s virtual, {result['speedup']}x real time)")
+    print(f"  cycle (median): {result['cycle_wall_ms_median']} ms wall")
+    print(f"  steps: {result['steps']} ({result['steps_per_s']}/s), image matches: {result['matches']}, "
+          f"clicks: {result['clicks']}")
+    print(f"  frames shown: {result['visits']}")
+    if result["trace"]:
+        print(f"  trace: {result['trace']}")
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
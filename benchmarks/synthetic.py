@@ -0,0 +1,96 @@
+"""
+Synthetic screen content for the benchmarks.
+
+Frames look roughly like a game/desktop UI: smooth gradients, flat panels,
+buttons with text, plus optional sensor noise. Everything is seeded, so the
+same arguments always produce the same pixels.
+"""
+
+import numpy as np
+import cv2
+
+# Common screen sizes in physical pixels
+RESOLUTIONS = {
+    "1080p": (1920, 1080),
+    "1440p": (2560, 1440),
+    "5k": (5120, 2880),
+}
+
+
+def make_frame(width: int, height: int, seed: int = 0, panels: int = 40) -> np.ndarray:
+    """Returns a BGR frame with a gradient background and random UI-like panels."""
+    rng = np.random.default_rng(seed)
+
+    xs = np.linspace(0, 1, width, dtype=np.float32)
+    ys = np.linspace(0, 1, height, dtype=np.float32)
+    base = rng.uniform(40, 200, 3).astype(np.float32)
+    frame = np.empty((height, width, 3), np.float32)
+    for c in range(3):
+        frame[:, :, c] = base[c] + 40 * np.outer(ys, np.ones_like(xs)) + 30 * np.outer(np.ones_like(ys), xs)
+    frame = np.clip(frame, 0, 255).astype(np.uint8)
+
+    font = cv2.FONT_HERSHEY_SIMPLEX
+    for i in range(panels):
+        w = int(rng.integers(width // 40, width // 6))
+        h = int(rng.integers(height // 40, height // 6))
+        x = int(rng.integers(0, width - w))
+        y = int(rng.integers(0, height - h))
+        color = tuple(int(v) for v in rng.integers(0, 255, 3))
+        cv2.rectangle(frame, (x, y), (x + w, y + h), color, -1)
+        cv2.rectangle(frame, (x, y), (x + w, y + h), (20, 20, 20), 2)
+        label = "".join(chr(int(c)) for c in rng.integers(65, 90, int(rng.integers(3, 9))))
+        cv2.putText(frame, label, (x + 4, y + h // 2), font, max(0.4, h / 80.0), (255, 255, 255), 1, cv2.LINE_AA)
+    return frame
+
+
+def make_template(width: int, height: int, seed: int = 1) -> np.ndarray:
+    """Returns a distinctive button-like BGR patch."""
+    rng = np.random.default_rng(seed)
+    tmpl = np.empty((height, width, 3), np.uint8)
+    tmpl[:] = tuple(int(v) for v in rng.integers(30, 230, 3))
+    cv2.circle(tmpl, (width // 4, height // 2), max(2, min(width, height) // 4), (0, 0, 255), -1)
+    cv2.rectangle(tmpl, (width // 2, height // 4), (width - 3, 3 * height // 4), (255, 255, 0), -1)
+    cv2.line(tmpl, (0, height - 1), (width - 1, 0), (0, 0, 0), 2)
+    label = "".join(chr(int(c)) for c in rng.integers(65, 90, 3))
+    cv2.putText(tmpl, label, (2, height - 4), cv2.FONT_HERSHEY_SIMPLEX, max(0.3, height / 60.0), (255, 255, 255), 1, cv2.LINE_AA)
+    return tmpl
+
+
+def plant(frame: np.ndarray, tmpl: np.ndarray, positions) -> np.ndarray:
+    """Copies tmpl into frame at every (x, y) top-left position (in place)."""
+    t_h, t_w = tmpl.shape[:2]
+    for x, y in positions:
+        frame[y:y + t_h, x:x + t_w] = tmpl
+    return frame
+
+
+def near_duplicate(tmpl: np.ndarray, seed: int = 2, strength: int = 25) -> np.ndarray:
+    """Returns a slightly altered copy (brightness shift + a few changed pixels)."""
+    rng = np.random.default_rng(seed)
+    dup = np.clip(tmpl.astype(np.int16) + int(rng.integers(-strength, strength)), 0, 255).astype(np.uint8)
+    t_h, t_w = dup.shape[:2]
+    cv2.line(dup, (0, 0), (t_w - 1, t_h - 1), tuple(int(v) for v in rng.integers(0, 255, 3)), 1)
+    return dup
+
+
+def add_noise(frame: np.ndarray, sigma: float = 3.0, seed: int = 3) -> np.ndarray:
+    """Adds gaussian sensor noise (returns a new frame)."""
+    rng = np.random.default_rng(seed)
+    noise = rng.normal(0, sigma, frame.shape)
+    return np.clip(frame.astype(np.float32) + noise, 0, 255).astype(np.uint8)
+
+
+def random_positions(frame_shape, tmpl_shape, count: int, seed: int = 4):
+    """Non-overlapping top-left positions for count templates."""
+    rng = np.random.default_rng(seed)
+    f_h, f_w = frame_shape[:2]
+    t_h, t_w = tmpl_shape[:2]
+    positions = []
+    attempts = 0
+    while len(positions) < count and attempts < count * 100:
+        attempts += 1
+        x = int(rng.integers(0, f_w - t_w))
+        y = int(rng.integers(0, f_h - t_h))
+        if all(abs(x - px) > t_w or abs(y - py) > t_h for px, py in positions):
+            positions.append((x, y))
+    return positions
@@ -6,10 +6,10 @@ from app.ui.manager import WorkflowManager
 from app.ui.workflow_editor_v2 import launch_v2_editor
 from app.core.engine import WorkflowRunner
 from app.ui.runner import RunnerWindow
-from app.core.models import Workflow
+from app.core.workflow_io import load_workflow
 from app.utils.common import setup_logging, get_workflows_dir
-import json
 import threading
+import time
 
 
 # Debug Logging for Segfault Diagnosis
@@ -93,9 +93,10 @@ def main():
             logger.error(f"Workflow not found: {path}")
             return
             
-        with open(path, "r") as f:
-            data = json.load(f)
-            workflow = Workflow(**data)
+        workflow = load_workflow(path, name)
+        if workflow is None:
+            logger.error(f"Workflow could not be read: {path}")
+            return
             
         # Run in separate thread to not freeze UI
         workflow_dir = os.path.join(get_workflows_dir(), name)
@@ -114,7 +115,13 @@ def main():
             else:
                 runner.set_input_value("1") # Default fallback
                 
-        runner.request_input_signal.connect(on_input_requested)
+        runner_window.signals.request_input_signal.connect(on_input_requested)
+
+        # Last-run stats for the manager's catalog
+        started = time.monotonic()
+        runner_window.signals.finished_signal.connect(
+            lambda: windows["manager"].record_run(name, runner.succeeded, time.monotonic() - started)
+        )
         
         t = threading.Thread(target=runner.run)
         t.start()
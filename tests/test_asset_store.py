@@ -0,0 +1,91 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from app.core.asset_store import store_bytes, reference, adopt_workflow, collect_garbage, export_workflow, store_dir
+from app.core.models import Workflow, Step, Condition, Action, ConditionType, ActionType
+from app.core.workflow_io import save_workflow, load_workflow
+
+
+def image_step(step_id, path):
+    return Step(id=step_id, name=step_id, condition=Condition(type=ConditionType.IMAGE, target_image_path=path),
+                action=Action(type=ActionType.NONE))
+
+
+class TestAssetStore(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        for folder, files in (("a", {"btn.png": b"same", "old.png": b"unused"}), ("b", {"copy.png": b"same"})):
+            os.makedirs(os.path.join(self.root, folder, "assets"))
+            for name, data in files.items():
+                with open(os.path.join(self.root, folder, "assets", name), "wb") as f:
+                    f.write(data)
+        save_workflow(os.path.join(self.root, "a", "flow.json"),
+                      Workflow(name="a", steps=[image_step("s1", "assets/btn.png"), image_step("s2", "assets/btn.png")],
+                               created_at="", updated_at=""))
+        save_workflow(os.path.join(self.root, "b", "flow.json"),
+                      Workflow(name="b", steps=[image_step("s1", "assets/copy.png")], created_at="", updated_at=""))
+
+    def age(self, path, seconds=7 * 24 * 3600):
+        stamp = os.path.getmtime(path) - seconds
+        os.utime(path, (stamp, stamp))
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_identical_bytes_are_stored_once(self):
+        first = store_bytes(b"pixels", ".png", self.root)
+        self.assertEqual(store_bytes(b"pixels", ".png", self.root), first)
+        self.assertNotEqual(store_bytes(b"other", ".png", self.root), first)
+        self.assertEqual(reference(first, os.path.join(self.root, "a")), "../.assets/" + os.path.basename(first))
+
+    def test_adopt_then_gc(self):
+        self.assertEqual(adopt_workflow("a", self.root), 2)
+        self.assertEqual(adopt_workflow("b", self.root), 1)
+        self.assertEqual(adopt_workflow("b", self.root), 0) # Already in the store
+        a = load_workflow(os.path.join(self.root, "a", "flow.json"))
+        b = load_workflow(os.path.join(self.root, "b", "flow.json"))
+        self.assertEqual(a.steps[0].condition.target_image_path, b.steps[0].condition.target_image_path)
+        self.assertEqual(len(os.listdir(store_dir(self.root))), 1)
+
+        for folder in ("a", "b"):
+            for name in os.listdir(os.path.join(self.root, folder, "assets")):
+                self.age(os.path.join(self.root, folder, "assets", name))
+        report = collect_garbage(self.root, dry_run=True)
+        self.assertEqual(len(report.removed), 3) # btn.png, old.png, copy.png
+        self.assertTrue(os.path.exists(os.path.join(self.root, "a", "assets", "old.png")))
+        report = collect_garbage(self.root)
+        self.assertEqual((len(report.removed), report.kept), (3, 1))
+        self.assertEqual(os.listdir(os.path.join(self.root, "a", "assets")), [])
+
+        with open(os.path.join(self.root, "b", "flow.json"), "w") as f:
+            f.write("{broken")
+        with self.assertRaises(ValueError):
+            collect_garbage(self.root)
+        self.assertEqual(len(os.listdir(store_dir(self.root))), 1)
+
+    def test_gc_keeps_recent_captures(self):
+        # Captured in an editor that hasn't saved flow.json yet
+        fresh = store_bytes(b"just captured", ".png", self.root)
+        stale = store_bytes(b"long gone", ".png", self.root)
+        self.age(stale)
+        report = collect_garbage(self.root)
+        self.assertEqual((report.removed, report.recent), ([stale], 2)) # fresh and a/assets/old.png
+        self.assertTrue(os.path.exists(fresh))
+
+    def test_export_is_self_contained(self):
+        adopt_workflow("a", self.root)
+        dest = os.path.join(self.root, "export", "a")
+        self.assertEqual(export_workflow("a", dest, self.root), 2)
+        exported = load_workflow(os.path.join(dest, "flow.json"))
+        path = exported.steps[0].condition.target_image_path
+        self.assertTrue(path.startswith("assets/"))
+        with open(os.path.join(dest, path), "rb") as f:
+            self.assertEqual(f.read(), b"same")
+        # The original still uses the store
+        self.assertTrue(load_workflow(os.path.join(self.root, "a", "flow.json")).steps[0].condition.target_image_path.startswith("../"))
+
+
+if __name__ == '__main__':
+    unittest.main()
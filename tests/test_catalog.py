@@ -0,0 +1,61 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from app.core.catalog import WorkflowCatalog
+
+
+def write_flow(root, folder, name, steps):
+    path = os.path.join(root, folder)
+    os.makedirs(os.path.join(path, "assets"), exist_ok=True)
+    with open(os.path.join(path, "flow.json"), "w", encoding="utf-8") as f:
+        json.dump({"name": name, "steps": steps, "created_at": "", "updated_at": ""}, f)
+
+
+def step(image=None, children=()):
+    return {"condition": {"type": "IMAGE" if image else "TIME", "target_image_path": image},
+            "action": {"type": "NONE"}, "children": list(children)}
+
+
+class TestWorkflowCatalog(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        write_flow(self.root, "a", "Alpha", [step(), step(children=[step("assets/btn.png")])])
+        with open(os.path.join(self.root, "a", "assets", "btn.png"), "wb") as f:
+            f.write(b"png")
+        write_flow(self.root, "b", "Beta", [])
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_only_changed_flows_are_parsed(self):
+        catalog = WorkflowCatalog(self.root)
+        entries = catalog.refresh()
+        self.assertEqual([(e.folder, e.name, e.step_count, e.asset_count) for e in entries],
+                         [("a", "Alpha", 3, 1), ("b", "Beta", 0, 0)])
+        self.assertEqual(entries[0].thumbnail, "assets/btn.png")
+        self.assertEqual(catalog.parsed, 2)
+
+        catalog.record_run("a", succeeded=True, duration_s=1.5)
+        reopened = WorkflowCatalog(self.root)
+        reopened.refresh()
+        self.assertEqual(reopened.parsed, 0)
+
+        write_flow(self.root, "b", "Beta renamed", [step(), step()])
+        shutil.rmtree(os.path.join(self.root, "a", "assets"))
+        os.utime(os.path.join(self.root, "a", "flow.json"), ns=(1, 1))
+        entries = reopened.refresh()
+        self.assertEqual(reopened.parsed, 2)
+        self.assertEqual((entries[1].name, entries[1].step_count), ("Beta renamed", 2))
+        self.assertIsNone(entries[0].thumbnail)
+        self.assertTrue(entries[0].last_run.succeeded) # Kept across a re-parse
+
+        shutil.rmtree(os.path.join(self.root, "b"))
+        self.assertIsNone(reopened.update_folder("b"))
+        self.assertEqual([e.folder for e in WorkflowCatalog(self.root).list()], ["a"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,9 @@
 import unittest
-from unittest.mock import MagicMock, patch
+from unittest.mock import patch
 from app.core.models import Workflow, Step, Condition, Action, ConditionType, ActionType
 from app.core.engine import WorkflowRunner
-import time
+from app.core.clock import VirtualClock
+from app.core.input import PyAutoGUIInput, set_input_backend
 
 class TestWorkflowRunner(unittest.TestCase):
     def setUp(self):
@@ -11,11 +12,14 @@ class TestWorkflowRunner(unittest.TestCase):
             created_at="",
             updated_at=""
         )
+        set_input_backend(PyAutoGUIInput())
+
+    def tearDown(self):
+        set_input_backend(None)
         
-    @patch('app.core.engine.time.sleep') # Mock sleep to speed up tests
     @patch('app.core.engine.find_image_on_screen')
-    @patch('app.core.engine.pyautogui.click')
-    def test_simple_flow(self, mock_click, mock_find_image, mock_sleep):
+    @patch('app.core.input.PyAutoGUIInput.click')
+    def test_simple_flow(self, mock_click, mock_find_image):
         # Step 1: Wait 1s
         step1 = Step(
             id="1",
@@ -37,15 +41,17 @@ class TestWorkflowRunner(unittest.TestCase):
         # Mock image finding
         mock_find_image.return_value = [(0, 0, 10, 10)]
         
-        runner = WorkflowRunner(self.workflow)
+        # Waits run on a virtual clock, so the 1s wait takes no real time
+        clock = VirtualClock()
+        runner = WorkflowRunner(self.workflow, clock=clock)
         runner.run()
         
         # Verify
         self.assertEqual(mock_click.call_count, 1)
         mock_click.assert_called_with(100, 100)
+        self.assertGreaterEqual(clock.monotonic(), 1.0)
 
-    @patch('app.core.engine.time.sleep')
-    def test_goto_loop(self, mock_sleep):
+    def test_goto_loop(self):
         # Step 1: Goto Step 2 (Index 1) -> But wait, Step 2 is Index 1.
         # Let's make a loop: Step 1 -> Step 2 -> Goto Step 1
         # But we need a break condition or it runs forever.
@@ -0,0 +1,262 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+import cv2
+import numpy as np
+
+from app.core.debug_artifacts import DebugArtifactWriter
+from app.core.change_detect import ChangeWatcher
+from app.core.capture import StaticFrameBackend, set_capture_backend, invalidate_frame_cache, frame_cache
+from app.core.color_search import find_color_components, parse_hex_color
+from app.core.image_proc import find_image_on_screen, find_image_matches, find_images_batch, ImageQuery, deduplicate_matches, find_color_on_screen
+from app.core.models import ImageSearchMode
+from app.core.spatial import VisitedPoints
+
+
+def make_frame(width=640, height=360, seed=0):
+    rng = np.random.default_rng(seed)
+    frame = np.full((height, width, 3), 90, np.uint8)
+    for _ in range(30):
+        x, y = int(rng.integers(0, width - 40)), int(rng.integers(0, height - 30))
+        color = tuple(int(v) for v in rng.integers(0, 255, 3))
+        cv2.rectangle(frame, (x, y), (x + int(rng.integers(10, 40)), y + int(rng.integers(10, 30))), color, -1)
+    return cv2.GaussianBlur(frame, (3, 3), 0)
+
+
+def make_template(width=48, height=32):
+    tmpl = np.full((height, width, 3), 200, np.uint8)
+    cv2.circle(tmpl, (12, 16), 8, (0, 0, 255), -1)
+    cv2.rectangle(tmpl, (26, 6), (44, 26), (255, 128, 0), -1)
+    cv2.line(tmpl, (0, height - 1), (width - 1, 0), (0, 0, 0), 2)
+    return tmpl
+
+
+class TestFindImage(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.tmpl = make_template()
+        self.path = os.path.join(self.tmp.name, "target.png")
+        cv2.imwrite(self.path, self.tmpl)
+
+        self.positions = [(40, 30), (300, 200), (520, 60)]
+        self.frame = make_frame()
+        t_h, t_w = self.tmpl.shape[:2]
+        for x, y in self.positions:
+            self.frame[y:y + t_h, x:x + t_w] = self.tmpl
+        set_capture_backend(StaticFrameBackend(self.frame))
+
+    def tearDown(self):
+        invalidate_frame_cache()
+        self.tmp.cleanup()
+
+    def test_one_match_per_occurrence(self):
+        matches = find_image_on_screen(self.path, confidence=0.8)
+        self.assertEqual(sorted((m[0], m[1]) for m in matches), sorted(self.positions))
+        for match in matches:
+            self.assertEqual(match[2:], (48, 32))
+
+    def test_max_matches_returns_best_peak(self):
+        # Slightly damage two copies so the untouched one scores highest
+        for x, y in self.positions[1:]:
+            self.frame[y + 2:y + 6, x + 2:x + 10] = 0
+        invalidate_frame_cache()
+
+        matches = find_image_matches(self.path, confidence=0.6, max_matches=1)
+        self.assertEqual(len(matches), 1)
+        self.assertEqual((matches[0].left, matches[0].top), self.positions[0])
+        self.assertGreater(matches[0].score, 0.99)
+
+    def test_pyramid_agrees_with_exhaustive(self):
+        exhaustive = find_image_on_screen(self.path, confidence=0.8, search_mode=ImageSearchMode.EXHAUSTIVE)
+        invalidate_frame_cache()
+        pyramid = find_image_on_screen(self.path, confidence=0.8, search_mode=ImageSearchMode.PYRAMID)
+        self.assertEqual(sorted(exhaustive), sorted(pyramid))
+
+    def test_grayscale_finds_same_occurrences(self):
+        for mode in (ImageSearchMode.EXHAUSTIVE, ImageSearchMode.PYRAMID):
+            invalidate_frame_cache()
+            color = find_image_on_screen(self.path, confidence=0.8, search_mode=mode)
+            gray = find_image_on_screen(self.path, confidence=0.8, search_mode=mode, grayscale=True)
+            self.assertEqual(sorted(gray), sorted(color))
+        invalidate_frame_cache()
+        batch = find_images_batch([ImageQuery(self.path, 0.8, (20, 10, 100, 80), grayscale=True), ImageQuery(self.path, 0.8)])
+        self.assertEqual([len(r) for r in batch], [1, 3])
+        # The batch used the cached gray frame, so a later gray search converts nothing
+        self.assertTrue(all(entry[3] is not None for entry in frame_cache._entries))
+
+    def test_missing_template(self):
+        self.assertEqual(find_image_on_screen(os.path.join(self.tmp.name, "missing.png")), [])
+
+    def test_batch_matches_single_searches(self):
+        queries = [
+            ImageQuery(self.path, 0.8, (20, 10, 100, 80)),
+            ImageQuery(self.path, 0.8, (280, 180, 100, 80), max_matches=1),
+            ImageQuery(self.path, 0.8, (200, 0, 60, 40)), # Nothing there
+            ImageQuery(os.path.join(self.tmp.name, "missing.png"), 0.8, (0, 0, 50, 50)),
+            ImageQuery(self.path, 0.8),
+        ]
+        batch = find_images_batch(queries)
+        for query, result in zip(queries, batch):
+            invalidate_frame_cache()
+            single = find_image_matches(query.path, query.confidence, query.region, max_matches=query.max_matches)
+            self.assertEqual(result, single)
+        self.assertEqual([len(r) for r in batch], [1, 1, 0, 0, 3])
+
+
+class TestFindColor(unittest.TestCase):
+    def setUp(self):
+        self.frame = np.full((600, 640, 3), 90, np.uint8)
+        cv2.rectangle(self.frame, (500, 20), (529, 39), (0, 0, 250), -1)    # red
+        cv2.rectangle(self.frame, (20, 20), (39, 29), (0, 200, 0), -1)      # green, same row
+        cv2.rectangle(self.frame, (300, 300), (302, 302), (0, 0, 255), -1)  # red, 3x3
+        # U shape: two prongs that only join far below the first band
+        cv2.rectangle(self.frame, (100, 100), (109, 400), (0, 0, 255), -1)
+        cv2.rectangle(self.frame, (60, 110), (69, 400), (0, 0, 255), -1)
+        cv2.rectangle(self.frame, (60, 400), (109, 409), (0, 0, 255), -1)
+        self.frame[50, 50] = (0, 0, 255) # Single-pixel noise
+        set_capture_backend(StaticFrameBackend(self.frame))
+
+    def tearDown(self):
+        invalidate_frame_cache()
+
+    def test_palette_with_own_tolerances(self):
+        matches = find_color_on_screen("#FF0000", tolerance=5, palette=[("#00C800", 0)])
+        self.assertEqual(matches, [(20, 20, 20, 10), (500, 20, 30, 20), (60, 100, 50, 310), (300, 300, 3, 3)])
+        self.assertEqual(find_color_on_screen("#FF0000", tolerance=5, min_area=10),
+                         [(500, 20, 30, 20), (60, 100, 50, 310)])
+        self.assertEqual(find_color_on_screen("#FF0000", tolerance=0)[:1], [(60, 100, 50, 310)])
+
+    def test_same_components_as_external_contours(self):
+        frame = np.full((120, 200, 3), 90, np.uint8)
+        frame[10, 10] = frame[11, 11] = (0, 0, 255) # Diagonal pair: 2x2 box, 2 pixels
+        cv2.rectangle(frame, (50, 20), (89, 59), (0, 0, 255), 3) # Ring ...
+        cv2.rectangle(frame, (65, 35), (72, 42), (0, 0, 255), -1) # ... with a dot in its hole
+        cv2.rectangle(frame, (120, 20), (129, 29), (0, 0, 255), -1)
+        mask = cv2.inRange(frame, (0, 0, 255), (0, 0, 255))
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        expected = sorted((cv2.boundingRect(c) for c in contours), key=lambda b: (b[1], b[0]))
+        boxes, _ = find_color_components(frame, [parse_hex_color("#FF0000")])
+        self.assertEqual(boxes, [tuple(b) for b in expected])
+        self.assertEqual(len(boxes), 3) # Dot inside the ring is not reported
+
+    def test_lookup_table_palette_matches_in_range(self):
+        targets = [parse_hex_color("#FF0000", 5), parse_hex_color("#00C800")]
+        unused = [parse_hex_color("#123456", 3), parse_hex_color("#FEDCBA", 9)]
+        self.assertEqual(find_color_components(self.frame, targets + unused)[0],
+                         find_color_components(self.frame, targets)[0])
+
+    def test_early_exit_agrees_with_full_scan(self):
+        targets = [parse_hex_color("#FF0000", 5), parse_hex_color("#00C800")]
+        full, mask = find_color_components(self.frame, targets)
+        self.assertEqual(mask.shape[0], 600)
+        for limit in range(1, len(full) + 2):
+            boxes, mask = find_color_components(self.frame, targets, limit=limit, first_band_px=32)
+            self.assertEqual(boxes, full[:limit])
+        _, mask = find_color_components(self.frame, targets, limit=2, first_band_px=32)
+        self.assertEqual(mask.shape[0], 64) # Both top components were complete after 64 rows
+
+
+class TestDeduplicate(unittest.TestCase):
+    def test_matches_within_radius_are_dropped(self):
+        matches = [(0, 0, 10, 10), (2, 3, 10, 10), (100, 100, 10, 10), (104, 100, 10, 10), (200, 0, 10, 10)]
+        self.assertEqual(
+            deduplicate_matches(matches, radius_px=5),
+            [(0, 0, 10, 10), (100, 100, 10, 10), (200, 0, 10, 10)],
+        )
+
+    def test_same_result_as_pairwise_check(self):
+        rng = np.random.default_rng(7)
+        matches = [(int(x), int(y), 20, 20) for x, y in rng.integers(0, 400, (500, 2))]
+        expected = []
+        for m in matches:
+            cx, cy = m[0] + 10, m[1] + 10
+            if all(((cx - u[0] - 10) ** 2 + (cy - u[1] - 10) ** 2) ** 0.5 >= 15 for u in expected):
+                expected.append(m)
+        self.assertEqual(deduplicate_matches(matches, radius_px=15), expected)
+
+
+class TestVisitedPoints(unittest.TestCase):
+    def test_first_unvisited_and_age_eviction(self):
+        now = [0.0]
+        visited = VisitedPoints(max_age_s=10.0, clock=lambda: now[0])
+        visited.add(50, 50)
+        centers = [(52, 49), (300, 300)]
+        self.assertEqual(visited.first_unvisited(centers, radius=10), 1)
+
+        now[0] = 11.0
+        self.assertEqual(visited.first_unvisited(centers, radius=10), 0)
+        self.assertEqual(len(visited), 0)
+
+    def test_max_points(self):
+        visited = VisitedPoints(max_age_s=None, max_points=3)
+        for i in range(5):
+            visited.add(i * 100, 0)
+        self.assertEqual(len(visited), 3)
+        self.assertFalse(visited.is_visited(0, 0, radius=10))
+        self.assertTrue(visited.is_visited(400, 0, radius=10))
+
+
+class TestDebugArtifacts(unittest.TestCase):
+    def test_disabled_writes_nothing(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            writer = DebugArtifactWriter(directory=tmp, enabled=False)
+            self.assertFalse(writer.submit("color_search", make_frame()))
+            self.assertEqual(os.listdir(tmp), [])
+
+    def test_sampling_and_rotation(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            writer = DebugArtifactWriter(directory=tmp, sample_every=3, max_files=2, enabled=True)
+            frame = make_frame(64, 48)
+            for _ in range(9):
+                writer.submit("color_search", frame, [(5, 5, 10, 10)])
+            writer.flush()
+            self.assertEqual(writer.written + writer.dropped, 3)
+            self.assertLessEqual(len(os.listdir(tmp)), 2)
+
+
+
+class TestChangeWatcher(unittest.TestCase):
+    def setUp(self):
+        self.frame = make_frame()
+        set_capture_backend(StaticFrameBackend(self.frame))
+        self.watcher = ChangeWatcher(region=(100, 100, 200, 100), poll_ms=5)
+        self.watcher.reset()
+
+    def test_unchanged_region_times_out(self):
+        self.frame[0:50, 0:50] = 255 # Outside the watched region
+        self.assertFalse(self.watcher.wait(0.05, threading.Event()))
+
+    def test_change_wakes_wait(self):
+        threading.Timer(0.02, lambda: self.frame.__setitem__((slice(150, 170), slice(150, 170)), 255)).start()
+        start = time.monotonic()
+        self.assertTrue(self.watcher.wait(2.0, threading.Event()))
+        self.assertLess(time.monotonic() - start, 1.0)
+
+    def test_hue_change_at_same_luminance(self):
+        self.frame[150:170, 150:170] = 76
+        self.watcher.reset()
+        self.frame[150:170, 150:170] = (0, 0, 255) # Pure red has gray level 76
+        self.assertTrue(self.watcher.changed())
+
+    def test_polling_keeps_other_cached_captures(self):
+        frame_cache.grab_physical((0, 0, 50, 50))
+        cached = len(frame_cache._entries)
+        self.frame[150:170, 150:170] = 255
+        self.assertTrue(self.watcher.changed())
+        self.assertEqual(len(frame_cache._entries), cached + 1)
+        view, _ = frame_cache.get_region((100, 100, 200, 100))
+        self.assertEqual(int(view[55, 55, 0]), 255) # Served from the new capture
+
+    def test_stop_event_wakes_wait(self):
+        stop = threading.Event()
+        threading.Timer(0.02, stop.set).start()
+        start = time.monotonic()
+        self.assertFalse(self.watcher.wait(2.0, stop))
+        self.assertLess(time.monotonic() - start, 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
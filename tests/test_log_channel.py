@@ -0,0 +1,70 @@
+import os
+import tempfile
+import unittest
+
+from app.core.log_channel import LogChannel, LogRollup, LogFileWriter, LogRecord
+
+
+def record(seq, t, message):
+    return LogRecord(seq, t, 0, "", message)
+
+
+class TestLogChannel(unittest.TestCase):
+    def test_overflow_drops_oldest_and_counts_them(self):
+        channel = LogChannel(capacity=3)
+        for i in range(5):
+            channel.push(f"line {i}")
+        records, dropped = channel.drain()
+        self.assertEqual([r.message for r in records], ["line 2", "line 3", "line 4"])
+        self.assertEqual(dropped, 2)
+        channel.push("line 5")
+        records, dropped = channel.drain()
+        self.assertEqual((len(records), dropped), (1, 0))
+
+    def test_full_history_goes_to_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "run_test.log")
+            writer = LogFileWriter(path)
+            channel = LogChannel(capacity=2, file_writer=writer)
+            for i in range(100):
+                channel.push(f"line {i}")
+            writer.close()
+            with open(path, encoding="utf-8") as f:
+                lines = f.read().splitlines()
+        self.assertEqual(len(lines), 100)
+        self.assertTrue(lines[-1].endswith("line 99"))
+
+    def test_rotation_removes_oldest_across_workflows(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            names = ["run_zeta_20240101_000000.log", "run_alpha_20240102_000000.log", "run_beta_20240103_000000.log"]
+            for age, name in enumerate(names):
+                path = os.path.join(tmp, name)
+                open(path, "w").close()
+                os.utime(path, (1000 + age, 1000 + age))
+            writer = LogFileWriter(os.path.join(tmp, "run_zeta_20240104_000000.log"), max_files=3)
+            writer.close()
+            self.assertEqual(sorted(os.listdir(tmp)), ["run_alpha_20240102_000000.log", "run_beta_20240103_000000.log",
+                                                       "run_zeta_20240104_000000.log"])
+
+
+class TestLogRollup(unittest.TestCase):
+    def test_repeats_are_counted(self):
+        rollup = LogRollup(window_s=5.0)
+        batch = []
+        for i in range(240):
+            batch.append(record(2 * i, i * 0.01, f"Scanning ({i * 0.01:.2f}s)"))
+            batch.append(record(2 * i + 1, i * 0.01, "Image NOT found."))
+        lines = rollup.feed(batch, now=2.4)
+        self.assertEqual(len(lines), 2)
+
+        lines = rollup.feed([], now=6.0)
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(all(line.endswith("(repeated 239x)") for line in lines))
+
+        lines = rollup.feed([record(999, 20.0, "Image NOT found.")], now=20.0)
+        self.assertEqual(len(lines), 1)
+        self.assertNotIn("repeated", lines[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
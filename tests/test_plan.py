@@ -0,0 +1,82 @@
+import os
+import unittest
+
+from app.core.models import Workflow, Step, Condition, Action, ConditionType, ActionType, StepType
+from app.core.plan import compile_workflow
+
+
+def make_step(step_id, condition, action=None, **kwargs):
+    return Step(id=step_id, name=step_id, condition=condition, action=action or Action(type=ActionType.NONE), **kwargs)
+
+
+class TestCompileWorkflow(unittest.TestCase):
+    def setUp(self):
+        find = make_step(
+            "find",
+            Condition(type=ConditionType.IMAGE, target_image_path="assets/a.png", watch_area=[10, 20, 30, 40]),
+            Action(type=ActionType.KEY, key_sequence="Ctrl + C")
+        )
+        again = make_step("again", Condition(type=ConditionType.IMAGE, target_image_path="assets/a.png"))
+        loop = make_step(
+            "loop", Condition(type=ConditionType.TIME), type=StepType.LOOP, children=[find, again]
+        )
+        bad_goto = make_step("goto", Condition(type=ConditionType.TIME), Action(type=ActionType.GOTO, goto_step_index=5))
+        self.workflow = Workflow(name="w", steps=[loop, bad_goto], created_at="", updated_at="")
+
+    def test_resolves_paths_regions_and_keys(self):
+        plan = compile_workflow(self.workflow, "/flows/demo", watch_area_margin_px=5)
+        find = plan.steps[0].children[0]
+        self.assertEqual(find.image_path, os.path.abspath("/flows/demo/assets/a.png"))
+        self.assertEqual(find.image_name, "a.png")
+        self.assertEqual(find.search_region, (5, 15, 40, 50))
+        self.assertEqual(find.keys, ("ctrl", "c"))
+        self.assertTrue(find.is_visual)
+        self.assertFalse(plan.steps[0].is_visual)
+        # Same template used twice is preloaded once
+        self.assertEqual(plan.template_paths, (find.image_path,))
+
+    def test_goto_targets_are_checked(self):
+        plan = compile_workflow(self.workflow)
+        self.assertEqual(plan.steps[1].goto_target, 4)
+        self.assertEqual(len(plan.warnings), 1)
+
+    def test_handlers_are_bound_per_node(self):
+        general, loop, check = object(), object(), object()
+        plan = compile_workflow(
+            self.workflow,
+            step_handlers={StepType.GENERAL: general, StepType.LOOP: loop},
+            condition_checks={ConditionType.IMAGE: check}
+        )
+        self.assertIs(plan.steps[0].run, loop)
+        self.assertIs(plan.steps[0].children[0].run, general)
+        self.assertIs(plan.steps[0].children[0].check, check)
+        self.assertIsNone(plan.steps[1].check)
+
+    def test_prefetch_stops_at_first_input(self):
+        def find(step_id, action=ActionType.NONE):
+            return make_step(step_id, Condition(type=ConditionType.IMAGE, target_image_path=f"{step_id}.png"),
+                             Action(type=action))
+
+        def if_step(step_id, *children):
+            return make_step(step_id, Condition(type=ConditionType.TIME), type=StepType.IF, children=list(children))
+
+        loop = make_step(
+            "loop", Condition(type=ConditionType.TIME), type=StepType.LOOP,
+            children=[
+                find("end", ActionType.MOVE),
+                if_step("if1", find("skill", ActionType.MOVE), make_step("click", Condition(type=ConditionType.TIME), Action(type=ActionType.CLICK))),
+                if_step("if2", find("boss")),
+            ]
+        )
+        plan = compile_workflow(Workflow(name="w", steps=[loop], created_at="", updated_at=""))
+        self.assertEqual([n.name for n in plan.steps[0].prefetch], ["end", "skill"])
+        self.assertEqual(plan.steps[0].children[1].prefetch, ()) # Only one IMAGE condition
+
+        # Find Image defaults to MOVE: a moving condition still lets its block prefetch
+        if_move = if_step("if_move", find("a", ActionType.MOVE), if_step("inner", find("b")))
+        plan = compile_workflow(Workflow(name="w", steps=[if_move], created_at="", updated_at=""))
+        self.assertEqual([n.name for n in plan.steps[0].prefetch], ["a", "b"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+
+from app.core.models import Step, Condition, Action, ConditionType, ActionType, StepType
+from app.ui.step_tree import StepTreeModel, CARD_ROLE, CONDITION_ADD, CONDITION_EDIT
+
+
+def make_step(step_id, step_type=StepType.GENERAL, children=()):
+    return Step(id=step_id, name=step_id, type=step_type, condition=Condition(type=ConditionType.TIME),
+                action=Action(type=ActionType.NONE), children=list(children))
+
+
+class TestStepTreeModel(unittest.TestCase):
+    def setUp(self):
+        self.loop = make_step("loop", StepType.IF, [make_step("a"), make_step("b")])
+        self.steps = [make_step("first"), self.loop, make_step("last")]
+        self.model = StepTreeModel()
+        self.model.set_steps(self.steps)
+        self.events = []
+        self.model.rowsInserted.connect(lambda parent, first, last: self.events.append(("insert", first)))
+        self.model.rowsRemoved.connect(lambda parent, first, last: self.events.append(("remove", first)))
+        self.model.rowsMoved.connect(lambda *args: self.events.append(("move", args[1])))
+        self.model.dataChanged.connect(lambda top, bottom, roles: self.events.append(("changed", self.model.step(top).id)))
+
+    def card(self, step):
+        return self.model.index_of(step).data(CARD_ROLE)
+
+    def test_lookups_use_the_id_index(self):
+        self.assertEqual(self.model.find("b"), (self.loop.children[1], self.loop))
+        self.assertIs(self.model.parent_step(self.steps[0]), None)
+        self.assertEqual(self.card(self.loop.children[1]).index, "2.2")
+        self.assertEqual(self.card(self.loop).condition_button, CONDITION_ADD)
+
+    def test_sync_touches_only_changed_rows(self):
+        self.model.sync(self.steps)
+        self.assertEqual(self.events, [])
+
+        self.steps.insert(0, self.steps.pop(2)) # last -> top: one move, then every card whose number changed
+        self.model.sync(self.steps)
+        self.assertEqual(self.events, [("move", 2), ("changed", "last"), ("changed", "first"), ("changed", "loop"),
+                                       ("changed", "a"), ("changed", "b")])
+
+        del self.events[:]
+        moved = self.steps.pop(1) # first -> into the IF, ahead of a (it becomes its condition slot)
+        moved.condition.type = ConditionType.IMAGE
+        self.loop.children.insert(0, moved)
+        self.model.sync(self.steps)
+        self.assertEqual([e for e in self.events if e[0] != "changed"], [("remove", 1), ("insert", 0)])
+        self.assertEqual(self.card(self.loop).condition_button, CONDITION_EDIT)
+        self.assertEqual(self.card(self.loop.children[2]).index, "2.3")
+        self.assertEqual(self.model.find("first")[1], self.loop)
+
+        del self.events[:]
+        self.loop.children[1].name = "renamed"
+        self.model.refresh_step(self.loop.children[1])
+        self.assertEqual(self.events, [("changed", "a")])
+
+
+if __name__ == '__main__':
+    unittest.main()
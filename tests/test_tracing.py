@@ -0,0 +1,79 @@
+import json
+import os
+import tempfile
+import unittest
+
+from app.core.engine import WorkflowRunner
+from app.core.models import Workflow, Step, Condition, Action, ConditionType, ActionType
+from app.core.tracing import Tracer, NullTracer, resolve_trace_path
+
+
+class TestTracer(unittest.TestCase):
+    def test_chrome_trace_nests_spans(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "run.json")
+            tracer = Tracer(path)
+            with tracer.span("Find", "step", id="1") as span:
+                with tracer.span("capture", "capture"):
+                    pass
+                span.set(outcome="ok")
+            tracer.close()
+
+            with open(path) as f:
+                events = [e for e in json.load(f) if e["ph"] == "X"]
+            self.assertEqual([e["name"] for e in events], ["capture", "Find"])
+            inner, outer = events
+            self.assertEqual(outer["args"], {"id": "1", "outcome": "ok"})
+            self.assertGreaterEqual(inner["ts"], outer["ts"])
+            self.assertLessEqual(inner["ts"] + inner["dur"], outer["ts"] + outer["dur"])
+
+    def test_jsonl_and_exception_outcome(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "run.jsonl")
+            tracer = Tracer(path)
+            with self.assertRaises(ValueError):
+                with tracer.span("Click", "step"):
+                    raise ValueError("boom")
+            tracer.close()
+
+            with open(path) as f:
+                records = [json.loads(line) for line in f]
+            self.assertEqual(len(records), 1)
+            self.assertEqual(records[0]["outcome"], "ValueError")
+
+    def test_null_tracer_and_paths(self):
+        with NullTracer().span("x", foo=1) as span:
+            span.set(outcome="ok")
+        self.assertIsNone(resolve_trace_path(None))
+        self.assertEqual(resolve_trace_path("out.jsonl"), "out.jsonl")
+        with tempfile.TemporaryDirectory() as tmp:
+            path = resolve_trace_path(tmp, "My Flow")
+            self.assertTrue(os.path.basename(path).startswith("trace_My_Flow_"))
+
+
+class TestRunTrace(unittest.TestCase):
+    def test_step_start_drift_is_traced(self):
+        steps = [
+            Step(id=str(i), name=f"Wait {i}", condition=Condition(type=ConditionType.TIME),
+                 action=Action(type=ActionType.NONE), step_interval_ms=2)
+            for i in range(5)
+        ]
+        workflow = Workflow(name="drift", steps=steps, created_at="", updated_at="")
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "run.jsonl")
+            runner = WorkflowRunner(workflow, trace_path=path)
+            runner.run()
+            with open(path) as f:
+                records = [json.loads(line) for line in f]
+
+        step_drifts = [r.get("drift_ms") for r in records if r["cat"] == "step"]
+        self.assertIsNone(step_drifts[0]) # First step has no planned start
+        self.assertTrue(all(d is not None and d >= 0 for d in step_drifts[1:]))
+        summary = [r for r in records if r["name"] == "schedule_drift"]
+        self.assertEqual(len(summary), 1)
+        self.assertEqual(summary[0]["steps"], 4)
+        self.assertEqual(runner.schedule_stats["steps"], 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,157 @@
+import os
+import tempfile
+import time
+import unittest
+
+import cv2
+import numpy as np
+
+from app.core.engine import WorkflowRunner
+from app.core.models import Workflow, Step, Condition, Action, ConditionType, ActionType, StepType, InputDelays
+from app.core.virtual import VirtualScreen, textured_background, use_virtual_screen
+
+
+def make_button(width=60, height=30):
+    button = np.full((height, width, 3), 230, np.uint8)
+    cv2.rectangle(button, (3, 3), (width - 4, height - 4), (40, 120, 240), -1)
+    cv2.putText(button, "GO", (14, 22), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+    return button
+
+
+class TestVirtualScreen(unittest.TestCase):
+    def setUp(self):
+        self.screen = VirtualScreen(scale=1.0)
+        for i, name in enumerate(("a", "b")):
+            self.screen.add_frame(name, textured_background(320, 200, seed=i))
+
+    def test_click_in_region_switches_frame(self):
+        self.screen.on_click("a", (100, 50, 40, 20), "b")
+        self.screen.click(10, 10)
+        self.assertEqual(self.screen.current, "a")
+        self.screen.click(110, 60)
+        self.assertEqual(self.screen.current, "b")
+        self.assertIs(self.screen.grab(None), self.screen.frames["b"])
+        self.assertEqual([e.frame for e in self.screen.clicks], ["a", "a"])
+
+    def test_timed_transition_follows_virtual_clock(self):
+        self.screen.after("a", 2.0, "b")
+        self.screen.clock.advance(1.5)
+        self.screen.grab((0, 0, 10, 10))
+        self.assertEqual(self.screen.current, "a")
+        self.screen.clock.advance(1.0)
+        self.screen.grab((0, 0, 10, 10))
+        self.assertEqual(self.screen.current, "b")
+        self.assertEqual(self.screen.shown_at, 2.0)
+
+
+class TestVirtualRun(unittest.TestCase):
+    def test_await_and_click_without_real_waits(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            button = make_button()
+            cv2.imwrite(os.path.join(tmp, "button.png"), button)
+
+            screen = VirtualScreen(scale=1.0)
+            screen.add_frame("loading", textured_background(640, 360, seed=1))
+            menu = textured_background(640, 360, seed=2)
+            menu[200:230, 300:360] = button
+            screen.add_frame("menu", menu)
+            screen.add_frame("done", textured_background(640, 360, seed=3))
+            screen.after("loading", 20.0, "menu")
+            screen.on_click("menu", (300, 200, 60, 30), "done")
+
+            wait_button = Step(
+                id="await",
+                name="Wait for button",
+                type=StepType.AWAIT,
+                condition=Condition(type=ConditionType.TIME, retry_timeout_s=60.0),
+                action=Action(type=ActionType.NONE),
+                children=[Step(
+                    id="find",
+                    name="Find button",
+                    condition=Condition(type=ConditionType.IMAGE, target_image_path="button.png",
+                                        watch_area=[250, 150, 160, 130]),
+                    action=Action(type=ActionType.MOVE, target_x=0, target_y=0)
+                )]
+            )
+            click = Step(
+                id="click",
+                name="Click",
+                condition=Condition(type=ConditionType.TIME, wait_time_s=5.0),
+                action=Action(type=ActionType.CLICK)
+            )
+            workflow = Workflow(name="virtual", steps=[wait_button, click], created_at="", updated_at="")
+
+            with use_virtual_screen(screen):
+                runner = WorkflowRunner(workflow, workflow_dir=tmp, clock=screen.clock)
+                start = time.monotonic()
+                runner.run()
+                elapsed = time.monotonic() - start
+
+        self.assertTrue(runner.succeeded)
+        self.assertEqual(screen.current, "done")
+        self.assertEqual(screen.clicks[-1].detail, (330, 215))
+        self.assertGreaterEqual(screen.clock.monotonic(), 25.0)
+        self.assertLess(elapsed, 10.0)
+
+    def test_input_delays_are_explicit(self):
+        screen = VirtualScreen(scale=1.0)
+        screen.add_frame("screen", textured_background(320, 200, seed=5))
+        steps = [
+            Step(id="move", name="Move", condition=Condition(type=ConditionType.TIME),
+                 action=Action(type=ActionType.MOVE, target_x=50, target_y=60), step_interval_ms=0),
+            Step(id="click", name="Click", condition=Condition(type=ConditionType.TIME),
+                 action=Action(type=ActionType.CLICK), step_interval_ms=0),
+            Step(id="key", name="Key", condition=Condition(type=ConditionType.TIME),
+                 action=Action(type=ActionType.KEY, key_sequence="ctrl+s"), step_interval_ms=0),
+        ]
+        workflow = Workflow(name="delays", steps=steps, created_at="", updated_at="",
+                            input_delays=InputDelays(move_ms=0, click_ms=300, key_ms=40))
+        with use_virtual_screen(screen):
+            runner = WorkflowRunner(workflow, clock=screen.clock)
+            runner.run()
+        self.assertTrue(runner.succeeded)
+        self.assertEqual([e.kind for e in screen.events if e.kind != "frame"], ["move", "click", "key"])
+        self.assertAlmostEqual(screen.clock.monotonic(), 0.34)
+
+    def test_switch_runs_best_scoring_case(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            go = make_button()
+            cv2.imwrite(os.path.join(tmp, "go.png"), go)
+            retry = cv2.flip(make_button(), 1)
+            cv2.imwrite(os.path.join(tmp, "retry.png"), retry)
+
+            screen = VirtualScreen(scale=1.0)
+            frame = textured_background(640, 360, seed=4)
+            damaged = retry.copy()
+            damaged[8:14, 10:30] = 0 # Still above 0.7, but a worse match than "go"
+            frame[40:70, 100:160] = damaged
+            frame[250:280, 400:460] = go
+            screen.add_frame("screen", frame)
+
+            def case(name, image):
+                return Step(id=name, name=name, type=StepType.IF, condition=Condition(type=ConditionType.TIME),
+                            action=Action(type=ActionType.NONE), children=[
+                    Step(id=f"{name}-find", name=f"Find {name}",
+                         condition=Condition(type=ConditionType.IMAGE, target_image_path=image, confidence=0.7),
+                         action=Action(type=ActionType.MOVE, target_x=0, target_y=0)),
+                    Step(id=f"{name}-click", name=f"Click {name}", condition=Condition(type=ConditionType.TIME),
+                         action=Action(type=ActionType.CLICK)),
+                ])
+
+            default = Step(id="default", name="Default", condition=Condition(type=ConditionType.TIME),
+                           action=Action(type=ActionType.KEY, key_sequence="esc"))
+            switch = Step(id="switch", name="Which screen", type=StepType.SWITCH, condition=Condition(type=ConditionType.TIME),
+                          action=Action(type=ActionType.NONE), children=[case("retry", "retry.png"), default, case("go", "go.png")])
+            workflow = Workflow(name="switch", steps=[switch], created_at="", updated_at="")
+
+            with use_virtual_screen(screen):
+                runner = WorkflowRunner(workflow, workflow_dir=tmp, clock=screen.clock)
+                runner.run()
+
+        self.assertTrue(runner.succeeded)
+        self.assertEqual([e.detail for e in screen.clicks], [(430, 265)])
+        self.assertNotIn("key", [e.kind for e in screen.events]) # Default case never ran
+
+
+if __name__ == '__main__':
+    unittest.main()
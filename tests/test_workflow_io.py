@@ -0,0 +1,86 @@
+import json
+import os
+import tempfile
+import unittest
+
+from app.constants import FLOW_FORMAT_VERSION
+from app.core.models import Workflow, Step, Condition, Action, ConditionType, ActionType, StepType, LoopMode
+from app.core.workflow_io import dump_workflow, save_workflow, load_workflow
+
+
+def sample_workflow():
+    wait = Step(id="wait", name="Wait", condition=Condition(type=ConditionType.TIME, wait_time_s=2.0, confidence=0.5),
+                action=Action(type=ActionType.NONE, input_prompt="unused"))
+    find = Step(id="find", name="Find", condition=Condition(type=ConditionType.IMAGE, target_image_path="assets/a.png",
+                                                            confidence=0.9, watch_area=[1, 2, 3, 4]),
+                action=Action(type=ActionType.MOVE, target_x=5, target_y=0))
+    loop = Step(id="loop", name="Loop", type=StepType.LOOP,
+                condition=Condition(type=ConditionType.TIME, loop_mode=LoopMode.WHILE_FOUND, loop_max_count=3),
+                action=Action(type=ActionType.NONE), children=[find])
+    return Workflow(name="io", steps=[wait, loop], created_at="c", updated_at="u")
+
+
+class TestWorkflowIO(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "flow.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_compact_format_keeps_only_used_fields(self):
+        data = json.loads(dump_workflow(sample_workflow()))
+        self.assertEqual(next(iter(data)), "format")
+        wait, loop = data["steps"]
+        self.assertEqual(wait["condition"], {"type": "TIME", "wait_time_s": 2.0})
+        self.assertEqual(wait["action"], {"type": "NONE"})
+        self.assertNotIn("children", wait)
+        self.assertEqual(loop["condition"], {"type": "TIME", "loop_mode": "WHILE_FOUND", "loop_max_count": 3})
+        self.assertEqual(loop["children"][0]["action"], {"type": "MOVE", "target_x": 5, "target_y": 0})
+
+        save_workflow(self.path, sample_workflow())
+        loaded = load_workflow(self.path)
+        self.assertEqual(loaded.steps[1].children[0].condition.watch_area, [1, 2, 3, 4])
+        self.assertEqual(loaded.steps[0].condition.confidence, 0.8) # Unused by TIME steps, not stored
+        self.assertEqual([s.id for s in loaded.steps], ["wait", "loop"]) # Ids are kept
+
+    def test_old_files_are_migrated_once(self):
+        workflow = sample_workflow()
+        workflow.steps.append(workflow.steps[0].model_copy(deep=True)) # Duplicate id
+        with open(self.path, "w") as f:
+            f.write(workflow.model_dump_json())
+        loaded = load_workflow(self.path)
+        self.assertEqual(len({s.id for s in loaded.steps}), 3)
+        with open(self.path) as f:
+            self.assertEqual(json.load(f)["format"], FLOW_FORMAT_VERSION)
+
+        legacy = {"name": "old", "steps": [
+            {"step_type": "general", "condition": {"type": "wait", "wait": {"seconds": 1.5}},
+             "action": {"type": "keypress", "keypress": {"text": "enter"}}}]}
+        with open(self.path, "w") as f:
+            json.dump(legacy, f)
+        loaded = load_workflow(self.path)
+        self.assertEqual((loaded.steps[0].condition.wait_time_s, loaded.steps[0].action.key_sequence), (1.5, "enter"))
+        self.assertTrue(os.path.exists(os.path.join(self.tmp.name, "flow.legacy.json")))
+        self.assertEqual(load_workflow(self.path, migrate=False).steps[0].action.key_sequence, "enter")
+
+    def test_versioned_files_are_never_migrated(self):
+        for text in ('{"format": 99, "name": "new", "steps": [], "created_at": "", "updated_at": ""}',
+                     '{"format":2,"name":"bad","steps":"oops"}'):
+            with open(self.path, "w") as f:
+                f.write(text)
+            self.assertIsNone(load_workflow(self.path))
+            with open(self.path) as f:
+                self.assertEqual(f.read(), text)
+        self.assertFalse(os.path.exists(os.path.join(self.tmp.name, "flow.legacy.json")))
+
+        legacy = {"name": "old", "steps": [{"condition": {"type": "wait", "wait": {"seconds": 1}}}]}
+        for _ in range(2):
+            with open(self.path, "w") as f:
+                json.dump(legacy, f)
+            load_workflow(self.path)
+        self.assertTrue(os.path.exists(os.path.join(self.tmp.name, "flow.legacy.1.json"))) # First backup kept
+
+
+if __name__ == '__main__':
+    unittest.main()